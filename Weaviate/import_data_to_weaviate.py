@@ -1,23 +1,37 @@
+"""
+Import katalogu produktů z CSV do Weaviate (viz utils/catalog_importer.py).
+
+Spuštění z kořene repozitáře:
+    python -m Weaviate.import_data_to_weaviate
+    python -m Weaviate.import_data_to_weaviate --csv Weaviate/apple_data.csv --batch-mode fixed --batch-size 200 --concurrent-requests 4
+    python -m Weaviate.import_data_to_weaviate --no-resume   # ignorovat checkpoint a importovat od začátku
+    python -m Weaviate.import_data_to_weaviate --full        # zapsat všechny řádky bez porovnání se stavem kolekce
+
+Výchozí je delta import - zapíší se jen nové a změněné produkty, chybějící se smažou
+a vektorizuje se jen změněný `content`.
+"""
 import weaviate
-import weaviate.classes as wvc
-import csv, os, time, ast
-from utils.config import WEAVIATE_URL 
+import argparse, os, sys
+from utils.config import (
+    WEAVIATE_URL, CATALOG_IMPORT_BATCH_MODE, CATALOG_IMPORT_BATCH_SIZE, CATALOG_IMPORT_CONCURRENT_REQUESTS,
+    CATALOG_IMPORT_CHUNK_ROWS, CATALOG_IMPORT_MAX_RETRIES, CATALOG_IMPORT_DELETE_MISSING,
+)
+from utils.catalog_importer import CatalogImporter, WeaviateBatchWriter, default_checkpoint_path, ensure_collection
+from utils.catalog_version import bump_catalog_version
+from utils.local_vector_index import export_weaviate_collection
 
 
 # Konfigurace
 csv_filename = "apple_data.csv"
 CSV_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), csv_filename)
 WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY", "")
-print(f"API_KEY: {WEAVIATE_API_KEY}")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 COLLECTION_NAME = "Apple_Products"
-BATCH_SIZE = 100
 
-# Připojení k Weaviate
-print("Připojování k Weaviate...")
-auth_config = weaviate.auth.AuthApiKey(api_key=WEAVIATE_API_KEY)
 
-try:
+def connect():
+    """Připojí se k Weaviate (s OpenAI klíčem pro vektorizér)."""
+    print("Připojování k Weaviate...")
     client = weaviate.connect_to_custom(
         http_host=WEAVIATE_URL,
         http_port=8080,
@@ -25,7 +39,7 @@ try:
         grpc_host=WEAVIATE_URL,
         grpc_port=50051,
         grpc_secure=False,
-        auth_credentials=auth_config,
+        auth_credentials=weaviate.auth.AuthApiKey(api_key=WEAVIATE_API_KEY),
         headers={
              "X-OpenAI-Api-Key": OPENAI_API_KEY
         }
@@ -35,190 +49,67 @@ try:
     print(f"Připojeno: {client.is_connected()}, Připraveno: {client.is_ready()}")
     if not client.is_ready():
         raise ConnectionError("Weaviate není připraveno. Zkontrolujte logy serveru.")
-
-    # Definice a vytvoření schématu (kolekce)
-    print(f"Kontrola/vytváření kolekce '{COLLECTION_NAME}'...")
-
-    if not client.collections.exists(COLLECTION_NAME):
-        client.collections.create(
-            name=COLLECTION_NAME,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(),
-            properties=[
-                wvc.config.Property(
-                    name="name",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=True,
-                    tokenization=wvc.config.Tokenization.WORD # Povolí fulltext
-                ),
-                # Content - TOTO POLE VEKTORIZUJEME
-                wvc.config.Property(
-                    name="content",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=False,
-                    tokenization=wvc.config.Tokenization.WORD # Pro případné hybridní hledání
-                ),
-                wvc.config.Property(
-                    name="url",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=True,
-                    tokenization=wvc.config.Tokenization.FIELD
-                ),
-                wvc.config.Property(
-                    name="prefix",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=True,
-                    tokenization=wvc.config.Tokenization.FIELD
-                ),
-                wvc.config.Property(
-                    name="manufacturer",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=True,
-                    tokenization=wvc.config.Tokenization.FIELD
-                ),
-                # productCode uložíme jako text (může obsahovat formát jako ['code'])
-                wvc.config.Property(
-                    name="product_code",
-                    data_type=wvc.config.DataType.TEXT,
-                    skip_vectorization=True,
-                    tokenization=wvc.config.Tokenization.FIELD
-                ),
-                wvc.config.Property(
-                    name="price",
-                    data_type=wvc.config.DataType.NUMBER,
-                    skip_vectorization=True,
-                )
-            ]
+    return client
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=CSV_FILE_PATH, help="CSV soubor s katalogem (oddělovač '|').")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--batch-mode", choices=["dynamic", "fixed"], default=CATALOG_IMPORT_BATCH_MODE)
+    parser.add_argument("--batch-size", type=int, default=CATALOG_IMPORT_BATCH_SIZE, help="Velikost dávky v režimu fixed.")
+    parser.add_argument("--concurrent-requests", type=int, default=CATALOG_IMPORT_CONCURRENT_REQUESTS)
+    parser.add_argument("--chunk-rows", type=int, default=CATALOG_IMPORT_CHUNK_ROWS)
+    parser.add_argument("--max-retries", type=int, default=CATALOG_IMPORT_MAX_RETRIES)
+    parser.add_argument("--checkpoint", help="Soubor checkpointu (výchozí v utils/cache_data/import_checkpoints).")
+    parser.add_argument("--no-resume", action="store_true", help="Nepokračovat z checkpointu.")
+    parser.add_argument("--full", action="store_true", help="Zapsat všechny řádky (bez delta porovnání a mazání).")
+    parser.add_argument("--no-delete", action="store_true", help="Nemazat objekty, které v CSV chybí.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        print(f"Chyba: CSV soubor nebyl nalezen na cestě: {args.csv}")
+        return 1
+
+    client = None
+    try:
+        client = connect()
+        print(f"Kontrola/vytváření kolekce '{args.collection}'...")
+        collection = ensure_collection(client, args.collection)
+
+        importer = CatalogImporter(
+            WeaviateBatchWriter(collection, mode=args.batch_mode, batch_size=args.batch_size, concurrent_requests=args.concurrent_requests),
+            chunk_rows=args.chunk_rows,
+            max_retries=args.max_retries,
+            checkpoint_path=args.checkpoint or default_checkpoint_path(args.csv, args.collection),
+            uuid_namespace=args.collection,
+            delete_missing=CATALOG_IMPORT_DELETE_MISSING and not args.no_delete,
         )
-        print(f"Kolekce '{COLLECTION_NAME}' vytvořena.")
-    else:
-        print(f"Kolekce '{COLLECTION_NAME}' již existuje.")
-
-    # Získání reference ke kolekci
-    apple_collection = client.collections.get(COLLECTION_NAME)
+        print(f"Zahajuji import dat z {args.csv}...")
+        report = importer.run(args.csv, resume=not args.no_resume, delta=not args.full)
+        for error in report.errors:
+            print(f"  - {error}")
+
+        if report.imported or report.deleted:
+            # Lokální vektorový index (RETRIEVAL_BACKEND="local") se staví z exportu kolekce
+            try:
+                export_weaviate_collection(collection)
+            except Exception as e:
+                print(f"Chyba při exportu lokálního vektorového indexu: {e}")
+
+            # Data v kolekci se změnila - běžící aplikace podle nové verze zahodí cache výsledků
+            bump_catalog_version()
+        return 0 if not report.failed else 2
 
-    # Čtení CSV a import dat v dávkách
-    print(f"Zahajuji import dat z {CSV_FILE_PATH}...")
-    objects_to_insert = []
-    skipped_rows = 0
-    imported_count = 0
-    start_time = time.time()
-
-    try:
-        with open(CSV_FILE_PATH, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile, delimiter='|')
-
-            # Ověření existence základních sloupců (volitelné, ale užitečné)
-            required_cols = ['uuid', 'name', 'content', 'priceFrom']
-            if not all(col in reader.fieldnames for col in required_cols):
-                print(f"Varování: CSV souboru ({csv_filename}) mohou chybět některé očekávané sloupce.")
-                print(f"Očekávané (alespoň): {required_cols}")
-                print(f"Nalezené: {reader.fieldnames}")
-
-            row_num = 1
-            for row in reader:
-                row_num += 1
-                try:
-                    if not row.get('uuid') or not row.get('content'):
-                        print(f"Varování: Přeskakuji řádek {row_num} - chybí 'uuid' nebo 'content'.")
-                        skipped_rows += 1
-                        continue
-
-                    # Sestavení objektu pro Weaviate (klíče = názvy properties ve schématu)
-                    properties = {
-                        "uuid": row['uuid'],
-                        "name": row.get('name'),
-                        "content": row['content'], # Tento text bude vektorizován
-                        "url": row.get('url'),
-                        "prefix": row.get('prefix'),
-                        "manufacturer": row.get('manufacturer'),
-                    }
-
-                    # Zpracování productCode
-                    product_code_str = row.get('productCode')
-                    cleaned_product_code = None # Výchozí hodnota, pokud se nepodaří extrahovat
-                    if product_code_str:
-                        try:
-                            # Pokusíme se vyhodnotit string jako Python list
-                            evaluated_list = ast.literal_eval(product_code_str)
-                            # Pokud je to list a má alespoň jeden prvek...
-                            if isinstance(evaluated_list, list) and len(evaluated_list) > 0:
-                                # ...vezmeme první prvek
-                                cleaned_product_code = evaluated_list[0]
-                                # Volitelně: Ověřit, že je to string, pro jistotu
-                                if not isinstance(cleaned_product_code, str):
-                                    cleaned_product_code = str(cleaned_product_code)
-                            elif isinstance(evaluated_list, str):
-                                # Pokud to náhodou byl už jen string (bez listu), použijeme ho
-                                cleaned_product_code = evaluated_list
-                            else:
-                                print(f"Varování: 'productCode' ('{product_code_str}') na řádku {row_num} není očekávaný list nebo string. Používám None.")
-                        except (ValueError, SyntaxError):
-                            # Pokud se string nepodařilo vyhodnotit (není to platný Python literál)
-                            # Může to být už čistý kód, nebo něco jiného. Zkusíme základní očištění.
-                            print(f"Varování: 'productCode' ('{product_code_str}') na řádku {row_num} nemá formát seznamu. Používám hodnotu po očištění.")
-                            cleaned_product_code = product_code_str.strip("[]'\" ") # Odstraní běžné znaky okolo
-                        except Exception as e:
-                            # Jiná neočekávaná chyba
-                            print(f"Chyba při zpracování 'productCode' ('{product_code_str}') na řádku {row_num}: {e}. Používám None.")
-
-                    properties["product_code"] = cleaned_product_code # Uložíme očištěný kód (nebo None)
-
-                    # Převod číselných hodnot s ošetřením chyb
-                    try:
-                        properties["price"] = float(row['priceFrom']) if row.get('priceFrom') else None
-                    except (ValueError, TypeError):
-                        print(f"Varování: Neplatná hodnota 'priceFrom' ('{row.get('priceFrom')}') na řádku {row_num} (UUID: {row['uuid']}). Nastavuji None.")
-                        properties["price"] = None
-
-                    objects_to_insert.append(wvc.data.DataObject(properties=properties))
-
-                    # Pokud dosáhneme velikosti dávky, vložíme data
-                    if len(objects_to_insert) >= BATCH_SIZE:
-                        current_batch_size = len(objects_to_insert)
-                        imported_count += current_batch_size
-                        print(f"Vkládám dávku {current_batch_size} objektů (celkem {imported_count})...")
-                        result = apple_collection.data.insert_many(objects_to_insert)
-
-                        if result.has_errors:
-                            print(f"Chyby při vkládání dávky:")
-
-                            for i, err_obj in result.errors.items():
-                                print(f"  - Objekt index {i}: {err_obj.message}")
-                                print(f"    Data: {objects_to_insert[i].properties}")
-
-                        objects_to_insert = []
-
-                except Exception as e:
-                    print(f"Neočekávaná chyba při zpracování řádku {row_num} (UUID: {row.get('uuid', 'N/A')}): {e}. Přeskakuji.")
-                    skipped_rows += 1
-                    print(f"Data řádku: {row}")
-
-            if objects_to_insert:
-                final_batch_size = len(objects_to_insert)
-                imported_count += final_batch_size
-                print(f"Vkládám poslední dávku {final_batch_size} objektů (celkem {imported_count})...")
-                result = apple_collection.data.insert_many(objects_to_insert)
-                if result.has_errors:
-                    print(f"Chyby při vkládání poslední dávky:")
-                    for i, err_obj in result.errors.items():
-                        print(f"  - Objekt index {i}: {err_obj.message}")
-
-        end_time = time.time()
-        print(f"\nImport dokončen.")
-        print(f"Celkem úspěšně zpracováno pro import: {imported_count}")
-        print(f"Přeskočeno řádků kvůli chybám/neúplnosti: {skipped_rows}")
-        print(f"Celkový čas: {end_time - start_time:.2f} sekund.")
-
-    except FileNotFoundError:
-        print(f"Chyba: CSV soubor nebyl nalezen na cestě: {CSV_FILE_PATH}")
     except Exception as e:
-        print(f"Chyba při čtení nebo zpracování CSV: {e}")
+        print(f"Chyba při importu do Weaviate: {e}")
+        return 1
 
+    finally:
+        if client is not None and client.is_connected():
+            client.close()
+            print("Spojení s Weaviate uzavřeno.")
 
-except Exception as e:
-    print(f"Chyba při připojování nebo operaci s Weaviate: {e}")
 
-finally:
-    if 'client' in locals() and client.is_connected():
-        client.close()
-        print("Spojení s Weaviate uzavřeno.")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Aktualizace cen a skladu produktů ve Weaviate bez nové vektorizace (viz utils/price_updater.py).
+
+Spuštění z kořene repozitáře:
+    python -m Weaviate.update_prices prices.csv
+    python -m Weaviate.update_prices prices.csv --delimiter ";" --chunk-size 200 --concurrency 4
+
+Feed je CSV se sloupci `product_code`, `price` a volitelně `stock`.
+"""
+import argparse, os, sys
+from utils.config import PRICE_UPDATE_CHUNK_SIZE, PRICE_UPDATE_CONCURRENCY, CATALOG_IMPORT_MAX_RETRIES
+from utils.catalog_importer import WeaviateBatchWriter
+from utils.price_updater import PriceUpdater, PriceUpdateReport, ensure_stock_property, read_price_feed
+from Weaviate.import_data_to_weaviate import COLLECTION_NAME, connect
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feed", help="CSV soubor s cenami (product_code, price[, stock]).")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--chunk-size", type=int, default=PRICE_UPDATE_CHUNK_SIZE, help="Kódů produktů na jeden dotaz/zápis.")
+    parser.add_argument("--concurrency", type=int, default=PRICE_UPDATE_CONCURRENCY, help="Souběžných aktualizací objektů.")
+    parser.add_argument("--max-retries", type=int, default=CATALOG_IMPORT_MAX_RETRIES)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.feed):
+        print(f"Chyba: feed cen nebyl nalezen na cestě: {args.feed}")
+        return 1
+
+    report = PriceUpdateReport()
+    updates = read_price_feed(args.feed, delimiter=args.delimiter, report=report)
+    if not updates:
+        print("Feed neobsahuje žádné platné řádky.")
+        for error in report.errors:
+            print(f"  - {error}")
+        return 1
+
+    client = None
+    try:
+        client = connect()
+        collection = client.collections.get(args.collection)
+        if any(update.stock is not None for update in updates):
+            ensure_stock_property(collection)
+
+        updater = PriceUpdater(
+            WeaviateBatchWriter(collection, update_concurrency=args.concurrency),
+            chunk_size=args.chunk_size,
+            max_retries=args.max_retries,
+        )
+        report = updater.run(updates, report)
+        for error in report.errors:
+            print(f"  - {error}")
+        return 0 if not report.failed else 2
+
+    except Exception as e:
+        print(f"Chyba při aktualizaci cen ve Weaviate: {e}")
+        return 1
+
+    finally:
+        if client is not None and client.is_connected():
+            client.close()
+            print("Spojení s Weaviate uzavřeno.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,16 @@
+import uuid
 import streamlit as st
-from promptflow.client import PFClient
+from utils.config import STREAM_ANSWER
+from utils.flow_executor import get_flow_executor
+from utils.embedding_cache import get_embedding_cache
+from utils.search_cache import get_search_result_cache
+from utils.answer_cache import get_answer_cache
+from utils.product_code_index import get_product_code_index
+from utils.query_planner import get_query_planner
+from utils.models import PricingCacheManager
+from utils.usage_ledger import get_usage_ledger
 from components.ProductCarousel import product_carousel
+from components.TraceWaterfall import trace_waterfall
 
 # Inicializace Streamlit
 st.set_page_config(
@@ -9,6 +19,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Načtení kurzu a ceníků na pozadí hned při startu - výpočet ceny první zprávy pak nečeká
+PricingCacheManager().get_current_pricing_data()
+
 # Inicializace chat historie v session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -37,6 +50,14 @@ if "cost" not in st.session_state:
 if "search_queries" not in st.session_state:
     st.session_state.search_queries = None
 
+if "flow_stats" not in st.session_state:
+    st.session_state.flow_stats = None
+if "prompt_budget" not in st.session_state:
+    st.session_state.prompt_budget = None
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # Přednastavené hodnoty
 CUSTOMER_IDS = ["CUS765894089", "CUS905621345", "CUS168925307", "CUS788902345", "CUS630952341", "anonymous"]
 
@@ -118,6 +139,7 @@ with st.sidebar:
             "page_title": PAGE_TITLES[selected_title_index],
             "current_url": context_current_url,
             "language": st.session_state.language,
+            "session_id": st.session_state.session_id,
         }
         
         # Customer editor
@@ -163,7 +185,8 @@ if customer_message := st.chat_input("Napište svoji zprávu..."):
         st.markdown(customer_message)
 
     try:
-        pf = PFClient()
+        # Sdílený executor - flow.dag.yaml a moduly uzlů se načítají jen jednou za proces
+        executor = get_flow_executor()
         
         # Příprava dat pro flow
         flow_inputs = {
@@ -174,27 +197,42 @@ if customer_message := st.chat_input("Napište svoji zprávu..."):
             "llm_provider": st.session_state.llm_provider
         }
         
-        # Spuštění flow
-        flow_result = pf.test(flow="flow", inputs=flow_inputs)
-        
-        # Získání outputů z flow
-        assistant_response = flow_result["response"]["answer"]
-        recommended_products = flow_result["response"]["recommended_products"]
+        # Spuštění flow - ve streamovacím režimu se odpověď vypisuje po tokenech už během generování
+        with st.chat_message("assistant"):
+            if STREAM_ANSWER:
+                stream_result = {}
+
+                def answer_stream():
+                    for event in executor.stream(flow_inputs):
+                        if event.type == "answer_delta":
+                            yield event.data
+                        elif event.type == "result":
+                            stream_result["outputs"], stream_result["stats"] = event.data
+
+                st.write_stream(answer_stream())
+                flow_result, flow_stats = stream_result["outputs"], stream_result["stats"]
+            else:
+                flow_result, flow_stats = executor.run_with_stats(flow_inputs)
+                st.markdown(flow_result["response"]["answer"])
+
+            # Získání outputů z flow
+            assistant_response = flow_result["response"]["answer"]
+            recommended_products = flow_result["response"]["recommended_products"]
+
+            # Zobrazení doporučených produktů, pokud nějaké jsou
+            if recommended_products:
+                product_carousel(recommended_products)
 
         st.session_state.chat_history = flow_result.get("chat_history")
         st.session_state.context = flow_result.get("context")
         st.session_state.customer = flow_result.get("customer")
         st.session_state.cost = flow_result.get("cost")
         st.session_state.search_queries = flow_result.get("search_queries")
+        st.session_state.prompt_budget = flow_result.get("prompt_budget")
+        st.session_state.flow_stats = flow_stats
         
         # Přidání odpovědi asistenta do historie
         st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-        with st.chat_message("assistant"):
-            st.markdown(assistant_response)
-            
-            # Zobrazení doporučených produktů, pokud nějaké jsou
-            if recommended_products:
-                product_carousel(recommended_products)
 
     except Exception as e:
         st.error(f"Došlo k chybě při zpracování požadavku: {str(e)}")
@@ -206,6 +244,22 @@ with st.sidebar:
             st.caption(f"Cena za poslední zprávu: {st.session_state.cost} CZK")
         else:
             st.caption("Cena za poslední zprávu: N/A")
+
+        if st.session_state.flow_stats is not None:
+            flow_stats = st.session_state.flow_stats
+            st.caption(
+                f"Doba flow: {flow_stats.wall_time:.2f} s (kritická cesta {flow_stats.critical_path_latency:.2f} s, "
+                f"sekvenčně {flow_stats.sequential_latency:.2f} s)"
+            )
+            if flow_stats.time_to_first_token is not None:
+                st.caption(f"Čas do prvního tokenu odpovědi: {flow_stats.time_to_first_token:.2f} s")
+            with st.expander("Časování uzlů (poslední volání)"):
+                st.write("Kritická cesta:", " → ".join(flow_stats.critical_path))
+                st.json({name: round(duration, 3) for name, duration in flow_stats.node_durations.items()})
+            if flow_stats.spans:
+                with st.expander("Waterfall posledního volání"):
+                    st.altair_chart(trace_waterfall(flow_stats.spans), use_container_width=True)
+                    st.caption(f"Trace ID: {flow_stats.trace_id}")
             
         if st.session_state.search_queries is not None and st.session_state.search_queries:
             with st.expander("Použité vyhledávací dotazy (poslední volání)"):
@@ -213,6 +267,30 @@ with st.sidebar:
         else:
             with st.expander("Použité vyhledávací dotazy (poslední volání)"):
                 st.write("Žádné vyhledávací dotazy.")
+
+        if st.session_state.prompt_budget:
+            prompt_budget = st.session_state.prompt_budget
+            st.caption(
+                f"Dokumenty v promptu: {prompt_budget['included_documents']} "
+                f"(vynecháno {prompt_budget['dropped_documents']}, ~{prompt_budget['dropped_tokens']} tokenů; "
+                f"rozpočet {prompt_budget['budget']} tokenů)"
+            )
+
+        with st.expander("Statistiky cache"):
+            st.write("Embeddingy dotazů:", get_embedding_cache().stats())
+            st.write("Výsledky vyhledávání:", get_search_result_cache().stats())
+            st.write("Odpovědi (sémantická cache):", get_answer_cache().stats())
+            st.write("Index kódů produktů:", get_product_code_index().stats())
+            planner_stats = get_query_planner().stats
+            st.write("Plánovač dotazů (LLM přeskočen):", f"{planner_stats.planned}/{planner_stats.planned + planner_stats.llm} ({planner_stats.bypass_rate:.0%})")
+
+        with st.expander("Náklady a spotřeba (ledger)"):
+            usage_ledger = get_usage_ledger()
+            st.write("p95 ceny za zprávu (CZK):", usage_ledger.cost_per_turn_percentile(95))
+            st.write("Náklady podle providera a dne:")
+            st.dataframe(usage_ledger.cost_per_provider_per_day())
+            st.write("Tokeny podle uzlu:")
+            st.dataframe(usage_ledger.tokens_per_node())
         st.markdown("---")
         
         st.write("Context:", st.session_state.context)
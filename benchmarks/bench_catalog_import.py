@@ -0,0 +1,96 @@
+"""
+Měření propustnosti importu katalogu (utils/catalog_importer.py) bez Weaviate.
+
+Vygeneruje syntetické CSV s `--rows` řádky a změří:
+  - parsování řádků na properties (hashe, kód produktu, cena) v hlavním vlákně,
+  - cenu přenosu úseků mezi procesy (pickle úseku tam a výsledku zpět) - tolik by
+    hlavní proces platil navíc za každý úsek poslaný do poolu procesů,
+  - celý CatalogImporter.run se zápisem, který na každý úsek čeká `--write-latency` ms
+    (náhrada síťového batch zápisu do Weaviate).
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_catalog_import --rows 20000 --repeat 3
+    python -m benchmarks.bench_catalog_import --write-latency 0
+"""
+import argparse, csv, os, pickle, statistics, tempfile, time
+
+from utils.catalog_importer import CSV_DELIMITER, CatalogImporter, parse_chunk
+from utils.config import CATALOG_IMPORT_CHUNK_ROWS
+
+
+COLUMNS = ["uuid", "name", "content", "url", "prefix", "manufacturer", "productCode", "priceFrom"]
+
+
+def write_catalog(path: str, rows: int) -> None:
+    """Zapíše CSV s řádky podobnými exportu e-shopu (popis produktu cca 1,5 kB)."""
+    description = "Displej Super Retina XDR, čip A17 Pro, titanové tělo, 48Mpx fotoaparát. " * 20
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, delimiter=CSV_DELIMITER)
+        writer.writeheader()
+        for index in range(rows):
+            writer.writerow({
+                "uuid": f"product-{index}",
+                "name": f"Apple iPhone 15 Pro Max {index}",
+                "content": f"Apple iPhone 15 Pro Max {index}\n{description}",
+                "url": f"https://eshop.cz/mobily/iphone-{index}",
+                "prefix": "Mobilní telefon",
+                "manufacturer": "Apple",
+                "productCode": f"['RI{index:06d}']",
+                "priceFrom": str(20000 + index % 5000),
+            })
+
+
+class SleepingWriter:
+    """Writer, který simuluje síťovou latenci batch zápisu a nic neukládá."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def write(self, objects):
+        time.sleep(self.latency)
+        return []
+
+
+def measure(label: str, run_once, repeat: int, rows: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_once()
+        durations.append(time.perf_counter() - started)
+
+    result = {"label": label, "mean_s": statistics.mean(durations), "min_s": min(durations)}
+    print(f"{label:<45} mean={result['mean_s'] * 1000:9.1f} ms  min={result['min_s'] * 1000:9.1f} ms  ({rows / result['min_s']:,.0f} řádků/s)")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-rows", type=int, default=CATALOG_IMPORT_CHUNK_ROWS)
+    parser.add_argument("--write-latency", type=float, default=50.0, help="Simulovaná doba zápisu jednoho úseku (ms).")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "catalog.csv")
+        write_catalog(path, args.rows)
+        chunks = list(CatalogImporter(None, chunk_rows=args.chunk_rows).iter_chunks(path))
+        parsed = [parse_chunk(chunk) for chunk in chunks]
+        writes = len(chunks)
+        print(f"{args.rows} řádků v {writes} úsecích po {args.chunk_rows}, CPU: {os.cpu_count()}\n")
+
+        measure("parsování (hlavní vlákno)", lambda: [parse_chunk(chunk) for chunk in chunks], args.repeat, args.rows)
+        measure(
+            "přenos mezi procesy (pickle tam i zpět)",
+            lambda: [(pickle.loads(pickle.dumps(chunk)), pickle.loads(pickle.dumps(result))) for chunk, result in zip(chunks, parsed)],
+            args.repeat, args.rows,
+        )
+
+        latency = args.write_latency / 1000
+        print(f"\nzápis úseku {args.write_latency:.0f} ms => samotné zápisy {writes * latency * 1000:.0f} ms")
+        importer = CatalogImporter(SleepingWriter(latency), chunk_rows=args.chunk_rows, progress_interval=float("inf"))
+        measure("CatalogImporter.run (bez delta)", lambda: importer.run(path, resume=False, delta=False), args.repeat, args.rows)
+
+
+if __name__ == "__main__":
+    main()
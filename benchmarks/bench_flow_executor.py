@@ -0,0 +1,73 @@
+"""
+Porovnání režie jedné zprávy: `PFClient().test()` vs. sdílený FlowExecutor.
+
+LLM modely i Weaviate jsou nahrazeny deterministickými náhradami z benchmarks/fakes.py,
+takže naměřený čas je čistě režie spuštění flow (parsování DAGu, import uzlů, příprava běhu).
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_flow_executor --iterations 20
+"""
+import argparse, os, statistics, time
+
+from benchmarks.fakes import fake_backends
+
+
+FLOW_INPUTS = {
+    "customer_input": "Kolik stojí iPhone 15 Pro Max?",
+    "chat_history": [],
+    "context": {
+        "page_title": "Mobilní telefon iPhone 15 Pro Max",
+        "current_url": "https://eshop.cz/mobily/iphone-15-pro-max",
+        "language": "CS",
+    },
+    # prázdný zákazník, aby se do měření nepromítl simulovaný API call v get_customer_info
+    "customer": {},
+    "llm_provider": "OPENAI",
+}
+
+
+def measure(label: str, run_once, iterations: int) -> dict:
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_once()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    durations.sort()
+    result = {
+        "label": label,
+        "iterations": iterations,
+        "mean_ms": statistics.mean(durations),
+        "p50_ms": durations[len(durations) // 2],
+        "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+    }
+    print(f"{label:<20} mean={result['mean_ms']:9.2f} ms  p50={result['p50_ms']:9.2f} ms  p95={result['p95_ms']:9.2f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10, help="Počet zpráv pro každou variantu.")
+    parser.add_argument("--skip-pf", action="store_true", help="Neměřit variantu s PFClient().test().")
+    args = parser.parse_args()
+
+    flow_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flow")
+    with fake_backends():
+        from utils.flow_executor import FlowExecutor
+
+        # první (studený) běh executoru měříme zvlášť - obsahuje načtení DAGu a import uzlů
+        cold_start = time.perf_counter()
+        executor = FlowExecutor(flow_dir)
+        executor.run(FLOW_INPUTS)
+        print(f"{'executor (cold)':<20} {(time.perf_counter() - cold_start) * 1000:9.2f} ms")
+
+        measure("executor.run", lambda: executor.run(FLOW_INPUTS), args.iterations)
+
+        if not args.skip_pf:
+            from promptflow.client import PFClient
+
+            measure("PFClient().test", lambda: PFClient().test(flow=flow_dir, inputs=FLOW_INPUTS), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Měření doby importu (studeného startu) aplikace a jednotlivých uzlů flow.
+
+Každý modul se importuje v novém python procesu, takže měření zahrnuje i import
+všech závislostí (langchain, provider balíčky, weaviate, ...). Volitelně se měří
+i vytvoření prvního LLM klienta přes `Models.get_model` (líné vytváření klientů).
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_import_time --repeat 3
+    python -m benchmarks.bench_import_time --top 15   # nejpomalejší importy podle -X importtime
+"""
+import argparse, os, statistics, subprocess, sys
+import yaml
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE_SNIPPET = '''
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+FIRST_MODEL_SNIPPET = '''
+import time
+from utils.models import Models
+start = time.perf_counter()
+Models.get_model("{provider}", "{model_type}")
+print(time.perf_counter() - start)
+'''
+
+
+def flow_node_modules() -> list:
+    """Vrátí názvy modulů všech uzlů z flow/flow.dag.yaml."""
+    with open(os.path.join(REPO_DIR, "flow", "flow.dag.yaml"), "r", encoding="utf-8") as f:
+        definition = yaml.safe_load(f)
+    return [f"flow.{os.path.splitext(node['source']['path'])[0]}" for node in definition.get("nodes", [])]
+
+
+def run_snippet(code: str) -> float:
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "neznámá chyba")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure(label: str, code: str, repeat: int) -> dict:
+    try:
+        durations = [run_snippet(code) * 1000 for _ in range(repeat)]
+    except RuntimeError as e:
+        print(f"{label:<40} CHYBA: {e}")
+        return {"label": label, "error": str(e)}
+
+    result = {"label": label, "mean_ms": statistics.mean(durations), "min_ms": min(durations)}
+    print(f"{label:<40} mean={result['mean_ms']:9.1f} ms  min={result['min_ms']:9.1f} ms")
+    return result
+
+
+def print_top_imports(module: str, top: int) -> None:
+    """Vypíše nejpomalejší importy (kumulativně) podle `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_DIR, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        if cumulative.isdigit():
+            rows.append((int(cumulative), name))
+
+    print(f"\nNejpomalejší importy pro {module}:")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Počet opakování pro každý modul.")
+    parser.add_argument("--provider", default="OPENAI", help="Provider pro měření vytvoření prvního klienta.")
+    parser.add_argument("--top", type=int, default=0, help="Vypsat N nejpomalejších importů pro utils.models a app.")
+    args = parser.parse_args()
+
+    for module in ["utils.models", *flow_node_modules(), "app"]:
+        measure(f"import {module}", MEASURE_SNIPPET.format(module=module), args.repeat)
+
+    for model_type in ["mini", "hot"]:
+        measure(f"první Models.get_model({args.provider}, {model_type})", FIRST_MODEL_SNIPPET.format(provider=args.provider, model_type=model_type), args.repeat)
+
+    if args.top:
+        for module in ["utils.models", "app"]:
+            print_top_imports(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Mikrobenchmarky jednotlivých uzlů flow a pomocných funkcí v izolaci.
+
+LLM modely i Weaviate jsou nahrazeny deterministickými náhradami z benchmarks/fakes.py,
+takže měření zachycuje jen režii našeho kódu (skládání promptů, post-processing dotazů,
+deduplikace dokumentů, model_dump, výpočet ceny, HTML karusel produktů, ...).
+
+Výsledky se ukládají jako JSON; s `--baseline` se porovnají s předchozím během a
+zpomalení nad `--threshold` se označí jako regrese (návratový kód 1).
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.bench_nodes --output benchmarks/results/base.json
+    python -m benchmarks.bench_nodes --baseline benchmarks/results/base.json --threshold 0.2
+    python -m benchmarks.bench_nodes --only get_answer pricing
+"""
+import argparse, copy, json, os, platform, statistics, subprocess, sys, time
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+from benchmarks.fakes import FAKE_STRUCTURED_PAYLOAD, FakeWeaviateService, fake_backends
+from utils.weaviate_service import Document, SearchQuery
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+CONTEXT = {
+    "page_title": "Mobilní telefon iPhone 15 Pro Max",
+    "current_url": "https://eshop.cz/mobily/iphone-15-pro-max",
+    "language": "CS",
+}
+CUSTOMER = {"customer_id": "CUS765894089", "name": "Jan Novák", "vokative": "Jane", "email": "jan@example.com", "favorite_brands": ["Apple"]}
+
+# 8 dotazů × 5 výsledků s překryvy - realistický vstup pro deduplikaci a prompt
+SEARCH_QUERIES = [SearchQuery(query=f"iPhone 15 Pro Max varianta {index}", max_price=40000 if index % 2 else None) for index in range(8)]
+BENCH_DOCUMENTS = [
+    Document(
+        name=f"iPhone 15 Pro Max {index}",
+        content=(f"iPhone 15 Pro Max {index} s čipem A17 Pro.\n" + "\n".join(
+            f"Parametr {line}: hodnota {line * index} s podrobným popisem specifikace." for line in range(30)
+        )),
+        url=f"https://eshop.cz/mobily/iphone-15-pro-max-{index}",
+        product_code=f"RI0{index:02d}b1",
+        price=30000.0 + index * 500,
+        distance=0.1 + index / 100,
+    )
+    for index in range(20)
+]
+CHAT_HISTORY = [
+    {
+        "customer_input": f"Dotaz {index} na iPhone",
+        "assistant_answer": {"answer": f"Odpověď {index} " * 20, "recommended_products": FAKE_STRUCTURED_PAYLOAD["recommended_products"]},
+    }
+    for index in range(6)
+]
+
+
+class OverlappingWeaviateService(FakeWeaviateService):
+    """Každý dotaz vrátí jiné, částečně se překrývající okno dokumentů."""
+
+    def search_products(self, search_params: SearchQuery, limit: int = 5) -> List[Document]:
+        offset = int(search_params.query.rsplit(" ", 1)[-1]) * 2
+        return [doc.model_copy() for doc in self.documents[offset:offset + limit]]
+
+
+def measure(name: str, run_once: Callable[[], object], min_iterations: int, max_seconds: float) -> dict:
+    """Spouští `run_once`, dokud neproběhne `min_iterations` běhů nebo nevyprší `max_seconds` (aspoň 3 běhy)."""
+    run_once()  # zahřátí (importy, líné inicializace)
+    durations = []
+    deadline = time.perf_counter() + max_seconds
+    while len(durations) < 3 or (len(durations) < min_iterations and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        run_once()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    durations.sort()
+    result = {
+        "iterations": len(durations),
+        "mean_ms": statistics.mean(durations),
+        "p50_ms": durations[len(durations) // 2],
+        "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "min_ms": durations[0],
+    }
+    # print je během měření potlačený (výpisy uzlů), výsledek píšeme přímo na stdout
+    sys.stdout.write(f"{name:<40} n={result['iterations']:<5} p50={result['p50_ms']:9.3f} ms  p95={result['p95_ms']:9.3f} ms\n")
+    return result
+
+
+def bench_generate_search_queries() -> Callable[[], object]:
+    from flow.generate_search_queries import generate_search_queries
+
+    return lambda: generate_search_queries("Hledám iPhone 15 Pro Max RI045b1 do 40 000 Kč", copy.deepcopy(CHAT_HISTORY), CONTEXT, "OPENAI")
+
+
+def bench_generate_search_queries_planner() -> Callable[[], object]:
+    from flow.generate_search_queries import generate_search_queries
+
+    return lambda: generate_search_queries("iPhone 15 Pro Max do 40 000", [], CONTEXT, "OPENAI")
+
+
+def bench_get_documents_from_vector_db() -> Callable[[], object]:
+    from flow.get_documents_from_vector_db import get_documents_from_vector_db
+
+    return lambda: get_documents_from_vector_db(SEARCH_QUERIES)
+
+
+def bench_extract_passages() -> Callable[[], object]:
+    from flow.extract_passages import extract_passages
+
+    return lambda: extract_passages(BENCH_DOCUMENTS, "Jaký displej má iPhone 15 Pro Max?", SEARCH_QUERIES)
+
+
+def bench_get_answer() -> Callable[[], object]:
+    from flow.get_answer import get_answer
+    from utils.models import TokenManager
+
+    def run_once():
+        token_manager = TokenManager()
+        token_manager.add_token("gpt-4o-mini", 800, 150)
+        return get_answer(
+            "Kolik stojí iPhone 15 Pro Max?", BENCH_DOCUMENTS, CONTEXT, CUSTOMER, copy.deepcopy(CHAT_HISTORY),
+            "OPENAI", SEARCH_QUERIES, token_manager,
+        )
+
+    return run_once
+
+
+def bench_pricing() -> Callable[[], object]:
+    from utils.models import PricingManager, TokenCounter
+
+    manager = PricingManager()
+    tokens = [TokenCounter(model, 1000 * index, 200 * index) for index, model in enumerate(["gpt-4o-mini", "gpt-4o"] * 5, start=1)]
+    return lambda: manager.calculate_cost(tokens)
+
+
+def bench_product_carousel() -> Callable[[], object]:
+    import components.ProductCarousel as carousel
+
+    products = [dict(FAKE_STRUCTURED_PAYLOAD["recommended_products"][0], name=f"Produkt {index}") for index in range(4)]
+    return lambda: carousel.product_carousel(products)
+
+
+def bench_get_customer_info() -> Callable[[], object]:
+    from flow.get_customer_info import get_customer_info
+
+    return lambda: get_customer_info({"customer_id": CUSTOMER["customer_id"]})
+
+
+def bench_get_customer_info_anonymous() -> Callable[[], object]:
+    from flow.get_customer_info import get_customer_info
+
+    return lambda: get_customer_info({})
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {
+    "generate_search_queries": bench_generate_search_queries,
+    "generate_search_queries.planner": bench_generate_search_queries_planner,
+    "get_documents_from_vector_db": bench_get_documents_from_vector_db,
+    "extract_passages": bench_extract_passages,
+    "get_answer": bench_get_answer,
+    "pricing.calculate_cost": bench_pricing,
+    "product_carousel": bench_product_carousel,
+    "get_customer_info": bench_get_customer_info,
+    "get_customer_info.anonymous": bench_get_customer_info_anonymous,
+}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(names: List[str], min_iterations: int, max_seconds: float) -> dict:
+    """Spustí vybrané benchmarky s náhradami LLM, Weaviate a Streamlitu."""
+    results = {}
+    with ExitStack() as stack:
+        stack.enter_context(fake_backends(OverlappingWeaviateService(documents=BENCH_DOCUMENTS)))
+        # product_carousel volá st.markdown - měříme jen sestavení HTML
+        stack.enter_context(patch("components.ProductCarousel.st", MagicMock()))
+        # bez zápisu do ledgeru a bez shrnutí historie na pozadí (měří se jen uzel)
+        stack.enter_context(patch("flow.get_answer.USAGE_LEDGER_ENABLED", False))
+        stack.enter_context(patch("utils.chat_history.CHAT_HISTORY_SUMMARY_ENABLED", False))
+        # výpočet ceny nad daty v paměti, bez obnovy kurzu na pozadí
+        stack.enter_context(patch("utils.models.PricingCacheManager._memory", {
+            "date": datetime.today().strftime("%Y%m%d"), "USD/CZK": 23.0, "api_costs": {},
+        }))
+        # uzly vypisují výstupy přes print - do měření ani do konzole je nepouštíme
+        stack.enter_context(patch("builtins.print"))
+
+        for name in names:
+            results[name] = measure(name, BENCHMARKS[name](), min_iterations, max_seconds)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[dict]:
+    """
+    Porovná p50 s baseline během.
+
+    Returns:
+        Seznam regresí - benchmarky, jejichž p50 vzrostl o více než `threshold` (poměr, 0.2 = 20 %).
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"]
+        result["baseline_p50_ms"] = previous["p50_ms"]
+        result["change"] = ratio - 1
+        if ratio - 1 > threshold:
+            regressions.append({"name": name, "baseline_p50_ms": previous["p50_ms"], "p50_ms": result["p50_ms"], "change": ratio - 1})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Spustit jen vybrané benchmarky.")
+    parser.add_argument("--iterations", type=int, default=200, help="Počet běhů každého benchmarku (nejvýše).")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="Časový limit jednoho benchmarku (s).")
+    parser.add_argument("--output", help="Cesta k JSON souboru s výsledky (výchozí benchmarks/results/nodes-<čas>.json).")
+    parser.add_argument("--baseline", help="JSON předchozího běhu pro porovnání.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Povolené zpomalení p50 proti baseline (0.2 = 20 %%).")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results = run_benchmarks(names, args.iterations, args.max_seconds)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        report["baseline"] = {"path": args.baseline, "commit": baseline.get("commit"), "threshold": args.threshold}
+        report["regressions"] = regressions
+
+    output = args.output or os.path.join(RESULTS_DIR, f"nodes-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Výsledky uloženy do {output}")
+
+    for regression in regressions:
+        print(
+            f"REGRESE {regression['name']}: p50 {regression['baseline_p50_ms']:.3f} ms -> "
+            f"{regression['p50_ms']:.3f} ms ({regression['change']:+.0%})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Deterministické náhrady LLM modelů a Weaviate pro benchmarky.
+
+Náhrady nevolají žádné síťové služby, takže benchmarky měří pouze režii
+našeho kódu (flow, zpracování dotazů, skládání promptů) a ne latenci providerů.
+"""
+import json
+from contextlib import contextmanager, ExitStack
+from typing import Iterator, List
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from utils.weaviate_service import Document, SearchQuery
+
+
+FAKE_STRUCTURED_PAYLOAD = {
+    "search_queries": [
+        {"query": "iPhone 15 Pro Max"},
+        {"query": "iPhone 15 Pro Max cena", "max_price": 40000},
+    ],
+    "answer": "iPhone 15 Pro Max nabízí titanové tělo a čip A17 Pro.",
+    "recommended_products": [
+        {
+            "name": "iPhone 15 Pro Max 256GB",
+            "description": "Vlajkový iPhone s čipem A17 Pro.",
+            "price": 38990.0,
+            "product_code": "RI045b1",
+            "url": "https://eshop.cz/mobily/iphone-15-pro-max-256gb",
+            "image_url": "",
+        }
+    ],
+}
+
+FAKE_DOCUMENTS = [
+    Document(
+        name=f"iPhone 15 Pro Max {capacity}GB",
+        content=f"iPhone 15 Pro Max {capacity}GB s čipem A17 Pro, titanovým tělem a 6,7\" displejem Super Retina XDR.",
+        url=f"https://eshop.cz/mobily/iphone-15-pro-max-{capacity}gb",
+        product_code=f"RI045b{index}",
+        price=32990.0 + index * 4000,
+    )
+    for index, capacity in enumerate([128, 256, 512, 1024], start=1)
+]
+
+
+class FakeStructuredOutput(Runnable):
+    """Náhrada `llm.with_structured_output(schema, include_raw=True)` podporující invoke i stream."""
+
+    def __init__(self, model: "FakeChatModel", schema, chunk_size: int = 16):
+        self.model = model
+        self.schema = schema
+        self.chunk_size = chunk_size
+
+    def invoke(self, input, config=None, **kwargs) -> dict:
+        return self.model._respond(self.schema, input)
+
+    def stream(self, input, config=None, **kwargs) -> Iterator[dict]:
+        """Streamuje JSON výstupu po kouscích jako AIMessageChunk (stejně jako json_schema režim providerů)."""
+        response = self.model._respond(self.schema, input)
+        text = json.dumps(FAKE_STRUCTURED_PAYLOAD, ensure_ascii=False)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            yield {"raw": AIMessageChunk(content=piece, usage_metadata=response["raw"].usage_metadata if last else None)}
+        yield {"parsed": response["parsed"]}
+        yield {"parsing_error": None}
+
+
+class FakeChatModel:
+    """Náhrada langchain chat modelu, která okamžitě vrací deterministický strukturovaný výstup."""
+
+    def __init__(self, model_name: str = "gpt-4o", input_tokens: int = 1000, output_tokens: int = 200):
+        self.model_name = model_name
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    def _respond(self, schema, prompt_value) -> dict:
+        raw = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.input_tokens + self.output_tokens,
+            },
+        )
+        return {"parsed": schema.model_validate(FAKE_STRUCTURED_PAYLOAD), "raw": raw, "parsing_error": None}
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        if include_raw:
+            return FakeStructuredOutput(self, schema)
+        return RunnableLambda(lambda prompt_value: self._respond(schema, prompt_value)["parsed"])
+
+
+def fake_get_model(provider: str, model_type: str = "normal", *args, **kwargs) -> FakeChatModel:
+    """Náhrada `Models.get_model` vracející FakeChatModel pro libovolného providera."""
+    return FakeChatModel(model_name="gpt-4o-mini" if model_type == "mini" else "gpt-4o")
+
+
+class FakeWeaviateService:
+    """Náhrada WeaviateService bez síťového spojení."""
+
+    def __init__(self, *args, documents: List[Document] = None, **kwargs):
+        self.documents = documents if documents is not None else FAKE_DOCUMENTS
+
+    def search_products(self, search_params: SearchQuery, limit: int = 5) -> List[Document]:
+        return [doc.model_copy() for doc in self.documents[:limit]]
+
+    def fetch_all_documents(self) -> List[Document]:
+        return [doc.model_copy() for doc in self.documents]
+
+    def fetch_by_product_codes(self, product_codes: List[str]) -> List[Document]:
+        return [doc.model_copy() for doc in self.documents if doc.product_code in product_codes]
+
+    def close(self) -> None:
+        pass
+
+
+@contextmanager
+def fake_backends(weaviate_service=None):
+    """
+    Nahradí LLM modely a sdílený vyhledávací backend deterministickými náhradami.
+
+    Patchuje i referenci importovanou v uzlu get_documents_from_vector_db, aby náhrada
+    platila jak pro FlowExecutor, tak pro moduly, které flow načítá znovu (pf.test).
+    """
+    import flow.get_documents_from_vector_db
+
+    service = weaviate_service or FakeWeaviateService()
+    with ExitStack() as stack:
+        stack.enter_context(patch("utils.models.Models.get_model", side_effect=fake_get_model))
+        stack.enter_context(patch("utils.weaviate_service.get_weaviate_service", return_value=service))
+        stack.enter_context(patch("utils.retrieval.get_retrieval_service", return_value=service))
+        stack.enter_context(patch("flow.get_documents_from_vector_db.get_retrieval_service", return_value=service))
+        yield service
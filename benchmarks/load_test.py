@@ -0,0 +1,471 @@
+"""
+Zátěžový test flow - souběžné relace přehrávají konverzace proti FlowExecutoru.
+
+LLM provider a vektorová databáze jsou nahrazeny simulacemi s nastavitelným rozdělením
+latence (log-normální, zadané mediánem a p95) a mírou chyb, takže lze bez API kreditů
+zjistit, kolik souběžných relací zvládne Streamlit + FlowExecutor na jednom stroji.
+Ostatní kód flow (zákaznické API, skládání promptů, historie...) běží beze změny.
+
+Provoz se načítá z CSV (sloupce customer_input, chat_history, person - viz
+tests/provider_tests/test_files/provider_test_data.csv) nebo z JSONL, kde každý řádek je
+jeden tah `{"customer_input", "chat_history", "customer_id"}` nebo celá konverzace
+`{"turns": [...], "customer_id"}`. Řádky bez dotazu zákazníka se přeskočí.
+
+Pro každou úroveň souběžnosti se vypíše propustnost, p50/p95/p99 latence celého tahu,
+času do prvního tokenu i jednotlivých uzlů a míra chyb; výsledky se uloží jako JSON.
+
+Spuštění z kořene repozitáře:
+    python -m benchmarks.load_test --concurrency 1 4 16 --turns 200
+    python -m benchmarks.load_test --traffic conversations.jsonl --duration 60 --llm-failure-rate 0.02
+    python -m benchmarks.load_test --llm-latency 1.5:4 --llm-ttft 0.4:1.2 --search-latency 0.05:0.2
+"""
+import argparse, csv, json, math, os, platform, random, sys, threading, time, uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from unittest.mock import patch
+from langchain_core.messages import AIMessageChunk
+from pydantic import BaseModel, Field
+
+from benchmarks.fakes import FAKE_STRUCTURED_PAYLOAD, FakeChatModel, FakeStructuredOutput, FakeWeaviateService, fake_backends
+from utils.weaviate_service import Document, SearchQuery
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+DEFAULT_TRAFFIC = os.path.join(REPO_DIR, "tests", "provider_tests", "test_files", "provider_test_data.csv")
+
+CONTEXT = {
+    "page_title": "Mobilní telefony",
+    "current_url": "https://eshop.cz/mobily",
+    "language": "CS",
+}
+
+
+class SimulatedBackendError(RuntimeError):
+    """Chyba vyvolaná simulací (výpadek providera / vektorové databáze)."""
+
+
+class LatencyDistribution:
+    """
+    Log-normální rozdělení latence zadané mediánem a 95. percentilem (v sekundách).
+
+    Log-normální rozdělení dobře odpovídá latencím API - většina volání je blízko mediánu,
+    ale s dlouhým pravým ocasem.
+    """
+
+    def __init__(self, median: float, p95: Optional[float] = None):
+        self.median = max(median, 0.0)
+        self.p95 = max(p95 if p95 is not None else median, self.median)
+        self.sigma = math.log(self.p95 / self.median) / 1.645 if self.median > 0 else 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyDistribution":
+        """Načte rozdělení z textu 'median' nebo 'median:p95' (např. '0.8:2.5')."""
+        median, _, p95 = value.partition(":")
+        return cls(float(median), float(p95) if p95 else None)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+    def describe(self) -> dict:
+        return {"median_s": self.median, "p95_s": self.p95}
+
+
+class BackendProfile:
+    """Latence a míra chyb jedné simulované služby; počítá volání a vyvolané chyby."""
+
+    def __init__(self, name: str, latency: LatencyDistribution, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> tuple:
+        """Vrátí (latence, má selhat) pro jedno volání."""
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            return self.latency.sample(self._rng), fail
+
+    def sample_latency(self, distribution: LatencyDistribution) -> float:
+        with self._lock:
+            return distribution.sample(self._rng)
+
+    def describe(self) -> dict:
+        return {
+            **self.latency.describe(),
+            "failure_rate": self.failure_rate,
+            "calls": self.calls,
+            "injected_failures": self.failures,
+        }
+
+
+class SimulatedStructuredOutput(FakeStructuredOutput):
+    """Strukturovaný výstup simulovaného LLM - čeká podle profilu, streamuje s prodlevou prvního tokenu."""
+
+    def invoke(self, input, config=None, **kwargs) -> dict:
+        latency, fail = self.model.profile.sample()
+        time.sleep(latency)
+        if fail:
+            raise SimulatedBackendError("Simulovaný výpadek LLM providera.")
+        return self.model._respond(self.schema, input)
+
+    def stream(self, input, config=None, **kwargs) -> Iterator[dict]:
+        latency, fail = self.model.profile.sample()
+        ttft = min(self.model.profile.sample_latency(self.model.ttft), latency)
+        time.sleep(ttft)
+        if fail:
+            raise SimulatedBackendError("Simulovaný výpadek LLM providera.")
+
+        response = self.model._respond(self.schema, input)
+        text = json.dumps(FAKE_STRUCTURED_PAYLOAD, ensure_ascii=False)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        # zbytek latence rozložíme rovnoměrně mezi další kusy odpovědi
+        delay = (latency - ttft) / max(len(pieces) - 1, 1)
+
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(delay)
+            last = index == len(pieces) - 1
+            yield {"raw": AIMessageChunk(content=piece, usage_metadata=response["raw"].usage_metadata if last else None)}
+        yield {"parsed": response["parsed"]}
+        yield {"parsing_error": None}
+
+
+class SimulatedChatModel(FakeChatModel):
+    """FakeChatModel s latencí a chybovostí podle BackendProfile."""
+
+    def __init__(self, profile: BackendProfile, ttft: LatencyDistribution, model_name: str = "gpt-4o"):
+        super().__init__(model_name=model_name)
+        self.profile = profile
+        self.ttft = ttft
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        if include_raw:
+            return SimulatedStructuredOutput(self, schema)
+        return super().with_structured_output(schema, include_raw=False, **kwargs)
+
+
+class SimulatedVectorStore(FakeWeaviateService):
+    """FakeWeaviateService s latencí a chybovostí podle BackendProfile."""
+
+    def __init__(self, profile: BackendProfile, documents: List[Document] = None):
+        super().__init__(documents=documents)
+        self.profile = profile
+
+    def _call(self) -> None:
+        latency, fail = self.profile.sample()
+        time.sleep(latency)
+        if fail:
+            raise SimulatedBackendError("Simulovaný výpadek vektorové databáze.")
+
+    def search_products(self, search_params: SearchQuery, limit: int = 5) -> List[Document]:
+        self._call()
+        return super().search_products(search_params, limit)
+
+    def fetch_by_product_codes(self, product_codes: List[str]) -> List[Document]:
+        self._call()
+        return super().fetch_by_product_codes(product_codes)
+
+
+class Turn(BaseModel):
+    customer_input: str
+    chat_history: list = Field(default_factory=list, description="Historie před prvním tahem konverzace.")
+
+
+class Conversation(BaseModel):
+    turns: List[Turn]
+    customer_id: Optional[str] = None
+
+
+def _parse_history(value) -> list:
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    try:
+        history = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return history if isinstance(history, list) else []
+
+
+def load_traffic(path: str) -> List[Conversation]:
+    """Načte konverzace z CSV nebo JSONL souboru (formáty viz docstring modulu)."""
+    conversations = []
+    skipped = 0
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                if not (row.get("customer_input") or "").strip():
+                    skipped += 1
+                    continue
+                conversations.append(Conversation(
+                    turns=[Turn(customer_input=row["customer_input"], chat_history=_parse_history(row.get("chat_history")))],
+                    customer_id=(row.get("person") or "").strip() or None,
+                ))
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                raw_turns = item.get("turns") or [item]
+                turns = [
+                    Turn(customer_input=turn["customer_input"], chat_history=_parse_history(turn.get("chat_history")))
+                    for turn in raw_turns
+                    if isinstance(turn, dict) and (turn.get("customer_input") or "").strip()
+                ]
+                if not turns:
+                    skipped += 1
+                    continue
+                conversations.append(Conversation(turns=turns, customer_id=item.get("customer_id") or item.get("person")))
+
+    if skipped:
+        sys.stdout.write(f"{path}: přeskočeno {skipped} záznamů bez customer_input\n")
+    return conversations
+
+
+def percentiles(values: List[float]) -> dict:
+    """p50/p95/p99 a průměr v milisekundách (nejbližší pořadí)."""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def rank(q: float) -> float:
+        return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))] * 1000
+
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000,
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": values[-1] * 1000,
+    }
+
+
+class LoadTestRecorder:
+    """Sbírá výsledky tahů ze všech relací (thread-safe)."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+        self.node_durations: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def success(self, latency: float, stats) -> None:
+        with self._lock:
+            self.turns += 1
+            self.latencies.append(latency)
+            if stats.time_to_first_token is not None:
+                self.ttfts.append(stats.time_to_first_token)
+            for node, duration in stats.node_durations.items():
+                self.node_durations[node].append(duration)
+
+    def failure(self, error: BaseException) -> None:
+        with self._lock:
+            self.turns += 1
+            self.errors[type(error).__name__] += 1
+
+    def report(self, elapsed: float) -> dict:
+        with self._lock:
+            failed = sum(self.errors.values())
+            return {
+                "turns": self.turns,
+                "failed_turns": failed,
+                "error_rate": failed / self.turns if self.turns else 0.0,
+                "errors": dict(self.errors),
+                "elapsed_s": elapsed,
+                "throughput_turns_per_s": (self.turns - failed) / elapsed if elapsed else 0.0,
+                "latency": percentiles(self.latencies),
+                "time_to_first_token": percentiles(self.ttfts),
+                "nodes": {node: percentiles(durations) for node, durations in sorted(self.node_durations.items())},
+            }
+
+
+def run_turn(executor, inputs: dict, stream: bool):
+    """Jeden tah jako v app.py - ve streamovacím režimu přes executor.stream."""
+    if not stream:
+        return executor.run_with_stats(inputs)
+    for event in executor.stream(inputs):
+        if event.type == "result":
+            return event.data
+    raise RuntimeError("Flow skončil bez výsledku.")
+
+
+def run_session(executor, conversation: Conversation, llm_provider: str, stream: bool, think_time: float, recorder: LoadTestRecorder) -> None:
+    """Přehraje jednu konverzaci; historie a stav se předávají mezi tahy stejně jako v app.py."""
+    chat_history = list(conversation.turns[0].chat_history)
+    context = {**CONTEXT, "session_id": uuid.uuid4().hex}
+    customer = {"customer_id": conversation.customer_id} if conversation.customer_id else {}
+
+    for index, turn in enumerate(conversation.turns):
+        if index and think_time:
+            time.sleep(think_time)
+        inputs = {
+            "customer_input": turn.customer_input,
+            "chat_history": chat_history,
+            "context": context,
+            "customer": customer,
+            "llm_provider": llm_provider,
+        }
+        started = time.perf_counter()
+        try:
+            outputs, stats = run_turn(executor, inputs, stream)
+        except Exception as e:
+            recorder.failure(e)
+            # s rozbitým tahem nemá smysl konverzaci dál přehrávat
+            return
+        recorder.success(time.perf_counter() - started, stats)
+        chat_history = outputs.get("chat_history") or chat_history
+        context = outputs.get("context") or context
+        customer = outputs.get("customer") or customer
+
+
+def run_level(executor, conversations: List[Conversation], concurrency: int, max_turns: Optional[int], duration: Optional[float],
+              llm_provider: str, stream: bool, think_time: float) -> dict:
+    """
+    Spustí `concurrency` souběžných relací, které si berou konverzace ze sdílené fronty (dokola).
+
+    Test skončí po `max_turns` tazích nebo po `duration` sekundách (rozpracované tahy se dokončí).
+    """
+    recorder = LoadTestRecorder()
+    lock = threading.Lock()
+    state = {"next": 0, "planned_turns": 0}
+    started = time.perf_counter()
+
+    def take() -> Optional[Conversation]:
+        with lock:
+            if duration is not None and time.perf_counter() - started >= duration:
+                return None
+            if max_turns is not None and state["planned_turns"] >= max_turns:
+                return None
+            conversation = conversations[state["next"] % len(conversations)]
+            state["next"] += 1
+            state["planned_turns"] += len(conversation.turns)
+            return conversation
+
+    def worker() -> None:
+        while (conversation := take()) is not None:
+            run_session(executor, conversation, llm_provider, stream, think_time, recorder)
+
+    threads = [threading.Thread(target=worker, name=f"load-session-{index}", daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {"concurrency": concurrency, **recorder.report(time.perf_counter() - started)}
+
+
+def print_level(result: dict) -> None:
+    latency, ttft = result["latency"], result["time_to_first_token"]
+    sys.stdout.write(
+        f"\nsouběžnost {result['concurrency']:>3}: {result['turns']} tahů za {result['elapsed_s']:.1f} s, "
+        f"{result['throughput_turns_per_s']:.2f} tahů/s, chybovost {result['error_rate']:.1%} {result['errors'] or ''}\n"
+    )
+    rows = [("tah", latency), ("první token", ttft)] + list(result["nodes"].items())
+    for name, values in rows:
+        if values.get("count"):
+            sys.stdout.write(
+                f"  {name:<32} p50={values['p50_ms']:9.1f} ms  p95={values['p95_ms']:9.1f} ms  p99={values['p99_ms']:9.1f} ms\n"
+            )
+
+
+def main() -> int:
+    from utils.config import FLOW_MAX_WORKERS, STREAM_ANSWER
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traffic", nargs="+", default=[DEFAULT_TRAFFIC], help="CSV/JSONL soubory s konverzacemi.")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16], help="Úrovně souběžnosti (počty relací).")
+    parser.add_argument("--turns", type=int, default=100, help="Počet tahů na jednu úroveň souběžnosti.")
+    parser.add_argument("--duration", type=float, help="Délka jedné úrovně v sekundách (místo --turns).")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pauza mezi tahy jedné relace (s).")
+    parser.add_argument("--llm-provider", default="OPENAI")
+    parser.add_argument("--llm-latency", type=LatencyDistribution.parse, default=LatencyDistribution(1.0, 3.0),
+                        help="Latence celé odpovědi LLM 'median[:p95]' v sekundách.")
+    parser.add_argument("--llm-ttft", type=LatencyDistribution.parse, default=LatencyDistribution(0.3, 0.8),
+                        help="Čas do prvního tokenu při streamování 'median[:p95]'.")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Podíl selhaných LLM volání (0-1).")
+    parser.add_argument("--search-latency", type=LatencyDistribution.parse, default=LatencyDistribution(0.05, 0.15),
+                        help="Latence jednoho vyhledávání ve vektorové databázi 'median[:p95]'.")
+    parser.add_argument("--search-failure-rate", type=float, default=0.0, help="Podíl selhaných vyhledávání (0-1).")
+    parser.add_argument("--max-workers", type=int, default=FLOW_MAX_WORKERS, help="Velikost poolu uzlů FlowExecutoru.")
+    parser.add_argument("--no-stream", action="store_true", help="Spouštět run_with_stats místo streamu (jako při STREAM_ANSWER=False).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Cesta k JSON souboru s výsledky (výchozí benchmarks/results/load-<čas>.json).")
+    args = parser.parse_args()
+
+    conversations = [conversation for path in args.traffic for conversation in load_traffic(path)]
+    if not conversations:
+        parser.error("Žádné konverzace k přehrání.")
+    stream = STREAM_ANSWER and not args.no_stream
+
+    llm_profile = BackendProfile("llm", args.llm_latency, args.llm_failure_rate, seed=args.seed)
+    search_profile = BackendProfile("vector_store", args.search_latency, args.search_failure_rate, seed=args.seed + 1)
+    vector_store = SimulatedVectorStore(search_profile)
+
+    def simulated_get_model(provider: str, model_type: str = "normal", *_, **__) -> SimulatedChatModel:
+        return SimulatedChatModel(llm_profile, args.llm_ttft, model_name="gpt-4o-mini" if model_type == "mini" else "gpt-4o")
+
+    levels = []
+    with ExitStack() as stack:
+        stack.enter_context(fake_backends(vector_store))
+        stack.enter_context(patch("utils.models.Models.get_model", side_effect=simulated_get_model))
+        # simulovaný provoz nezapisujeme do ledgeru spotřeby ani do exportu trace
+        stack.enter_context(patch("flow.get_answer.USAGE_LEDGER_ENABLED", False))
+        stack.enter_context(patch("utils.tracing.TRACING_ENABLED", False))
+        # výpisy uzlů by při desítkách relací zahltily konzoli
+        stack.enter_context(patch("builtins.print"))
+
+        from utils.flow_executor import FlowExecutor
+
+        executor = FlowExecutor(max_workers=args.max_workers)
+        sys.stdout.write(
+            f"{len(conversations)} konverzací, stream={stream}, pool uzlů={args.max_workers}, "
+            f"LLM {args.llm_latency.median}/{args.llm_latency.p95} s, vyhledávání {args.search_latency.median}/{args.search_latency.p95} s\n"
+        )
+        for concurrency in args.concurrency:
+            result = run_level(
+                executor, conversations, concurrency, None if args.duration else args.turns, args.duration,
+                args.llm_provider, stream, args.think_time,
+            )
+            print_level(result)
+            levels.append(result)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "traffic": args.traffic,
+        "stream": stream,
+        "max_workers": args.max_workers,
+        "backends": {
+            "llm": {**llm_profile.describe(), "ttft": args.llm_ttft.describe()},
+            "vector_store": search_profile.describe(),
+        },
+        "levels": levels,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nVýsledky uloženy do {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
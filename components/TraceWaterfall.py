@@ -0,0 +1,39 @@
+import altair as alt
+import pandas as pd
+
+
+def trace_waterfall(spans):
+    """
+    Vytvoří waterfall graf spanů jednoho běhu flow (uzly, LLM volání, vyhledávací dotazy).
+
+    Args:
+        spans (list): Spany z FlowRunStats.spans - slovníky s klíči
+                      'name', 'kind', 'offset' (s od startu), 'duration' a 'attributes'.
+
+    Returns:
+        alt.Chart: Horizontální pruhy od začátku do konce každého spanu, seřazené podle začátku.
+    """
+    rows = []
+    for index, item in enumerate(spans):
+        duration = item.get("duration") or 0.0
+        label = item["name"]
+        query = item.get("attributes", {}).get("query")
+        if query:
+            label = f"{label}: {query}"
+        rows.append({
+            "order": index,
+            # pořadové číslo drží unikátní a seřazené popisky i u opakovaných spanů
+            "span": f"{index:02d} {label}",
+            "kind": item.get("kind", "internal"),
+            "start_ms": item.get("offset", 0.0) * 1000,
+            "end_ms": (item.get("offset", 0.0) + duration) * 1000,
+            "duration_ms": round(duration * 1000, 1),
+        })
+
+    return alt.Chart(pd.DataFrame(rows)).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms od startu"),
+        x2="end_ms:Q",
+        y=alt.Y("span:N", sort=alt.SortField("order"), title=None),
+        color=alt.Color("kind:N", title="Typ"),
+        tooltip=["span", "kind", "duration_ms"],
+    )
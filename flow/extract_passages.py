@@ -0,0 +1,25 @@
+from promptflow.core import tool
+from typing import List
+
+from utils.config import PASSAGE_EXTRACTION_ENABLED
+from utils.weaviate_service import Document, SearchQuery
+from utils.passage_extractor import extract_passages as extract_relevant_passages
+
+
+@tool
+def extract_passages(documents: List[Document], customer_input: str, search_queries: List[SearchQuery]) -> List:
+    """Ponechá z obsahu každého produktu jen pasáže relevantní k dotazu zákazníka (zkrácení promptu get_answer)."""
+    if not PASSAGE_EXTRACTION_ENABLED or not documents:
+        return documents
+
+    query_texts = [query.query if isinstance(query, SearchQuery) else query.get("query", "") for query in search_queries or []]
+    try:
+        output_documents, stats = extract_relevant_passages(documents, customer_input, query_texts)
+    except Exception as e:
+        # extrakce je jen optimalizace - při chybě pošleme dokumenty celé
+        print(f"Chyba při extrakci pasáží, použije se celý obsah: {e}")
+        return documents
+
+    if stats["chars_after"] < stats["chars_before"]:
+        print(f"Extrakce pasáží: obsah dokumentů zkrácen z {stats['chars_before']} na {stats['chars_after']} znaků.")
+    return output_documents
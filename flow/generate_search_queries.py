@@ -1,10 +1,14 @@
-import re
+import re, time
 from promptflow.core import tool
 from typing import List
 from pydantic import BaseModel, Field
-from langchain.prompts.prompt import PromptTemplate
-from utils.models import Models, get_model_name, _extract_token_counts, TokenManager
+from langchain_core.prompts import PromptTemplate
+from utils.config import QUERY_PLANNER_ENABLED
+from utils.models import Models, record_usage, get_model_name, _extract_token_counts, TokenManager
+from utils.chat_history import get_history_manager
 from utils.weaviate_service import SearchQuery
+from utils.query_planner import get_query_planner
+from utils.tracing import span
 
 
 class OutputSchema(BaseModel):
@@ -19,9 +23,9 @@ class Output():
         self.token_manager = token_manager
 
 
-@tool
-def generate_search_queries(customer_input: str, chat_history: list, context: dict, llm_provider: str) -> List[SearchQuery]:
-    llm = Models.get_model(llm_provider, "mini")
+def generate_queries_with_llm(customer_input: str, chat_history: list, context: dict, llm_provider: str, token_manager: TokenManager) -> List[SearchQuery]:
+    """Vygeneruje vyhledávací dotazy pomocí "mini" modelu a započítá spotřebované tokeny."""
+    llm = Models.get_model(llm_provider, "mini", hedge="generate_search_queries")
     if not llm:
         raise ValueError(f"Nepodporovaný poskytovatel LLM: {llm_provider}")
     
@@ -49,21 +53,38 @@ def generate_search_queries(customer_input: str, chat_history: list, context: di
         "page_title": context.get("page_title", ""),
         "current_url": context.get("current_url", ""),
         "customer_input": customer_input,
-        "chat_history": chat_history[:7]
+        "chat_history": get_history_manager().prepare(chat_history)
     }
     
     structured_llm = llm.with_structured_output(OutputSchema, include_raw=True)
     chain = prompt | structured_llm
     
-    output_data = chain.invoke(data)
+    with span("llm.generate_search_queries", kind="llm", provider=llm_provider) as llm_span:
+        started = time.perf_counter()
+        output_data = chain.invoke(data)
+        latency = time.perf_counter() - started
+        input_tokens, output_tokens = _extract_token_counts(output_data)
+        llm_span.set(model=output_data.get("model_name") or get_model_name(llm), input_tokens=input_tokens, output_tokens=output_tokens)
     generated_search_queries = output_data["parsed"].search_queries
     
     # Count tokens
+    record_usage(token_manager, llm, output_data, provider=llm_provider, node="generate_search_queries", latency=latency)
+
+    return generated_search_queries
+
+
+@tool
+def generate_search_queries(customer_input: str, chat_history: list, context: dict, llm_provider: str) -> List[SearchQuery]:
     token_manager = TokenManager()
-    model_name = get_model_name(llm)
-    input_tokens, output_tokens = _extract_token_counts(output_data)
-    
-    token_manager.add_token(model_name, input_tokens, output_tokens)
+
+    # Jednoduché dotazy ("MacBook Air 13 M3 do 35 000") naplánují pravidla bez volání LLM
+    planner = get_query_planner() if QUERY_PLANNER_ENABLED else None
+    generated_search_queries = planner.plan(customer_input, chat_history) if planner else None
+    if planner:
+        planner.record(planned=generated_search_queries is not None)
+
+    if generated_search_queries is None:
+        generated_search_queries = generate_queries_with_llm(customer_input, chat_history, context, llm_provider, token_manager)
     
     for query_obj in generated_search_queries:
         if query_obj.min_price is not None:
@@ -1,10 +1,18 @@
 from promptflow.core import tool
-from typing import List
+import time
+from typing import List, Optional, Tuple
 from pydantic import BaseModel, Field
-from langchain.prompts.prompt import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 
-from utils.models import Models, get_model_name, _extract_token_counts, TokenManager
+from utils.config import ANSWER_CACHE_ENABLED, USAGE_LEDGER_ENABLED
+from utils.models import Models, record_usage, get_model_name, _extract_token_counts, TokenManager
+from utils.prompt_budget import PromptBudgetReport, build_documents_section, get_token_budget
 from utils.weaviate_service import Document
+from utils.answer_cache import get_answer_cache
+from utils.chat_history import get_history_manager
+from utils.usage_ledger import get_usage_ledger
+from utils.streaming import emit, is_streaming, stream_structured_output
+from utils.tracing import span
 
 
 class Product(BaseModel):
@@ -35,11 +43,25 @@ class Output(BaseModel):
     search_queries: list = Field(default_factory=list, description="Search queries for the vector database.")
     documents: List[Document] = Field(default_factory=list, description="Documents that are used to generate the answer.")
     cost: float = Field(description="Cost of the message that was generated for the customer.")
+    ttft: Optional[float] = Field(default=None, description="Time to first answer token in seconds (streaming mode only).")
+    prompt_budget: Optional[PromptBudgetReport] = Field(default=None, description="How many documents and tokens fit into the prompt budget.")
 
 
-@tool
-def get_answer(customer_input: str, documents: List[Document], context: dict, customer: dict, chat_history: list, llm_provider: str, search_queries: list, token_manager: TokenManager) -> dict:
-    llm = Models.get_model(llm_provider, "hot")
+def generate_answer(customer_input: str, documents: List[Document], context: dict, customer: dict, chat_history: list, llm_provider: str, token_manager: TokenManager) -> Tuple[OutputSchema, Optional[float], PromptBudgetReport]:
+    """
+    Vygeneruje odpověď zákazníkovi pomocí "hot" modelu a započítá spotřebované tokeny.
+
+    Do promptu se dostanou jen nejrelevantnější dokumenty, které se vejdou do
+    rozpočtu vstupních tokenů modelu (PROMPT_TOKEN_BUDGETS).
+
+    Pokud je nastaven stream handler (FlowExecutor.stream), text odpovědi se
+    posílá průběžně po tokenech.
+
+    Returns:
+        Trojici (odpověď, čas do prvního tokenu v sekundách nebo None bez streamování,
+        přehled rozpočtu promptu).
+    """
+    llm = Models.get_model(llm_provider, "hot", hedge="get_answer")
     if not llm:
         raise ValueError(f"Nepodporovaný poskytovatel LLM: {llm_provider}")
     
@@ -75,27 +97,76 @@ def get_answer(customer_input: str, documents: List[Document], context: dict, cu
     
     data = {
         "customer_input": customer_input,
-        "chat_history": chat_history[:7],
-        "documents": documents or [],
+        "chat_history": get_history_manager().prepare(chat_history),
+        "documents": "",
         "customer": customer,
         "language": context.get("language", "CZ"),
         "page_title": context.get("page_title", ""),
         "current_url": context.get("current_url", "")
     }
+
+    # dokumenty doplníme podle relevance do rozpočtu, který zbyde po zbytku promptu
+    budget = get_token_budget(llm_provider, get_model_name(llm))
+    data["documents"], budget_report = build_documents_section(documents or [], prompt.format(**data), budget)
+    if budget_report.dropped_documents or budget_report.truncated:
+        print(
+            f"Rozpočet promptu ({budget} tokenů): vynecháno {budget_report.dropped_documents} dokumentů "
+            f"(~{budget_report.dropped_tokens} tokenů), použito {budget_report.included_documents}."
+        )
     
     structured_llm = llm.with_structured_output(OutputSchema, include_raw=True)
     chain = prompt | structured_llm
     
-    output_data = chain.invoke(data)
+    time_to_first_token = None
+    with span("llm.get_answer", kind="llm", provider=llm_provider, documents=budget_report.included_documents) as llm_span:
+        started = time.perf_counter()
+        if is_streaming():
+            output_data, time_to_first_token = stream_structured_output(chain, data)
+        else:
+            output_data = chain.invoke(data)
+        latency = time.perf_counter() - started
+        input_tokens, output_tokens = _extract_token_counts(output_data)
+        llm_span.set(
+            model=output_data.get("model_name") or get_model_name(llm), input_tokens=input_tokens,
+            output_tokens=output_tokens, time_to_first_token=time_to_first_token
+        )
     response = output_data.get("parsed")
-    answer = response.answer
     
     # Count tokens
-    model_name = get_model_name(llm)
-    input_tokens, output_tokens = _extract_token_counts(output_data)
-    
-    token_manager.add_token(model_name, input_tokens, output_tokens)
-    
+    record_usage(token_manager, llm, output_data, provider=llm_provider, node="get_answer", latency=latency)
+
+    return response, time_to_first_token, budget_report
+
+
+@tool
+def get_answer(customer_input: str, documents: List[Document], context: dict, customer: dict, chat_history: list, llm_provider: str, search_queries: list, token_manager: TokenManager) -> dict:
+    # Sémantická cache jen pro první zprávu - s historií závisí odpověď i na předchozí konverzaci
+    answer_cache = get_answer_cache() if ANSWER_CACHE_ENABLED and not chat_history else None
+    response = None
+    time_to_first_token = None
+    budget_report = None
+
+    if answer_cache is not None:
+        try:
+            cached_response = answer_cache.lookup(customer_input, context, documents, customer)
+            if cached_response is not None:
+                response = OutputSchema.model_validate(cached_response)
+                # odpověď z cache pošleme do streamu celou najednou
+                emit("answer_delta", response.answer)
+        except Exception as e:
+            print(f"Chyba při čtení sémantické cache odpovědí: {e}")
+
+    if response is None:
+        response, time_to_first_token, budget_report = generate_answer(customer_input, documents, context, customer, chat_history, llm_provider, token_manager)
+
+        if answer_cache is not None:
+            try:
+                answer_cache.store(customer_input, context, documents, customer, response.model_dump())
+            except Exception as e:
+                print(f"Chyba při ukládání do sémantické cache odpovědí: {e}")
+
+    answer = response.answer
+
     chat_history.append({
         "customer_input": customer_input,
         "assistant_answer": {
@@ -103,8 +174,20 @@ def get_answer(customer_input: str, documents: List[Document], context: dict, cu
             "recommended_products": response.recommended_products
         }
     })
-    
+
     cost = token_manager.calculate_total_cost()
+
+    usage = {"session_id": context.get("session_id"), "customer_id": customer.get("customer_id")}
+    if USAGE_LEDGER_ENABLED:
+        # zápis do ledgeru jen zařadí záznamy do fronty, do SQLite se zapisují na pozadí
+        try:
+            usage["turn_id"] = get_usage_ledger().record_turn(token_manager, **usage)
+        except Exception as e:
+            print(f"Chyba při záznamu spotřeby do ledgeru: {e}")
+
+    # shrnutí starších tahů pro příští zprávu se spočítá na pozadí, aktuální odpověď nezdržuje;
+    # jeho spotřeba se v ledgeru připíše k tomuto tahu
+    get_history_manager().schedule_summary(chat_history, llm_provider, **usage)
     
     response_dict = response.model_dump()
 
@@ -124,7 +207,9 @@ def get_answer(customer_input: str, documents: List[Document], context: dict, cu
         customer=customer,
         search_queries=search_queries,
         documents=documents,
-        cost=cost
+        cost=cost,
+        ttft=time_to_first_token,
+        prompt_budget=budget_report
     )
 
     print(output.model_dump_json(indent=2))
@@ -1,7 +1,8 @@
 from promptflow.core import tool
 from typing import Optional, List, Dict
 from pydantic import BaseModel
-import json, os, time
+
+from utils.customer_store import get_customer_profile
 
 
 class Customer(BaseModel):
@@ -14,24 +15,12 @@ class Customer(BaseModel):
 
 def get_customer_data_from_api(customer_id: str) -> Dict:
     """
-    Simuluje volání API načtením dat ze sample souboru.
-    V reálném případě by zde bylo volání skutečného API.
+    Načte profil zákazníka ze sdíleného store (index v paměti nad sample daty, případně CRM API).
+    Anonymní a neznámý zákazník vrací prázdný slovník.
     """
     
     try:
-        # Načtení sample dat ze souboru
-        sample_data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample_data", "customers.json")
-        with open(sample_data_path, "r", encoding="utf-8") as f:
-            customers_data = json.load(f)
-        
-        time.sleep(0.5)
-        # Najdeme zákazníka v seznamu podle customer_id
-        for customer in customers_data:
-            if customer.get("customer_id") == customer_id:
-                return customer
-        
-        # Pokud zákazník neexistuje, vrátíme prázdný slovník
-        return {}
+        return get_customer_profile(customer_id) or {}
     except Exception as e:
         print(f"Chyba při načítání dat zákazníka: {e}")
         return {}
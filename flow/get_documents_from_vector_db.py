@@ -1,28 +1,152 @@
 from promptflow.core import tool
-from typing import List
+from typing import List, Optional
+import time, threading, contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-from utils.weaviate_service import WeaviateService, SearchQuery
+from utils.config import WEAVIATE_SEARCH_MAX_CONCURRENCY, WEAVIATE_SEARCH_POOL_SIZE, WEAVIATE_SEARCH_TIMEOUT
+from utils.weaviate_service import SearchQuery, Document, matches_price_filter
+from utils.retrieval import RetrievalService, get_retrieval_service
+from utils.product_code_index import ProductCodeIndex, get_product_code_index
+from utils.tracing import span
+
+
+_search_pool: Optional[ThreadPoolExecutor] = None
+_search_pool_lock = threading.Lock()
+
+
+def get_search_pool() -> ThreadPoolExecutor:
+    """Sdílený thread pool pro vyhledávací dotazy celého procesu (vlákna se nevytváří pro každou zprávu)."""
+    global _search_pool
+
+    if _search_pool is None:
+        with _search_pool_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(max_workers=WEAVIATE_SEARCH_POOL_SIZE, thread_name_prefix="vector-search")
+
+    return _search_pool
+
+
+def search_all_queries(
+    service: RetrievalService,
+    search_queries: List[SearchQuery],
+    limit: int = 5,
+    max_concurrency: int = WEAVIATE_SEARCH_MAX_CONCURRENCY,
+    timeout: float = WEAVIATE_SEARCH_TIMEOUT
+) -> List[List[Document]]:
+    """
+    Spustí všechny vyhledávací dotazy souběžně ve sdíleném thread poolu.
+
+    Najednou běží nejvýše `max_concurrency` dotazů jedné zprávy. Celé vyhledávání má
+    jeden společný deadline `timeout` (včetně dotazů, které čekají na volné vlákno);
+    dotaz, který do něj nedoběhne, se přeskočí (vrátí prázdný seznam), aby pomalé
+    dotazy nezdržely celou odpověď.
+
+    Returns:
+        Výsledky ve stejném pořadí jako vstupní dotazy.
+    """
+    results: List[List[Document]] = [[] for _ in search_queries]
+    if not search_queries:
+        return results
+
+    def run_query(query: SearchQuery) -> List[Document]:
+        with span("search_products", kind="search", query=query.query, min_price=query.min_price, max_price=query.max_price) as query_span:
+            documents = service.search_products(search_params=query, limit=limit)
+            query_span.set(results=len(documents))
+        return documents
+
+    pool = get_search_pool()
+    deadline = time.monotonic() + timeout
+    queued = list(enumerate(search_queries))
+    futures = {}
+
+    def submit_next() -> Future:
+        index, query = queued.pop(0)
+        # kopie kontextu - spany dotazů se zanoří pod span uzlu
+        future = pool.submit(contextvars.copy_context().run, run_query, query)
+        futures[future] = index
+        return future
+
+    pending = {submit_next() for _ in range(min(max(1, max_concurrency), len(queued)))}
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                print(f"Chyba při vyhledávání dotazu '{search_queries[index].query}': {e}")
+            if queued:
+                pending.add(submit_next())
+
+    # nečekáme na dotazy po deadlinu - rozběhnuté doběhnou na pozadí díky timeoutu klienta
+    for future in pending:
+        future.cancel()
+        print(f"Varování: Dotaz '{search_queries[futures[future]].query}' nestihl timeout vyhledávání {timeout} s, přeskakuji.")
+    for _, query in queued:
+        print(f"Varování: Dotaz '{query.query}' nestihl timeout vyhledávání {timeout} s, přeskakuji.")
+
+    return results
+
+
+def lookup_product_code_queries(index: ProductCodeIndex, search_queries: List[SearchQuery]) -> List[List[Document]]:
+    """
+    Obslouží dotazy s kódem produktu z indexu kódů - bez vektorového vyhledávání.
+
+    Filtr na přesný kód vrací jen varianty tohoto produktu, text dotazu tedy výsledek
+    nemění a vektorizace je zbytečná. Cenový filtr se aplikuje na všechny varianty.
+
+    Returns:
+        Výsledky ve stejném pořadí jako vstupní dotazy.
+    """
+    found = index.lookup(query.product_code for query in search_queries)
+    results = []
+    for query in search_queries:
+        # přesná shoda kódu je nejrelevantnější výsledek (vzdálenost 0)
+        results.append([
+            document.model_copy(update={"distance": 0.0})
+            for document in found.get(query.product_code, [])
+            if matches_price_filter(document, query)
+        ])
+    return results
 
 
 @tool
 def get_documents_from_vector_db(search_queries: List[SearchQuery]) -> List:
     documents = []
-    service = WeaviateService()
-    
+    # sdílený backend pro celý proces (Weaviate nebo lokální index) - nezavíráme ho, použije ho i další zpráva
+    service = get_retrieval_service()
+
+    code_queries = [query for query in search_queries if query.product_code]
+    vector_queries = [query for query in search_queries if not query.product_code]
+
+    retrieved = {}
+    if code_queries:
+        with span("product_code_lookup", kind="search", product_codes=",".join(query.product_code for query in code_queries)):
+            code_results = lookup_product_code_queries(get_product_code_index(), code_queries)
+        for query, result in zip(code_queries, code_results):
+            retrieved[id(query)] = result
+    for query, result in zip(vector_queries, search_all_queries(service, vector_queries, limit=5)):
+        retrieved[id(query)] = result
+
+    # pořadí dokumentů zachováváme podle pořadí dotazů
     for query in search_queries:
-        retrieved_documents = service.search_products(search_params=query, limit=5)
-        for doc in retrieved_documents:
+        for doc in retrieved[id(query)]:
             documents.append(doc)
-    
-    service.close()
-    
+
     # deduplikace dokumentu
     output_documents: list = []
-    seen_documents = set()
-    
+    seen_documents = {}
+
     for item in documents:
-        if item.content not in seen_documents:
+        first = seen_documents.get(item.content)
+        if first is None:
             output_documents.append(item)
-            seen_documents.add(item.content)
-    
+            seen_documents[item.content] = item
+        elif item.distance is not None and (first.distance is None or item.distance < first.distance):
+            # stejný produkt z více dotazů - ponecháme nejmenší vzdálenost
+            first.distance = item.distance
+
     return output_documents
@@ -0,0 +1,23 @@
+# tests/conftest.py
+from unittest.mock import patch
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_usage_ledger(tmp_path_factory):
+    """Sdílený ledger spotřeby zapisuje do dočasného souboru, ne do utils/cache_data (skutečná útrata)"""
+    path = tmp_path_factory.mktemp("usage_ledger") / "usage_ledger.sqlite"
+    with patch("utils.usage_ledger.USAGE_LEDGER_PATH", str(path)), \
+         patch("utils.usage_ledger._usage_ledger", None):
+        yield path
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_tracing(tmp_path_factory):
+    """Tracing je v testech vypnutý a spany jdou do dočasného souboru (zapíná ho jen tests/test_tracing.py)"""
+    path = tmp_path_factory.mktemp("tracing") / "traces.jsonl"
+    with patch("utils.tracing.TRACING_ENABLED", False), \
+         patch("utils.tracing.TRACING_JSONL_PATH", str(path)), \
+         patch("utils.tracing.TRACING_OTLP_ENDPOINT", None), \
+         patch("utils.tracing._span_exporter", None):
+        yield path
@@ -2,11 +2,11 @@ import os, logging, csv, datetime, json
 import pytest
 from pathlib import Path
 from pydantic import BaseModel, Field
-from promptflow.client import PFClient
 from pytest_csv_params.decorator import csv_params
 from langchain.prompts.prompt import PromptTemplate
 
 from utils.models import Models
+from utils.flow_executor import get_flow_executor
 
 # Setup logging for test results
 RESULTS_DIR = Path("test_results")
@@ -14,7 +14,7 @@ RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 RESULTS_DETAIL_DIR = RESULTS_DIR / "test_results_detail"
 RESULTS_DETAIL_DIR.mkdir(parents=True, exist_ok=True)
 
-pf_client = PFClient()
+flow_executor = get_flow_executor()
 
 
 class RatingOutput(BaseModel):
@@ -140,7 +140,6 @@ def log_test_result(llm_provider, customer_input, chat_history, person, flow_res
 
 
 def run_flow(llm_provider, customer_input, chat_history, person, benchmark_answer) -> RatingOutput:
-    flow_path = "flow/"
     flow_input = {
         "customer_input": customer_input,
         "chat_history": chat_history,
@@ -157,12 +156,12 @@ def run_flow(llm_provider, customer_input, chat_history, person, benchmark_answe
     
     try:
         start_time = datetime.datetime.now()
-        flow_result = pf_client.test(flow=flow_path, inputs=flow_input)
+        flow_result = flow_executor.run(flow_input)
         end_time = datetime.datetime.now()
         duration = (end_time - start_time).total_seconds()
         logging.info(f"Flow execution time: {duration} seconds")
     except Exception as e:
-        logging.error("Výjimka při spuštění pf_client.test: %s", e)
+        logging.error("Výjimka při spuštění flow: %s", e)
         flow_result = {"response": f"Chyba zpracování - {e}" }
     
     if flow_result is None:
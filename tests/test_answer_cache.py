@@ -0,0 +1,93 @@
+# tests/test_answer_cache.py
+from unittest.mock import MagicMock
+from utils.answer_cache import AnswerCache, VOCATIVE_PLACEHOLDER
+from utils.catalog_version import CatalogVersion, bump_catalog_version
+from utils.weaviate_service import Document
+
+
+VECTORS = {
+    "Jsou AirPods Pro 2 voděodolné?": [1.0, 0.0, 0.0],
+    "Jsou airpods pro 2 voděodolná?": [0.99, 0.05, 0.0],
+    "Kolik stojí iPhone 16?": [0.0, 1.0, 0.0],
+}
+
+CONTEXT = {"language": "CS", "page_title": "AirPods Pro 2", "current_url": "https://eshop.cz/airpods-pro-2"}
+DOCUMENTS = [Document(name="AirPods Pro 2", content="AirPods Pro 2 s odolností IP54", product_code="JA0ws84")]
+RESPONSE = {
+    "answer": "Evo, AirPods Pro 2 mají odolnost IP54.",
+    "recommended_products": [],
+}
+
+
+def make_cache(**kwargs):
+    return AnswerCache(
+        embedder=lambda text: VECTORS[text],
+        catalog_version=MagicMock(**{"current.return_value": 1}),
+        **kwargs
+    )
+
+
+def test_answer_cache_hit_is_repersonalised():
+    """Test, že podobný dotaz vrátí uloženou odpověď s oslovením aktuálního zákazníka"""
+    cache = make_cache(threshold=0.95)
+    cache.store("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {"vokative": "Evo"}, RESPONSE)
+
+    stored = cache.cache.get(next(iter(cache.cache._data)))[0][1]
+    assert VOCATIVE_PLACEHOLDER in stored["answer"]
+
+    hit = cache.lookup("Jsou airpods pro 2 voděodolná?", CONTEXT, DOCUMENTS, {"vokative": "Petře"})
+    assert hit["answer"] == "Petře, AirPods Pro 2 mají odolnost IP54."
+    assert cache.stats()["hits"] == 1
+
+
+def test_answer_cache_miss_on_different_question_or_context():
+    """Test, že jiný dotaz, jiná stránka nebo jiné dokumenty cache nezasáhnou"""
+    cache = make_cache(threshold=0.95)
+    cache.store("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {"vokative": "Evo"}, RESPONSE)
+
+    assert cache.lookup("Kolik stojí iPhone 16?", CONTEXT, DOCUMENTS, {"vokative": "Evo"}) is None
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", {**CONTEXT, "language": "EN"}, DOCUMENTS, {"vokative": "Evo"}) is None
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, [], {"vokative": "Evo"}) is None
+    # anonymní zákazník nedostane odpověď psanou pro osloveného zákazníka
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}) is None
+
+
+def test_answer_cache_expires_on_catalog_change(tmp_path):
+    """Test, že změna verze katalogu vyprázdní cache odpovědí"""
+    version_file = str(tmp_path / "catalog_version.json")
+    cache = AnswerCache(
+        embedder=lambda text: VECTORS[text],
+        catalog_version=CatalogVersion(version_file, check_interval=0)
+    )
+    cache.store("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}, RESPONSE)
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}) is not None
+
+    bump_catalog_version(version_file)
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}) is None
+
+
+def test_answer_cache_ttl():
+    """Test, že odpověď po uplynutí TTL vyprší"""
+    cache = make_cache(ttl=0)
+    cache.store("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}, RESPONSE)
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}) is None
+
+
+def test_answer_cache_drops_only_answers_for_changed_products(tmp_path):
+    """Test, že změna ceny produktu zahodí jen odpovědi nad ním nebo s jeho doporučením"""
+    version_file = str(tmp_path / "catalog_version.json")
+    cache = AnswerCache(
+        embedder=lambda text: VECTORS[text],
+        catalog_version=CatalogVersion(version_file, check_interval=0)
+    )
+    iphone = [Document(name="iPhone 16", content="iPhone 16", product_code="RI001")]
+    recommending = {**RESPONSE, "recommended_products": [{"product_code": "RI001", "price": 22990.0}]}
+    cache.store("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}, RESPONSE)
+    cache.store("Kolik stojí iPhone 16?", CONTEXT, iphone, {}, RESPONSE)
+    cache.store("Jsou AirPods Pro 2 voděodolné?", {**CONTEXT, "language": "EN"}, DOCUMENTS, {}, recommending)
+
+    bump_catalog_version(version_file, product_codes=["RI001"])
+
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", CONTEXT, DOCUMENTS, {}) is not None
+    assert cache.lookup("Kolik stojí iPhone 16?", CONTEXT, iphone, {}) is None
+    assert cache.lookup("Jsou AirPods Pro 2 voděodolné?", {**CONTEXT, "language": "EN"}, DOCUMENTS, {}) is None
@@ -0,0 +1,58 @@
+# tests/test_cache.py
+import time
+from utils.cache import TTLCache
+
+
+def test_ttl_cache_get_set_and_counters():
+    """Test základního uložení, načtení a počítání zásahů"""
+    cache = TTLCache(maxsize=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test, že při překročení velikosti se zahodí nejdéle nepoužitý záznam"""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" je teď nejdéle nepoužitý
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expiration():
+    """Test vypršení záznamu podle TTL (výchozího i per-záznam)"""
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("short", 1)
+    cache.set("long", 2, ttl=10)
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert len(cache) == 1
+
+
+def test_ttl_cache_remove_where_and_clear():
+    """Test selektivního a úplného vyprázdnění cache"""
+    cache = TTLCache(maxsize=10)
+    cache.set(("q", "A1"), 1)
+    cache.set(("q", "B2"), 2)
+
+    removed = cache.remove_where(lambda key, value: key[1] == "A1")
+    assert removed == 1
+    assert cache.get(("q", "A1")) is None
+    assert cache.pop(("q", "B2")) == 2
+
+    cache.set("x", 1)
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,247 @@
+# tests/test_catalog_importer.py
+import csv, json
+import pytest
+
+from unittest.mock import MagicMock
+
+from utils.catalog_importer import (
+    CatalogImporter, ImportObject, ImportReport, WeaviateBatchWriter, object_uuid, parse_product_code, row_to_properties,
+)
+
+
+COLUMNS = ["uuid", "name", "content", "url", "prefix", "manufacturer", "productCode", "priceFrom"]
+
+
+def make_row(index):
+    return {
+        "uuid": f"u{index}",
+        "name": f"Produkt {index}",
+        "content": f"Popis produktu {index}\nna více řádcích",
+        "url": f"https://eshop.cz/p{index}",
+        "prefix": "Mobil",
+        "manufacturer": "Apple",
+        "productCode": f"['RI{index:03d}']",
+        "priceFrom": str(1000 + index),
+    }
+
+
+def write_rows(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, delimiter="|")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_csv(path, count, start=0):
+    write_rows(path, [make_row(index) for index in range(start, start + count)])
+
+
+class FakeWriter:
+    """Writer nad slovníkem UUID -> objekt; `reject` vrací chyby pro vybrané pokusy."""
+
+    def __init__(self, reject=None):
+        self.written = []
+        self.deleted = []
+        self.objects = {}
+        self.calls = 0
+        self.reject = reject or (lambda call, obj: None)
+
+    def fetch_state(self):
+        return {
+            object_id: (obj.properties["content_hash"], obj.properties["properties_hash"])
+            for object_id, obj in self.objects.items()
+        }
+
+    def fetch_vectors(self, uuids):
+        return {object_id: self.objects[object_id].vector for object_id in uuids if object_id in self.objects}
+
+    def delete(self, uuids):
+        self.deleted.extend(uuids)
+        for object_id in uuids:
+            self.objects.pop(object_id, None)
+        return len(uuids)
+
+    def write(self, objects):
+        self.calls += 1
+        failures = []
+        for obj in objects:
+            message = self.reject(self.calls, obj)
+            if message:
+                failures.append((obj, message))
+            else:
+                self.written.append(obj)
+                # zápis bez vektoru = nová vektorizace
+                self.objects[obj.uuid] = obj.model_copy(update={"vector": obj.vector or [float(len(self.written))]})
+        return failures
+
+
+def test_parse_product_code_formats():
+    """Test parsování productCode ze seznamu i z prostého textu"""
+    assert parse_product_code("['RI045b1']") == "RI045b1"
+    assert parse_product_code("['RI045b1', 'RI045b2']") == "RI045b1"
+    assert parse_product_code("[123]") == "123"
+    assert parse_product_code("RI045b1") == "RI045b1"
+    assert parse_product_code("[]") is None
+    assert parse_product_code("") is None
+
+
+def test_row_to_properties_skips_incomplete_rows():
+    """Test přeskočení řádku bez obsahu a převodu ceny"""
+    assert row_to_properties({"uuid": "u1", "content": ""})[0] is None
+
+    properties, reason = row_to_properties({"uuid": "u1", "content": "x", "priceFrom": "abc", "productCode": "['A1']"})
+    assert reason is None
+    assert properties["price"] is None
+    assert properties["product_code"] == "A1"
+
+
+def test_import_writes_all_rows(tmp_path):
+    """Test importu všech řádků po úsecích (zápis na pozadí zachovává pořadí úseků)"""
+    path = tmp_path / "catalog.csv"
+    write_csv(path, 25)
+    writer = FakeWriter()
+
+    report = CatalogImporter(writer, chunk_rows=10, progress_interval=0).run(str(path))
+
+    assert report.completed
+    assert report.imported == 25
+    assert report.rows_read == 25
+    assert [obj.properties["uuid"] for obj in writer.written] == [f"u{index}" for index in range(25)]
+    assert writer.written[0].properties["content"] == "Popis produktu 0\nna více řádcích"
+
+
+def test_import_retries_rate_limited_objects_with_backoff(tmp_path):
+    """Test opakování objektů odmítnutých kvůli rate limitu a nezopakování jiných chyb"""
+    path = tmp_path / "catalog.csv"
+    write_csv(path, 4)
+
+    def reject(call, obj):
+        if obj.properties["uuid"] == "u1" and call < 3:
+            return "429 Too Many Requests: rate limit reached for text-embedding"
+        if obj.properties["uuid"] == "u2":
+            return "invalid property"
+        return None
+
+    sleeps = []
+    writer = FakeWriter(reject)
+    report = CatalogImporter(writer, chunk_rows=10, backoff_base=1, sleep=sleeps.append).run(str(path))
+
+    assert report.imported == 3
+    assert report.failed == 1
+    assert report.retried == 2
+    assert len(sleeps) == 2 and sleeps[1] > sleeps[0] * 0.5
+    # stejné UUID i při opakování - opakovaný zápis nevytvoří duplicitu
+    assert [obj.properties["uuid"] for obj in writer.written].count("u1") == 1
+    assert any("invalid property" in error for error in report.errors)
+
+
+def test_import_resumes_from_checkpoint(tmp_path):
+    """Test pokračování z checkpointu po přerušení importu"""
+    path = tmp_path / "catalog.csv"
+    checkpoint = tmp_path / "checkpoint.json"
+    write_csv(path, 30)
+
+    class FailingWriter(FakeWriter):
+        def write(self, objects):
+            if self.calls == 1:
+                raise ConnectionError("spojení ztraceno")
+            return super().write(objects)
+
+    importer = CatalogImporter(FailingWriter(), chunk_rows=10, max_retries=0, checkpoint_path=str(checkpoint))
+    with pytest.raises(ConnectionError):
+        importer.run(str(path))
+    assert json.loads(checkpoint.read_text(encoding="utf-8"))["rows_done"] == 10
+
+    writer = FakeWriter()
+    report = CatalogImporter(writer, chunk_rows=10, checkpoint_path=str(checkpoint)).run(str(path))
+
+    assert report.resumed_from_row == 10
+    assert [obj.properties["uuid"] for obj in writer.written] == [f"u{index}" for index in range(10, 30)]
+    assert not checkpoint.exists()
+
+
+def test_checkpoint_ignored_for_changed_csv(tmp_path):
+    """Test, že checkpoint jiné verze CSV se nepoužije"""
+    path = tmp_path / "catalog.csv"
+    checkpoint = tmp_path / "checkpoint.json"
+    write_csv(path, 5)
+    importer = CatalogImporter(FakeWriter(), checkpoint_path=str(checkpoint))
+    importer.save_checkpoint(str(path), 3, ImportReport())
+
+    write_csv(path, 6)
+
+    assert importer.load_checkpoint(str(path)) == 0
+
+
+def test_weaviate_batch_writer_maps_failed_objects():
+    """Test zápisu přes batch API a přiřazení chyb k objektům podle UUID"""
+    objects = [ImportObject(row=index, properties={"uuid": f"u{index}"}) for index in range(3)]
+    collection = MagicMock()
+    batch = collection.batch.fixed_size.return_value.__enter__.return_value
+    failed = MagicMock(message="rate limit")
+    failed.object_.uuid = objects[1].uuid
+    collection.batch.failed_objects = [failed]
+
+    failures = WeaviateBatchWriter(collection, mode="fixed", batch_size=50, concurrent_requests=4).write(objects)
+
+    collection.batch.fixed_size.assert_called_once_with(batch_size=50, concurrent_requests=4)
+    assert batch.add_object.call_count == 3
+    assert failures == [(objects[1], "rate limit")]
+
+
+def test_object_uuid_is_deterministic():
+    """Test deterministického UUID z uuid v CSV a jmenného prostoru"""
+    assert object_uuid("u1", "Apple_Products") == object_uuid("u1", "Apple_Products")
+    assert object_uuid("u1", "Apple_Products") != object_uuid("u2", "Apple_Products")
+    assert object_uuid("u1", "Apple_Products") != object_uuid("u1", "Jina_Kolekce")
+
+
+def test_delta_import_inserts_updates_deletes_and_skips(tmp_path):
+    """Test delta importu - jen změněný content se vektorizuje znovu"""
+    path = tmp_path / "catalog.csv"
+    write_csv(path, 5)
+    writer = FakeWriter()
+    CatalogImporter(writer).run(str(path))
+    vector_u1 = writer.objects[object_uuid("u1")].vector
+
+    rows = [make_row(index) for index in (0, 1, 3, 4, 5)]
+    rows[0]["content"] = "Nový popis produktu 0"
+    rows[1]["priceFrom"] = "999"
+    write_rows(path, rows)
+    writer.written.clear()
+
+    report = CatalogImporter(writer).run(str(path))
+
+    written = {obj.properties["uuid"]: obj for obj in writer.written}
+    assert set(written) == {"u0", "u1", "u5"}
+    assert written["u0"].vector is None  # změněný content -> nová vektorizace
+    assert written["u1"].vector == vector_u1  # změna ceny -> původní vektor
+    assert written["u5"].vector is None
+    assert writer.deleted == [object_uuid("u2")]
+    assert (report.inserted, report.updated, report.unchanged, report.deleted, report.vectors_reused) == (1, 2, 2, 1, 1)
+
+
+def test_delta_import_of_empty_csv_does_not_delete(tmp_path):
+    """Test, že prázdné CSV nesmaže celý katalog"""
+    path = tmp_path / "catalog.csv"
+    write_csv(path, 3)
+    writer = FakeWriter()
+    CatalogImporter(writer).run(str(path))
+
+    write_rows(path, [])
+    report = CatalogImporter(writer).run(str(path))
+
+    assert report.deleted == 0
+    assert len(writer.objects) == 3
+
+
+def test_full_import_upserts_without_state(tmp_path):
+    """Test režimu bez delta porovnání - zapíše vše pod stejnými UUID"""
+    path = tmp_path / "catalog.csv"
+    write_csv(path, 3)
+    writer = FakeWriter()
+    CatalogImporter(writer).run(str(path))
+    CatalogImporter(writer).run(str(path), delta=False)
+
+    assert len(writer.written) == 6
+    assert len(writer.objects) == 3
@@ -0,0 +1,97 @@
+# tests/test_chat_history.py
+import time
+from unittest.mock import MagicMock, patch
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+
+from utils.chat_history import HistoryManager, compact_turn, extractive_summary, history_key, llm_summarizer
+
+
+def make_turn(index, products=()):
+    return {
+        "customer_input": f"Dotaz {index}",
+        "assistant_answer": {
+            "answer": f"Odpověď {index}",
+            "recommended_products": [
+                {"name": name, "description": "dlouhý popis " * 20, "price": 1000.0, "product_code": name, "url": "https://eshop.cz", "image_url": ""}
+                for name in products
+            ],
+        },
+    }
+
+
+def test_compact_turn_keeps_only_product_essentials():
+    """Test, že zkompaktněný tah obsahuje u produktů jen název, kód a cenu"""
+    compact = compact_turn(make_turn(1, ["iPhone 16"]))
+    assert compact["assistant_answer"]["recommended_products"] == [{"name": "iPhone 16", "product_code": "iPhone 16", "price": 1000.0}]
+
+
+def test_prepare_keeps_most_recent_turns_and_summarises_older():
+    """Test, že do promptu jdou poslední tahy (ne nejstarší) a starší tahy jako shrnutí"""
+    manager = HistoryManager(recent_turns=2, token_cap=10000, summarizer_factory=None, background=False)
+    history = [make_turn(i, [f"Produkt {i}"]) for i in range(6)]
+
+    prepared = manager.prepare(history)
+
+    assert [turn["customer_input"] for turn in prepared[1:]] == ["Dotaz 4", "Dotaz 5"]
+    summary = prepared[0]["summary_of_earlier_conversation"]
+    assert "Dotaz 0" in summary and "Produkt 3" in summary
+
+
+def test_prepare_enforces_token_cap():
+    """Test, že při překročení limitu vypadnou nejstarší tahy, ale poslední zůstane"""
+    manager = HistoryManager(recent_turns=5, token_cap=60, summarizer_factory=None, background=False)
+    prepared = manager.prepare([make_turn(i, ["iPhone"]) for i in range(5)])
+
+    assert prepared[-1]["customer_input"] == "Dotaz 4"
+    assert len(prepared) < 5
+
+
+def test_background_summary_is_used_and_built_incrementally():
+    """Test, že shrnutí z pozadí se použije v dalším tahu a navazuje na předchozí shrnutí"""
+    calls = []
+
+    def summarizer_factory(provider):
+        def summarize(previous, turns):
+            calls.append((previous, [turn["customer_input"] for turn in turns]))
+            return (previous + " | " if previous else "") + ", ".join(turn["customer_input"] for turn in turns)
+        return summarize
+
+    manager = HistoryManager(recent_turns=2, token_cap=10000, summarizer_factory=summarizer_factory, background=True)
+    history = [make_turn(i) for i in range(3)]
+    manager.schedule_summary(history, "OPENAI")
+    history.append(make_turn(3))
+    manager.schedule_summary(history, "OPENAI")
+
+    deadline = time.monotonic() + 2
+    while manager.summaries.get(history_key(history[:2])) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert calls == [("", ["Dotaz 0"]), ("Dotaz 0", ["Dotaz 1"])]
+    assert manager.prepare(history)[0] == {"summary_of_earlier_conversation": "Dotaz 0 | Dotaz 1"}
+
+
+def test_extractive_summary_is_bounded():
+    """Test, že extraktivní shrnutí nepřekročí maximální délku"""
+    assert len(extractive_summary([make_turn(i, ["iPhone"]) for i in range(100)], max_chars=200)) == 200
+
+
+class FakeMiniModel(Runnable):
+    model_name = "gpt-mini"
+
+    def invoke(self, input, config=None, **kwargs):
+        return AIMessage(content="Zákazník hledá iPhone.", usage_metadata={"input_tokens": 120, "output_tokens": 15, "total_tokens": 135})
+
+
+def test_llm_summarizer_records_usage_to_ledger():
+    """Test, že spotřeba shrnutí se zapíše do ledgeru jako uzel summarize_history daného tahu"""
+    ledger = MagicMock()
+    with patch("utils.models.Models.get_model", return_value=FakeMiniModel()), \
+         patch("utils.usage_ledger.get_usage_ledger", return_value=ledger):
+        summary = llm_summarizer("OPENAI", session_id="s1", turn_id="t1")("", [make_turn(0)])
+
+    assert summary == "Zákazník hledá iPhone."
+    token_manager = ledger.record_turn.call_args.args[0]
+    [token] = token_manager.tokens
+    assert (token.model, token.node, token.provider, token.input_tokens, token.output_tokens) == ("gpt-mini", "summarize_history", "OPENAI", 120, 15)
+    assert ledger.record_turn.call_args.kwargs == {"session_id": "s1", "customer_id": None, "turn_id": "t1"}
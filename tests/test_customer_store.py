@@ -0,0 +1,144 @@
+# tests/test_customer_store.py
+import asyncio, json, os
+import httpx
+import pytest
+from unittest.mock import patch
+
+from utils.customer_store import FileCustomerStore, HttpCustomerStore, get_customer_profile
+from flow.get_customer_info import get_customer_info
+
+
+CUSTOMERS = [
+    {"customer_id": "CUS1", "name": "Jan Novák", "vokative": "Jane", "email": "jan@example.com", "favorite_brands": ["Apple"]},
+    {"customer_id": "CUS2", "name": "Eva Černá", "vokative": "Evo", "email": "eva@example.com", "favorite_brands": []},
+]
+
+
+@pytest.fixture
+def customers_file(tmp_path):
+    path = tmp_path / "customers.json"
+    path.write_text(json.dumps(CUSTOMERS), encoding="utf-8")
+    return path
+
+
+def test_file_store_indexes_customers_and_loads_once(customers_file):
+    """Test vyhledání podle id bez opakovaného čtení souboru"""
+    store = FileCustomerStore(str(customers_file), check_interval=0)
+
+    assert store.get("CUS1")["name"] == "Jan Novák"
+    assert store.get("CUS2")["vokative"] == "Evo"
+    assert store.get("CUS404") is None
+    assert store.loads == 1
+
+
+def test_file_store_returns_copies(customers_file):
+    """Test, že úprava vráceného profilu nezmění index"""
+    store = FileCustomerStore(str(customers_file), check_interval=0)
+    store.get("CUS1")["favorite_brands"].append("Sony")
+
+    assert store.get("CUS1")["favorite_brands"] == ["Apple"]
+
+
+def test_file_store_reloads_when_mtime_changes(customers_file):
+    """Test znovunačtení indexu po změně souboru"""
+    store = FileCustomerStore(str(customers_file), check_interval=0)
+    assert store.get("CUS3") is None
+
+    customers_file.write_text(json.dumps(CUSTOMERS + [{"customer_id": "CUS3", "name": "Petr"}]), encoding="utf-8")
+    stat = os.stat(customers_file)
+    os.utime(customers_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.get("CUS3")["name"] == "Petr"
+    assert store.loads == 2
+
+
+def test_file_store_keeps_last_index_on_invalid_file(customers_file):
+    """Test, že poškozený soubor nezahodí poslední platný index"""
+    store = FileCustomerStore(str(customers_file), check_interval=0)
+    assert store.get("CUS1") is not None
+
+    customers_file.write_text("{nevalidní json", encoding="utf-8")
+    stat = os.stat(customers_file)
+    os.utime(customers_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.get("CUS1")["name"] == "Jan Novák"
+
+
+def test_get_customer_profile_short_circuits_anonymous():
+    """Test, že anonymní zákazník se na backend vůbec neptá"""
+    with patch("utils.customer_store.get_customer_store") as mock_store:
+        assert get_customer_profile("anonymous") is None
+        assert get_customer_profile(None) is None
+        mock_store.assert_not_called()
+
+
+def test_get_customer_info_uses_store(customers_file):
+    """Test doplnění profilu v uzlu get_customer_info ze store"""
+    store = FileCustomerStore(str(customers_file), check_interval=0)
+    with patch("utils.customer_store.get_customer_store", return_value=store):
+        assert get_customer_info({"customer_id": "CUS2"})["name"] == "Eva Černá"
+        assert get_customer_info({"customer_id": "anonymous"})["customer_id"] is None
+        assert get_customer_info({"customer_id": "CUS404"})["customer_id"] is None
+
+
+def _http_store(handler, **kwargs) -> HttpCustomerStore:
+    return HttpCustomerStore(
+        base_url="https://crm.example.com/api/customers",
+        client_factory=lambda: httpx.AsyncClient(
+            base_url="https://crm.example.com/api/customers", transport=httpx.MockTransport(handler)
+        ),
+        **kwargs,
+    )
+
+
+def _handler(requests):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        customer_id = request.url.path.rsplit("/", 1)[-1]
+        if customer_id == "CUS500":
+            return httpx.Response(500)
+        customer = next((customer for customer in CUSTOMERS if customer["customer_id"] == customer_id), None)
+        return httpx.Response(200, json=customer) if customer else httpx.Response(404)
+    return handle
+
+
+def test_http_store_caches_found_and_unknown_customers():
+    """Test TTL cache pro nalezené zákazníky i negativní cache pro neznámá id"""
+    requests = []
+    store = _http_store(_handler(requests))
+    try:
+        assert store.get("CUS1")["name"] == "Jan Novák"
+        assert store.get("CUS1")["name"] == "Jan Novák"
+        assert store.get("CUS404") is None
+        assert store.get("CUS404") is None
+    finally:
+        store.close()
+
+    assert requests == ["/api/customers/CUS1", "/api/customers/CUS404"]
+
+
+def test_http_store_does_not_cache_errors():
+    """Test, že chyba API se necachuje"""
+    requests = []
+    store = _http_store(_handler(requests))
+    try:
+        assert store.get("CUS500") is None
+        assert store.get("CUS500") is None
+    finally:
+        store.close()
+
+    assert len(requests) == 2
+
+
+def test_http_store_async_get_from_other_loop():
+    """Test asynchronního načtení z jiné event loop než je loop store"""
+    requests = []
+    store = _http_store(_handler(requests))
+    try:
+        customer = asyncio.run(store.aget("CUS2"))
+        assert customer["name"] == "Eva Černá"
+        assert store.get("CUS2")["name"] == "Eva Černá"
+    finally:
+        store.close()
+
+    assert requests == ["/api/customers/CUS2"]
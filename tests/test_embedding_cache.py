@@ -0,0 +1,74 @@
+# tests/test_embedding_cache.py
+import pytest
+from unittest.mock import MagicMock
+from utils.embedding_cache import EmbeddingCache, normalize_query
+
+
+@pytest.fixture
+def embedder():
+    """Deterministická náhrada embedding API, která počítá volání."""
+    calls = []
+
+    def factory(model):
+        def embed(text):
+            calls.append((model, text))
+            return [float(len(text)), 0.5, -0.25]
+        return embed
+
+    factory.calls = calls
+    return factory
+
+
+def test_normalize_query():
+    """Test normalizace textu dotazu"""
+    assert normalize_query("  iPhone   16 Pro\tMax ") == "iphone 16 pro max"
+    assert normalize_query("Jsou AirPods Pro 2 voděodolné?") == "jsou airpods pro 2 voděodolné?"
+    assert normalize_query(None) == ""
+
+
+def test_embedding_cache_memory_hit(embedder):
+    """Test, že opakovaný (i jinak formátovaný) dotaz se nevektorizuje znovu"""
+    cache = EmbeddingCache(db_path=None, embedder_factory=embedder)
+
+    first = cache.get_embedding("iPhone 16 Pro Max", model="text-embedding-3-small")
+    second = cache.get_embedding("  iphone 16 pro   max", model="text-embedding-3-small")
+
+    assert first == second
+    assert len(embedder.calls) == 1
+    assert cache.stats() == {"memory_hits": 1, "disk_hits": 0, "misses": 1, "memory_size": 1}
+
+
+def test_embedding_cache_is_keyed_by_model(embedder):
+    """Test, že vektory různých modelů se nemíchají"""
+    cache = EmbeddingCache(db_path=None, embedder_factory=embedder)
+
+    cache.get_embedding("MacBook Air", model="model-a")
+    cache.get_embedding("MacBook Air", model="model-b")
+
+    assert [model for model, _ in embedder.calls] == ["model-a", "model-b"]
+
+
+def test_embedding_cache_disk_store_survives_restart(embedder, tmp_path):
+    """Test, že vektory uložené na disk se po restartu načtou bez volání API"""
+    db_path = str(tmp_path / "embeddings.sqlite")
+
+    cache = EmbeddingCache(db_path=db_path, embedder_factory=embedder)
+    vector = cache.get_embedding("AirPods Pro 2")
+    cache.close()
+
+    restarted = EmbeddingCache(db_path=db_path, embedder_factory=embedder)
+    assert restarted.get_embedding("AirPods Pro 2") == pytest.approx(vector)
+    assert len(embedder.calls) == 1
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["misses"] == 0
+    restarted.close()
+
+
+def test_embedding_cache_propagates_embedder_errors(tmp_path):
+    """Test, že chyba API se propaguje a nic se neuloží"""
+    failing = MagicMock(side_effect=Exception("rate limit"))
+    cache = EmbeddingCache(db_path=str(tmp_path / "e.sqlite"), embedder_factory=lambda model: failing)
+
+    with pytest.raises(Exception, match="rate limit"):
+        cache.get_embedding("iPad Air")
+    assert cache.stats()["memory_size"] == 0
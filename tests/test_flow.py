@@ -124,17 +124,23 @@ def test_get_customer_info(sample_customer):
     assert "customer_id" in customer_info
     assert customer_info["customer_id"] == sample_customer["customer_id"]
 
-@patch('flow.get_documents_from_vector_db.WeaviateService')
-def test_get_documents_from_vector_db(mock_weaviate_service, sample_search_queries, sample_document_objects):
+@patch('flow.get_documents_from_vector_db.get_product_code_index')
+@patch('flow.get_documents_from_vector_db.get_retrieval_service')
+def test_get_documents_from_vector_db(mock_get_weaviate_service, mock_get_product_code_index, sample_search_queries, sample_document_objects):
     """Test získávání dokumentů z vektorové databáze včetně deduplikace."""
-    # Setup the mock WeaviateService 
-    mock_instance = mock_weaviate_service.return_value
+    # Setup the mock shared WeaviateService
+    mock_instance = mock_get_weaviate_service.return_value
     
     # Configure the search_products method to return different documents for each query
-    mock_instance.search_products.side_effect = [
-        [sample_document_objects[0], sample_document_objects[2]],  # First query - includes duplicate content
-        [sample_document_objects[1]]  # Second query
-    ]
+    # (dotazy běží souběžně, proto výsledek určujeme podle dotazu, ne podle pořadí volání)
+    results_by_query = {
+        "iPhone 15": [sample_document_objects[0], sample_document_objects[2]],  # First query - includes duplicate content
+        "iPhone Pro Max": [sample_document_objects[1]]  # Second query
+    }
+    mock_instance.search_products.side_effect = lambda search_params, limit: results_by_query[search_params.query]
+
+    # Second query has a product code - it is answered from the product code index
+    mock_get_product_code_index.return_value.lookup.return_value = {"APP-IP15PM": [sample_document_objects[1]]}
     
     # Call the function under test
     documents = get_documents_from_vector_db(search_queries=sample_search_queries)
@@ -144,12 +150,98 @@ def test_get_documents_from_vector_db(mock_weaviate_service, sample_search_queri
     assert documents[0].name == "iPhone 15 Pro Max 256GB"
     assert documents[1].name == "iPhone 15 Pro 128GB"
     
-    # Verify WeaviateService was used correctly
-    mock_weaviate_service.assert_called_once()
-    assert mock_instance.search_products.call_count == 2  # Called for each query
-    mock_instance.close.assert_called_once()  # Service should be closed
+    # Verify the shared WeaviateService was used correctly
+    mock_get_weaviate_service.assert_called_once()
+    assert mock_instance.search_products.call_count == 1  # Only the query without product code goes to vector search
+    mock_instance.close.assert_not_called()  # Shared service stays open for the next message
+
+def test_lookup_product_code_queries_applies_price_filter(sample_document_objects):
+    """Test, že dotazy s kódem produktu respektují i cenové filtry a zachovají pořadí."""
+    from flow.get_documents_from_vector_db import lookup_product_code_queries
+
+    index = MagicMock()
+    cheaper_variant = sample_document_objects[0].model_copy(update={"name": "Varianta", "price": 25000.0})
+    index.lookup.return_value = {"APP-IP15PM-256": [sample_document_objects[0], cheaper_variant]}
+    queries = [
+        SearchQuery(query="x", product_code="APP-IP15PM-256"),
+        SearchQuery(query="x", product_code="APP-IP15PM-256", max_price=30000),
+        SearchQuery(query="x", product_code="UNKNOWN"),
+    ]
+
+    results = lookup_product_code_queries(index, queries)
+
+    assert [len(result) for result in results] == [2, 1, 0]
+    assert results[0][0].product_code == "APP-IP15PM-256"
+    assert results[1][0].name == "Varianta"
+
+def test_search_all_queries_respects_concurrency_limit(sample_search_queries):
+    """Test, že počet souběžných dotazů nepřekročí nastavený limit a pořadí výsledků odpovídá dotazům."""
+    import threading, time
+    from flow.get_documents_from_vector_db import search_all_queries
+
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def slow_search(search_params, limit):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return [Document(name=search_params.query)]
+
+    service = MagicMock()
+    service.search_products.side_effect = slow_search
+    queries = [SearchQuery(query=f"dotaz {i}") for i in range(6)]
+
+    results = search_all_queries(service, queries, limit=5, max_concurrency=2, timeout=5)
+
+    assert [result[0].name for result in results] == [f"dotaz {i}" for i in range(6)]
+    assert active["max"] == 2
+
+def test_search_all_queries_skips_query_after_timeout():
+    """Test, že pomalý dotaz nezdrží ostatní a po timeoutu se přeskočí."""
+    import time
+    from flow.get_documents_from_vector_db import search_all_queries
+
+    def search(search_params, limit):
+        if search_params.query == "pomalý":
+            time.sleep(1)
+        return [Document(name=search_params.query)]
+
+    service = MagicMock()
+    service.search_products.side_effect = search
+    queries = [SearchQuery(query="rychlý"), SearchQuery(query="pomalý")]
+
+    start = time.monotonic()
+    results = search_all_queries(service, queries, limit=5, max_concurrency=2, timeout=0.2)
 
-@patch('flow.get_documents_from_vector_db.WeaviateService')
+    assert time.monotonic() - start < 0.8
+    assert results[0][0].name == "rychlý"
+    assert results[1] == []
+
+def test_search_all_queries_deadline_covers_queued_queries():
+    """Test, že společný deadline platí i pro dotazy čekající na volné vlákno."""
+    import time
+    from flow.get_documents_from_vector_db import search_all_queries
+
+    def search(search_params, limit):
+        time.sleep(0.15)
+        return [Document(name=search_params.query)]
+
+    service = MagicMock()
+    service.search_products.side_effect = search
+    queries = [SearchQuery(query=f"dotaz {i}") for i in range(4)]
+
+    start = time.monotonic()
+    results = search_all_queries(service, queries, limit=5, max_concurrency=1, timeout=0.25)
+
+    assert time.monotonic() - start < 0.4
+    assert results[0][0].name == "dotaz 0"
+    assert results[2:] == [[], []]
+
+@patch('flow.get_documents_from_vector_db.get_retrieval_service')
 @patch('flow.generate_search_queries.Models')
 def test_flow_integration(mock_models_class, mock_weaviate_service, sample_context, sample_customer, sample_chat_history, sample_document_objects):
     """Integration test for the full prompt flow"""
@@ -221,7 +313,7 @@ def test_flow_integration(mock_models_class, mock_weaviate_service, sample_conte
     assert hasattr(documents[0], "content")
     
     # Step 4: Generate final answer
-    with patch('flow.get_answer._extract_token_counts', return_value=(200, 100)):
+    with patch('utils.models._extract_token_counts', return_value=(200, 100)):
         answer_output = get_answer(
             customer_input=customer_input,
             context=sample_context,
@@ -244,3 +336,45 @@ def test_flow_integration(mock_models_class, mock_weaviate_service, sample_conte
     # Verify only the expected service calls
     mock_models_class.get_model.assert_called()
     # We're not calling get_documents_from_vector_db, so we shouldn't verify its mocks
+
+def test_answer_cache_hit_skips_hot_model(sample_context, sample_customer, sample_document_objects):
+    """Test, že při zásahu sémantické cache se nevolá "hot" model"""
+    cached_response = {"answer": "Evo, iPhone 15 Pro Max stojí 38 990 Kč.", "recommended_products": []}
+    answer_cache = MagicMock()
+    answer_cache.lookup.return_value = cached_response
+
+    with patch('flow.get_answer.ANSWER_CACHE_ENABLED', True), \
+         patch('flow.get_answer.get_answer_cache', return_value=answer_cache), \
+         patch('flow.get_answer.Models') as mock_models:
+        result = get_answer(
+            customer_input="Kolik stojí iPhone 15 Pro Max?",
+            documents=sample_document_objects,
+            context=sample_context,
+            customer=sample_customer,
+            chat_history=[],
+            llm_provider="OPENAI",
+            search_queries=[],
+            token_manager=TokenManager()
+        )
+
+    mock_models.get_model.assert_not_called()
+    answer_cache.store.assert_not_called()
+    assert result["response"]["answer"] == cached_response["answer"]
+    assert len(result["chat_history"]) == 1
+
+def test_query_planner_bypasses_mini_model(sample_context):
+    """Test, že jednoduchý dotaz naplánuje plánovač a "mini" model se nevolá"""
+    with patch('flow.generate_search_queries.Models') as mock_models:
+        output = generate_search_queries(
+            customer_input="MacBook Air 13 M3 do 35 000",
+            chat_history=[],
+            context=sample_context,
+            llm_provider="OPENAI"
+        )
+
+    mock_models.get_model.assert_not_called()
+    assert output.search_queries[0].query == "MacBook Air 13 M3"
+    assert output.search_queries[0].max_price == pytest.approx(35000 * 1.15)
+    # záložní dotaz s celým vstupem zůstává
+    assert output.search_queries[-1].query == "MacBook Air 13 M3 do 35 000"
+    assert output.token_manager.tokens == []
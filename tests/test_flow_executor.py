@@ -0,0 +1,227 @@
+# tests/test_flow_executor.py
+import pytest
+from unittest.mock import patch
+
+from benchmarks.fakes import fake_backends
+from utils.flow_executor import FlowExecutor, get_flow_executor, parse_reference, resolve_path
+
+
+TOOL_MODULE = '''
+import time
+from promptflow.core import tool
+
+@tool
+def {name}({args}):
+    time.sleep({delay})
+    return {body}
+'''
+
+
+@pytest.fixture
+def simple_flow_dir(tmp_path):
+    """Malý testovací flow se dvěma nezávislými uzly a jedním koncovým uzlem."""
+    flow_dir = tmp_path / "simple_flow"
+    flow_dir.mkdir()
+
+    (flow_dir / "node_a.py").write_text(TOOL_MODULE.format(name="node_a", args="text: str", delay=0.2, body="{'upper': text.upper()}"), encoding="utf-8")
+    (flow_dir / "node_b.py").write_text(TOOL_MODULE.format(name="node_b", args="items: list", delay=0.3, body="len(items)"), encoding="utf-8")
+    (flow_dir / "node_c.py").write_text(TOOL_MODULE.format(name="node_c", args="upper: str, count: int", delay=0.05, body="{'result': f'{upper}-{count}'}"), encoding="utf-8")
+
+    (flow_dir / "flow.dag.yaml").write_text('''
+inputs:
+  text:
+    type: string
+  items:
+    type: list
+    default: [1, 2, 3]
+outputs:
+  result:
+    type: string
+    reference: ${node_c.output.result}
+nodes:
+- name: node_c
+  type: python
+  source:
+    type: code
+    path: node_c.py
+  inputs:
+    upper: ${node_a.output.upper}
+    count: ${node_b.output}
+- name: node_a
+  type: python
+  source:
+    type: code
+    path: node_a.py
+  inputs:
+    text: ${inputs.text}
+- name: node_b
+  type: python
+  source:
+    type: code
+    path: node_b.py
+  inputs:
+    items: ${inputs.items}
+''', encoding="utf-8")
+    return str(flow_dir)
+
+
+def test_parse_reference():
+    """Test rozpoznání referencí ${...}"""
+    assert parse_reference("${inputs.customer}") == "inputs.customer"
+    assert parse_reference("${get_answer.output.response}") == "get_answer.output.response"
+    assert parse_reference("plain value") is None
+    assert parse_reference(42) is None
+
+
+def test_resolve_path_dict_and_attributes():
+    """Test průchodu výstupem přes klíče slovníku i atributy objektu"""
+    class Output:
+        search_queries = ["a", "b"]
+
+    assert resolve_path({"response": {"answer": "ok"}}, ["response", "answer"]) == "ok"
+    assert resolve_path(Output(), ["search_queries"]) == ["a", "b"]
+    assert resolve_path("value", []) == "value"
+
+
+def test_executor_runs_nodes_in_dependency_order(simple_flow_dir):
+    """Test, že uzly běží až po svých závislostech a výstupy odpovídají DAGu"""
+    executor = FlowExecutor(simple_flow_dir, concurrent=False)
+
+    assert [node.name for node in executor.nodes][-1] == "node_c"
+
+    outputs = executor.run({"text": "iphone"})
+    assert outputs == {"result": "IPHONE-3"}
+
+
+def test_executor_concurrent_mode_runs_independent_nodes_in_parallel(simple_flow_dir):
+    """Test souběžného běhu nezávislých uzlů a výpočtu kritické cesty"""
+    executor = FlowExecutor(simple_flow_dir, concurrent=True)
+
+    outputs, stats = executor.run_with_stats({"text": "iphone"})
+
+    assert outputs == {"result": "IPHONE-3"}
+    assert stats.concurrent is True
+    assert stats.critical_path == ["node_b", "node_c"]
+    assert stats.critical_path_latency == pytest.approx(0.35, abs=0.1)
+    assert stats.sequential_latency == pytest.approx(0.55, abs=0.1)
+    # node_a a node_b běží současně, celý flow tedy trvá zhruba jako kritická cesta
+    assert stats.wall_time < stats.sequential_latency - 0.1
+    assert stats.node_starts["node_c"] >= stats.node_starts["node_b"] + stats.node_durations["node_b"] - 0.01
+
+
+def test_executor_sequential_mode_stats(simple_flow_dir):
+    """Test časování v sekvenčním režimu"""
+    executor = FlowExecutor(simple_flow_dir, concurrent=False)
+
+    _, stats = executor.run_with_stats({"text": "iphone"})
+
+    assert stats.concurrent is False
+    assert stats.critical_path == ["node_b", "node_c"]
+    assert stats.wall_time >= stats.sequential_latency - 0.01
+
+
+def test_executor_concurrent_mode_propagates_node_errors(tmp_path):
+    """Test, že chyba v uzlu se při souběžném běhu propaguje volajícímu"""
+    flow_dir = tmp_path / "failing_flow"
+    flow_dir.mkdir()
+    (flow_dir / "broken.py").write_text(
+        "from promptflow.core import tool\n\n@tool\ndef broken(text: str):\n    raise RuntimeError('boom')\n",
+        encoding="utf-8"
+    )
+    (flow_dir / "flow.dag.yaml").write_text(
+        "inputs:\n  text:\n    type: string\noutputs:\n  out:\n    type: string\n    reference: ${broken.output}\n"
+        "nodes:\n- name: broken\n  type: python\n  source:\n    type: code\n    path: broken.py\n  inputs:\n    text: ${inputs.text}\n",
+        encoding="utf-8"
+    )
+
+    with pytest.raises(RuntimeError, match="boom"):
+        FlowExecutor(str(flow_dir), concurrent=True).run({"text": "x"})
+
+
+def test_executor_does_not_mutate_caller_inputs(simple_flow_dir):
+    """Test, že flow pracuje s kopií vstupů (stejně jako pf.test)"""
+    executor = FlowExecutor(simple_flow_dir)
+    items = [1, 2]
+
+    outputs = executor.run({"text": "a", "items": items})
+    assert outputs == {"result": "A-2"}
+    assert items == [1, 2]
+
+
+def test_executor_missing_required_input(simple_flow_dir):
+    """Test chybějícího povinného vstupu bez výchozí hodnoty"""
+    executor = FlowExecutor(simple_flow_dir)
+    with pytest.raises(ValueError, match="text"):
+        executor.run({})
+
+
+def test_get_flow_executor_is_shared():
+    """Test, že get_flow_executor vrací jednu instanci pro celý proces"""
+    with patch("utils.flow_executor._executor", None):
+        first = get_flow_executor()
+        second = get_flow_executor()
+    assert first is second
+    assert [node.name for node in first.nodes][-1] == "get_answer"
+
+
+def test_executor_runs_real_flow_with_fakes():
+    """Test spuštění skutečného flow.dag.yaml s deterministickými náhradami LLM a Weaviate"""
+    with fake_backends(), patch("utils.models.PricingManager.calculate_cost", return_value=0.5):
+        executor = FlowExecutor()
+        chat_history = []
+        outputs = executor.run({
+            "customer_input": "Kolik stojí iPhone 15 Pro Max?",
+            "chat_history": chat_history,
+            "context": {"page_title": "Domů", "current_url": "https://eshop.cz/", "language": "CS"},
+            "customer": {},
+            "llm_provider": "OPENAI",
+        })
+
+    assert set(outputs) == {"response", "chat_history", "context", "customer", "cost", "search_queries", "documents", "ttft", "prompt_budget"}
+    assert outputs["ttft"] is None
+    assert isinstance(outputs["response"]["answer"], str)
+    assert outputs["response"]["recommended_products"][0]["image_url"].startswith("https://image.alza.cz/")
+    assert len(outputs["chat_history"]) == 1
+    assert chat_history == []
+    assert outputs["cost"] == 0.5
+
+
+def test_executor_stream_forwards_answer_tokens_from_real_flow():
+    """Test streamování odpovědi po tokenech ze skutečného flow (náhrady LLM streamují JSON po kouscích)"""
+    with fake_backends(), patch("utils.models.PricingManager.calculate_cost", return_value=0.5):
+        executor = FlowExecutor()
+        events = list(executor.stream({
+            "customer_input": "Kolik stojí iPhone 15 Pro Max?",
+            "chat_history": [],
+            "context": {"page_title": "Domů", "current_url": "https://eshop.cz/", "language": "CS"},
+            "customer": {},
+            "llm_provider": "OPENAI",
+        }))
+
+    deltas = [event.data for event in events if event.type == "answer_delta"]
+    outputs, stats = events[-1].data
+
+    assert events[-1].type == "result"
+    assert len(deltas) > 1
+    assert "".join(deltas) == outputs["response"]["answer"]
+    assert {event.type for event in events} <= {"answer_delta", "ttft", "result"}
+    assert outputs["ttft"] is not None
+    assert stats.time_to_first_token is not None and stats.time_to_first_token > 0
+
+
+def test_executor_stream_raises_node_errors(tmp_path):
+    """Test, že chyba uzlu při streamování se vyvolá v iterujícím vlákně"""
+    flow_dir = tmp_path / "failing_flow"
+    flow_dir.mkdir()
+    (flow_dir / "broken.py").write_text(
+        "from promptflow.core import tool\n\n@tool\ndef broken(text: str):\n    raise RuntimeError('boom')\n",
+        encoding="utf-8"
+    )
+    (flow_dir / "flow.dag.yaml").write_text(
+        "inputs:\n  text:\n    type: string\noutputs:\n  out:\n    type: string\n    reference: ${broken.output}\n"
+        "nodes:\n- name: broken\n  type: python\n  source:\n    type: code\n    path: broken.py\n  inputs:\n    text: ${inputs.text}\n",
+        encoding="utf-8"
+    )
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(FlowExecutor(str(flow_dir)).stream({"text": "x"}))
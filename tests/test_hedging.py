@@ -0,0 +1,173 @@
+# tests/test_hedging.py
+import asyncio
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+
+from utils.hedging import HedgedChatModel, LatencyTracker
+from utils.models import Models, TokenManager, record_usage
+
+
+SETTINGS = {"enabled": True, "secondary_provider": "GOOGLE", "initial_delay": 0.05, "min_delay": 0.01, "max_delay": 1.0, "percentile": 95}
+
+
+class FakeStructured(Runnable):
+    """Strukturovaný výstup s nastavitelnou latencí (include_raw=True tvar)."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def invoke(self, input, config=None, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.owner.calls += 1
+        try:
+            await asyncio.sleep(self.owner.latency)
+        except asyncio.CancelledError:
+            self.owner.cancelled = True
+            raise
+        if self.owner.fail:
+            raise RuntimeError("provider nedostupný")
+        raw = AIMessage(content="", usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110})
+        return {"raw": raw, "parsed": {"answer": self.owner.model_name}, "parsing_error": None}
+
+    async def astream(self, input, config=None, **kwargs):
+        self.owner.calls += 1
+        try:
+            await asyncio.sleep(self.owner.latency)
+        except asyncio.CancelledError:
+            self.owner.cancelled = True
+            raise
+        yield {"raw": AIMessageChunk(content='{"answer": "')}
+        yield {"raw": AIMessageChunk(content=self.owner.model_name + '"}')}
+        yield {"parsed": {"answer": self.owner.model_name}, "parsing_error": None}
+
+
+class FakeChatModel:
+    def __init__(self, model_name, latency, fail=False):
+        self.model_name = model_name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+
+    def with_structured_output(self, schema, include_raw=False):
+        return FakeStructured(self)
+
+
+def make_hedged(primary, secondary, **settings):
+    return HedgedChatModel(primary, secondary, node="get_answer", settings={**SETTINGS, **settings}, tracker=LatencyTracker())
+
+
+def test_fast_primary_does_not_hedge():
+    """Test, že rychlý primární provider odpoví sám a sekundární se nevolá"""
+    primary, secondary = FakeChatModel("gpt-test", 0.0), FakeChatModel("gemini-test", 0.0)
+    output = make_hedged(primary, secondary).with_structured_output(dict, include_raw=True).invoke("prompt")
+
+    assert output["parsed"] == {"answer": "gpt-test"}
+    assert output["model_name"] == "gpt-test"
+    assert output["hedge_usage"] == []
+    assert secondary.calls == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    """Test, že pomalý primární provider je po zpoždění předstižen sekundárním a zrušen"""
+    primary, secondary = FakeChatModel("gpt-test", 1.0), FakeChatModel("gemini-test", 0.0)
+    hedged = make_hedged(primary, secondary)
+    output = hedged.with_structured_output(dict, include_raw=True).invoke("prompt " * 40)
+
+    assert output["parsed"] == {"answer": "gemini-test"}
+    assert output["model_name"] == "gemini-test"
+    assert primary.cancelled
+    assert hedged.secondary_wins == 1
+    [loser] = output["hedge_usage"]
+    assert loser["model"] == "gpt-test"
+    assert loser["input_tokens"] > 0 and loser["output_tokens"] == 0
+
+
+def test_cancelled_primary_latency_is_recorded_as_lower_bound():
+    """Test, že zrušené primární volání se započítá dobou do zrušení, takže pomalý provider zvedá zpoždění"""
+    primary, secondary = FakeChatModel("gpt-test", 1.0), FakeChatModel("gemini-test", 0.0)
+    hedged = make_hedged(primary, secondary)
+    initial_delay = hedged.delay("invoke")
+    hedged.with_structured_output(dict, include_raw=True).invoke("prompt")
+    list(hedged.with_structured_output(dict, include_raw=True).stream("prompt"))
+
+    assert primary.cancelled
+    invoke_sample = hedged.tracker.percentile(hedged._latency_key("invoke"), 95, min_samples=1)
+    stream_sample = hedged.tracker.percentile(hedged._latency_key("stream"), 95, min_samples=1)
+    assert invoke_sample >= initial_delay
+    assert stream_sample >= initial_delay
+
+
+    # bez cenzurovaných měření by p95 zůstalo na rychlých vzorcích, i když primární volání pomalá zrušujeme
+    slow = make_hedged(FakeChatModel("gpt-test", 1.0), FakeChatModel("gemini-test", 0.2))
+    for _ in range(20):
+        slow.record_latency("invoke", 0.02)
+    assert slow.delay("invoke") == 0.02
+    for _ in range(2):
+        slow.with_structured_output(dict, include_raw=True).invoke("prompt")
+    assert slow.delay("invoke") >= 0.2
+
+
+def test_failed_primary_falls_back_to_secondary():
+    """Test, že chyba primárního providera před zpožděním spustí sekundární volání hned"""
+    primary, secondary = FakeChatModel("gpt-test", 0.0, fail=True), FakeChatModel("gemini-test", 0.0)
+    output = make_hedged(primary, secondary, initial_delay=5.0, max_delay=5.0).with_structured_output(dict, include_raw=True).invoke("prompt")
+
+    assert output["model_name"] == "gemini-test"
+
+
+def test_delay_follows_observed_p95():
+    """Test, že zpoždění vychází z p95 naměřené latence a drží se v mezích"""
+    hedged = make_hedged(FakeChatModel("gpt-test", 0), FakeChatModel("gemini-test", 0), min_delay=0.2, max_delay=0.9)
+    assert hedged.delay("invoke") == 0.2  # initial_delay 0.05 zvednuté na min_delay
+
+    for latency in [0.1] * 18 + [0.5, 0.6]:
+        hedged.record_latency("invoke", latency)
+    assert hedged.delay("invoke") == 0.5
+
+    for _ in range(20):
+        hedged.record_latency("invoke", 5.0)
+    assert hedged.delay("invoke") == 0.9
+
+
+def test_hedged_stream_yields_winner_chunks_and_usage():
+    """Test, že při streamování vyhraje provider s prvním chunkem a na konci přijdou metadata"""
+    primary, secondary = FakeChatModel("gpt-test", 1.0), FakeChatModel("gemini-test", 0.0)
+    chunks = list(make_hedged(primary, secondary).with_structured_output(dict, include_raw=True).stream("prompt"))
+
+    assert chunks[-2]["parsed"] == {"answer": "gemini-test"}
+    assert chunks[-1]["model_name"] == "gemini-test"
+    assert chunks[-1]["hedge_usage"][0]["model"] == "gpt-test"
+    assert primary.cancelled
+
+
+def test_record_usage_counts_both_calls():
+    """Test, že TokenManager zaznamená vítěze i poražené volání"""
+    token_manager = TokenManager()
+    primary, secondary = FakeChatModel("gpt-test", 1.0), FakeChatModel("gemini-test", 0.0)
+    hedged = make_hedged(primary, secondary)
+    output = hedged.with_structured_output(dict, include_raw=True).invoke("prompt")
+
+    record_usage(token_manager, hedged, output)
+
+    assert [token.model for token in token_manager.tokens] == ["gemini-test", "gpt-test"]
+    assert token_manager.tokens[0].input_tokens == 100
+
+
+def test_get_model_wraps_only_when_enabled():
+    """Test, že get_model obalí model hedgingem jen pro uzel se zapnutým hedgingem"""
+    config = {"get_answer": SETTINGS, "generate_search_queries": {**SETTINGS, "enabled": False}}
+    fakes = {"openai_hot": FakeChatModel("gpt-test", 0), "gemini_hot": FakeChatModel("gemini-test", 0),
+             "openai_mini": FakeChatModel("gpt-mini", 0)}
+    with patch("utils.models.HEDGING_CONFIG", config), patch.multiple(Models, **fakes):
+        hedged = Models.get_model("OPENAI", "hot", hedge="get_answer")
+        assert isinstance(hedged, HedgedChatModel)
+        assert hedged.secondary_name == "gemini-test"
+
+        assert Models.get_model("OPENAI", "mini", hedge="generate_search_queries") is fakes["openai_mini"]
+        assert Models.get_model("OPENAI", "hot") is fakes["openai_hot"]
+        # stejný sekundární provider jako primární - bez hedgingu
+        assert Models.get_model("GOOGLE", "hot", hedge="get_answer") is fakes["gemini_hot"]
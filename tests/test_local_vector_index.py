@@ -0,0 +1,139 @@
+# tests/test_local_vector_index.py
+import os, pytest
+from unittest.mock import MagicMock, patch
+from utils.catalog_version import CatalogVersion, bump_catalog_version
+from utils.local_vector_index import LocalVectorIndex, current_index_dir, export_weaviate_collection, update_local_index_prices, write_local_index
+from utils.retrieval import get_retrieval_service
+from utils.weaviate_service import SearchQuery
+
+
+DOCUMENTS = [
+    {"name": "iPhone 16 Pro", "content": "iPhone 16 Pro", "url": "u1", "product_code": "RI001", "price": 29990.0},
+    {"name": "iPhone 16", "content": "iPhone 16", "url": "u2", "product_code": "RI002", "price": 22990.0},
+    {"name": "AirPods Pro 2", "content": "AirPods Pro 2", "url": "u3", "product_code": "JA001", "price": 5990.0},
+    {"name": "Pouzdro", "content": "Pouzdro bez ceny", "url": "u4", "product_code": "PO001", "price": None},
+]
+VECTORS = [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0], [0.5, 0.5, 0.0]]
+QUERY_VECTORS = {"iPhone": [1.0, 0.0, 0.0], "sluchátka": [0.0, 2.0, 0.0]}
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    path = str(tmp_path / "local_index")
+    write_local_index(path, VECTORS, DOCUMENTS, model="text-embedding-3-small")
+    return path
+
+
+def make_index(index_dir, version_file=None):
+    embedding_cache = MagicMock()
+    embedding_cache.get_embedding.side_effect = lambda text, model: QUERY_VECTORS[text]
+    catalog_version = CatalogVersion(version_file, check_interval=0) if version_file else MagicMock(**{"current.return_value": 0})
+    return LocalVectorIndex(index_dir, embedding_cache=embedding_cache, catalog_version=catalog_version)
+
+
+def test_local_index_search_orders_by_cosine_similarity(index_dir):
+    """Test, že výsledky jsou seřazené podle kosinové podobnosti (nezávisle na délce vektoru dotazu)"""
+    index = make_index(index_dir)
+
+    assert [doc.name for doc in index.search_products(SearchQuery(query="iPhone"), limit=2)] == ["iPhone 16 Pro", "iPhone 16"]
+    assert index.search_products(SearchQuery(query="sluchátka"), limit=1)[0].name == "AirPods Pro 2"
+    index.embedding_cache.get_embedding.assert_called_with("sluchátka", model="text-embedding-3-small")
+
+
+def test_local_index_applies_filters_as_masks(index_dir):
+    """Test filtrů ceny a kódu produktu (produkty bez ceny cenový filtr nesplní)"""
+    index = make_index(index_dir)
+
+    results = index.search_products(SearchQuery(query="iPhone", max_price=25000), limit=5)
+    assert [doc.name for doc in results] == ["iPhone 16", "AirPods Pro 2"]
+
+    results = index.search_products(SearchQuery(query="iPhone", product_code="JA001"), limit=5)
+    assert [doc.product_code for doc in results] == ["JA001"]
+
+    assert index.search_products(SearchQuery(query="iPhone", min_price=100000), limit=5) == []
+
+
+def test_local_index_reloads_after_catalog_change(index_dir, tmp_path):
+    """Test, že po změně verze katalogu se index načte znovu z nového exportu"""
+    version_file = str(tmp_path / "catalog_version.json")
+    index = make_index(index_dir, version_file)
+    assert len(index.search_products(SearchQuery(query="iPhone"), limit=10)) == 4
+
+    write_local_index(index_dir, VECTORS[:1], DOCUMENTS[:1], model="text-embedding-3-small")
+    bump_catalog_version(version_file)
+
+    assert [doc.name for doc in index.search_products(SearchQuery(query="iPhone"), limit=10)] == ["iPhone 16 Pro"]
+
+
+def test_local_index_reload_publishes_new_snapshot(index_dir, tmp_path):
+    """Test, že znovunačtení nahradí celý stav najednou a rozběhnuté hledání dočte starý stav"""
+    version_file = str(tmp_path / "catalog_version.json")
+    index = make_index(index_dir, version_file)
+    assert len(index.fetch_all_documents()) == 4
+    old = index.snapshot
+
+    write_local_index(index_dir, VECTORS[:1], DOCUMENTS[:1], model="text-embedding-3-small")
+    bump_catalog_version(version_file)
+    index.fetch_all_documents()
+
+    assert index.snapshot is not old
+    assert len(old.vectors) == len(old.documents) == len(old.prices) == len(old.product_codes) == 4
+    assert len(index.snapshot.vectors) == len(index.snapshot.documents) == len(index.snapshot.prices) == 1
+
+
+def test_local_index_publishes_versions_through_single_pointer(index_dir):
+    """Test, že nová verze (export i úprava cen) vznikne ve vlastním adresáři a přepne se jen soubor CURRENT"""
+    first = current_index_dir(index_dir)
+    index = make_index(index_dir)
+
+    assert update_local_index_prices({"RI001": 27990.0}, index_dir) == 1
+    second = current_index_dir(index_dir)
+    assert second != first
+    assert sorted(os.listdir(first)) == sorted(os.listdir(second)) == ["documents.json", "meta.json", "vectors.f32"]
+    # načtený stav dál čte svou verzi, nová verze se projeví až po změně katalogu
+    assert index.fetch_by_product_codes(["RI001"])[0].price == 29990.0
+    assert make_index(index_dir).fetch_by_product_codes(["RI001"])[0].price == 27990.0
+
+    write_local_index(index_dir, VECTORS[:1], DOCUMENTS[:1], model="text-embedding-3-small")
+    assert not os.path.exists(first)  # drží se jen aktuální a předchozí verze
+    assert os.path.exists(second)
+
+
+def test_local_index_retries_failed_reload(index_dir, tmp_path):
+    """Test, že neúspěšné načtení nové verze nepřevezme verzi katalogu a zkusí se znovu"""
+    version_file = str(tmp_path / "catalog_version.json")
+    index = make_index(index_dir, version_file)
+    assert len(index.fetch_all_documents()) == 4
+
+    write_local_index(index_dir, VECTORS[:1], DOCUMENTS[:1], model="text-embedding-3-small")
+    bump_catalog_version(version_file)
+    with patch.object(LocalVectorIndex, "_load", side_effect=OSError("disk")):
+        assert len(index.fetch_all_documents()) == 4
+
+    assert [doc.name for doc in index.fetch_all_documents()] == ["iPhone 16 Pro"]
+
+
+def test_export_weaviate_collection(tmp_path):
+    """Test exportu vektorů a vlastností z kolekce Weaviate"""
+    collection = MagicMock()
+    collection.iterator.return_value = [
+        MagicMock(vector={"default": vector}, properties=properties)
+        for vector, properties in zip(VECTORS, DOCUMENTS)
+    ]
+    index_dir = str(tmp_path / "exported")
+
+    assert export_weaviate_collection(collection, index_dir, model="text-embedding-3-small") == 4
+    collection.iterator.assert_called_once()
+    assert collection.iterator.call_args.kwargs["include_vector"] is True
+    assert make_index(index_dir).search_products(SearchQuery(query="sluchátka"), limit=1)[0].product_code == "JA001"
+
+
+def test_get_retrieval_service_selects_backend():
+    """Test výběru vyhledávacího backendu podle konfigurace"""
+    with patch("utils.retrieval.get_weaviate_service") as mock_weaviate, \
+         patch("utils.local_vector_index.get_local_vector_index") as mock_local:
+        assert get_retrieval_service("weaviate") is mock_weaviate.return_value
+        assert get_retrieval_service("local") is mock_local.return_value
+
+    with pytest.raises(ValueError):
+        get_retrieval_service("elasticsearch")
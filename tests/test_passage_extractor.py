@@ -0,0 +1,60 @@
+# tests/test_passage_extractor.py
+from utils.passage_extractor import extract_passages, fold_diacritics, split_sections, tokenize
+from utils.weaviate_service import Document
+
+
+MACBOOK_CONTENT = "\n".join([
+    "MacBook Air 13 M3 je lehký notebook s čipem Apple M3.",
+    "Displej: Liquid Retina 13,6\" s rozlišením 2560 × 1664 a jasem 500 nitů.",
+    "Procesor: 8jádrové CPU a až 10jádrové GPU.",
+    "Paměť: 8 GB sjednocené paměti, SSD 256 GB.",
+    "Baterie: výdrž až 18 hodin přehrávání videa.",
+    "Porty: 2× Thunderbolt / USB 4, MagSafe 3, 3,5mm jack.",
+    "Hmotnost: 1,24 kg, tloušťka 1,13 cm.",
+    "Barvy: temně inkoustová, hvězdně bílá, stříbrná, vesmírně šedá.",
+    "Kamera: 1080p FaceTime HD, tři mikrofony, čtyři reproduktory.",
+    "Klávesnice: Magic Keyboard s Touch ID.",
+])
+
+
+def test_fold_diacritics_and_tokenize_match_inflected_forms():
+    """Test, že odstranění diakritiky a stemming spojí různé tvary slov"""
+    assert fold_diacritics("Jaký typ DISPLEJE") == "jaky typ displeje"
+    assert set(tokenize("Jaký displej?")) & set(tokenize("Displeje: Liquid Retina")) == {"disple"}
+
+
+def test_split_sections_merges_short_pieces():
+    """Test, že krátké sekce se spojí do pasáží nepřekračujících maximální délku"""
+    passages = split_sections("A; B; C\nD", max_chars=5)
+    assert passages == ["A B C", "D"]
+    assert all(len(passage) <= 80 for passage in split_sections(MACBOOK_CONTENT, max_chars=80))
+
+
+def test_extract_passages_keeps_relevant_sections():
+    """Test, že u dotazu na displej zůstane pasáž o displeji a obsah se výrazně zkrátí"""
+    document = Document(name="MacBook Air 13 M3", content=MACBOOK_CONTENT, product_code="NL250b1a1a")
+    [extracted], stats = extract_passages(
+        [document], "Jaký typ displeje má MacBook Air 13 M3?", ["MacBook Air M3 displej"],
+        top_k=2, max_chars=80, min_content_chars=100,
+    )
+
+    assert "Liquid Retina" in extracted.content
+    assert "Hmotnost" not in extracted.content
+    assert stats["chars_after"] * 2 < stats["chars_before"]
+    # původní dokument zůstane beze změny
+    assert document.content == MACBOOK_CONTENT
+
+
+def test_extract_passages_leaves_short_content_untouched():
+    """Test, že krátký obsah se nezkracuje"""
+    document = Document(name="AirTag", content="AirTag pro vyhledávání věcí.")
+    [extracted], stats = extract_passages([document], "Kolik stojí AirTag?", min_content_chars=600)
+    assert extracted.content == document.content
+    assert stats["chars_before"] == stats["chars_after"]
+
+
+def test_extract_passages_without_overlap_keeps_beginning():
+    """Test, že bez shody s dotazem zůstane začátek obsahu"""
+    document = Document(name="MacBook Air 13 M3", content=MACBOOK_CONTENT)
+    [extracted], _ = extract_passages([document], "xyz", top_k=1, max_chars=80, min_content_chars=100)
+    assert extracted.content.startswith("MacBook Air 13 M3 je lehký notebook")
@@ -0,0 +1,170 @@
+# tests/test_price_updater.py
+import os, json
+from unittest.mock import MagicMock
+
+from utils.catalog_importer import ImportObject, WeaviateBatchWriter
+from utils.catalog_version import CatalogVersion, CatalogVersionGuard, bump_catalog_version
+from utils.local_vector_index import current_index_dir, write_local_index
+from utils.price_updater import PriceUpdate, PriceUpdater, PriceUpdateReport, read_price_feed
+
+
+class FakeWriter:
+    """Writer nad slovníkem UUID -> objekt; `update` slučuje properties jako PATCH ve Weaviate."""
+
+    def __init__(self, objects, reject=None):
+        self.objects = {obj.uuid: obj for obj in objects}
+        self.updated = []
+        self.fetches = []
+        self.calls = 0
+        self.reject = reject or (lambda call, obj: None)
+
+    def fetch_by_product_codes(self, product_codes):
+        self.fetches.append(list(product_codes))
+        return [obj.model_copy() for obj in self.objects.values() if obj.properties["product_code"] in product_codes]
+
+    def update(self, objects):
+        self.calls += 1
+        failures = []
+        for obj in objects:
+            message = self.reject(self.calls, obj)
+            if message:
+                failures.append((obj, message))
+                continue
+            self.updated.append(obj)
+            stored = self.objects[obj.uuid]
+            self.objects[obj.uuid] = stored.model_copy(update={"properties": {**stored.properties, **obj.properties}})
+        return failures
+
+
+def make_object(index, price):
+    return ImportObject(
+        row=0,
+        uuid=f"00000000-0000-0000-0000-{index:012d}",
+        properties={"uuid": f"u{index}", "name": f"Produkt {index}", "product_code": f"RI{index:03d}", "price": price, "content_hash": "c", "properties_hash": "p"},
+    )
+
+
+def make_updater(writer, tmp_path, **kwargs):
+    return PriceUpdater(writer, index_dir=str(tmp_path / "local_index"), version_path=str(tmp_path / "catalog_version.json"), **kwargs)
+
+
+def test_read_price_feed_skips_invalid_rows(tmp_path):
+    """Test načtení feedu - neplatné řádky se přeskočí, pro opakovaný kód platí poslední"""
+    path = tmp_path / "prices.csv"
+    path.write_text("product_code,price,stock\nRI001,999,3\nRI002,abc,\n,100,\nRI003,,0\nRI001,899,\nRI004,,\n", encoding="utf-8")
+    report = PriceUpdateReport()
+
+    updates = read_price_feed(str(path), report=report)
+
+    assert updates == [PriceUpdate(product_code="RI001", price=899.0), PriceUpdate(product_code="RI003", stock=0)]
+    assert (report.rows_read, report.skipped) == (6, 3)
+
+
+def test_price_updater_sends_only_changed_properties(tmp_path):
+    """Test, že se částečnou aktualizací zapíší jen změněná cena a sklad"""
+    writer = FakeWriter([make_object(1, 1000.0), make_object(2, 2000.0), make_object(3, 3000.0)])
+    updates = [
+        PriceUpdate(product_code="RI001", price=900.0),
+        PriceUpdate(product_code="RI002", price=2000.0),
+        PriceUpdate(product_code="RI003", stock=5),
+        PriceUpdate(product_code="RI404", price=1.0),
+    ]
+
+    report = make_updater(writer, tmp_path, chunk_size=2).run(updates)
+
+    assert [(obj.uuid, obj.properties) for obj in writer.updated] == [
+        (make_object(1, 0).uuid, {"price": 900.0}),
+        (make_object(3, 0).uuid, {"stock": 5}),
+    ]
+    assert writer.objects[make_object(1, 0).uuid].properties == make_object(1, 900.0).properties
+    assert writer.objects[make_object(3, 0).uuid].properties["price"] == 3000.0
+    assert writer.fetches == [["RI001", "RI002"], ["RI003", "RI404"]]
+    assert (report.updated, report.imported, report.unchanged, report.not_found) == (2, 2, 1, 1)
+
+
+def test_price_updater_retries_rate_limited_updates(tmp_path):
+    """Test, že aktualizace odmítnutá kvůli rate limitu se zopakuje a jiná chyba se započítá"""
+    def reject(call, obj):
+        if obj.uuid == make_object(1, 0).uuid and call == 1:
+            return "429 Too Many Requests"
+        if obj.uuid == make_object(2, 0).uuid:
+            return "objekt neexistuje"
+
+    writer = FakeWriter([make_object(1, 1000.0), make_object(2, 2000.0)], reject=reject)
+    updater = make_updater(writer, tmp_path)
+    updater.importer.sleep = lambda delay: None
+
+    report = updater.run([PriceUpdate(product_code="RI001", price=900.0), PriceUpdate(product_code="RI002", price=1900.0)])
+
+    assert writer.objects[make_object(1, 0).uuid].properties["price"] == 900.0
+    assert (report.imported, report.failed, report.retried) == (1, 1, 1)
+
+
+def test_price_updater_bumps_catalog_version_for_changed_products(tmp_path):
+    """Test, že verze katalogu se zvýší jen pro změněné produkty a upraví se ceny v lokálním indexu"""
+    index_dir = tmp_path / "local_index"
+    write_local_index(str(index_dir), [[1.0, 0.0], [0.0, 1.0]], [
+        {"name": "Produkt 1", "content": "Produkt 1", "url": "u1", "product_code": "RI001", "price": 1000.0},
+        {"name": "Produkt 2", "content": "Produkt 2", "url": "u2", "product_code": "RI002", "price": 2000.0},
+    ], model="text-embedding-3-small")
+    guard = CatalogVersionGuard(CatalogVersion(str(tmp_path / "catalog_version.json"), check_interval=0))
+    assert guard.poll() is None
+
+    writer = FakeWriter([make_object(1, 1000.0), make_object(2, 2000.0)])
+    make_updater(writer, tmp_path).run([PriceUpdate(product_code="RI001", price=900.0), PriceUpdate(product_code="RI002", price=2000.0)])
+
+    change = guard.poll()
+    assert change.product_codes == {"RI001"} and not change.full
+    with open(os.path.join(current_index_dir(str(index_dir)), "documents.json"), encoding="utf-8") as f:
+        documents = json.load(f)
+    assert [doc["price"] for doc in documents] == [900.0, 2000.0]
+
+
+def test_catalog_change_is_full_across_full_bump(tmp_path):
+    """Test, že mezi částečnou a úplnou změnou katalogu se hlásí změna celého katalogu"""
+    version_file = str(tmp_path / "catalog_version.json")
+    guard = CatalogVersionGuard(CatalogVersion(version_file, check_interval=0))
+    guard.poll()
+
+    bump_catalog_version(version_file, product_codes=["RI001"])
+    bump_catalog_version(version_file, product_codes=["RI002"])
+    assert guard.poll().product_codes == {"RI001", "RI002"}
+
+    bump_catalog_version(version_file, product_codes=["RI003"])
+    bump_catalog_version(version_file)
+    assert guard.poll().full
+
+
+def test_weaviate_batch_writer_fetches_by_product_codes_without_vectors():
+    """Test načtení objektů podle kódů produktů po stránkách bez vektorů"""
+    def page(index):
+        return MagicMock(uuid=f"uuid-{index}", properties={"product_code": f"RI{index:03d}"})
+
+    collection = MagicMock()
+    collection.query.fetch_objects.side_effect = [MagicMock(objects=[page(1), page(2)]), MagicMock(objects=[page(3)])]
+
+    objects = WeaviateBatchWriter(collection).fetch_by_product_codes(["RI001", "RI002", "RI003"], page_size=2)
+
+    assert [(obj.uuid, obj.properties["product_code"], obj.vector) for obj in objects] == [
+        ("uuid-1", "RI001", None), ("uuid-2", "RI002", None), ("uuid-3", "RI003", None),
+    ]
+    assert [call.kwargs["offset"] for call in collection.query.fetch_objects.call_args_list] == [0, 2]
+    assert not any(call.kwargs["include_vector"] for call in collection.query.fetch_objects.call_args_list)
+
+
+def test_weaviate_batch_writer_updates_only_given_properties():
+    """Test, že update posílá jen předané properties přes data.update a vrací selhané objekty"""
+    def update(uuid, properties):
+        if uuid == "uuid-2":
+            raise RuntimeError("429")
+
+    collection = MagicMock()
+    collection.data.update.side_effect = update
+    objects = [ImportObject(row=0, uuid="uuid-1", properties={"price": 900.0}), ImportObject(row=0, uuid="uuid-2", properties={"stock": 3})]
+
+    failures = WeaviateBatchWriter(collection, update_concurrency=2).update(objects)
+
+    assert [(obj.uuid, message) for obj, message in failures] == [("uuid-2", "429")]
+    assert sorted((call.kwargs["uuid"], call.kwargs["properties"]) for call in collection.data.update.call_args_list) == [
+        ("uuid-1", {"price": 900.0}), ("uuid-2", {"stock": 3}),
+    ]
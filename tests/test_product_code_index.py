@@ -0,0 +1,108 @@
+# tests/test_product_code_index.py
+from unittest.mock import MagicMock
+from utils.catalog_version import CatalogVersion, bump_catalog_version
+from utils.product_code_index import ProductCodeIndex
+from utils.weaviate_service import Document
+
+
+CATALOG = [
+    Document(name="iPhone 16 Pro", content="iPhone 16 Pro", product_code="RI045b1", price=29990.0),
+    Document(name="AirPods Pro 2", content="AirPods Pro 2", product_code="JA0ws84", price=5990.0),
+]
+
+
+def test_product_code_index_lookup_from_loaded_index():
+    """Test vyhledání kódu ve slovníku (i bez ohledu na velikost písmen) bez volání fetcheru"""
+    fetcher = MagicMock()
+    index = ProductCodeIndex(loader=lambda: CATALOG, fetcher=fetcher, catalog_version=MagicMock(**{"current.return_value": 0}), background=False)
+
+    found = index.lookup(["RI045b1", "ja0WS84", "NEEXISTUJE"])
+
+    assert found["RI045b1"][0].name == "iPhone 16 Pro"
+    assert found["ja0WS84"][0].name == "AirPods Pro 2"
+    assert "NEEXISTUJE" not in found
+    fetcher.assert_not_called()
+    assert index.stats()["codes"] == 2
+
+
+def test_product_code_index_uses_batched_fetch_until_loaded():
+    """Test, že dokud index není načtený, použije se jeden dávkový dotaz pro všechny kódy"""
+    fetcher = MagicMock(return_value=[CATALOG[0]])
+    index = ProductCodeIndex(loader=MagicMock(side_effect=ConnectionError("down")), fetcher=fetcher, catalog_version=MagicMock(**{"current.return_value": 0}), background=False)
+
+    found = index.lookup(["RI045b1", "JA0ws84"])
+
+    fetcher.assert_called_once_with(["RI045b1", "JA0ws84"])
+    assert list(found) == ["RI045b1"]
+    assert index.stats()["fetches"] == 1
+
+
+def test_product_code_index_refreshes_after_catalog_change(tmp_path):
+    """Test, že po importu (změně verze katalogu) se index načte znovu"""
+    version_file = str(tmp_path / "catalog_version.json")
+    catalog = list(CATALOG)
+    index = ProductCodeIndex(loader=lambda: catalog, fetcher=MagicMock(return_value=[]), catalog_version=CatalogVersion(version_file, check_interval=0), background=False)
+    assert "NEW001" not in index.lookup(["NEW001"])
+
+    catalog.append(Document(name="iPad Air", content="iPad Air", product_code="NEW001", price=17990.0))
+    bump_catalog_version(version_file)
+
+    assert index.lookup(["NEW001"])["NEW001"][0].name == "iPad Air"
+
+
+def test_product_code_index_patches_changed_products(tmp_path):
+    """Test, že po změně cen se znovu načtou jen změněné produkty (bez načtení celého katalogu)"""
+    version_file = str(tmp_path / "catalog_version.json")
+    loader = MagicMock(return_value=list(CATALOG))
+    fetcher = MagicMock(return_value=[CATALOG[0].model_copy(update={"price": 27990.0})])
+    index = ProductCodeIndex(loader=loader, fetcher=fetcher, catalog_version=CatalogVersion(version_file, check_interval=0), background=False)
+    assert index.lookup(["RI045b1"])["RI045b1"][0].price == 29990.0
+
+    bump_catalog_version(version_file, product_codes=["RI045b1"])
+
+    found = index.lookup(["ri045B1", "JA0ws84"])
+    assert found["ri045B1"][0].price == 27990.0
+    assert found["JA0ws84"][0].price == 5990.0
+    fetcher.assert_called_once_with(["RI045b1"])
+    loader.assert_called_once()
+
+
+def test_product_code_index_keeps_all_variants_of_a_code():
+    """Test, že varianty se stejným kódem se nepřepíšou poslední načtenou"""
+    variant = CATALOG[0].model_copy(update={"name": "iPhone 16 Pro 512 GB", "price": 35990.0})
+    index = ProductCodeIndex(loader=lambda: CATALOG + [variant], fetcher=MagicMock(), catalog_version=MagicMock(**{"current.return_value": 0}), background=False)
+
+    found = index.lookup(["RI045b1"])
+
+    assert [doc.price for doc in found["RI045b1"]] == [29990.0, 35990.0]
+    assert index.stats()["documents"] == 3
+
+
+def test_product_code_index_serves_changed_codes_from_fetcher_until_patched(tmp_path):
+    """Test, že změněné kódy se do dokončení aktualizace na pozadí čtou přes fetcher a ostatní z indexu"""
+    import threading, time
+
+    version_file = str(tmp_path / "catalog_version.json")
+    release = threading.Event()
+    updated = CATALOG[0].model_copy(update={"price": 27990.0})
+
+    def fetcher(codes):
+        if threading.current_thread().name == "product-code-index":
+            release.wait(5)
+        return [updated]
+
+    index = ProductCodeIndex(loader=lambda: list(CATALOG), fetcher=fetcher, catalog_version=CatalogVersion(version_file, check_interval=0), background=True)
+    index.refresh()
+    for _ in range(100):
+        if index.stats()["codes"]:
+            break
+        time.sleep(0.01)
+    index.lookup(["JA0ws84"])
+
+    bump_catalog_version(version_file, product_codes=["RI045b1"])
+    found = index.lookup(["RI045b1", "JA0ws84"])
+
+    assert found["RI045b1"][0].price == 27990.0
+    assert found["JA0ws84"][0].price == 5990.0
+    assert index.stats()["fetches"] == 1
+    release.set()
@@ -0,0 +1,48 @@
+# tests/test_prompt_budget.py
+from unittest.mock import patch
+from utils.prompt_budget import build_documents_section, estimate_tokens, get_token_budget, order_by_relevance
+from utils.weaviate_service import Document
+
+
+def make_document(name, distance, content_length=350):
+    return Document(name=name, content="x" * content_length, product_code=name, price=1000.0, distance=distance)
+
+
+def test_order_by_relevance_puts_unscored_documents_last():
+    """Test, že dokumenty se řadí podle vzdálenosti a dokumenty bez vzdálenosti zůstanou na konci"""
+    documents = [make_document("C", None), make_document("B", 0.4), make_document("D", None), make_document("A", 0.1)]
+    assert [doc.name for doc in order_by_relevance(documents)] == ["A", "B", "C", "D"]
+
+
+def test_budget_keeps_most_relevant_documents_and_reports_dropped():
+    """Test, že se do rozpočtu vejdou nejrelevantnější dokumenty a zbytek je vykázán jako vynechaný"""
+    documents = [make_document(f"P{i}", distance=i / 10) for i in range(10)]
+    line_tokens = estimate_tokens(f"- name: P0; product_code: P0; price: 1000.0; url: None; content: {'x' * 350}") + 1
+    base_prompt = "p" * 350  # 100 tokenů
+
+    section, report = build_documents_section(list(reversed(documents)), base_prompt, budget=100 + 3 * line_tokens)
+
+    assert report.included_documents == 3
+    assert report.dropped_documents == 7
+    assert report.dropped_tokens == 7 * line_tokens
+    assert report.base_tokens == 100
+    assert [line.split(";")[0] for line in section.splitlines()] == ["- name: P0", "- name: P1", "- name: P2"]
+
+
+def test_budget_truncates_single_oversized_document():
+    """Test, že příliš dlouhý nejrelevantnější dokument se zkrátí místo vynechání"""
+    section, report = build_documents_section([make_document("A", 0.1, content_length=10000)], "", budget=50)
+
+    assert report.included_documents == 1
+    assert report.truncated
+    assert report.dropped_tokens > 0
+    assert estimate_tokens(section) <= 50
+
+
+def test_token_budget_prefers_model_over_provider():
+    """Test, že rozpočet pro konkrétní model má přednost před rozpočtem providera"""
+    budgets = {"OPENAI": 6000, "gpt-4.1": 12000}
+    with patch("utils.prompt_budget.PROMPT_TOKEN_BUDGETS", budgets):
+        assert get_token_budget("OPENAI", "gpt-4.1") == 12000
+        assert get_token_budget("OPENAI", "gpt-4.1-mini") == 6000
+        assert get_token_budget("UNKNOWN") > 0
@@ -0,0 +1,102 @@
+# tests/test_query_planner.py
+import pytest
+from utils.query_planner import QueryPlanner, parse_price_expression
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("MacBook Air 13 M3 do 35 000", (None, 35000.0, "MacBook Air 13 M3")),
+    ("iPhone od 20 tisíc", (20000.0, None, "iPhone")),
+    ("AirPods kolem 30k", (27000.0, 33000.0, "AirPods")),
+    ("iPad mezi 20 a 30 tisíc", (20000.0, 30000.0, "iPad")),
+    ("iPhone 20 000 - 30 000 Kč", (20000.0, 30000.0, "iPhone")),
+    ("iPhone 16 Pro max. 40.000,-", (None, 40000.0, "iPhone 16 Pro")),
+    ("iPad do 15 tis.", (None, 15000.0, "iPad")),
+    ("iPhone 16 Pro Max", (None, None, "iPhone 16 Pro Max")),
+    ("iPhone 14-15", (None, None, "iPhone 14-15")),
+    ("Galaxy S23-S24", (None, None, "Galaxy S23-S24")),
+    ("iPhone 14-15 do 30k", (None, 30000.0, "iPhone 14-15")),
+    ("iPhone 15000-20000", (15000.0, 20000.0, "iPhone")),
+    ("AirPods 300-500 Kč", (300.0, 500.0, "AirPods")),
+])
+def test_parse_price_expression(text, expected):
+    """Test rozpoznání českých cenových výrazů"""
+    assert parse_price_expression(text) == expected
+
+
+def test_planner_plans_simple_product_queries():
+    """Test, že jednoduchý dotaz na produkt se naplánuje bez LLM"""
+    planner = QueryPlanner()
+
+    queries = planner.plan("MacBook Air 13 M3 do 35 000")
+    assert len(queries) == 1
+    assert queries[0].query == "MacBook Air 13 M3"
+    assert queries[0].max_price == 35000.0
+
+    assert planner.plan("Kolik stojí iPhone 15 Pro Max?")[0].query == "iPhone 15 Pro Max"
+    # samotný kód produktu - dotazy na kód doplní generate_search_queries
+    assert planner.plan("RI045b1") == []
+
+
+def test_planner_defers_to_llm_when_not_confident():
+    """Test, že u složitějších dotazů plánovač vrátí None (zavolá se LLM)"""
+    planner = QueryPlanner()
+
+    assert planner.plan("Jaký je rozdíl mezi iPhone 15 a 16?") is None
+    assert planner.plan("a ten levnější?") is None
+    assert planner.plan("Notebook do 30 000") is None
+    # rozsah modelů, ne cen
+    assert planner.plan("iPhone 14-15") is None
+    assert planner.plan("Galaxy S23-S24") is None
+    assert planner.plan("") is None
+
+
+def test_planner_uses_catalog_vocabulary_and_counts_bypasses():
+    """Test rozšíření slovníku o názvy produktů z katalogu a počítání přeskočených LLM volání"""
+    planner = QueryPlanner(vocabulary_source=lambda: ["Apple iPhone 16 Pro Max 256GB Pouštní titan"])
+
+    assert planner.plan("iPhone 16 Pro pouštní titan")[0].query == "iPhone 16 Pro pouštní titan"
+    assert QueryPlanner().plan("iPhone 16 Pro pouštní titan") is None
+
+    planner.record(planned=True)
+    planner.record(planned=False)
+    assert planner.stats.planned == 1
+    assert planner.stats.llm == 1
+    assert planner.stats.bypass_rate == 0.5
+
+
+def test_planner_rebuilds_vocabulary_only_when_version_changes():
+    """Test, že slovník z katalogu se sestaví jednou a znovu jen po změně verze zdroje"""
+    names = ["Apple iPhone 16 Pro Max 256GB Pouštní titan"]
+    version = {"value": None}
+    source_calls = []
+
+    def source():
+        source_calls.append(1)
+        return list(names)
+
+    planner = QueryPlanner(vocabulary_source=source, vocabulary_version=lambda: version["value"])
+    version["value"] = 1
+    assert planner.plan("iPhone 16 Pro pouštní titan") is not None
+    assert planner.plan("iPhone 16 pouštní titan") is not None
+    assert len(source_calls) == 1
+
+    names.append("Apple iPhone 16 Pro Přírodní titan")
+    assert planner.plan("iPhone 16 Pro přírodní titan") is None
+    version["value"] = 2
+    assert planner.plan("iPhone 16 Pro přírodní titan") is not None
+    assert len(source_calls) == 2
+
+    # zdroj se právě načítá - zůstává poslední slovník
+    version["value"] = None
+    assert planner.plan("iPhone 16 Pro přírodní titan") is not None
+    assert len(source_calls) == 2
+
+
+def test_planner_defers_references_to_chat_history():
+    """Test, že dotaz odkazující na předchozí konverzaci přenechá plánovač LLM"""
+    planner = QueryPlanner(vocabulary_source=lambda: ["Apple iPhone 16 Pro 128GB Černý titan"])
+    history = [{"role": "user", "content": "Hledám iPhone 16"}, {"role": "assistant", "content": "Máme iPhone 16 Pro."}]
+
+    assert planner.plan("a ten iPhone 16 Pro do 30k?", chat_history=history) is None
+    assert planner.plan("stejný iPhone 16 Pro, ale do 30k", chat_history=history) is None
+    assert planner.plan("iPhone 16 Pro do 30k", chat_history=history) is not None
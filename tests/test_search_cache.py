@@ -0,0 +1,52 @@
+# tests/test_search_cache.py
+from utils.catalog_version import CatalogVersion, bump_catalog_version
+from utils.search_cache import SearchResultCache, bucket_price_range, search_cache_key
+from utils.weaviate_service import Document
+
+
+def test_bucket_price_range_rounds_outwards():
+    """Test, že se cenové meze zaokrouhlí směrem ven na násobky bucketu"""
+    assert bucket_price_range(30000 * 0.85, 40000 * 1.15, bucket=500) == (25500, 46000)
+    assert bucket_price_range(None, 1001, bucket=500) == (None, 1500)
+    assert bucket_price_range(120, None, bucket=500) == (0, None)
+    assert bucket_price_range(123.4, 567.8, bucket=0) == (123.4, 567.8)
+
+
+def test_search_cache_key_is_canonical():
+    """Test, že klíč nezávisí na velikosti písmen a mezerách v dotazu ani v kódu produktu"""
+    assert search_cache_key(" iPhone  16 Pro ", None, 1500, " ri045b1", 5) == search_cache_key("iphone 16 pro", None, 1500, "RI045B1", 5)
+    assert search_cache_key("iPhone 16", None, None, "", 5) == search_cache_key("iPhone 16", None, None, None, 5)
+    assert search_cache_key("iPhone 16", None, None, None, 5) != search_cache_key("iPhone 16", None, None, None, 10)
+
+
+def test_search_result_cache_invalidated_by_catalog_version(tmp_path):
+    """Test, že zvýšení verze katalogu (import dat) vyprázdní cache výsledků"""
+    version_file = str(tmp_path / "catalog_version.json")
+    cache = SearchResultCache(catalog_version=CatalogVersion(version_file, check_interval=0))
+    key = search_cache_key("iPhone", None, None, None, 5)
+
+    cache.set(key, [Document(name="iPhone 16", content="iPhone 16")])
+    assert cache.get(key)[0].name == "iPhone 16"
+
+    assert bump_catalog_version(version_file) == 1
+    assert cache.get(key) is None
+    assert cache.stats()["invalidations"] == 1
+
+    assert bump_catalog_version(version_file) == 2
+
+
+def test_search_result_cache_drops_only_changed_products(tmp_path):
+    """Test, že změna cen vybraných produktů zahodí jen jejich výsledky a výsledky s cenovým filtrem"""
+    version_file = str(tmp_path / "catalog_version.json")
+    cache = SearchResultCache(catalog_version=CatalogVersion(version_file, check_interval=0))
+    iphone = search_cache_key("iPhone", None, None, None, 5)
+    airpods = search_cache_key("AirPods", None, None, None, 5)
+    cheap = search_cache_key("AirPods", None, 10000, None, 5)
+    cache.set(iphone, [Document(name="iPhone 16", content="iPhone 16", product_code="RI001")])
+    cache.set(airpods, [Document(name="AirPods Pro 2", content="AirPods Pro 2", product_code="JA001")])
+    cache.set(cheap, [Document(name="AirPods Pro 2", content="AirPods Pro 2", product_code="JA001")])
+    bump_catalog_version(version_file, product_codes=["RI001"])
+
+    assert cache.get(iphone) is None
+    assert cache.get(cheap) is None
+    assert cache.get(airpods)[0].product_code == "JA001"
@@ -0,0 +1,47 @@
+# tests/test_streaming.py
+from langchain_core.messages import AIMessageChunk
+from utils.streaming import AnswerStreamParser, emit, message_partial_json, stream_structured_output, stream_to
+
+
+def test_answer_stream_parser_returns_deltas():
+    """Test, že parser vrací jen přírůstky textu odpovědi"""
+    parser = AnswerStreamParser()
+
+    assert parser.feed('{"ans') == ""
+    assert parser.feed('{"answer": "Evo, AirP') == "Evo, AirP"
+    assert parser.feed('{"answer": "Evo, AirPods jsou') == "ods jsou"
+    # neúplná escape sekvence - nic nevracíme, dokud nepřijde zbytek
+    assert parser.feed('{"answer": "Evo, AirPods jsou \\u01') == ""
+    assert parser.feed('{"answer": "Evo, AirPods jsou \\u010d", "recommended_products": [{"name": "AirPods Pro 2"}, {"na') == " č"
+
+
+def test_message_partial_json_from_tool_call_and_content_blocks():
+    """Test získání JSONu z tool call chunků i z obsahu ve formě bloků"""
+    tool_chunk = AIMessageChunk(content="", tool_call_chunks=[{"name": "OutputSchema", "args": '{"answer": "A', "id": "1", "index": 0}])
+    assert message_partial_json(tool_chunk) == '{"answer": "A'
+
+    block_chunk = AIMessageChunk(content=[{"type": "tool_use", "partial_json": '{"answer": "B', "index": 0}])
+    assert message_partial_json(block_chunk) == '{"answer": "B'
+
+
+def test_stream_structured_output_emits_events_and_merges_usage():
+    """Test, že streamování posílá události a výsledek má stejný tvar jako invoke"""
+    class FakeRunnable:
+        def stream(self, data):
+            yield {"raw": AIMessageChunk(content='{"answer": "Dob')}
+            yield {"raw": AIMessageChunk(content='rý den"}', usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})}
+            yield {"parsed": "parsed-output"}
+
+    events = []
+    with stream_to(events.append):
+        output_data, time_to_first_token = stream_structured_output(FakeRunnable(), {})
+
+    assert [event.type for event in events] == ["ttft", "answer_delta", "answer_delta"]
+    assert "".join(event.data for event in events if event.type == "answer_delta") == "Dobrý den"
+    assert output_data["parsed"] == "parsed-output"
+    assert output_data["raw"].usage_metadata["output_tokens"] == 5
+    assert time_to_first_token is not None
+
+    # mimo stream_to se události nikam neposílají
+    emit("answer_delta", "x")
+    assert len(events) == 3
@@ -0,0 +1,89 @@
+# tests/test_tracing.py
+import json, threading, contextvars
+from unittest.mock import MagicMock, patch
+import pytest
+
+from benchmarks.fakes import fake_backends
+from utils.flow_executor import FlowExecutor
+from utils.tracing import SpanExporter, span, start_trace
+
+
+@pytest.fixture(autouse=True)
+def tracing_enabled():
+    with patch("utils.tracing.TRACING_ENABLED", True):
+        yield
+
+
+def test_spans_are_nested_across_threads():
+    """Test, že spany se zanoří pod rodiče i ve vláknech se zkopírovaným kontextem"""
+    exporter = MagicMock()
+    with start_trace("flow", exporter=exporter) as trace:
+        with span("get_documents_from_vector_db", kind="node") as node_span:
+            def run_query():
+                with span("search_products", kind="search", query="iPhone") as query_span:
+                    query_span.set(results=5)
+
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(run_query,))
+            thread.start()
+            thread.join()
+
+    spans = {item["name"]: item for item in trace.to_dicts()}
+    assert spans["get_documents_from_vector_db"]["parent_id"] == spans["flow"]["span_id"]
+    assert spans["search_products"]["parent_id"] == node_span.span_id
+    assert spans["search_products"]["attributes"] == {"query": "iPhone", "results": 5}
+    assert spans["flow"]["offset"] == 0.0
+    exporter.export.assert_called_once_with(trace)
+
+
+def test_span_outside_trace_is_noop():
+    """Test, že span mimo trace nic nezaznamená"""
+    with span("search_products") as query_span:
+        query_span.set(results=1)
+
+
+def test_span_records_error():
+    """Test, že výjimka v bloku se zaznamená do spanu a propaguje dál"""
+    with pytest.raises(ValueError):
+        with start_trace("flow", exporter=MagicMock()) as trace:
+            with span("get_answer", kind="node"):
+                raise ValueError("chyba")
+
+    failed = [item for item in trace.to_dicts() if item["name"] == "get_answer"][0]
+    assert failed["status"] == "error"
+    assert "ValueError" in failed["error"]
+
+
+def test_exporter_appends_jsonl(tmp_path):
+    """Test, že exportér zapíše spany do JSONL souboru (jeden span na řádek)"""
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(jsonl_path=str(path), otlp_endpoint=None)
+    with start_trace("flow", exporter=exporter):
+        with span("get_answer", kind="node"):
+            pass
+    exporter.flush()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["name"] for line in lines] == ["flow", "get_answer"]
+    assert all(line["duration"] is not None for line in lines)
+
+
+def test_executor_collects_node_llm_and_search_spans():
+    """Test, že běh flow vrátí spany uzlů, LLM volání a vyhledávacích dotazů"""
+    with fake_backends(), \
+         patch("utils.models.PricingManager.calculate_cost", return_value=0.5), \
+         patch("utils.tracing.get_span_exporter", return_value=MagicMock()), \
+         patch("flow.generate_search_queries.QUERY_PLANNER_ENABLED", False):
+        _, stats = FlowExecutor().run_with_stats({
+            "customer_input": "Kolik stojí iPhone 15 Pro Max?",
+            "chat_history": [],
+            "context": {"page_title": "Domů", "current_url": "https://eshop.cz/", "language": "CS"},
+            "customer": {},
+            "llm_provider": "OPENAI",
+        })
+
+    names = [item["name"] for item in stats.spans]
+    assert stats.trace_id and names[0] == "flow"
+    assert {"get_customer_info", "generate_search_queries", "get_documents_from_vector_db", "get_answer"} <= set(names)
+    assert "llm.get_answer" in names and "search_products" in names
+    llm_span = next(item for item in stats.spans if item["name"] == "llm.get_answer")
+    assert llm_span["attributes"]["input_tokens"] > 0
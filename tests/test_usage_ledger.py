@@ -0,0 +1,71 @@
+# tests/test_usage_ledger.py
+from unittest.mock import MagicMock
+from utils.models import TokenManager, TokenCounter
+from utils.usage_ledger import UsageLedger
+
+
+def make_ledger(tmp_path, **kwargs):
+    # cena = 1 CZK za 1000 tokenů (vstup i výstup)
+    pricing = MagicMock(**{"calculate_cost.side_effect": lambda tokens: sum(t.input_tokens + t.output_tokens for t in tokens) / 1000})
+    kwargs.setdefault("flush_interval", 0.05)
+    return UsageLedger(db_path=str(tmp_path / "usage.sqlite"), pricing_manager=pricing, **kwargs)
+
+
+def make_turn(*calls):
+    token_manager = TokenManager.__new__(TokenManager)
+    token_manager.tokens = [
+        TokenCounter(model, input_tokens, output_tokens, provider=provider, node=node, latency=0.5)
+        for model, provider, node, input_tokens, output_tokens in calls
+    ]
+    return token_manager
+
+
+def test_ledger_writes_in_background_and_aggregates(tmp_path):
+    """Test, že záznamy tahů se zapíšou na pozadí a agregace sečtou náklady a tokeny"""
+    ledger = make_ledger(tmp_path)
+    ledger.record_turn(make_turn(
+        ("gpt-4o-mini", "OPENAI", "generate_search_queries", 800, 200),
+        ("gpt-4o", "OPENAI", "get_answer", 3000, 1000),
+    ), session_id="s1", customer_id="CUS1")
+    ledger.record_turn(make_turn(("claude-3-7-sonnet-latest", "ANTHROPIC", "get_answer", 1500, 500)), session_id="s2")
+    ledger.flush()
+
+    assert ledger.written == 3
+    per_provider = {row["provider"]: row for row in ledger.cost_per_provider_per_day()}
+    assert per_provider["OPENAI"]["cost"] == 5.0
+    assert per_provider["OPENAI"]["turns"] == 1
+    assert per_provider["ANTHROPIC"]["cost"] == 2.0
+
+    per_node = {row["node"]: row for row in ledger.tokens_per_node()}
+    assert per_node["get_answer"]["input_tokens"] == 4500
+    assert per_node["get_answer"]["calls"] == 2
+    assert per_node["generate_search_queries"]["avg_latency"] == 0.5
+    ledger.close()
+
+
+def test_ledger_cost_per_turn_percentile(tmp_path):
+    """Test, že p95 ceny se počítá ze součtu všech volání jednoho tahu"""
+    ledger = make_ledger(tmp_path)
+    assert ledger.cost_per_turn_percentile(95) is None
+
+    for turn_cost in range(1, 21):
+        ledger.record_turn(make_turn(
+            ("gpt-4o", "OPENAI", "get_answer", turn_cost * 500, 0),
+            ("gpt-4o-mini", "OPENAI", "generate_search_queries", turn_cost * 500, 0),
+        ))
+    ledger.flush()
+
+    assert ledger.cost_per_turn_percentile(95) == 19.0
+    assert ledger.cost_per_turn_percentile(50) == 11.0
+    ledger.close()
+
+
+def test_ledger_record_does_not_touch_database(tmp_path):
+    """Test, že record_turn jen zařadí záznamy do fronty (zápis běží mimo vlákno požadavku)"""
+    ledger = make_ledger(tmp_path, batch_size=1000, flush_interval=60)
+
+    ledger.record_turn(make_turn(("gpt-4o", "OPENAI", "get_answer", 100, 10)))
+
+    ledger.pricing_manager.calculate_cost.assert_not_called()
+    ledger.close()
+    assert ledger.written == 1
@@ -101,7 +101,6 @@ def test_extract_token_counts_dict_missing_raw():
 # TODO: Add tests for PricingCacheManager (requires mocking requests and file I/O)
 # TODO: Add tests for PricingManager (requires mocking PricingCacheManager or providing fixed data)
 # TODO: Add tests for PricingManager (requires mocking PricingCacheManager or providing fixed data)
-# TODO: Add tests for Models.get_model (might require mocking model initializations)
 
 
 # --- Fixtures for TokenManager Tests ---
@@ -317,6 +316,72 @@ def test_get_model_invalid_type():
     assert Models.get_model("OPENAI", "invalid_type") is None
     assert Models.get_model("OPENAI", "") is None # Empty type should also likely fail or return default
 
+def test_lazy_model_builds_client_once_on_first_access():
+    """Test that a lazy model attribute builds its client on first access and then reuses it."""
+    from utils.models import _LazyModel
+
+    factory = MagicMock(side_effect=lambda **kwargs: MagicMock(**kwargs))
+
+    class LazyModels:
+        normal = _LazyModel(factory, model_name="gpt-test", temperature=0)
+        unused = _LazyModel(factory, model_name="never-built")
+
+    factory.assert_not_called()
+    first = LazyModels.normal
+    assert LazyModels.normal is first
+    factory.assert_called_once_with(model_name="gpt-test", temperature=0)
+
+def test_get_model_builds_only_requested_client():
+    """Test that Models.get_model only touches the requested model attribute."""
+    with patch('utils.models._chat_openai') as mock_chat_openai, \
+         patch('utils.models._chat_anthropic') as mock_chat_anthropic, \
+         patch.object(Models.__dict__['openai_mini'], 'client', None), \
+         patch.object(Models.__dict__['openai_mini'], 'factory', mock_chat_openai):
+        model = Models.get_model("OPENAI", "mini")
+
+    assert model is mock_chat_openai.return_value
+    mock_chat_openai.assert_called_once()
+    mock_chat_anthropic.assert_not_called()
+
+def test_importing_models_does_not_import_provider_packages():
+    """Test that importing utils.models does not import any provider package."""
+    import subprocess, sys
+    code = (
+        "import sys, utils.models\n"
+        "loaded = [name for name in ('langchain_openai', 'langchain_google_genai', 'langchain_anthropic') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+# --- Tests for PricingCacheManager (in-memory refresh) ---
+
+def test_pricing_uses_file_written_by_other_process(mock_pricing_cache_manager):
+    """Test that a fresh cache file from another worker is used without calling the API."""
+    today = mock_pricing_cache_manager.get_today_date_formatted()
+    with open(mock_pricing_cache_manager.file_path, 'w', encoding='utf-8') as f:
+        json.dump({"date": today, "USD/CZK": 25.0, "api_costs": {}}, f)
+
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate') as mock_rate:
+        data = mock_pricing_cache_manager.refresh(today)
+
+    mock_rate.assert_not_called()
+    assert data["USD/CZK"] == 25.0
+    assert data["api_costs"] == mock_pricing_cache_manager.get_api_costs()
+
+def test_pricing_failed_fetch_keeps_stale_rate_and_backs_off(mock_pricing_cache_manager):
+    """Test that a failed rate fetch keeps the previous rate and does not retry immediately."""
+    PricingCacheManager._memory = {"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=None):
+        data = mock_pricing_cache_manager.refresh(mock_pricing_cache_manager.get_today_date_formatted())
+
+    assert data["USD/CZK"] == 22.0
+    assert not os.path.exists(mock_pricing_cache_manager.file_path)
+    with patch('utils.models.threading.Thread') as mock_thread:
+        mock_pricing_cache_manager.get_current_pricing_data()
+    mock_thread.assert_not_called()
+
 # --- Placeholder for future tests ---
 # (Keep the existing placeholders)
 # TODO: Add tests for weaviate_service.py
@@ -450,10 +515,107 @@ def test_calculate_cost_empty_list(mock_pricing_manager):
     mock_cache_instance.get_current_pricing_data.assert_called_once()
 
 
+def test_lazy_model_builds_client_once_on_first_access():
+    """Test that a lazy model attribute builds its client on first access and then reuses it."""
+    from utils.models import _LazyModel
+
+    factory = MagicMock(side_effect=lambda **kwargs: MagicMock(**kwargs))
+
+    class LazyModels:
+        normal = _LazyModel(factory, model_name="gpt-test", temperature=0)
+        unused = _LazyModel(factory, model_name="never-built")
+
+    factory.assert_not_called()
+    first = LazyModels.normal
+    assert LazyModels.normal is first
+    factory.assert_called_once_with(model_name="gpt-test", temperature=0)
+
+def test_get_model_builds_only_requested_client():
+    """Test that Models.get_model only touches the requested model attribute."""
+    with patch('utils.models._chat_openai') as mock_chat_openai, \
+         patch('utils.models._chat_anthropic') as mock_chat_anthropic, \
+         patch.object(Models.__dict__['openai_mini'], 'client', None), \
+         patch.object(Models.__dict__['openai_mini'], 'factory', mock_chat_openai):
+        model = Models.get_model("OPENAI", "mini")
+
+    assert model is mock_chat_openai.return_value
+    mock_chat_openai.assert_called_once()
+    mock_chat_anthropic.assert_not_called()
+
+def test_importing_models_does_not_import_provider_packages():
+    """Test that importing utils.models does not import any provider package."""
+    import subprocess, sys
+    code = (
+        "import sys, utils.models\n"
+        "loaded = [name for name in ('langchain_openai', 'langchain_google_genai', 'langchain_anthropic') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+# --- Tests for PricingCacheManager ---
+
+@pytest.fixture
+def pricing_cache(tmp_path):
+    """PricingCacheManager with an empty in-memory state and a temporary cache file."""
+    with patch.object(PricingCacheManager, 'file_path', str(tmp_path / 'mock_pricing_cache_manager.json')), \
+         patch.object(PricingCacheManager, '_memory', None), \
+         patch.object(PricingCacheManager, '_file_loaded', False), \
+         patch.object(PricingCacheManager, '_refresh_thread', None), \
+         patch.object(PricingCacheManager, '_next_refresh_at', 0.0):
+        yield PricingCacheManager()
+
+def test_pricing_cold_start_returns_defaults_without_blocking(mock_pricing_cache_manager):
+    """Test that the first call returns defaults at once and refreshes in the background."""
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=24.5) as mock_rate:
+        data = mock_pricing_cache_manager.get_current_pricing_data()
+        assert data["USD/CZK"] == PricingCacheManager.DEFAULT_USD_CZK_RATE
+        PricingCacheManager._refresh_thread.join(timeout=5)
+
+        data = mock_pricing_cache_manager.get_current_pricing_data()
+
+    assert data["USD/CZK"] == 24.5
+    mock_rate.assert_called_once()
+    with open(mock_pricing_cache_manager.file_path, encoding='utf-8') as f:
+        assert json.load(f)["USD/CZK"] == 24.5
+
+def test_pricing_stale_data_served_while_revalidating(mock_pricing_cache_manager):
+    """Test that yesterday's data are returned immediately while today's rate is fetched."""
+    PricingCacheManager._memory = {"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=24.5):
+        assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 22.0
+        PricingCacheManager._refresh_thread.join(timeout=5)
+        assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 24.5
+
+def test_pricing_uses_file_written_by_other_process(mock_pricing_cache_manager):
+    """Test that a fresh cache file from another worker is used without calling the API."""
+    today = mock_pricing_cache_manager.get_today_date_formatted()
+    with open(mock_pricing_cache_manager.file_path, 'w', encoding='utf-8') as f:
+        json.dump({"date": today, "USD/CZK": 25.0, "api_costs": {}}, f)
+
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate') as mock_rate:
+        data = mock_pricing_cache_manager.refresh(today)
+
+    mock_rate.assert_not_called()
+    assert data["USD/CZK"] == 25.0
+    assert data["api_costs"] == mock_pricing_cache_manager.get_api_costs()
+
+def test_pricing_failed_fetch_keeps_stale_rate_and_backs_off(mock_pricing_cache_manager):
+    """Test that a failed rate fetch keeps the previous rate and does not retry immediately."""
+    PricingCacheManager._memory = {"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=None):
+        data = mock_pricing_cache_manager.refresh(mock_pricing_cache_manager.get_today_date_formatted())
+
+    assert data["USD/CZK"] == 22.0
+    assert not os.path.exists(mock_pricing_cache_manager.file_path)
+    with patch('utils.models.threading.Thread') as mock_thread:
+        mock_pricing_cache_manager.get_current_pricing_data()
+    mock_thread.assert_not_called()
+
 # --- Placeholder for future tests ---
 # (Keep the existing placeholders)
 # TODO: Add tests for TokenManager (requires mocking PricingManager)
-# TODO: Add tests for Models.get_model (might require mocking model initializations)
 
 
 # --- Fixtures for PricingCacheManager Tests ---
@@ -464,11 +626,15 @@ def mock_pricing_cache_manager(tmp_path):
     # Create a temporary directory for the cache file
     cache_dir = tmp_path / "pricing_cache"
     cache_dir.mkdir()
-    cache_file_path = cache_dir / "pricing_cache.json"
+    cache_file_path = cache_dir / "mock_pricing_cache_manager.json"
 
     # Patch the class attributes to use the temporary path
     with patch.object(PricingCacheManager, 'output_dir', str(cache_dir)), \
-         patch.object(PricingCacheManager, 'file_path', str(cache_file_path)):
+         patch.object(PricingCacheManager, 'file_path', str(cache_file_path)), \
+         patch.object(PricingCacheManager, '_memory', None), \
+         patch.object(PricingCacheManager, '_file_loaded', False), \
+         patch.object(PricingCacheManager, '_refresh_thread', None), \
+         patch.object(PricingCacheManager, '_next_refresh_at', 0.0):
         manager = PricingCacheManager()
         # Ensure the manager uses the patched path
         manager.output_dir = str(cache_dir)
@@ -576,67 +742,62 @@ def test_get_today_date_formatted(mock_pricing_cache_manager):
 @patch.object(PricingCacheManager, 'read_from_file')
 @patch.object(PricingCacheManager, 'update_cached_data')
 @patch.object(PricingCacheManager, 'get_today_date_formatted')
-def test_get_current_pricing_data_cache_hit(mock_get_date, mock_update_data, mock_read_file, mock_pricing_cache_manager, capsys):
-    """Test get_current_pricing_data when cache is valid."""
+def test_get_current_pricing_data_cache_hit(mock_get_date, mock_update_data, mock_read_file, mock_pricing_cache_manager):
+    """Test get_current_pricing_data when today's data are in memory (no disk or network access)."""
     today = '20250424'
     mock_get_date.return_value = today
     cached_data = {"date": today, "USD/CZK": 23.5, "api_costs": {"gpt_4o_input": 2.5}}
-    mock_read_file.return_value = cached_data
+    PricingCacheManager._memory = cached_data
 
     data = mock_pricing_cache_manager.get_current_pricing_data()
 
     assert data == cached_data
-    mock_read_file.assert_called_once_with(mock_pricing_cache_manager.file_path)
+    mock_read_file.assert_not_called()
     mock_update_data.assert_not_called()
-    captured = capsys.readouterr()
-    assert "Cashed data, načítáme ze souboru" in captured.out
+    assert PricingCacheManager._refresh_thread is None
 
-@patch.object(PricingCacheManager, 'read_from_file')
-@patch.object(PricingCacheManager, 'update_cached_data')
+@patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate')
 @patch.object(PricingCacheManager, 'get_today_date_formatted')
-def test_get_current_pricing_data_cache_miss_date(mock_get_date, mock_update_data, mock_read_file, mock_pricing_cache_manager, capsys):
-    """Test get_current_pricing_data when cache is outdated."""
+def test_get_current_pricing_data_cache_miss_date(mock_get_date, mock_get_rate, mock_pricing_cache_manager):
+    """Test that outdated data are returned immediately while today's rate is fetched in the background."""
     today = '20250424'
     yesterday = '20250423'
     mock_get_date.return_value = today
-    cached_data = {"date": yesterday, "USD/CZK": 23.0, "api_costs": {}}
-    mock_read_file.return_value = cached_data
-    updated_data = {"date": today, "USD/CZK": 23.5, "api_costs": {"gpt_4o_input": 2.5}}
-    mock_update_data.return_value = updated_data
+    mock_get_rate.return_value = 23.5
+    PricingCacheManager._memory = {"date": yesterday, "USD/CZK": 23.0, "api_costs": {}}
 
     data = mock_pricing_cache_manager.get_current_pricing_data()
+    assert data["USD/CZK"] == 23.0
 
-    assert data == updated_data
-    mock_read_file.assert_called_once_with(mock_pricing_cache_manager.file_path)
-    mock_update_data.assert_called_once_with(today)
-    captured = capsys.readouterr()
-    assert "Aktualizace cached dat" in captured.out
+    PricingCacheManager._refresh_thread.join(timeout=5)
+    data = mock_pricing_cache_manager.get_current_pricing_data()
 
-@patch.object(PricingCacheManager, 'read_from_file')
-@patch.object(PricingCacheManager, 'update_cached_data')
+    assert data == {"date": today, "USD/CZK": 23.5, "api_costs": mock_pricing_cache_manager.get_api_costs()}
+    mock_get_rate.assert_called_once_with(today, default=None)
+
+@patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate')
 @patch.object(PricingCacheManager, 'get_today_date_formatted')
-def test_get_current_pricing_data_cache_miss_no_file(mock_get_date, mock_update_data, mock_read_file, mock_pricing_cache_manager, capsys):
-    """Test get_current_pricing_data when cache file doesn't exist."""
+def test_get_current_pricing_data_cache_miss_no_file(mock_get_date, mock_get_rate, mock_pricing_cache_manager):
+    """Test that a cold start returns defaults at once and creates the cache file in the background."""
     today = '20250424'
     mock_get_date.return_value = today
-    mock_read_file.return_value = None # Simulate file not found
-    updated_data = {"date": today, "USD/CZK": 23.5, "api_costs": {"gpt_4o_input": 2.5}}
-    mock_update_data.return_value = updated_data
+    mock_get_rate.return_value = 24.5
 
     data = mock_pricing_cache_manager.get_current_pricing_data()
+    assert data["USD/CZK"] == PricingCacheManager.DEFAULT_USD_CZK_RATE
+    assert data["api_costs"] == mock_pricing_cache_manager.get_api_costs()
 
-    assert data == updated_data
-    mock_read_file.assert_called_once_with(mock_pricing_cache_manager.file_path)
-    mock_update_data.assert_called_once_with(today)
-    captured = capsys.readouterr()
-    assert "Žádné cached data, vytvářím..." in captured.out
+    PricingCacheManager._refresh_thread.join(timeout=5)
+
+    assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 24.5
+    with open(mock_pricing_cache_manager.file_path, encoding='utf-8') as f:
+        assert json.load(f)["USD/CZK"] == 24.5
 
 
-@patch('utils.models.json.dump')
-@patch('builtins.open', new_callable=MagicMock)
+@patch('utils.models.write_json_atomic')
 @patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate')
 @patch.object(PricingCacheManager, 'get_api_costs')
-def test_update_cached_data_success(mock_get_costs, mock_get_rate, mock_open, mock_json_dump, mock_pricing_cache_manager):
+def test_update_cached_data_success(mock_get_costs, mock_get_rate, mock_write_json_atomic, mock_pricing_cache_manager):
     """Test successful update of cached data."""
     today = '20250424'
     mock_get_rate.return_value = 23.5
@@ -648,18 +809,14 @@ def test_update_cached_data_success(mock_get_costs, mock_get_rate, mock_open, mo
         "api_costs": mock_api_costs
     }
 
-    # Mock the file handle returned by open
-    mock_file_handle = MagicMock()
-    mock_open.return_value.__enter__.return_value = mock_file_handle
-
     result_data = mock_pricing_cache_manager.update_cached_data(today)
 
     assert result_data == expected_data
-    mock_get_rate.assert_called_once_with(today)
+    mock_get_rate.assert_called_once_with(today, default=None)
     mock_get_costs.assert_called_once()
-    # Use the patched file_path from the fixture
-    mock_open.assert_called_once_with(mock_pricing_cache_manager.file_path, 'w', encoding='utf-8')
-    mock_json_dump.assert_called_once_with(expected_data, mock_file_handle, indent=4)
+    # Use the patched file_path from the fixture; the file is replaced atomically
+    mock_write_json_atomic.assert_called_once_with(mock_pricing_cache_manager.file_path, expected_data)
+    assert PricingCacheManager._memory == expected_data
 
 @patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate')
 def test_update_cached_data_request_exception(mock_get_rate, mock_pricing_cache_manager, capsys):
@@ -674,8 +831,119 @@ def test_update_cached_data_request_exception(mock_get_rate, mock_pricing_cache_
     captured = capsys.readouterr()
     assert "Error fetching data: API Error" in captured.out
 
+def test_lazy_model_builds_client_once_on_first_access():
+    """Test that a lazy model attribute builds its client on first access and then reuses it."""
+    from utils.models import _LazyModel
+
+    factory = MagicMock(side_effect=lambda **kwargs: MagicMock(**kwargs))
+
+    class LazyModels:
+        normal = _LazyModel(factory, model_name="gpt-test", temperature=0)
+        unused = _LazyModel(factory, model_name="never-built")
+
+    factory.assert_not_called()
+    first = LazyModels.normal
+    assert LazyModels.normal is first
+    factory.assert_called_once_with(model_name="gpt-test", temperature=0)
+
+def test_get_model_builds_only_requested_client():
+    """Test that Models.get_model only touches the requested model attribute."""
+    with patch('utils.models._chat_openai') as mock_chat_openai, \
+         patch('utils.models._chat_anthropic') as mock_chat_anthropic, \
+         patch.object(Models.__dict__['openai_mini'], 'client', None), \
+         patch.object(Models.__dict__['openai_mini'], 'factory', mock_chat_openai):
+        model = Models.get_model("OPENAI", "mini")
+
+    assert model is mock_chat_openai.return_value
+    mock_chat_openai.assert_called_once()
+    mock_chat_anthropic.assert_not_called()
+
+def test_importing_models_does_not_import_provider_packages():
+    """Test that importing utils.models does not import any provider package."""
+    import subprocess, sys
+    code = (
+        "import sys, utils.models\n"
+        "loaded = [name for name in ('langchain_openai', 'langchain_google_genai', 'langchain_anthropic') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+# --- Tests for PricingCacheManager ---
+
+@pytest.fixture
+def pricing_cache(tmp_path):
+    """PricingCacheManager with an empty in-memory state and a temporary cache file."""
+    with patch.object(PricingCacheManager, 'file_path', str(tmp_path / 'mock_pricing_cache_manager.json')), \
+         patch.object(PricingCacheManager, '_memory', None), \
+         patch.object(PricingCacheManager, '_file_loaded', False), \
+         patch.object(PricingCacheManager, '_refresh_thread', None), \
+         patch.object(PricingCacheManager, '_next_refresh_at', 0.0):
+        yield PricingCacheManager()
+
+def test_pricing_cold_start_returns_defaults_without_blocking(mock_pricing_cache_manager):
+    """Test that the first call returns defaults at once and refreshes in the background."""
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=24.5) as mock_rate:
+        data = mock_pricing_cache_manager.get_current_pricing_data()
+        assert data["USD/CZK"] == PricingCacheManager.DEFAULT_USD_CZK_RATE
+        PricingCacheManager._refresh_thread.join(timeout=5)
+
+        data = mock_pricing_cache_manager.get_current_pricing_data()
+
+    assert data["USD/CZK"] == 24.5
+    mock_rate.assert_called_once()
+    with open(mock_pricing_cache_manager.file_path, encoding='utf-8') as f:
+        assert json.load(f)["USD/CZK"] == 24.5
+
+def test_pricing_cold_start_reads_cache_file_synchronously(mock_pricing_cache_manager):
+    """Test that a cold process uses the stored rate at once and refreshes only the network fetch."""
+    with open(mock_pricing_cache_manager.file_path, 'w', encoding='utf-8') as f:
+        json.dump({"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}, f)
+
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=24.5) as mock_rate:
+        data = mock_pricing_cache_manager.get_current_pricing_data()
+        assert data["USD/CZK"] == 22.0
+        assert data["api_costs"] == mock_pricing_cache_manager.get_api_costs()
+        PricingCacheManager._refresh_thread.join(timeout=5)
+
+        assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 24.5
+    mock_rate.assert_called_once()
+
+def test_pricing_stale_data_served_while_revalidating(mock_pricing_cache_manager):
+    """Test that yesterday's data are returned immediately while today's rate is fetched."""
+    PricingCacheManager._memory = {"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=24.5):
+        assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 22.0
+        PricingCacheManager._refresh_thread.join(timeout=5)
+        assert mock_pricing_cache_manager.get_current_pricing_data()["USD/CZK"] == 24.5
+
+def test_pricing_uses_file_written_by_other_process(mock_pricing_cache_manager):
+    """Test that a fresh cache file from another worker is used without calling the API."""
+    today = mock_pricing_cache_manager.get_today_date_formatted()
+    with open(mock_pricing_cache_manager.file_path, 'w', encoding='utf-8') as f:
+        json.dump({"date": today, "USD/CZK": 25.0, "api_costs": {}}, f)
+
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate') as mock_rate:
+        data = mock_pricing_cache_manager.refresh(today)
+
+    mock_rate.assert_not_called()
+    assert data["USD/CZK"] == 25.0
+    assert data["api_costs"] == mock_pricing_cache_manager.get_api_costs()
+
+def test_pricing_failed_fetch_keeps_stale_rate_and_backs_off(mock_pricing_cache_manager):
+    """Test that a failed rate fetch keeps the previous rate and does not retry immediately."""
+    PricingCacheManager._memory = {"date": "20000101", "USD/CZK": 22.0, "api_costs": {}}
+    with patch.object(PricingCacheManager, 'get_usd_czk_exchange_rate', return_value=None):
+        data = mock_pricing_cache_manager.refresh(mock_pricing_cache_manager.get_today_date_formatted())
+
+    assert data["USD/CZK"] == 22.0
+    assert not os.path.exists(mock_pricing_cache_manager.file_path)
+    with patch('utils.models.threading.Thread') as mock_thread:
+        mock_pricing_cache_manager.get_current_pricing_data()
+    mock_thread.assert_not_called()
+
 # --- Placeholder for future tests ---
 # (Keep the existing placeholders)
 # TODO: Add tests for PricingManager (requires mocking PricingCacheManager or providing fixed data)
 # TODO: Add tests for TokenManager (requires mocking PricingManager)
-# TODO: Add tests for Models.get_model (might require mocking model initializations)
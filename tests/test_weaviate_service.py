@@ -51,7 +51,7 @@ def test_weaviate_service_document_extraction(mock_weaviate):
     """Test extracting Document objects from Weaviate results."""
     # Create a mock WeaviateService without connecting to actual Weaviate
     with patch.object(WeaviateService, '__init__', return_value=None):
-        service = WeaviateService()
+        service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
         service.client = MagicMock()
         service.collection_name = "Apple_Products"
         
@@ -100,7 +100,7 @@ def test_weaviate_service_search_products(mock_weaviate):
     """Test searching for products with various parameters."""
     # Create a mock WeaviateService without connecting to actual Weaviate
     with patch.object(WeaviateService, '__init__', return_value=None):
-        service = WeaviateService()
+        service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
         service.client = MagicMock()
         service.client.is_connected.return_value = True
         service.collection_name = "Apple_Products"
@@ -148,8 +148,13 @@ def test_weaviate_service_search_products(mock_weaviate):
             args, kwargs = mock_query.near_text.call_args
             assert kwargs['filters'] is not None
             
-            # Test invalid client connection
-            service.client.is_connected.return_value = False
+            # Collection handle is cached - no per-query lookup or is_connected() round trip
+            service.client.collections.get.assert_called_once_with("Apple_Products")
+            service.client.is_connected.assert_not_called()
+
+            # Test missing client connection
+            service.client = None
+            service.collection = None
             results = service.search_products(search_params=search_params)
             assert results == []  # Should return empty list when not connected
 
@@ -158,7 +163,7 @@ def test_weaviate_service_client_lifecycle(mock_weaviate):
     """Test client connection and closing."""
     # Test closing a connected client
     with patch.object(WeaviateService, '__init__', return_value=None):
-        service = WeaviateService()
+        service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
         mock_client = MagicMock()
         mock_client.is_connected.return_value = True
         service.client = mock_client
@@ -170,3 +175,209 @@ def test_weaviate_service_client_lifecycle(mock_weaviate):
         # Test closing when client is None
         service.client = None
         service.close()  # Should not raise any errors
+
+
+# === Tests for the shared (pooled) WeaviateService ===
+
+def test_get_weaviate_service_returns_shared_instance():
+    """Test, že sdílená služba se vytvoří jen jednou a spustí kontrolu stavu."""
+    from utils import weaviate_service
+
+    with patch.object(weaviate_service, '_shared_service', None), \
+         patch.object(weaviate_service, 'WeaviateService') as mock_service_class:
+        first = weaviate_service.get_weaviate_service()
+        second = weaviate_service.get_weaviate_service()
+
+    assert first is second
+    mock_service_class.assert_called_once()
+    first.start_health_check.assert_called_once()
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_connect_caches_collection(mock_weaviate):
+    """Test, že při připojení se uloží reference na kolekci."""
+    mock_client = mock_weaviate.connect_to_custom.return_value
+    mock_client.is_ready.return_value = True
+    mock_client.collections.exists.return_value = True
+
+    service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
+
+    assert service.collection is mock_client.collections.get.return_value
+    assert service.check_health() is True
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_lazy_reconnect_after_failed_health_check(mock_weaviate):
+    """Test, že po neúspěšné kontrole stavu se služba při dalším dotazu znovu připojí."""
+    first_client, second_client = MagicMock(), MagicMock()
+    for client in (first_client, second_client):
+        client.is_ready.return_value = True
+        client.collections.exists.return_value = True
+    mock_weaviate.connect_to_custom.side_effect = [first_client, second_client]
+
+    service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
+    first_client.is_ready.side_effect = Exception("connection reset")
+
+    assert service.check_health() is False
+
+    mock_response = MagicMock()
+    mock_response.objects = []
+    second_client.collections.get.return_value.query.near_text.return_value = mock_response
+
+    service.search_products(search_params=SearchQuery(query="iPhone"))
+
+    first_client.close.assert_called_once()
+    assert service.client is second_client
+    second_client.collections.get.return_value.query.near_text.assert_called_once()
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_failed_reconnect_returns_empty(mock_weaviate):
+    """Test, že neúspěšné opětovné připojení vrátí prázdný výsledek a zkusí se znovu příště."""
+    first_client = MagicMock()
+    first_client.is_ready.return_value = True
+    first_client.collections.exists.return_value = True
+    mock_weaviate.connect_to_custom.side_effect = [first_client, Exception("down")]
+
+    service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
+    service._healthy = False
+
+    assert service.search_products(search_params=SearchQuery(query="iPhone")) == []
+    assert service._healthy is False
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_search_uses_cached_query_vector(mock_weaviate):
+    """Test, že s EmbeddingCache se vyhledává přes near_vector a near_text se nevolá."""
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        service.collection_name = "Apple_Products"
+        service.embedding_cache = MagicMock()
+        service.embedding_cache.get_embedding.return_value = [0.1, 0.2, 0.3]
+        service.collection.query.near_vector.return_value.objects = []
+
+        service.search_products(search_params=SearchQuery(query="AirPods Pro"))
+
+        service.embedding_cache.get_embedding.assert_called_once_with("AirPods Pro", model=service.vectorizer_model)
+        args, kwargs = service.collection.query.near_vector.call_args
+        assert kwargs['near_vector'] == [0.1, 0.2, 0.3]
+        service.collection.query.near_text.assert_not_called()
+
+        # Při chybě vektorizace se použije near_text
+        service.embedding_cache.get_embedding.side_effect = Exception("API down")
+        service.search_products(search_params=SearchQuery(query="AirPods Pro"))
+        service.collection.query.near_text.assert_called_once()
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_search_uses_result_cache(mock_weaviate):
+    """Test, že opakovaný (kanonicky stejný) dotaz se obslouží z cache bez dotazu do Weaviate."""
+    from utils.search_cache import SearchResultCache
+
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        service.result_cache = SearchResultCache(catalog_version=MagicMock(**{"current.return_value": 1}))
+        mock_obj = MagicMock()
+        mock_obj.properties = {"name": "iPhone 16 Pro Max", "price": 34990.0, "content": "iPhone 16 Pro Max"}
+        service.collection.query.near_text.return_value.objects = [mock_obj]
+
+        first = service.search_products(search_params=SearchQuery(query="iPhone 16 Pro Max", max_price=34500 * 1.15))
+        second = service.search_products(search_params=SearchQuery(query="  iphone 16 pro MAX ", max_price=34600 * 1.15))
+
+        service.collection.query.near_text.assert_called_once()
+        assert second == first
+        assert second[0] is not first[0]
+
+        # Chyba dotazu se necachuje
+        service.collection.query.near_text.side_effect = Exception("timeout")
+        assert service.search_products(search_params=SearchQuery(query="AirPods")) == []
+        service.collection.query.near_text.side_effect = None
+        service.search_products(search_params=SearchQuery(query="AirPods"))
+        assert service.collection.query.near_text.call_count == 3
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_post_filters_bucketed_price_range(mock_weaviate):
+    """Test, že zaokrouhlené meze se použijí jen pro dotaz a výsledky se dofiltrují na přesný rozpočet."""
+    from utils.search_cache import SearchResultCache
+
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        service.result_cache = SearchResultCache(catalog_version=MagicMock(**{"current.return_value": 1}))
+        objects = []
+        for name, price in [("iPhone 16 Pro", 34990.0), ("iPhone 16 Pro Max", 35300.0), ("iPhone 15", 20050.0)]:
+            obj = MagicMock()
+            obj.properties = {"name": name, "price": price, "content": name}
+            objects.append(obj)
+        service.collection.query.near_text.return_value.objects = objects
+
+        first = service.search_products(search_params=SearchQuery(query="iPhone", min_price=20100, max_price=35200))
+        second = service.search_products(search_params=SearchQuery(query="iPhone", min_price=20000, max_price=35400))
+
+        service.collection.query.near_text.assert_called_once()
+        assert [doc.name for doc in first] == ["iPhone 16 Pro"]
+        assert [doc.name for doc in second] == ["iPhone 16 Pro", "iPhone 16 Pro Max", "iPhone 15"]
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_overfetches_bucketed_price_range(mock_weaviate):
+    """Test, že se zaokrouhlenými mezemi se načte víc kandidátů, aby po dofiltrování zbyl celý limit."""
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        service.result_cache = None
+        objects = []
+        for name, price in [("iPhone 16 Pro Max", 35300.0), ("iPhone 16 Pro", 34990.0), ("iPhone 16", 24990.0), ("iPhone 15", 20990.0)]:
+            obj = MagicMock()
+            obj.properties = {"name": name, "price": price, "content": name}
+            objects.append(obj)
+        service.collection.query.near_text.return_value.objects = objects
+
+        documents = service.search_products(search_params=SearchQuery(query="iPhone", max_price=35200), limit=2)
+
+        assert service.collection.query.near_text.call_args.kwargs["limit"] == 4
+        assert [doc.name for doc in documents] == ["iPhone 16 Pro", "iPhone 16"]
+
+        # Meze už zarovnané na násobky - dotaz s přesným limitem
+        service.search_products(search_params=SearchQuery(query="iPhone", max_price=35000), limit=2)
+        assert service.collection.query.near_text.call_args.kwargs["limit"] == 2
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_fetch_by_product_codes(mock_weaviate):
+    """Test, že produkty podle kódů se načtou jedním fetch_objects bez vektorového hledání."""
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        mock_obj = MagicMock()
+        mock_obj.properties = {"name": "iPhone 16 Pro", "product_code": "RI045b1", "price": 29990.0}
+        service.collection.query.fetch_objects.return_value.objects = [mock_obj]
+
+        documents = service.fetch_by_product_codes(["RI045b1", "JA0ws84"])
+
+        assert [doc.product_code for doc in documents] == ["RI045b1"]
+        service.collection.query.fetch_objects.assert_called_once()
+        service.collection.query.near_text.assert_not_called()
+        service.collection.query.near_vector.assert_not_called()
+        assert service.fetch_by_product_codes([]) == []
+
+@patch('utils.weaviate_service.weaviate')
+def test_weaviate_service_fetch_by_product_codes_pages_all_variants(mock_weaviate):
+    """Test, že varianty jednoho kódu se načtou po stránkách všechny, dokud nepřijde neúplná stránka."""
+    with patch.object(WeaviateService, '__init__', return_value=None):
+        service = WeaviateService()
+        service.client = MagicMock()
+        service.collection = MagicMock()
+        variants = []
+        for index in range(5):
+            obj = MagicMock()
+            obj.properties = {"name": f"iPhone 16 Pro varianta {index}", "product_code": "RI045b1", "price": 29990.0}
+            variants.append(obj)
+        service.collection.query.fetch_objects.side_effect = [
+            MagicMock(objects=variants[0:2]), MagicMock(objects=variants[2:4]), MagicMock(objects=variants[4:])
+        ]
+
+        documents = service.fetch_by_product_codes(["RI045b1"], page_size=2)
+
+        assert len(documents) == 5
+        assert [call.kwargs["offset"] for call in service.collection.query.fetch_objects.call_args_list] == [0, 2, 4]
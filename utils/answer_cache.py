@@ -0,0 +1,172 @@
+import math, threading
+from typing import Callable, Hashable, List, Optional
+
+from .cache import TTLCache
+from .catalog_version import CatalogVersion, CatalogVersionGuard
+from .config import ANSWER_CACHE_SIMILARITY_THRESHOLD, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, EMBEDDING_MODEL
+from .embedding_cache import get_embedding_cache
+
+
+VOCATIVE_PLACEHOLDER = "<<VOCATIVE>>"
+MAX_ENTRIES_PER_KEY = 32
+
+
+def default_embedder(text: str) -> List[float]:
+    return get_embedding_cache().get_embedding(text, model=EMBEDDING_MODEL)
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def document_id(document) -> str:
+    """Identifikátor dokumentu pro klíč cache - kód produktu, případně URL nebo obsah."""
+    return document.product_code or document.url or document.content or ""
+
+
+def _replace_vocative(value, old: str, new: str):
+    """Nahradí oslovení ve všech řetězcích odpovědi (odpověď i popisy doporučených produktů)."""
+    if isinstance(value, str):
+        return value.replace(old, new)
+    if isinstance(value, list):
+        return [_replace_vocative(item, old, new) for item in value]
+    if isinstance(value, dict):
+        return {key: _replace_vocative(item, old, new) for key, item in value.items()}
+    return value
+
+
+class AnswerCache:
+    """
+    Sémantická cache odpovědí pro první zprávu konverzace (bez chat historie).
+
+    Odpověď se znovu použije, pokud je dotaz zákazníka významově téměř stejný
+    (kosinová podobnost embeddingů >= `threshold`) a zároveň přesně sedí jazyk,
+    stránka, na které zákazník je, a množina nalezených dokumentů. Oslovení
+    zákazníka se v uložené odpovědi nahradí zástupným textem a při zásahu se
+    doplní oslovení aktuálního zákazníka.
+
+    Args:
+        embedder: Funkce text -> vektor. Výchozí je sdílená EmbeddingCache.
+        threshold: Minimální kosinová podobnost pro zásah.
+        maxsize: Maximální počet klíčů (kombinací kontextu a dokumentů).
+        ttl: Doba platnosti odpovědi v sekundách.
+        catalog_version: Sledovač verze katalogu; při změně katalogu se cache vyprázdní.
+    """
+
+    def __init__(
+        self,
+        embedder: Callable[[str], List[float]] = default_embedder,
+        threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl: Optional[float] = ANSWER_CACHE_TTL,
+        catalog_version: Optional[CatalogVersion] = None
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.catalog_guard = CatalogVersionGuard(catalog_version)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _context_key(self, context: dict, documents: list, customer: dict) -> Hashable:
+        """Část klíče, která musí sedět přesně."""
+        return (
+            context.get("language", "CZ"),
+            context.get("page_title", ""),
+            context.get("current_url", ""),
+            frozenset(document_id(doc) for doc in documents or []),
+            bool((customer or {}).get("vokative")),
+            tuple(sorted((customer or {}).get("favorite_brands") or [])),
+        )
+
+    def _check_version(self) -> None:
+        change = self.catalog_guard.poll()
+        if change is None:
+            return
+        if change.full:
+            self.cache.clear()
+            print("Katalog změněn, sémantická cache odpovědí vyprázdněna.")
+            return
+
+        # změna jen některých produktů (ceny) - zahodí odpovědi nad jejich dokumenty nebo s jejich doporučením
+        product_codes = change.product_codes
+
+        def affected(key: Hashable, entries: list) -> bool:
+            return bool(key[3] & product_codes) or any(
+                product.get("product_code") in product_codes
+                for _, response in entries
+                for product in response.get("recommended_products") or []
+                if isinstance(product, dict)
+            )
+
+        removed = self.cache.remove_where(affected)
+        print(f"Katalog změněn ({len(product_codes)} produktů), ze sémantické cache odpovědí odstraněno {removed} záznamů.")
+
+    def lookup(self, customer_input: str, context: dict, documents: list, customer: dict) -> Optional[dict]:
+        """Vrátí uloženou odpověď (slovník ve tvaru OutputSchema) přizpůsobenou zákazníkovi, nebo None."""
+        self._check_version()
+        entries = self.cache.get(self._context_key(context, documents, customer))
+        if not entries:
+            self.misses += 1
+            return None
+
+        vector = self.embedder(customer_input)
+        best_score, best_response = 0.0, None
+        for entry_vector, response in list(entries):
+            score = cosine_similarity(vector, entry_vector)
+            if score > best_score:
+                best_score, best_response = score, response
+
+        if best_response is None or best_score < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        print(f"Odpověď nalezena v sémantické cache (podobnost {best_score:.3f}).")
+        vocative = (customer or {}).get("vokative") or ""
+        return _replace_vocative(best_response, VOCATIVE_PLACEHOLDER, vocative)
+
+    def store(self, customer_input: str, context: dict, documents: list, customer: dict, response: dict) -> None:
+        """Uloží odpověď; oslovení zákazníka se nahradí zástupným textem."""
+        self._check_version()
+        vocative = (customer or {}).get("vokative")
+        if vocative:
+            response = _replace_vocative(response, vocative, VOCATIVE_PLACEHOLDER)
+
+        vector = self.embedder(customer_input)
+        key = self._context_key(context, documents, customer)
+        with self._lock:
+            entries = list(self.cache.get(key) or [])
+            entries.append((vector, response))
+            self.cache.set(key, entries[-MAX_ENTRIES_PER_KEY:])
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Vrátí sdílenou AnswerCache pro celý proces."""
+    global _answer_cache
+
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+
+    return _answer_cache
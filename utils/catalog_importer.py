@@ -0,0 +1,615 @@
+"""
+Hromadný import katalogu produktů z CSV do Weaviate.
+
+CSV se čte proudově po úsecích (`chunk_rows` řádků), úseky se parsují v hlavním vlákně
+a zapisují přes batch API klienta (dynamic nebo fixed_size se souběžnými požadavky)
+ve vlákně na pozadí - zatímco se úsek zapisuje, parsuje se další. Parsování je levné
+(přenos úseku do procesu a zpět stojí zhruba tolik co parsování samo, viz
+benchmarks/bench_catalog_import.py), čas importu určuje síťový zápis. Objekty
+odmítnuté kvůli rate limitu vektorizéru se posílají znovu s
+exponenciálním backoffem. Po každém zapsaném úseku se uloží checkpoint, takže
+přerušený import pokračuje tam, kde skončil.
+
+UUID objektů se odvozují deterministicky (uuid5) ze sloupce `uuid` v CSV a každý objekt nese
+`content_hash` (hash vektorizovaného `content`) a `properties_hash` (hash ostatních properties).
+Import v režimu delta porovná CSV se stavem kolekce: nové řádky vloží, změněné přepíše,
+chybějící smaže a nezměněné přeskočí. Objekty se změnou jen mimo `content` se zapíší
+s původním vektorem, takže se znovu vektorizuje jen skutečně změněný obsah.
+
+Použití (CLI viz Weaviate/import_data_to_weaviate.py):
+    importer = CatalogImporter(WeaviateBatchWriter(collection))
+    report = importer.run("Weaviate/apple_data.csv")
+"""
+import csv, hashlib, json, os, random, re, sys, time, uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field
+
+from .config import (
+    CATALOG_IMPORT_BATCH_MODE, CATALOG_IMPORT_BATCH_SIZE, CATALOG_IMPORT_CONCURRENT_REQUESTS,
+    CATALOG_IMPORT_CHUNK_ROWS, CATALOG_IMPORT_MAX_RETRIES,
+    CATALOG_IMPORT_BACKOFF_BASE, CATALOG_IMPORT_BACKOFF_MAX, CATALOG_IMPORT_CHECKPOINT_DIR,
+    CATALOG_IMPORT_PROGRESS_INTERVAL, CATALOG_IMPORT_DELETE_MISSING, PRICE_UPDATE_CONCURRENCY,
+)
+from .files import write_json_atomic
+
+
+DEFAULT_COLLECTION_NAME = "Apple_Products"
+CSV_DELIMITER = "|"
+REQUIRED_COLUMNS = ("uuid", "name", "content", "priceFrom")
+MAX_REPORTED_ERRORS = 50
+DELETE_BATCH_SIZE = 1000
+
+_QUOTED_CODE = re.compile(r"""['"]([^'"]+)['"]""")
+_RATE_LIMIT_MARKERS = ("429", "rate limit", "ratelimit", "too many requests", "resource_exhausted", "quota")
+
+
+def parse_product_code(value: Optional[str]) -> Optional[str]:
+    """
+    Vytáhne kód produktu ze sloupce productCode.
+
+    Export obsahuje seznam v Python zápisu (např. "['RI045b1']") - bere se první kód.
+    Regex je výrazně rychlejší než ast.literal_eval a zvládne i samotný kód bez závorek.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith("["):
+        match = _QUOTED_CODE.search(value)
+        if match:
+            return match.group(1).strip() or None
+        return value.strip("[] ").split(",")[0].strip() or None
+    return value.strip("'\" ") or None
+
+
+def object_uuid(source_uuid: str, namespace: str = DEFAULT_COLLECTION_NAME) -> str:
+    """Deterministické UUID objektu z `uuid` v CSV (stejně jako weaviate.util.generate_uuid5(source_uuid, namespace))."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{namespace}{source_uuid}"))
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def properties_hash(properties: dict) -> str:
+    """Hash properties mimo `content` a samotné hashe - změna znamená update bez nové vektorizace."""
+    data = {key: value for key, value in properties.items() if key not in ("content", "content_hash", "properties_hash")}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def parse_price(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_to_properties(row: dict) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Převede řádek CSV na properties objektu kolekce.
+
+    Returns:
+        Dvojici (properties, None), nebo (None, důvod přeskočení).
+    """
+    if not row.get("uuid") or not row.get("content"):
+        return None, "chybí 'uuid' nebo 'content'"
+
+    properties = {
+        "uuid": row["uuid"],
+        "name": row.get("name"),
+        "content": row["content"],  # jediné vektorizované pole
+        "url": row.get("url"),
+        "prefix": row.get("prefix"),
+        "manufacturer": row.get("manufacturer"),
+        "product_code": parse_product_code(row.get("productCode")),
+        "price": parse_price(row.get("priceFrom")),
+    }
+    properties["content_hash"] = content_hash(properties["content"])
+    properties["properties_hash"] = properties_hash(properties)
+    return properties, None
+
+
+def parse_chunk(rows: List[Tuple[int, dict]]) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+    """Parsuje úsek řádků; chyba v jednom řádku přeskočí jen tento řádek."""
+    parsed = []
+    for row_number, row in rows:
+        try:
+            properties, reason = row_to_properties(row)
+        except Exception as e:
+            properties, reason = None, f"neočekávaná chyba: {e}"
+        parsed.append((row_number, properties, reason))
+    return parsed
+
+
+def is_rate_limit_error(message: str) -> bool:
+    message = message.lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+class ImportObject(BaseModel):
+    """Jeden objekt připravený k zápisu (UUID se drží i přes opakované pokusy)."""
+
+    row: int
+    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    properties: dict
+    vector: Optional[List[float]] = Field(default=None, description="Původní vektor - objekt se znovu nevektorizuje.")
+
+
+class ImportReport(BaseModel):
+    """Průběh a výsledek importu."""
+
+    rows_read: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    retried: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    vectors_reused: int = 0
+    resumed_from_row: int = 0
+    elapsed: float = 0.0
+    completed: bool = False
+    errors: List[str] = Field(default_factory=list, description=f"Prvních {MAX_REPORTED_ERRORS} chyb a přeskočení.")
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.rows_read - self.resumed_from_row) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"přečteno {self.rows_read} řádků, importováno {self.imported}, přeskočeno {self.skipped}, "
+            f"selhalo {self.failed}, opakováno {self.retried} (nové {self.inserted}, změněné {self.updated}, "
+            f"beze změny {self.unchanged}, smazané {self.deleted}, převzaté vektory {self.vectors_reused}; "
+            f"{self.rows_per_second:.0f} řádků/s)"
+        )
+
+
+class WeaviateBatchWriter:
+    """
+    Zápis objektů přes batch API Weaviate klienta.
+
+    Args:
+        collection: Kolekce Weaviate (client.collections.get(...)).
+        mode: "dynamic" - klient přizpůsobuje velikost dávek zátěži serveru;
+            "fixed" - dávky `batch_size` objektů, `concurrent_requests` požadavků souběžně.
+        update_concurrency: Počet souběžných částečných aktualizací v `update`.
+    """
+
+    def __init__(
+        self,
+        collection,
+        mode: str = CATALOG_IMPORT_BATCH_MODE,
+        batch_size: int = CATALOG_IMPORT_BATCH_SIZE,
+        concurrent_requests: int = CATALOG_IMPORT_CONCURRENT_REQUESTS,
+        update_concurrency: int = PRICE_UPDATE_CONCURRENCY,
+    ):
+        if mode not in ("dynamic", "fixed"):
+            raise ValueError(f"Neznámý režim dávkování '{mode}'.")
+        self.collection = collection
+        self.mode = mode
+        self.batch_size = batch_size
+        self.concurrent_requests = concurrent_requests
+        self.update_concurrency = max(1, update_concurrency)
+
+    def _batch(self):
+        if self.mode == "dynamic":
+            return self.collection.batch.dynamic()
+        return self.collection.batch.fixed_size(batch_size=self.batch_size, concurrent_requests=self.concurrent_requests)
+
+    def write(self, objects: List[ImportObject]) -> List[Tuple[ImportObject, str]]:
+        """Zapíše objekty; vrací seznam (objekt, chybová zpráva) pro objekty, které se nezapsaly."""
+        by_uuid = {obj.uuid: obj for obj in objects}
+        with self._batch() as batch:
+            for obj in objects:
+                batch.add_object(properties=obj.properties, uuid=obj.uuid, vector=obj.vector)
+
+        failures = []
+        for error in self.collection.batch.failed_objects:
+            obj = by_uuid.get(str(error.object_.uuid))
+            if obj is not None:
+                failures.append((obj, error.message))
+        return failures
+
+    def update(self, objects: List[ImportObject]) -> List[Tuple[ImportObject, str]]:
+        """
+        Částečně aktualizuje existující objekty - zapíše jen `properties` objektu, ostatní properties
+        i vektor zůstávají. Vrací seznam (objekt, chybová zpráva) pro objekty, které se nezapsaly.
+        """
+        def apply(obj: ImportObject) -> Optional[Tuple[ImportObject, str]]:
+            try:
+                self.collection.data.update(uuid=obj.uuid, properties=obj.properties)
+                return None
+            except Exception as e:
+                return obj, str(e)
+
+        with ThreadPoolExecutor(max_workers=min(self.update_concurrency, max(1, len(objects)))) as pool:
+            return [failure for failure in pool.map(apply, objects) if failure is not None]
+
+    def fetch_state(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Stav kolekce pro delta import: UUID -> (content_hash, properties_hash), bez vektorů."""
+        return {
+            str(obj.uuid): (obj.properties.get("content_hash"), obj.properties.get("properties_hash"))
+            for obj in self.collection.iterator(return_properties=["content_hash", "properties_hash"])
+        }
+
+    def fetch_vectors(self, uuids: List[str]) -> Dict[str, List[float]]:
+        """Vektory existujících objektů (pro zápis bez nové vektorizace)."""
+        from weaviate.classes.query import Filter
+
+        if not uuids:
+            return {}
+        response = self.collection.query.fetch_objects(
+            filters=Filter.by_id().contains_any(uuids), include_vector=True, limit=len(uuids)
+        )
+        vectors = {}
+        for obj in response.objects:
+            vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+            if vector:
+                vectors[str(obj.uuid)] = vector
+        return vectors
+
+    def fetch_by_product_codes(self, product_codes: List[str], page_size: int = 1000) -> List[ImportObject]:
+        """Existující objekty s danými kódy produktů a jejich properties, bez vektorů (pro částečnou aktualizaci)."""
+        from weaviate.classes.query import Filter
+
+        if not product_codes:
+            return []
+        objects = []
+        offset = 0
+        while True:
+            response = self.collection.query.fetch_objects(
+                filters=Filter.by_property("product_code").contains_any(product_codes),
+                include_vector=False, limit=page_size, offset=offset,
+            )
+            for obj in response.objects:
+                objects.append(ImportObject(row=0, uuid=str(obj.uuid), properties=dict(obj.properties)))
+            if len(response.objects) < page_size:
+                return objects
+            offset += page_size
+
+    def delete(self, uuids: List[str]) -> int:
+        """Smaže objekty podle UUID po dávkách; vrací počet smazaných."""
+        from weaviate.classes.query import Filter
+
+        deleted = 0
+        for start in range(0, len(uuids), DELETE_BATCH_SIZE):
+            result = self.collection.data.delete_many(where=Filter.by_id().contains_any(uuids[start:start + DELETE_BATCH_SIZE]))
+            deleted += result.successful
+        return deleted
+
+
+def csv_signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def default_checkpoint_path(csv_path: str, collection_name: str) -> str:
+    key = hashlib.sha256(f"{os.path.abspath(csv_path)}|{collection_name}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CATALOG_IMPORT_CHECKPOINT_DIR, f"{collection_name}-{key}.json")
+
+
+class CatalogImporter:
+    """
+    Proudový import CSV katalogu se zápisem na pozadí, opakováním a checkpointy.
+
+    Zápis běží vždy nejvýše jeden (batch API drží `failed_objects` pro celou kolekci),
+    souběžnost samotného zápisu řídí writer (`concurrent_requests`).
+
+    Args:
+        writer: Objekt s metodou `write(objects) -> [(objekt, chyba)]` (typicky WeaviateBatchWriter).
+        chunk_rows: Počet řádků v jednom úseku (jednotka parsování, zápisu i checkpointu).
+        max_retries: Kolikrát nejvýše zopakovat zápis objektů odmítnutých kvůli rate limitu.
+        backoff_base: Čekání před prvním opakováním v sekundách (dále se zdvojnásobuje, s jitterem).
+        backoff_max: Horní mez čekání mezi pokusy.
+        checkpoint_path: Soubor checkpointu. None = bez checkpointů.
+        progress_interval: Jak často vypisovat průběh (s).
+        uuid_namespace: Jmenný prostor pro deterministická UUID objektů (typicky název kolekce).
+        delete_missing: V režimu delta smazat objekty, které v CSV už nejsou.
+        sleep: Funkce pro čekání (v testech lze nahradit).
+    """
+
+    def __init__(
+        self,
+        writer,
+        chunk_rows: int = CATALOG_IMPORT_CHUNK_ROWS,
+        max_retries: int = CATALOG_IMPORT_MAX_RETRIES,
+        backoff_base: float = CATALOG_IMPORT_BACKOFF_BASE,
+        backoff_max: float = CATALOG_IMPORT_BACKOFF_MAX,
+        checkpoint_path: Optional[str] = None,
+        progress_interval: float = CATALOG_IMPORT_PROGRESS_INTERVAL,
+        uuid_namespace: str = DEFAULT_COLLECTION_NAME,
+        delete_missing: bool = CATALOG_IMPORT_DELETE_MISSING,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.writer = writer
+        self.chunk_rows = max(1, chunk_rows)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint_path = checkpoint_path
+        self.progress_interval = progress_interval
+        self.uuid_namespace = uuid_namespace
+        self.delete_missing = delete_missing
+        self.sleep = sleep
+
+    # --- checkpointy ---
+
+    def load_checkpoint(self, csv_path: str) -> int:
+        """Vrátí počet už zapsaných řádků z checkpointu (0, pokud neexistuje nebo patří jiné verzi CSV)."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Checkpoint {self.checkpoint_path} nelze načíst ({e}) - import začíná od začátku.")
+            return 0
+        if checkpoint.get("csv") != csv_signature(csv_path):
+            print("Checkpoint patří jiné verzi CSV souboru - import začíná od začátku.")
+            return 0
+        return int(checkpoint.get("rows_done", 0))
+
+    def save_checkpoint(self, csv_path: str, rows_done: int, report: ImportReport) -> None:
+        if not self.checkpoint_path:
+            return
+        write_json_atomic(self.checkpoint_path, {
+            "csv_path": os.path.abspath(csv_path),
+            "csv": csv_signature(csv_path),
+            "rows_done": rows_done,
+            "imported": report.imported,
+            "failed": report.failed,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def clear_checkpoint(self) -> None:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # --- čtení a parsování ---
+
+    def iter_chunks(self, csv_path: str, start_row: int = 0, seen: Optional[Set[str]] = None) -> Iterator[List[Tuple[int, dict]]]:
+        """
+        Čte CSV proudově po úsecích; prvních `start_row` datových řádků přeskočí (pokračování z checkpointu).
+
+        Do `seen` se přidají UUID objektů všech řádků CSV (i přeskočených) - co v něm na konci
+        chybí, v CSV není a delta import to smaže.
+        """
+        csv.field_size_limit(sys.maxsize)
+        with open(csv_path, mode="r", encoding="utf-8", newline="") as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=CSV_DELIMITER)
+            missing = [col for col in REQUIRED_COLUMNS if col not in (reader.fieldnames or [])]
+            if missing:
+                print(f"Varování: CSV souboru {csv_path} chybí sloupce {missing} (nalezené: {reader.fieldnames}).")
+
+            chunk = []
+            for row_number, row in enumerate(reader, start=1):
+                if seen is not None and row.get("uuid"):
+                    seen.add(object_uuid(row["uuid"], self.uuid_namespace))
+                if row_number <= start_row:
+                    continue
+                chunk.append((row_number, row))
+                if len(chunk) >= self.chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def to_objects(
+        self,
+        parsed: List[Tuple[int, Optional[dict], Optional[str]]],
+        report: ImportReport,
+        state: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    ) -> List[ImportObject]:
+        """
+        Z naparsovaného úseku vybere objekty k zápisu a započítá přeskočené řádky.
+
+        Se `state` (stav kolekce, režim delta) vynechá nezměněné objekty a objektům změněným
+        jen mimo `content` doplní jejich stávající vektor.
+        """
+        objects = []
+        reuse_vector = []
+        for row_number, properties, reason in parsed:
+            if properties is None:
+                report.skipped += 1
+                report.add_error(f"řádek {row_number}: přeskočen - {reason}")
+                continue
+
+            obj = ImportObject(row=row_number, uuid=object_uuid(properties["uuid"], self.uuid_namespace), properties=properties)
+            if state is not None:
+                existing = state.get(obj.uuid)
+                if existing is None:
+                    report.inserted += 1
+                elif existing == (properties["content_hash"], properties["properties_hash"]):
+                    report.unchanged += 1
+                    continue
+                else:
+                    report.updated += 1
+                    if existing[0] == properties["content_hash"]:
+                        reuse_vector.append(obj)
+            objects.append(obj)
+
+        if reuse_vector:
+            vectors = self.writer.fetch_vectors([obj.uuid for obj in reuse_vector])
+            for obj in reuse_vector:
+                obj.vector = vectors.get(obj.uuid)
+            report.vectors_reused += sum(1 for obj in reuse_vector if obj.vector is not None)
+        return objects
+
+    # --- zápis ---
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * (0.5 + random.random() / 2)
+
+    def write_with_retry(
+        self,
+        objects: List[ImportObject],
+        report: ImportReport,
+        write: Optional[Callable[[List[ImportObject]], List[Tuple[ImportObject, str]]]] = None,
+    ) -> None:
+        """
+        Zapíše objekty; odmítnuté kvůli rate limitu (nebo celý požadavek při výjimce) zkouší znovu s backoffem.
+
+        `write` nahradí `writer.write` (např. `writer.update` pro částečnou aktualizaci).
+
+        Raises:
+            Poslední výjimku writeru, pokud zápis selže i po `max_retries` pokusech
+            (import se přeruší, checkpoint zůstane na posledním zapsaném úseku).
+        """
+        write = write or self.writer.write
+        pending = objects
+        attempt = 0
+        while pending:
+            try:
+                failures = write(pending)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                report.retried += len(pending)
+                delay = self.backoff(attempt)
+                print(f"Chyba zápisu dávky ({e}) - pokus {attempt}/{self.max_retries} za {delay:.1f} s.")
+                self.sleep(delay)
+                continue
+
+            failed_uuids = {obj.uuid for obj, _ in failures}
+            report.imported += len(pending) - len(failed_uuids)
+
+            retryable = []
+            for obj, message in failures:
+                if is_rate_limit_error(message) and attempt < self.max_retries:
+                    retryable.append(obj)
+                else:
+                    report.failed += 1
+                    report.add_error(f"řádek {obj.row} (uuid {obj.properties.get('uuid') or obj.uuid}): {message}")
+
+            if not retryable:
+                return
+            attempt += 1
+            report.retried += len(retryable)
+            delay = self.backoff(attempt)
+            print(f"Rate limit pro {len(retryable)} objektů - pokus {attempt}/{self.max_retries} za {delay:.1f} s.")
+            self.sleep(delay)
+            pending = retryable
+
+    # --- celý import ---
+
+    def delete_missing_objects(self, state: Dict[str, tuple], seen: Set[str], report: ImportReport) -> None:
+        missing = [object_id for object_id in state if object_id not in seen]
+        if not missing:
+            return
+        if not seen:
+            # prázdné (nebo poškozené) CSV by smazalo celý katalog
+            print(f"Varování: CSV neobsahuje žádné objekty - {len(missing)} objektů kolekce se nemaže.")
+            return
+        report.deleted = self.writer.delete(missing)
+
+    def run(self, csv_path: str, resume: bool = True, delta: bool = True) -> ImportReport:
+        """
+        Naimportuje CSV soubor.
+
+        Args:
+            csv_path: Cesta k CSV (oddělovač '|').
+            resume: Pokračovat z checkpointu, pokud existuje pro stejnou verzi souboru.
+            delta: Porovnat CSV se stavem kolekce (zapsat jen nové a změněné, smazat chybějící).
+                False = zapsat všechny řádky (upsert podle deterministického UUID).
+
+        Returns:
+            ImportReport s počty řádků a průběhem; `completed` je True po zpracování celého souboru.
+        """
+        report = ImportReport()
+        start_row = self.load_checkpoint(csv_path) if resume else 0
+        if start_row:
+            print(f"Pokračuji v importu od řádku {start_row + 1} (checkpoint {self.checkpoint_path}).")
+        report.resumed_from_row = report.rows_read = start_row
+
+        started = time.perf_counter()
+        state = self.writer.fetch_state() if delta else None
+        seen: Optional[Set[str]] = set() if delta else None
+        if state is not None:
+            print(f"Stav kolekce načten ({len(state)} objektů).")
+
+        last_progress = started
+
+        def finish(write: Future, rows_done: int) -> None:
+            nonlocal last_progress
+            write.result()  # chyba zápisu import přeruší, checkpoint zůstane na posledním zapsaném úseku
+            report.rows_read = rows_done
+            self.save_checkpoint(csv_path, rows_done, report)
+
+            now = time.perf_counter()
+            report.elapsed = now - started
+            if now - last_progress >= self.progress_interval:
+                last_progress = now
+                print(f"Průběh importu: {report.summary()}")
+
+        # parsování dalšího úseku se překrývá se zápisem předchozího
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-write") as write_pool:
+            in_flight: Optional[Tuple[Future, int]] = None
+            for chunk in self.iter_chunks(csv_path, start_row, seen):
+                parsed = parse_chunk(chunk)
+                objects = self.to_objects(parsed, report, state)
+                if in_flight is not None:
+                    finish(*in_flight)
+                in_flight = (write_pool.submit(self.write_with_retry, objects, report), parsed[-1][0])
+            if in_flight is not None:
+                finish(*in_flight)
+
+        if state is not None and self.delete_missing:
+            self.delete_missing_objects(state, seen, report)
+
+        report.elapsed = time.perf_counter() - started
+        report.completed = True
+        self.clear_checkpoint()
+        print(f"Import dokončen: {report.summary()}, {report.elapsed:.1f} s.")
+        return report
+
+
+def ensure_collection(client, collection_name: str):
+    """
+    Vytvoří kolekci produktů, pokud neexistuje (vektorizuje se jen `content`), a vrátí ji.
+
+    Starší kolekci doplní properties s hashi - bez explicitní definice by je autoschema
+    založilo jako vektorizovaný text.
+    """
+    import weaviate.classes as wvc
+
+    hash_properties = [
+        wvc.config.Property(name=name, data_type=wvc.config.DataType.TEXT, skip_vectorization=True, tokenization=wvc.config.Tokenization.FIELD)
+        for name in ("content_hash", "properties_hash")
+    ]
+
+    if not client.collections.exists(collection_name):
+        text = wvc.config.DataType.TEXT
+        client.collections.create(
+            name=collection_name,
+            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(),
+            properties=[
+                wvc.config.Property(name="name", data_type=text, skip_vectorization=True, tokenization=wvc.config.Tokenization.WORD),
+                wvc.config.Property(name="content", data_type=text, skip_vectorization=False, tokenization=wvc.config.Tokenization.WORD),
+                wvc.config.Property(name="url", data_type=text, skip_vectorization=True, tokenization=wvc.config.Tokenization.FIELD),
+                wvc.config.Property(name="prefix", data_type=text, skip_vectorization=True, tokenization=wvc.config.Tokenization.FIELD),
+                wvc.config.Property(name="manufacturer", data_type=text, skip_vectorization=True, tokenization=wvc.config.Tokenization.FIELD),
+                wvc.config.Property(name="product_code", data_type=text, skip_vectorization=True, tokenization=wvc.config.Tokenization.FIELD),
+                wvc.config.Property(name="price", data_type=wvc.config.DataType.NUMBER, skip_vectorization=True),
+                *hash_properties,
+            ],
+        )
+        print(f"Kolekce '{collection_name}' vytvořena.")
+        return client.collections.get(collection_name)
+
+    collection = client.collections.get(collection_name)
+    existing = {prop.name for prop in collection.config.get().properties}
+    for prop in hash_properties:
+        if prop.name not in existing:
+            collection.config.add_property(prop)
+            print(f"Do kolekce '{collection_name}' přidána property '{prop.name}'.")
+    return collection
@@ -0,0 +1,178 @@
+import os, json, time, threading
+from datetime import datetime
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional
+
+from .config import CACHE_DATA_DIR, CATALOG_VERSION_CHECK_INTERVAL
+from .files import write_json_atomic
+
+
+CATALOG_VERSION_FILE = os.path.join(CACHE_DATA_DIR, "catalog_version.json")
+MAX_RECORDED_CHANGES = 100
+
+
+def read_catalog_version_file(path: str = CATALOG_VERSION_FILE) -> dict:
+    """Načte obsah souboru s verzí katalogu; pokud neexistuje, vrátí verzi 0."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": 0}
+
+
+def bump_catalog_version(path: str = CATALOG_VERSION_FILE, product_codes: Optional[Iterable[str]] = None) -> int:
+    """
+    Zvýší verzi katalogu po změně dat ve Weaviate (import, aktualizace).
+
+    Všechny procesy aplikace verzi sledují přes CatalogVersion a při změně
+    zahodí cache odvozené z katalogu (výsledky vyhledávání, odpovědi).
+
+    Args:
+        product_codes: Kódy změněných produktů (např. aktualizace cen) - cache pak zahodí
+            jen záznamy těchto produktů. None = změna celého katalogu.
+    """
+    product_codes = sorted(set(product_codes)) if product_codes is not None else None
+    data = read_catalog_version_file(path)
+    version = int(data.get("version", 0)) + 1
+    changes = list(data.get("changes", []))
+    changes.append({"version": version, "product_codes": product_codes})
+    write_json_atomic(path, {
+        "version": version,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "changes": changes[-MAX_RECORDED_CHANGES:],
+    })
+    print(f"Verze katalogu zvýšena na {version}" + (f" ({len(product_codes)} produktů)." if product_codes is not None else "."))
+    return version
+
+
+class CatalogChange(NamedTuple):
+    """Změna katalogu viděná jednou cache; `product_codes` None = změnil se celý katalog."""
+
+    version: int
+    product_codes: Optional[FrozenSet[str]]
+
+    @property
+    def full(self) -> bool:
+        return self.product_codes is None
+
+
+class CatalogVersion:
+    """Levné sledování verze katalogu - soubor se čte nejvýše jednou za `check_interval` sekund a jen při změně mtime/inode."""
+
+    def __init__(self, path: str = CATALOG_VERSION_FILE, check_interval: float = CATALOG_VERSION_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._version = 0
+        self._changes: List[dict] = []
+        self._signature: Optional[tuple] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._version
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                # os.replace vytváří nový soubor, inode se tedy změní i při stejném mtime
+                signature = (stat.st_mtime_ns, stat.st_ino)
+            except FileNotFoundError:
+                signature = None
+
+            if signature != self._signature:
+                self._signature = signature
+                data = read_catalog_version_file(self.path)
+                self._version = int(data.get("version", 0))
+                self._changes = list(data.get("changes", []))
+
+            return self._version
+
+    def changed_product_codes(self, since: int, until: int) -> Optional[FrozenSet[str]]:
+        """
+        Kódy produktů změněných mezi verzemi `since` (bez) a `until` (včetně).
+
+        Vrací None, pokud mezi nimi byla změna celého katalogu nebo záznamy změn
+        nepokrývají celý rozsah (starý soubor, víc než MAX_RECORDED_CHANGES změn).
+        """
+        if until <= since:
+            return None
+        changes = {change.get("version"): change for change in self._changes}
+        product_codes = set()
+        for version in range(since + 1, until + 1):
+            change = changes.get(version)
+            if change is None or change.get("product_codes") is None:
+                return None
+            product_codes.update(change["product_codes"])
+        return frozenset(product_codes)
+
+
+class CatalogVersionGuard:
+    """
+    Hlídá změnu verze katalogu pro jednu cache.
+
+    `changed()` vrátí True právě jednou po každé změně verze (první načtení
+    verze se za změnu nepovažuje), cache pak zahodí svůj obsah. `poll()` navíc
+    vrátí, kterých produktů se změna týká, aby cache mohla zahodit jen jejich záznamy.
+    """
+
+    def __init__(self, catalog_version: Optional[CatalogVersion] = None):
+        self.catalog_version = catalog_version or get_catalog_version()
+        self.version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> Optional[CatalogChange]:
+        """Vrátí změnu katalogu od posledního volání, nebo None, pokud se verze nezměnila."""
+        version = self.catalog_version.current()
+        if version == self.version:
+            return None
+
+        with self._lock:
+            if version == self.version:
+                return None
+            previous, self.version = self.version, version
+            if previous is None:
+                return None
+            return CatalogChange(version, self.catalog_version.changed_product_codes(previous, version))
+
+    def changed(self) -> bool:
+        return self.poll() is not None
+
+    def pending(self) -> Optional[int]:
+        """
+        Vrátí novou verzi katalogu, ale nepřevezme ji - to udělá až `commit()`.
+
+        Pro cache, jejichž obnova může selhat (např. načtení lokálního indexu):
+        verze se převezme až po úspěšné obnově, jinak se obnova zkusí znovu.
+        """
+        version = self.catalog_version.current()
+        if version == self.version:
+            return None
+
+        with self._lock:
+            if self.version is None:
+                self.version = version
+                return None
+            return version if version != self.version else None
+
+    def commit(self, version: int) -> None:
+        """Převezme verzi katalogu vrácenou z `pending()`."""
+        with self._lock:
+            self.version = version
+
+
+_catalog_version: Optional[CatalogVersion] = None
+_catalog_version_lock = threading.Lock()
+
+
+def get_catalog_version() -> CatalogVersion:
+    """Vrátí sdílený sledovač verze katalogu."""
+    global _catalog_version
+
+    if _catalog_version is None:
+        with _catalog_version_lock:
+            if _catalog_version is None:
+                _catalog_version = CatalogVersion()
+
+    return _catalog_version
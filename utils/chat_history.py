@@ -0,0 +1,242 @@
+"""
+Správa historie konverzace pro prompty.
+
+Do promptu jde posledních N tahů doslovně (s doporučenými produkty zkrácenými na
+název, kód a cenu) a starší tahy jako kompaktní průběžné shrnutí. Shrnutí počítá
+"mini" model na pozadí až po doručení odpovědi (`schedule_summary`), takže nikdy
+nezdržuje aktuální tah. Spotřeba tokenů shrnutí se zapisuje do ledgeru jako uzel
+`summarize_history` tahu, který ho vyvolal. Dokud shrnutí není hotové, použije se
+levné extraktivní shrnutí bez LLM. Celá historie se vejde do limitu tokenů CHAT_HISTORY_TOKEN_CAP.
+"""
+import hashlib, json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from .cache import TTLCache
+from .config import (
+    CHAT_HISTORY_RECENT_TURNS, CHAT_HISTORY_TOKEN_CAP, CHAT_HISTORY_SUMMARY_ENABLED, CHAT_HISTORY_SUMMARY_MAX_CHARS,
+    CHAT_HISTORY_SUMMARY_CACHE_SIZE, CHAT_HISTORY_SUMMARY_TTL, USAGE_LEDGER_ENABLED,
+)
+from .prompt_budget import estimate_tokens
+
+# summarizer(předchozí shrnutí, nové tahy) -> nové shrnutí
+Summarizer = Callable[[str, List[dict]], str]
+
+PRODUCT_FIELDS = ("name", "product_code", "price")
+
+
+def _field(item: Any, name: str) -> Any:
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def compact_turn(turn: dict) -> dict:
+    """Tah konverzace bez zbytečných polí - u doporučených produktů jen název, kód a cena."""
+    assistant_answer = turn.get("assistant_answer") or {}
+    products = _field(assistant_answer, "recommended_products") or []
+    return {
+        "customer_input": turn.get("customer_input", ""),
+        "assistant_answer": {
+            "answer": _field(assistant_answer, "answer") or "",
+            "recommended_products": [{field: _field(product, field) for field in PRODUCT_FIELDS} for product in products],
+        },
+    }
+
+
+def history_key(turns: List[dict]) -> str:
+    """Klíč shrnutí - hash zkompaktněných tahů (stejný prefix historie = stejné shrnutí)."""
+    payload = json.dumps([compact_turn(turn) for turn in turns], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def extractive_summary(turns: List[dict], max_chars: int = CHAT_HISTORY_SUMMARY_MAX_CHARS) -> str:
+    """Levné shrnutí bez LLM - dřívější dotazy zákazníka a doporučené produkty."""
+    questions = [turn.get("customer_input", "") for turn in turns if turn.get("customer_input")]
+    products = []
+    for turn in turns:
+        for product in compact_turn(turn)["assistant_answer"]["recommended_products"]:
+            if product["name"] and product["name"] not in products:
+                products.append(product["name"])
+
+    summary = "Zákazník se dříve ptal: " + "; ".join(questions) + "."
+    if products:
+        summary += " Doporučené produkty: " + ", ".join(products) + "."
+    return summary[:max_chars]
+
+
+def _to_text(content: Any) -> str:
+    """Text odpovědi chat modelu (string nebo seznam content bloků)."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content or [])
+
+
+def llm_summarizer(
+    llm_provider: str,
+    max_chars: int = CHAT_HISTORY_SUMMARY_MAX_CHARS,
+    session_id: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    turn_id: Optional[str] = None,
+) -> Summarizer:
+    """
+    Summarizer nad "mini" modelem providera - navazuje na předchozí shrnutí.
+
+    Spotřebu každého volání zapíše přes record_usage (uzel `summarize_history`) do ledgeru
+    pod `turn_id` tahu, po kterém se shrnutí počítá.
+    """
+    from langchain_core.prompts import PromptTemplate
+    from .models import Models, TokenManager, record_usage
+    from .usage_ledger import get_usage_ledger
+
+    prompt = PromptTemplate.from_template('''
+        Update the running summary of an e-commerce customer conversation with the new turns.
+        Keep product names, product codes, prices, budgets and customer preferences. Drop greetings and filler.
+        Write at most {max_chars} characters in the language of the conversation.
+
+        Current summary: """{summary}"""
+        New turns: """{turns}"""
+    ''')
+
+    def summarize(summary: str, turns: List[dict]) -> str:
+        llm = Models.get_model(llm_provider, "mini")
+        if not llm:
+            raise ValueError(f"Nepodporovaný poskytovatel LLM: {llm_provider}")
+        started = time.perf_counter()
+        response = (prompt | llm).invoke({
+            "summary": summary or "-",
+            "turns": [compact_turn(turn) for turn in turns],
+            "max_chars": max_chars,
+        })
+        latency = time.perf_counter() - started
+
+        token_manager = TokenManager()
+        record_usage(token_manager, llm, {"raw": response}, provider=llm_provider, node="summarize_history", latency=latency)
+        if USAGE_LEDGER_ENABLED:
+            try:
+                get_usage_ledger().record_turn(token_manager, session_id=session_id, customer_id=customer_id, turn_id=turn_id)
+            except Exception as e:
+                print(f"Chyba při záznamu spotřeby shrnutí do ledgeru: {e}")
+        return _to_text(response.content).strip()[:max_chars]
+
+    return summarize
+
+
+class HistoryManager:
+    """
+    Rolling okno historie konverzace se shrnutím starších tahů.
+
+    Args:
+        recent_turns: Počet posledních tahů, které jdou do promptu doslovně.
+        token_cap: Limit odhadu tokenů historie v promptu.
+        summarizer_factory: Vytvoří summarizer pro daného providera (None = jen extraktivní shrnutí);
+            dostane i `usage` ze schedule_summary jako klíčové argumenty.
+        background: Počítat shrnutí ve vlákně na pozadí (False = synchronně, např. v testech).
+    """
+
+    def __init__(
+        self,
+        recent_turns: int = CHAT_HISTORY_RECENT_TURNS,
+        token_cap: int = CHAT_HISTORY_TOKEN_CAP,
+        summarizer_factory: Optional[Callable[[str], Summarizer]] = llm_summarizer,
+        background: bool = True,
+        cache: Optional[TTLCache] = None,
+    ):
+        self.recent_turns = max(1, recent_turns)
+        self.token_cap = token_cap
+        self.summarizer_factory = summarizer_factory
+        self.background = background
+        self.summaries = cache or TTLCache(maxsize=CHAT_HISTORY_SUMMARY_CACHE_SIZE, ttl=CHAT_HISTORY_SUMMARY_TTL)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary") if background else None
+
+    def split(self, chat_history: List[dict]) -> tuple[List[dict], List[dict]]:
+        """Rozdělí historii na starší tahy (do shrnutí) a posledních N tahů."""
+        chat_history = chat_history or []
+        return chat_history[:-self.recent_turns], chat_history[-self.recent_turns:]
+
+    def summary_for(self, older: List[dict]) -> str:
+        """Shrnutí starších tahů - hotové z pozadí, jinak extraktivní."""
+        if not older:
+            return ""
+        return self.summaries.get(history_key(older)) or extractive_summary(older)
+
+    def prepare(self, chat_history: List[dict]) -> List[dict]:
+        """
+        Historie pro prompt (od nejstaršího po nejnovější) v limitu tokenů.
+
+        Returns:
+            Seznam - případné shrnutí starších tahů jako první položka, pak zkompaktněné poslední tahy.
+        """
+        older, recent = self.split(chat_history)
+        summary = self.summary_for(older)
+        turns = [compact_turn(turn) for turn in recent]
+
+        def render() -> List[dict]:
+            return ([{"summary_of_earlier_conversation": summary}] if summary else []) + turns
+
+        # nad limit: nejdřív vypadnou nejstarší doslovné tahy (poslední zůstane vždy), pak se krátí shrnutí
+        while estimate_tokens(json.dumps(render(), ensure_ascii=False, default=str)) > self.token_cap:
+            if len(turns) > 1:
+                turns.pop(0)
+            elif len(summary) > 100:
+                summary = summary[: len(summary) // 2]
+            else:
+                summary = ""
+                break
+        return render()
+
+    def schedule_summary(self, chat_history: List[dict], llm_provider: str, **usage: Any) -> None:
+        """
+        Po doručení odpovědi připraví shrnutí pro příští tah (historie už obsahuje i aktuální tah).
+
+        Shrnutí navazuje na shrnutí o jeden tah kratšího prefixu, pokud existuje.
+        `usage` (session_id, customer_id, turn_id) určuje, ke kterému tahu se v ledgeru
+        připíše spotřeba shrnutí.
+        """
+        if not CHAT_HISTORY_SUMMARY_ENABLED or self.summarizer_factory is None:
+            return
+        older, _ = self.split(chat_history)
+        if not older:
+            return
+
+        key = history_key(older)
+        with self._lock:
+            if key in self._in_flight or self.summaries.get(key) is not None:
+                return
+            self._in_flight.add(key)
+
+        older = list(older)
+        if self._pool is not None:
+            self._pool.submit(self._summarize, key, older, llm_provider, usage)
+        else:
+            self._summarize(key, older, llm_provider, usage)
+
+    def _summarize(self, key: str, older: List[dict], llm_provider: str, usage: dict) -> None:
+        try:
+            summarizer = self.summarizer_factory(llm_provider, **usage)
+            previous = self.summaries.get(history_key(older[:-1])) if len(older) > 1 else None
+            if previous is not None:
+                summary = summarizer(previous, older[-1:])
+            else:
+                summary = summarizer("", older)
+            if summary:
+                self.summaries.set(key, summary)
+        except Exception as e:
+            print(f"Chyba při shrnutí historie konverzace: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+
+_history_manager: Optional[HistoryManager] = None
+_history_manager_lock = threading.Lock()
+
+
+def get_history_manager() -> HistoryManager:
+    """Vrátí sdílený HistoryManager pro celý proces."""
+    global _history_manager
+    if _history_manager is None:
+        with _history_manager_lock:
+            if _history_manager is None:
+                _history_manager = HistoryManager()
+    return _history_manager
@@ -1,3 +1,5 @@
+import os
+
 OPENAI_MODEL="gpt-4o"
 OPENAI_MINI_MODEL="gpt-4o-mini"
 
@@ -10,4 +12,123 @@ GOOGLE_BASIC_MODEL="gemini-2.0-flash-lite"
 XAI_MODEL="grok-3-beta"
 XAI_BASIC_MODEL="grok-3-beta"
 
-WEAVIATE_URL="localhost"
\ No newline at end of file
+WEAVIATE_URL="localhost"
+
+FLOW_CONCURRENT_EXECUTION=True
+FLOW_MAX_WORKERS=8
+
+WEAVIATE_SEARCH_MAX_CONCURRENCY=4  # souběžných dotazů jedné zprávy
+WEAVIATE_SEARCH_POOL_SIZE=16  # sdílený pool vyhledávacích vláken celého procesu
+WEAVIATE_SEARCH_TIMEOUT=5  # s, společný deadline pro všechny dotazy jedné zprávy
+WEAVIATE_HEALTH_CHECK_INTERVAL=30
+
+CACHE_DATA_DIR=os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_data")
+
+EMBEDDING_CACHE_ENABLED=True
+EMBEDDING_MODEL="text-embedding-3-small"
+EMBEDDING_CACHE_SIZE=2048
+
+CATALOG_VERSION_CHECK_INTERVAL=1
+
+SEARCH_RESULT_CACHE_ENABLED=True
+SEARCH_RESULT_CACHE_SIZE=4096
+SEARCH_RESULT_CACHE_TTL=600
+SEARCH_PRICE_BUCKET=500
+SEARCH_PRICE_OVERFETCH=2  # násobek limitu pro dotaz se zaokrouhlenými mezemi (část výsledků odpadne při dofiltrování)
+
+ANSWER_CACHE_ENABLED=False
+ANSWER_CACHE_SIMILARITY_THRESHOLD=0.95
+ANSWER_CACHE_SIZE=1024
+ANSWER_CACHE_TTL=3600
+
+STREAM_ANSWER=True
+
+RETRIEVAL_BACKEND="weaviate"  # "weaviate" nebo "local" (LocalVectorIndex z exportu kolekce)
+LOCAL_INDEX_DIR=os.path.join(CACHE_DATA_DIR, "local_index")
+
+QUERY_PLANNER_ENABLED=True
+
+# Hedging LLM volání po uzlech: pokud primární provider neodpoví do zpoždění odvozeného z p95 jeho latence,
+# stejný prompt se pošle i sekundárnímu providerovi a použije se první platná odpověď.
+HEDGING_CONFIG={
+    "generate_search_queries": {
+        "enabled": False,
+        "secondary_provider": "GOOGLE",
+        "initial_delay": 1.5,  # zpoždění, dokud není dost měření pro p95 (s)
+        "min_delay": 0.5,
+        "max_delay": 3.0,
+        "percentile": 95,
+    },
+    "get_answer": {
+        "enabled": False,
+        "secondary_provider": "ANTHROPIC",
+        "initial_delay": 4.0,
+        "min_delay": 1.5,
+        "max_delay": 8.0,
+        "percentile": 95,
+    },
+}
+HEDGING_LATENCY_WINDOW=200
+HEDGING_MIN_SAMPLES=20
+
+# Rozpočet vstupních tokenů promptu get_answer (odhad bez volání API) - klíčem je název modelu nebo provider
+PROMPT_TOKEN_BUDGETS={
+    "OPENAI": 6000,
+    "GOOGLE": 8000,
+    "ANTHROPIC": 6000,
+    "XAI": 6000,
+}
+PROMPT_TOKEN_BUDGET_DEFAULT=6000
+PROMPT_CHARS_PER_TOKEN=3.5  # konzervativní odhad pro češtinu (diakritika se tokenizuje hůř než angličtina)
+
+# Extrakce relevantních pasáží z dlouhého obsahu produktů před sestavením promptu (BM25, bez LLM)
+PASSAGE_EXTRACTION_ENABLED=True
+PASSAGE_TOP_K=3  # počet pasáží ponechaných u každého produktu
+PASSAGE_MAX_CHARS=300  # maximální délka jedné pasáže (sekce se spojují do této délky)
+PASSAGE_MIN_CONTENT_CHARS=600  # kratší obsah se ponechá celý
+
+# Historie konverzace v promptech: posledních N tahů doslovně, starší tahy jako průběžné shrnutí
+CHAT_HISTORY_RECENT_TURNS=4
+CHAT_HISTORY_TOKEN_CAP=1500  # odhad tokenů historie v promptu (viz PROMPT_CHARS_PER_TOKEN)
+CHAT_HISTORY_SUMMARY_ENABLED=True  # shrnutí starších tahů "mini" modelem na pozadí po doručení odpovědi
+CHAT_HISTORY_SUMMARY_MAX_CHARS=800
+CHAT_HISTORY_SUMMARY_CACHE_SIZE=1024
+CHAT_HISTORY_SUMMARY_TTL=6 * 60 * 60
+
+# Ledger spotřeby tokenů a nákladů (SQLite, append-only) - zápisy se dávkují ve vlákně na pozadí
+USAGE_LEDGER_ENABLED=True
+USAGE_LEDGER_PATH=os.path.join(CACHE_DATA_DIR, "usage_ledger.sqlite")
+USAGE_LEDGER_FLUSH_INTERVAL=2.0  # s
+USAGE_LEDGER_BATCH_SIZE=200
+
+# Tracing - časové úseky (spany) uzlů flow, LLM volání a vyhledávacích dotazů
+TRACING_ENABLED=True
+TRACING_JSONL_PATH=os.path.join(CACHE_DATA_DIR, "traces.jsonl")
+TRACING_OTLP_ENDPOINT=os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")  # např. "http://localhost:4318/v1/traces"; None = jen JSONL
+TRACING_SERVICE_NAME="e-commerce-chatbot"
+
+# Profily zákazníků - "file" (sample_data/customers.json, index v paměti) nebo "http" (CRM API přes httpx)
+CUSTOMER_STORE_BACKEND="file"
+CUSTOMER_DATA_PATH=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_data", "customers.json")
+CUSTOMER_FILE_CHECK_INTERVAL=1.0  # jak často nejvýše kontrolovat mtime souboru (s)
+CUSTOMER_ANONYMOUS_IDS=("anonymous",)
+CUSTOMER_API_URL=os.getenv("CUSTOMER_API_URL")  # např. "https://crm.example.com/api/customers"
+CUSTOMER_API_TIMEOUT=2.0
+CUSTOMER_API_MAX_CONNECTIONS=20
+CUSTOMER_CACHE_SIZE=4096
+CUSTOMER_CACHE_TTL=5 * 60
+CUSTOMER_NEGATIVE_CACHE_TTL=60  # neznámá id se znovu neptají hned při další zprávě
+
+# Hromadný import katalogu (Weaviate/import_data_to_weaviate.py, utils/catalog_importer.py)
+CATALOG_IMPORT_BATCH_MODE="dynamic"  # "dynamic" (velikost dávky podle zátěže serveru) nebo "fixed"
+CATALOG_IMPORT_BATCH_SIZE=100  # velikost dávky pro režim "fixed"
+CATALOG_IMPORT_CONCURRENT_REQUESTS=2
+CATALOG_IMPORT_CHUNK_ROWS=500  # řádků CSV na jeden úsek parsování / zápisu / checkpoint
+CATALOG_IMPORT_MAX_RETRIES=6
+CATALOG_IMPORT_BACKOFF_BASE=2.0  # s, zdvojnásobuje se s každým pokusem
+CATALOG_IMPORT_BACKOFF_MAX=60.0
+CATALOG_IMPORT_CHECKPOINT_DIR=os.path.join(CACHE_DATA_DIR, "import_checkpoints")
+CATALOG_IMPORT_PROGRESS_INTERVAL=5.0  # s
+CATALOG_IMPORT_DELETE_MISSING=True  # delta import smaže objekty, které v CSV už nejsou
+PRICE_UPDATE_CHUNK_SIZE=500  # kódů produktů na jeden dotaz/zápis při aktualizaci cen
+PRICE_UPDATE_CONCURRENCY=8  # souběžných částečných aktualizací objektů (collection.data.update)
@@ -0,0 +1,240 @@
+"""
+Profily zákazníků pro uzel get_customer_info.
+
+`FileCustomerStore` drží sample_data/customers.json v paměti jako index `customer_id -> profil`
+a znovu ho načte jen při změně mtime souboru. `HttpCustomerStore` je připravený pro skutečné
+CRM API - asynchronní httpx klient se sdíleným poolem spojení a TTL cache (včetně negativní
+cache pro neznámá id). Anonymní zákazník se obslouží bez dotazu na backend.
+"""
+import asyncio, copy, json, os, threading, time
+from typing import Callable, Dict, Optional
+from urllib.parse import quote
+
+from .cache import TTLCache
+from .config import (
+    CUSTOMER_STORE_BACKEND, CUSTOMER_DATA_PATH, CUSTOMER_FILE_CHECK_INTERVAL, CUSTOMER_ANONYMOUS_IDS,
+    CUSTOMER_API_URL, CUSTOMER_API_TIMEOUT, CUSTOMER_API_MAX_CONNECTIONS,
+    CUSTOMER_CACHE_SIZE, CUSTOMER_CACHE_TTL, CUSTOMER_NEGATIVE_CACHE_TTL,
+)
+
+
+_MISSING = object()
+_UNKNOWN = object()  # záznam negativní cache - backend zákazníka nezná
+
+
+def is_anonymous(customer_id: Optional[str]) -> bool:
+    return not customer_id or customer_id in CUSTOMER_ANONYMOUS_IDS
+
+
+class FileCustomerStore:
+    """
+    Profily zákazníků ze JSON souboru, indexované podle customer_id.
+
+    Soubor se načte při prvním dotazu a znovu jen tehdy, když se změní jeho mtime
+    (kontroluje se nejvýše jednou za `check_interval` sekund). Neznámé id je jen
+    výpadek ve slovníku, soubor se kvůli němu znovu nečte.
+
+    Args:
+        path: Cesta k JSON souboru se seznamem zákazníků.
+        check_interval: Minimální odstup kontrol mtime v sekundách (0 = při každém dotazu).
+    """
+
+    def __init__(self, path: str = CUSTOMER_DATA_PATH, check_interval: float = CUSTOMER_FILE_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.loads = 0
+        self._index: Optional[Dict[str, dict]] = None
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self) -> None:
+        if self._index is not None and time.monotonic() < self._next_check:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                with open(self.path, "r", encoding="utf-8") as f:
+                    customers = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Chyba při načítání dat zákazníků z {self.path}: {e}")
+                # při chybě necháme poslední platný index
+                if self._index is None:
+                    self._index = {}
+                return
+
+            self._index = {
+                customer["customer_id"]: customer
+                for customer in customers
+                if isinstance(customer, dict) and customer.get("customer_id")
+            }
+            self._mtime = mtime
+            self.loads += 1
+
+    def get(self, customer_id: str) -> Optional[dict]:
+        """Vrátí kopii profilu zákazníka, nebo None, pokud ho soubor neobsahuje."""
+        self._reload_if_changed()
+        customer = self._index.get(customer_id)
+        return copy.deepcopy(customer) if customer is not None else None
+
+    def stats(self) -> dict:
+        return {"customers": len(self._index) if self._index is not None else None, "loads": self.loads}
+
+
+class HttpCustomerStore:
+    """
+    Profily zákazníků z CRM API (`GET {base_url}/{customer_id}`, 404 = neznámý zákazník).
+
+    Asynchronní httpx klient s poolem spojení běží ve vlastní event loop ve vlákně na pozadí,
+    takže ho sdílí všechna vlákna uzlů i asynchronní volající (`aget`). Nalezené profily se
+    drží v TTL cache, neznámá id v negativní cache s kratší platností. Chyby API se
+    necachují - další zpráva se zeptá znovu.
+
+    Args:
+        base_url: Adresa API zákazníků.
+        timeout: Timeout jednoho požadavku v sekundách.
+        max_connections: Velikost poolu spojení.
+        cache: Cache profilů. None = nová TTLCache podle konfigurace.
+        negative_ttl: Platnost záznamu o neznámém zákazníkovi v sekundách.
+        client_factory: Funkce vytvářející httpx.AsyncClient (např. s vlastní autentizací nebo transportem v testech).
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = CUSTOMER_API_URL,
+        timeout: float = CUSTOMER_API_TIMEOUT,
+        max_connections: int = CUSTOMER_API_MAX_CONNECTIONS,
+        cache: Optional[TTLCache] = None,
+        negative_ttl: float = CUSTOMER_NEGATIVE_CACHE_TTL,
+        client_factory: Optional[Callable[[], "httpx.AsyncClient"]] = None,
+    ):
+        if not base_url and client_factory is None:
+            raise ValueError("HttpCustomerStore vyžaduje CUSTOMER_API_URL.")
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache = cache if cache is not None else TTLCache(maxsize=CUSTOMER_CACHE_SIZE, ttl=CUSTOMER_CACHE_TTL)
+        self.negative_ttl = negative_ttl
+        self.client_factory = client_factory or self._default_client
+        self.requests = 0
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _default_client(self):
+        import httpx
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="customer-api", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    async def _fetch(self, customer_id: str) -> Optional[dict]:
+        """Běží v event loop store - klient (a jeho pool spojení) patří této loop."""
+        if self._client is None:
+            self._client = self.client_factory()
+        self.requests += 1
+        response = await self._client.get(f"/{quote(customer_id, safe='')}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json() or None
+
+    def _cached(self, customer_id: str) -> object:
+        cached = self.cache.get(customer_id, _MISSING)
+        if cached is _MISSING or cached is _UNKNOWN:
+            return cached
+        return copy.deepcopy(cached)
+
+    def _store(self, customer_id: str, customer: Optional[dict]) -> Optional[dict]:
+        if customer:
+            self.cache.set(customer_id, customer)
+            return copy.deepcopy(customer)
+        self.cache.set(customer_id, _UNKNOWN, ttl=self.negative_ttl)
+        return None
+
+    async def aget(self, customer_id: str) -> Optional[dict]:
+        """Asynchronní varianta `get` - lze volat z libovolné event loop."""
+        cached = self._cached(customer_id)
+        if cached is not _MISSING:
+            return None if cached is _UNKNOWN else cached
+
+        loop = self._get_loop()
+        try:
+            if asyncio.get_running_loop() is loop:
+                customer = await self._fetch(customer_id)
+            else:
+                customer = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._fetch(customer_id), loop))
+        except Exception as e:
+            print(f"Chyba při načítání zákazníka {customer_id} z API: {e}")
+            return None
+        return self._store(customer_id, customer)
+
+    def get(self, customer_id: str) -> Optional[dict]:
+        """Vrátí profil zákazníka z cache nebo z API, None pro neznámého zákazníka nebo při chybě API."""
+        cached = self._cached(customer_id)
+        if cached is not _MISSING:
+            return None if cached is _UNKNOWN else cached
+
+        future = asyncio.run_coroutine_threadsafe(self._fetch(customer_id), self._get_loop())
+        try:
+            customer = future.result(timeout=self.timeout + 1)
+        except Exception as e:
+            future.cancel()
+            print(f"Chyba při načítání zákazníka {customer_id} z API: {e}")
+            return None
+        return self._store(customer_id, customer)
+
+    def close(self) -> None:
+        """Zavře spojení klienta a zastaví event loop na pozadí."""
+        if self._loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=self.timeout + 1)
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, **self.cache.stats()}
+
+
+_customer_store = None
+_customer_store_lock = threading.Lock()
+
+
+def get_customer_store():
+    """Vrátí sdílený store profilů zákazníků podle CUSTOMER_STORE_BACKEND."""
+    global _customer_store
+
+    if _customer_store is None:
+        with _customer_store_lock:
+            if _customer_store is None:
+                _customer_store = HttpCustomerStore() if CUSTOMER_STORE_BACKEND == "http" else FileCustomerStore()
+
+    return _customer_store
+
+
+def get_customer_profile(customer_id: Optional[str]) -> Optional[dict]:
+    """Profil zákazníka podle id; anonymní zákazník se vrátí hned jako None bez dotazu na backend."""
+    if is_anonymous(customer_id):
+        return None
+    return get_customer_store().get(customer_id)
@@ -0,0 +1,134 @@
+import os, re, sqlite3, threading, unicodedata
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from .cache import TTLCache
+from .config import EMBEDDING_MODEL, EMBEDDING_CACHE_SIZE, CACHE_DATA_DIR
+
+
+def normalize_query(text: str) -> str:
+    """Normalizuje text dotazu pro klíč cache (Unicode NFC, malá písmena, sjednocené mezery)."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def openai_embedder(model: str) -> Callable[[str], List[float]]:
+    """Vrátí funkci, která vektorizuje text pomocí OpenAI embeddings (stejný model jako text2vec_openai)."""
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(model=model)
+    return embeddings.embed_query
+
+
+class EmbeddingCache:
+    """
+    Cache vektorů vyhledávacích dotazů na straně klienta.
+
+    Vektory se hledají nejdřív v paměťové LRU cache, potom v SQLite souboru na disku
+    a teprve při úplném výpadku se text pošle do embedding API. Díky tomu se běžné
+    dotazy (včetně záložního dotazu s customer_input) nevektorizují opakovaně.
+
+    Args:
+        db_path: Cesta k SQLite souboru s uloženými vektory. None = pouze paměť.
+        maxsize: Maximální počet vektorů v paměťové cache.
+        embedder_factory: Funkce, která pro název modelu vrátí funkci text -> vektor.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = os.path.join(CACHE_DATA_DIR, "embeddings.sqlite"),
+        maxsize: int = EMBEDDING_CACHE_SIZE,
+        embedder_factory: Callable[[str], Callable[[str], List[float]]] = openai_embedder
+    ):
+        self.memory = TTLCache(maxsize=maxsize)
+        self.embedder_factory = embedder_factory
+        self.disk_hits = 0
+        self.misses = 0
+        self._embedders: Dict[str, Callable[[str], List[float]]] = {}
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, query))"
+            )
+            self._db.commit()
+
+    def _get_embedder(self, model: str) -> Callable[[str], List[float]]:
+        with self._lock:
+            if model not in self._embedders:
+                self._embedders[model] = self.embedder_factory(model)
+            return self._embedders[model]
+
+    def _read_from_disk(self, model: str, query: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE model = ? AND query = ?", (model, query)).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist()
+
+    def _write_to_disk(self, model: str, query: str, vector: List[float]) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (model, query, vector) VALUES (?, ?, ?)",
+                (model, query, array("f", vector).tobytes())
+            )
+            self._db.commit()
+
+    def get_embedding(self, text: str, model: str = EMBEDDING_MODEL) -> List[float]:
+        """Vrátí vektor pro text dotazu; API volá jen tehdy, když vektor není v paměti ani na disku."""
+        query = normalize_query(text)
+        key = (model, query)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+
+        vector = self._read_from_disk(model, query)
+        if vector is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            vector = self._get_embedder(model)(query)
+            self._write_to_disk(model, query, vector)
+
+        self.memory.set(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        """Vrátí čítače zásahů (paměť / disk) a výpadků, které skončily voláním embedding API."""
+        memory_stats = self.memory.stats()
+        return {
+            "memory_hits": memory_stats["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": memory_stats["size"],
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Vrátí sdílenou EmbeddingCache pro celý proces."""
+    global _embedding_cache
+
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+
+    return _embedding_cache
@@ -0,0 +1,15 @@
+import os, json, tempfile
+
+
+def write_json_atomic(path: str, data: dict) -> None:
+    """Zapíše JSON atomicky (dočasný soubor + os.replace), aby souběžné procesy nikdy neviděly rozepsaný soubor."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,339 @@
+import os, re, copy, time, queue, importlib, importlib.util, threading, contextvars
+import yaml
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pydantic import BaseModel, Field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .config import FLOW_CONCURRENT_EXECUTION, FLOW_MAX_WORKERS
+from .streaming import StreamEvent, stream_to
+from .tracing import span, start_trace
+
+
+FLOW_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flow")
+REFERENCE_PATTERN = re.compile(r"^\$\{([^}]+)\}$")
+
+
+class FlowNode:
+    """Jeden python uzel z flow.dag.yaml s již naimportovanou tool funkcí."""
+
+    def __init__(self, name: str, func: Callable, inputs: Dict[str, Any]):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.dependencies = {
+            reference.split(".")[0]
+            for reference in (parse_reference(value) for value in inputs.values())
+            if reference and not reference.startswith("inputs.")
+        }
+
+
+class FlowRunStats(BaseModel):
+    """Časování jednoho běhu flow."""
+
+    concurrent: bool = Field(default=False, description="Zda byly nezávislé uzly spuštěny souběžně.")
+    node_durations: Dict[str, float] = Field(default_factory=dict, description="Doba běhu jednotlivých uzlů v sekundách.")
+    node_starts: Dict[str, float] = Field(default_factory=dict, description="Začátek uzlu v sekundách od startu flow.")
+    critical_path: List[str] = Field(default_factory=list, description="Nejdelší řetězec závislých uzlů.")
+    critical_path_latency: float = Field(default=0.0, description="Součet dob uzlů na kritické cestě v sekundách.")
+    sequential_latency: float = Field(default=0.0, description="Součet dob všech uzlů (doba při sekvenčním běhu).")
+    wall_time: float = Field(default=0.0, description="Skutečná doba běhu celého flow v sekundách.")
+    time_to_first_token: Optional[float] = Field(default=None, description="Čas od startu flow do prvního tokenu odpovědi (jen při streamování).")
+    trace_id: Optional[str] = Field(default=None, description="ID trace běhu (utils.tracing).")
+    spans: List[dict] = Field(default_factory=list, description="Spany běhu (uzly, LLM volání, vyhledávání) seřazené podle začátku.")
+
+
+def parse_reference(value: Any) -> Optional[str]:
+    """Vrátí obsah reference `${...}` nebo None, pokud hodnota není referencí."""
+    if not isinstance(value, str):
+        return None
+    match = REFERENCE_PATTERN.match(value.strip())
+    return match.group(1) if match else None
+
+
+def resolve_path(value: Any, path: List[str]) -> Any:
+    """Projde hodnotu podle cesty; u dict bere klíče, u objektů atributy."""
+    for part in path:
+        if isinstance(value, dict):
+            value = value[part]
+        else:
+            value = getattr(value, part)
+    return value
+
+
+class FlowExecutor:
+    """
+    Dlouhodobě žijící executor promptflow DAGu.
+
+    Na rozdíl od `PFClient().test()` načte `flow.dag.yaml` a moduly uzlů jen jednou
+    za proces a poté uzly volá přímo jako python funkce. Modely, spojení do Weaviate
+    a další stav na úrovni modulů tak zůstávají "teplé" mezi jednotlivými zprávami.
+    """
+
+    def __init__(self, flow_dir: str = FLOW_DIR, concurrent: bool = FLOW_CONCURRENT_EXECUTION, max_workers: int = FLOW_MAX_WORKERS):
+        self.flow_dir = flow_dir
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        with open(os.path.join(flow_dir, "flow.dag.yaml"), "r", encoding="utf-8") as f:
+            definition = yaml.safe_load(f)
+
+        self.inputs_spec: Dict[str, dict] = definition.get("inputs", {}) or {}
+        self.outputs_spec: Dict[str, dict] = definition.get("outputs", {}) or {}
+        self.nodes: List[FlowNode] = self._sort_nodes([
+            FlowNode(
+                name=node["name"],
+                func=self._load_tool(node["source"]["path"]),
+                inputs=node.get("inputs", {}) or {}
+            )
+            for node in definition.get("nodes", [])
+        ])
+
+    def _load_tool(self, source_path: str) -> Callable:
+        """Naimportuje modul uzlu a najde v něm funkci označenou dekorátorem @tool."""
+        module_name = f"{os.path.basename(self.flow_dir)}.{os.path.splitext(source_path)[0].replace('/', '.')}"
+
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(self.flow_dir, source_path))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+        for attribute in vars(module).values():
+            if callable(attribute) and hasattr(attribute, "__tool") and getattr(attribute, "__module__", None) == module.__name__:
+                return attribute
+
+        raise ValueError(f"V modulu '{source_path}' nebyla nalezena žádná @tool funkce.")
+
+    def _sort_nodes(self, nodes: List[FlowNode]) -> List[FlowNode]:
+        """Seřadí uzly topologicky podle jejich závislostí."""
+        nodes_by_name = {node.name: node for node in nodes}
+        sorted_nodes: List[FlowNode] = []
+        visiting, visited = set(), set()
+
+        def visit(node: FlowNode) -> None:
+            if node.name in visited:
+                return
+            if node.name in visiting:
+                raise ValueError(f"Flow obsahuje cyklus přes uzel '{node.name}'.")
+            visiting.add(node.name)
+            for dependency in node.dependencies:
+                if dependency not in nodes_by_name:
+                    raise ValueError(f"Uzel '{node.name}' odkazuje na neexistující uzel '{dependency}'.")
+                visit(nodes_by_name[dependency])
+            visiting.discard(node.name)
+            visited.add(node.name)
+            sorted_nodes.append(node)
+
+        for node in nodes:
+            visit(node)
+
+        return sorted_nodes
+
+    def _prepare_inputs(self, inputs: dict) -> dict:
+        """Doplní výchozí hodnoty vstupů z DAGu a odpojí je od objektů volajícího."""
+        flow_inputs = {}
+        for name, spec in self.inputs_spec.items():
+            if name in inputs:
+                flow_inputs[name] = inputs[name]
+            elif "default" in spec:
+                flow_inputs[name] = spec["default"]
+            else:
+                raise ValueError(f"Chybí povinný vstup flow '{name}'.")
+
+        # pf.test vstupy serializuje, proto ani uzly zde nesmí měnit objekty volajícího (např. chat_history)
+        return copy.deepcopy(flow_inputs)
+
+    def _resolve_value(self, value: Any, flow_inputs: dict, results: Dict[str, Any]) -> Any:
+        reference = parse_reference(value)
+        if reference is None:
+            return value
+
+        parts = reference.split(".")
+        if parts[0] == "inputs":
+            return resolve_path(flow_inputs, parts[1:])
+
+        if len(parts) < 2 or parts[1] != "output":
+            raise ValueError(f"Nepodporovaná reference '{value}'.")
+        return resolve_path(results[parts[0]], parts[2:])
+
+    def _run_node(self, node: FlowNode, flow_inputs: dict, results: Dict[str, Any]) -> Any:
+        kwargs = {
+            name: self._resolve_value(value, flow_inputs, results)
+            for name, value in node.inputs.items()
+        }
+        with span(node.name, kind="node"):
+            return node.func(**kwargs)
+
+    def _collect_outputs(self, flow_inputs: dict, results: Dict[str, Any]) -> dict:
+        return {
+            name: self._resolve_value(spec.get("reference"), flow_inputs, results)
+            for name, spec in self.outputs_spec.items()
+        }
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="flow-node")
+        return self._pool
+
+    def _run_sequential(self, flow_inputs: dict, results: Dict[str, Any], stats: FlowRunStats, started: float) -> None:
+        for node in self.nodes:
+            node_start = time.perf_counter()
+            results[node.name] = self._run_node(node, flow_inputs, results)
+            stats.node_starts[node.name] = node_start - started
+            stats.node_durations[node.name] = time.perf_counter() - node_start
+
+    def _run_concurrent(self, flow_inputs: dict, results: Dict[str, Any], stats: FlowRunStats, started: float) -> None:
+        """Spouští každý uzel hned, jakmile jsou hotové všechny jeho závislosti."""
+        pool = self._get_pool()
+        pending = list(self.nodes)
+        running = {}
+
+        def timed(node: FlowNode, node_inputs: dict) -> Tuple[Any, float, float]:
+            node_start = time.perf_counter()
+            with span(node.name, kind="node"):
+                output = node.func(**node_inputs)
+            return output, node_start, time.perf_counter() - node_start
+
+        while pending or running:
+            for node in [node for node in pending if node.dependencies.issubset(results)]:
+                pending.remove(node)
+                # vstupy vyhodnocujeme v hlavním vlákně, závislosti už jsou v results
+                node_inputs = {
+                    name: self._resolve_value(value, flow_inputs, results)
+                    for name, value in node.inputs.items()
+                }
+                # kopie kontextu přenese do vlákna uzlu i stream handler (contextvars)
+                running[pool.submit(contextvars.copy_context().run, timed, node, node_inputs)] = node
+
+            if not running:
+                raise ValueError(f"Uzly {[node.name for node in pending]} nelze spustit - nesplnitelné závislosti.")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                output, node_start, duration = future.result()
+                results[node.name] = output
+                stats.node_starts[node.name] = node_start - started
+                stats.node_durations[node.name] = duration
+
+    def _fill_critical_path(self, stats: FlowRunStats) -> None:
+        """Spočítá nejdelší cestu DAGem podle naměřených dob uzlů."""
+        path_latency: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+
+        for node in self.nodes:
+            slowest = max(node.dependencies, key=lambda name: path_latency[name], default=None)
+            previous[node.name] = slowest
+            path_latency[node.name] = stats.node_durations.get(node.name, 0.0) + (path_latency[slowest] if slowest else 0.0)
+
+        if not path_latency:
+            return
+
+        last = max(path_latency, key=path_latency.get)
+        stats.critical_path_latency = path_latency[last]
+        while last:
+            stats.critical_path.insert(0, last)
+            last = previous[last]
+        stats.sequential_latency = sum(stats.node_durations.values())
+
+    def run_with_stats(self, inputs: dict) -> Tuple[dict, FlowRunStats]:
+        """
+        Spustí celý flow a vrátí jeho výstupy spolu s časováním uzlů.
+
+        Args:
+            inputs: Vstupy flow (customer_input, chat_history, context, customer, llm_provider).
+
+        Returns:
+            Dvojici (výstupy flow ve stejném tvaru jako `pf.test`, FlowRunStats).
+        """
+        flow_inputs = self._prepare_inputs(inputs)
+        results: Dict[str, Any] = {}
+        stats = FlowRunStats(concurrent=self.concurrent)
+
+        with start_trace("flow", llm_provider=flow_inputs.get("llm_provider")) as trace:
+            started = time.perf_counter()
+            if self.concurrent:
+                self._run_concurrent(flow_inputs, results, stats, started)
+            else:
+                self._run_sequential(flow_inputs, results, stats, started)
+            stats.wall_time = time.perf_counter() - started
+
+        if trace is not None:
+            stats.trace_id = trace.trace_id
+            stats.spans = trace.to_dicts()
+
+        self._fill_critical_path(stats)
+        print(
+            f"Flow dokončen za {stats.wall_time:.3f} s (kritická cesta {stats.critical_path_latency:.3f} s: "
+            f"{' -> '.join(stats.critical_path)}, sekvenčně by trval {stats.sequential_latency:.3f} s)"
+        )
+
+        return self._collect_outputs(flow_inputs, results), stats
+
+    def run(self, inputs: dict) -> dict:
+        """
+        Spustí celý flow a vrátí jeho výstupy ve stejném tvaru jako `pf.test`.
+
+        Args:
+            inputs: Vstupy flow (customer_input, chat_history, context, customer, llm_provider).
+
+        Returns:
+            Slovník výstupů definovaných v sekci `outputs` souboru flow.dag.yaml.
+        """
+        outputs, _ = self.run_with_stats(inputs)
+        return outputs
+
+    def stream(self, inputs: dict) -> Iterator[StreamEvent]:
+        """
+        Spustí flow na pozadí a průběžně vrací události, které uzly posílají přes `utils.streaming.emit`
+        (např. 'answer_delta' s dalším kusem textu odpovědi).
+
+        Poslední událost je vždy 'result' s dvojicí (výstupy flow, FlowRunStats).
+        Výjimka z flow se vyvolá v iterujícím vlákně.
+        """
+        events: "queue.Queue[Optional[StreamEvent]]" = queue.Queue()
+        outcome: Dict[str, Any] = {}
+
+        def run_flow() -> None:
+            try:
+                with stream_to(events.put):
+                    outcome["result"] = self.run_with_stats(inputs)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                events.put(None)
+
+        started = time.perf_counter()
+        time_to_first_token = None
+        threading.Thread(target=run_flow, name="flow-stream", daemon=True).start()
+
+        while (event := events.get()) is not None:
+            if event.type == "answer_delta" and time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+            yield event
+
+        if "error" in outcome:
+            raise outcome["error"]
+
+        outputs, stats = outcome["result"]
+        stats.time_to_first_token = time_to_first_token
+        yield StreamEvent(type="result", data=(outputs, stats))
+
+_executor: Optional[FlowExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_flow_executor() -> FlowExecutor:
+    """Vrátí sdílenou instanci FlowExecutor pro celý proces (vytvoří ji při prvním volání)."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = FlowExecutor()
+
+    return _executor
@@ -0,0 +1,253 @@
+"""
+Hedging (závod) LLM volání mezi dvěma providery.
+
+Primární provider dostane náskok odpovídající p95 jeho dosavadní latence; pokud do té
+doby neodpoví, pošle se stejný prompt i sekundárnímu providerovi a použije se první
+platný strukturovaný výsledek. Poražené volání se zruší (asyncio cancel zavře HTTP
+požadavek) a jeho tokeny se započítají do TokenManageru přes `record_usage`.
+"""
+import asyncio, threading, time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from langchain_core.runnables import Runnable
+
+from .config import HEDGING_CONFIG, HEDGING_LATENCY_WINDOW, HEDGING_MIN_SAMPLES
+
+
+class LatencyTracker:
+    """Klouzavé okno latencí (v sekundách) pro jednotlivé klíče (uzel, model, režim)."""
+
+    def __init__(self, window: int = HEDGING_LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[Tuple, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Tuple, latency: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, key: Tuple, percentile: float, min_samples: int = HEDGING_MIN_SAMPLES) -> Optional[float]:
+        """Vrátí percentil latence, nebo None, pokud ještě není dost měření."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+_latency_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    return _latency_tracker
+
+
+def estimate_prompt_tokens(prompt_value: Any) -> int:
+    """Hrubý odhad vstupních tokenů zrušeného volání (cca 4 znaky na token)."""
+    text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+    return max(1, len(text) // 4)
+
+
+def _is_valid(output: Any) -> bool:
+    return isinstance(output, dict) and output.get("parsed") is not None
+
+
+class HedgedStructuredOutput(Runnable):
+    """Závod dvou `with_structured_output(..., include_raw=True)` runnablů se stejným schématem."""
+
+    def __init__(self, hedged_model: "HedgedChatModel", primary: Runnable, secondary: Runnable):
+        self.hedged_model = hedged_model
+        self.primary = primary
+        self.secondary = secondary
+
+    def _provider(self, role: str) -> Optional[str]:
+        model = self.hedged_model
+        return model.primary_provider if role == "primary" else model.secondary_provider
+
+    def _usage(self, role: str, name: str, output: Any, note: str) -> dict:
+        usage = getattr(output.get("raw") if isinstance(output, dict) else None, "usage_metadata", None) or {}
+        return {"model": name, "provider": self._provider(role), "input_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0), "note": note}
+
+    def _cancelled_usage(self, role: str, name: str, input: Any) -> dict:
+        return {"model": name, "provider": self._provider(role), "input_tokens": estimate_prompt_tokens(input), "output_tokens": 0, "note": "hedging - zrušeno (odhad)"}
+
+    async def _race(self, input: Any, config=None) -> dict:
+        model = self.hedged_model
+        names = {"primary": model.primary_name, "secondary": model.secondary_name}
+        started = time.perf_counter()
+        tasks = {asyncio.ensure_future(self.primary.ainvoke(input, config)): "primary"}
+
+        done, _ = await asyncio.wait(set(tasks), timeout=model.delay("invoke"))
+        primary_task = next(iter(tasks))
+        if not done or not _is_valid(primary_task.result() if not primary_task.exception() else None):
+            print(f"Hedging ({model.node}): {names['primary']} neodpověděl včas, posílám dotaz i na {names['secondary']}.")
+            model.hedges += 1
+            tasks[asyncio.ensure_future(self.secondary.ainvoke(input, config))] = "secondary"
+
+        winner, winner_output, extra_usage, last_error = None, None, [], None
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    role = tasks[task]
+                    if role == "primary":
+                        model.record_latency("invoke", time.perf_counter() - started)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        print(f"Hedging ({model.node}): volání {names[role]} selhalo: {last_error}")
+                        continue
+                    output = task.result()
+                    if winner is None and _is_valid(output):
+                        winner, winner_output = role, output
+                    else:
+                        extra_usage.append(self._usage(role, names[role], output, "hedging - poražený"))
+        finally:
+            for task in pending:
+                task.cancel()
+                role = tasks[task]
+                if role == "primary":
+                    # zrušené volání je cenzurované měření - skutečná latence je aspoň tolik
+                    model.record_latency("invoke", time.perf_counter() - started)
+                extra_usage.append(self._cancelled_usage(role, names[role], input))
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            if last_error is not None:
+                raise last_error
+            # žádná platná odpověď - vrátíme výstup primárního volání, ať se chová jako bez hedgingu
+            return primary_task.result()
+
+        if winner == "secondary":
+            model.secondary_wins += 1
+        return {**winner_output, "model_name": names[winner], "provider": self._provider(winner), "hedge_usage": extra_usage}
+
+    def invoke(self, input: Any, config=None, **kwargs) -> dict:
+        return asyncio.run(self._race(input, config))
+
+    async def ainvoke(self, input: Any, config=None, **kwargs) -> dict:
+        return await self._race(input, config)
+
+    async def _astream_race(self, input: Any, config=None) -> AsyncIterator[dict]:
+        """Závod o první chunk - vítěz pak streamuje dál sám, poražený stream se zavře."""
+        model = self.hedged_model
+        names = {"primary": model.primary_name, "secondary": model.secondary_name}
+        started = time.perf_counter()
+        iterators = {"primary": self.primary.astream(input, config).__aiter__()}
+        tasks = {asyncio.ensure_future(iterators["primary"].__anext__()): "primary"}
+
+        done, _ = await asyncio.wait(set(tasks), timeout=model.delay("stream"))
+        if not done:
+            print(f"Hedging ({model.node}): {names['primary']} nezačal streamovat včas, posílám dotaz i na {names['secondary']}.")
+            model.hedges += 1
+            iterators["secondary"] = self.secondary.astream(input, config).__aiter__()
+            tasks[asyncio.ensure_future(iterators["secondary"].__anext__())] = "secondary"
+
+        winner, first_chunk, last_error = None, None, None
+        pending = set(tasks)
+        extra_usage = []
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    role = tasks[task]
+                    if role == "primary":
+                        model.record_latency("stream", time.perf_counter() - started)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    if winner is None:
+                        winner, first_chunk = role, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+                if tasks[task] == "primary":
+                    model.record_latency("stream", time.perf_counter() - started)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for role, iterator in iterators.items():
+                if role != winner:
+                    extra_usage.append(self._cancelled_usage(role, names[role], input))
+                    await iterator.aclose()
+
+        if winner is None:
+            raise last_error or RuntimeError("Žádný provider nevrátil odpověď.")
+
+        if winner == "secondary":
+            model.secondary_wins += 1
+        yield first_chunk
+        async for chunk in iterators[winner]:
+            yield chunk
+        yield {"model_name": names[winner], "provider": self._provider(winner), "hedge_usage": extra_usage}
+
+    def stream(self, input: Any, config=None, **kwargs) -> Iterator[dict]:
+        # async generátor převádíme na synchronní ve vlastní event loop (uzly flow běží ve vláknech)
+        loop = asyncio.new_event_loop()
+        stream = self._astream_race(input, config)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(stream.aclose())
+            loop.close()
+
+
+class HedgedChatModel:
+    """
+    Obal dvou chat modelů (primární a sekundární provider) pro jeden uzel flow.
+
+    Podporuje rozhraní, které uzly používají: `with_structured_output(schema, include_raw=True)`.
+
+    Args:
+        primary: Chat model primárního providera.
+        secondary: Chat model sekundárního providera.
+        node: Název uzlu (klíč v HEDGING_CONFIG, zároveň klíč měření latence).
+        settings: Nastavení hedgingu uzlu (viz HEDGING_CONFIG).
+        tracker: Měření latencí pro výpočet zpoždění.
+        providers: Dvojice (primární, sekundární provider) pro záznam spotřeby tokenů.
+    """
+
+    def __init__(self, primary, secondary, node: str, settings: Optional[dict] = None, tracker: Optional[LatencyTracker] = None,
+                 providers: Tuple[Optional[str], Optional[str]] = (None, None)):
+        from .models import get_model_name
+
+        self.primary = primary
+        self.secondary = secondary
+        self.node = node
+        self.settings = settings or HEDGING_CONFIG.get(node, {})
+        self.tracker = tracker or get_latency_tracker()
+        self.primary_name = get_model_name(primary)
+        self.secondary_name = get_model_name(secondary)
+        self.primary_provider, self.secondary_provider = providers
+        # get_model_name(hedged) vrací primární model, skutečný vítěz je ve výstupu pod "model_name"
+        self.model_name = self.primary_name
+        self.hedges = 0
+        self.secondary_wins = 0
+
+    def _latency_key(self, mode: str) -> Tuple:
+        return (self.node, self.primary_name, mode)
+
+    def record_latency(self, mode: str, latency: float) -> None:
+        """Zaznamená latenci primárního volání; u zrušeného volání jde o dolní odhad (čas do zrušení)."""
+        self.tracker.record(self._latency_key(mode), latency)
+
+    def delay(self, mode: str) -> float:
+        """Náskok primárního providera: p95 jeho latence omezené na <min_delay, max_delay>."""
+        settings = self.settings
+        observed = self.tracker.percentile(self._latency_key(mode), settings.get("percentile", 95))
+        delay = observed if observed is not None else settings.get("initial_delay", 2.0)
+        return min(max(delay, settings.get("min_delay", 0.0)), settings.get("max_delay", float("inf")))
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs) -> Runnable:
+        if not include_raw:
+            raise ValueError("HedgedChatModel podporuje jen with_structured_output(..., include_raw=True).")
+        return HedgedStructuredOutput(
+            self,
+            self.primary.with_structured_output(schema, include_raw=True, **kwargs),
+            self.secondary.with_structured_output(schema, include_raw=True, **kwargs),
+        )
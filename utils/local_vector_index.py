@@ -0,0 +1,350 @@
+"""
+Lokální vektorový index produktů jako alternativa k Weaviate.
+
+Vektory a vlastnosti kolekce Apple_Products se exportují z Weaviate do souborů
+(float32 matice přes np.memmap + JSON s vlastnostmi) a vyhledávání probíhá přímo
+v procesu aplikace - bez síťového volání. Pro velikost našeho katalogu stačí
+vektorizovaný brute-force výpočet kosinové podobnosti.
+
+Každý export (i úprava cen) vytvoří novou verzi v podadresáři `versions/` a teprve
+pak se atomicky přepne soubor CURRENT, který na ni ukazuje - čtenář tak vždy načte
+vektory, dokumenty i meta ze stejné verze.
+
+Export z kořene repozitáře:
+    python -m utils.local_vector_index
+"""
+import os, json, shutil, threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from .catalog_version import CatalogVersion, CatalogVersionGuard
+from .config import LOCAL_INDEX_DIR, EMBEDDING_MODEL
+from .embedding_cache import get_embedding_cache
+from .files import write_json_atomic
+from .weaviate_service import Document, SearchQuery, RETURN_PROPERTIES, read_vectorizer_model
+
+
+VECTORS_FILE = "vectors.f32"
+DOCUMENTS_FILE = "documents.json"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 2  # aktuální + předchozí verze (může ji ještě číst rozběhnutý proces)
+
+
+def current_index_dir(index_dir: str) -> Optional[str]:
+    """Vrátí adresář aktuální verze indexu podle souboru CURRENT, nebo None, pokud index neexistuje."""
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+    except FileNotFoundError:
+        return None
+    return os.path.join(index_dir, VERSIONS_DIR, version)
+
+
+def _write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _publish_version(index_dir: str, write) -> None:
+    """
+    Zapíše novou verzi indexu do vlastního adresáře a přepne na ni soubor CURRENT.
+
+    Args:
+        index_dir: Adresář indexu.
+        write: Funkce, která do předaného adresáře zapíše soubory verze.
+    """
+    versions_dir = os.path.join(index_dir, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+    version = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+    version_dir = os.path.join(versions_dir, version)
+    tmp_dir = os.path.join(versions_dir, f".tmp-{version}")
+    os.makedirs(tmp_dir)
+    try:
+        write(tmp_dir)
+        os.rename(tmp_dir, version_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # jediné přepnutí, které čtenáři vidí
+    write_json_atomic(os.path.join(index_dir, CURRENT_FILE), {"version": version})
+
+    for old in sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))[:-KEEP_VERSIONS]:
+        if old != version:
+            shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+
+
+def write_local_index(index_dir: str, vectors: np.ndarray, documents: List[dict], model: str) -> None:
+    """
+    Uloží vektory (normalizované na jednotkovou délku) a vlastnosti dokumentů jako novou verzi indexu.
+
+    Args:
+        index_dir: Cílový adresář indexu.
+        vectors: Matice vektorů (počet dokumentů x dimenze).
+        documents: Vlastnosti dokumentů ve stejném pořadí jako vektory.
+        model: Embedding model, kterým byly vektory vytvořeny (stejným se vektorizují dotazy).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2 or len(vectors) != len(documents):
+        raise ValueError("Počet vektorů neodpovídá počtu dokumentů.")
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    def write(version_dir: str) -> None:
+        matrix = np.memmap(os.path.join(version_dir, VECTORS_FILE), dtype=np.float32, mode="w+", shape=vectors.shape)
+        matrix[:] = vectors
+        matrix.flush()
+        del matrix
+        _write_json(os.path.join(version_dir, DOCUMENTS_FILE), documents)
+        _write_json(os.path.join(version_dir, META_FILE), {
+            "count": int(vectors.shape[0]),
+            "dimensions": int(vectors.shape[1]) if vectors.size else 0,
+            "model": model,
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    _publish_version(index_dir, write)
+
+
+def export_weaviate_collection(collection, index_dir: str = LOCAL_INDEX_DIR, model: Optional[str] = None) -> int:
+    """
+    Exportuje vektory a vlastnosti kolekce z Weaviate do lokálního indexu.
+
+    Args:
+        collection: Kolekce Weaviate (Apple_Products).
+        index_dir: Cílový adresář indexu.
+        model: Embedding model vektorů; None = zjistí se z konfigurace vektorizéru kolekce.
+
+    Returns:
+        Počet exportovaných dokumentů.
+    """
+    vectors, documents = [], []
+    for obj in collection.iterator(include_vector=True, return_properties=RETURN_PROPERTIES):
+        vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+        if not vector:
+            continue
+        vectors.append(vector)
+        documents.append({name: obj.properties.get(name) for name in RETURN_PROPERTIES})
+
+    model = model or read_vectorizer_model(collection)
+    write_local_index(index_dir, np.array(vectors, dtype=np.float32).reshape(len(vectors), -1), documents, model)
+    print(f"Exportováno {len(documents)} dokumentů do lokálního indexu {index_dir}.")
+    return len(documents)
+
+
+def update_local_index_prices(prices: Dict[str, Optional[float]], index_dir: str = LOCAL_INDEX_DIR) -> int:
+    """
+    Přepíše ceny produktů v exportovaném lokálním indexu (vektory zůstávají beze změny).
+
+    Args:
+        prices: Kód produktu -> nová cena.
+        index_dir: Adresář indexu; pokud index neexistuje, nic se nestane.
+
+    Returns:
+        Počet upravených dokumentů.
+    """
+    source_dir = current_index_dir(index_dir)
+    if not prices or source_dir is None:
+        return 0
+    with open(os.path.join(source_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+        documents = json.load(f)
+
+    updated = 0
+    for doc in documents:
+        code = doc.get("product_code")
+        if code in prices and doc.get("price") != prices[code]:
+            doc["price"] = prices[code]
+            updated += 1
+
+    if updated:
+        def write(version_dir: str) -> None:
+            # vektory se nemění - nová verze je jen sdílí (hard link), kopíruje se až když link nejde
+            try:
+                os.link(os.path.join(source_dir, VECTORS_FILE), os.path.join(version_dir, VECTORS_FILE))
+            except OSError:
+                shutil.copyfile(os.path.join(source_dir, VECTORS_FILE), os.path.join(version_dir, VECTORS_FILE))
+            shutil.copyfile(os.path.join(source_dir, META_FILE), os.path.join(version_dir, META_FILE))
+            _write_json(os.path.join(version_dir, DOCUMENTS_FILE), documents)
+
+        _publish_version(index_dir, write)
+        print(f"V lokálním indexu {index_dir} aktualizovány ceny {updated} dokumentů.")
+    return updated
+
+
+class IndexSnapshot(NamedTuple):
+    """Neměnný stav načteného indexu - vyhledávání čte vždy jednu konzistentní verzi."""
+
+    model: str
+    vectors: np.ndarray
+    documents: List[Document]
+    prices: np.ndarray
+    product_codes: np.ndarray
+
+
+class LocalVectorIndex:
+    """
+    Vyhledávání produktů v lokálním vektorovém indexu se stejným rozhraním jako WeaviateService.
+
+    Filtry (cena, kód produktu) se aplikují jako booleovské masky nad celým katalogem,
+    podobnost se počítá jedním maticovým násobením nad memmap maticí vektorů.
+    Po změně verze katalogu (nový import/export) se index líně načte znovu a nový stav
+    se zveřejní jedním přiřazením `snapshot`, takže souběžné hledání nemíchá stará a nová data.
+
+    Args:
+        index_dir: Adresář s exportovaným indexem.
+        embedding_cache: Zdroj vektorů dotazů. None = sdílená EmbeddingCache.
+        catalog_version: Sledovač verze katalogu. None = sdílený sledovač.
+    """
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, embedding_cache=None, catalog_version: Optional[CatalogVersion] = None):
+        self.index_dir = index_dir
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.catalog_guard = CatalogVersionGuard(catalog_version)
+        self._lock = threading.Lock()
+        self.snapshot = self._load()
+
+    def _load(self) -> IndexSnapshot:
+        version_dir = current_index_dir(self.index_dir)
+        if version_dir is None:
+            raise FileNotFoundError(f"Lokální index {self.index_dir} neexistuje (chybí {CURRENT_FILE}).")
+        with open(os.path.join(version_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(version_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+
+        shape = (meta["count"], meta["dimensions"])
+        vectors = np.memmap(os.path.join(version_dir, VECTORS_FILE), dtype=np.float32, mode="r", shape=shape) if meta["count"] else np.zeros(shape, dtype=np.float32)
+
+        documents = [Document(**doc) for doc in documents]
+        snapshot = IndexSnapshot(
+            model=meta.get("model") or EMBEDDING_MODEL,
+            vectors=vectors,
+            documents=documents,
+            prices=np.array([np.nan if doc.price is None else doc.price for doc in documents], dtype=np.float64),
+            product_codes=np.array([doc.product_code or "" for doc in documents], dtype=object),
+        )
+        print(f"Lokální vektorový index načten ({meta['count']} dokumentů, model {snapshot.model}).")
+        return snapshot
+
+    def _current(self) -> IndexSnapshot:
+        """
+        Vrátí aktuální stav indexu (po změně katalogu nejdřív načte nový).
+
+        Novou verzi katalogu si guard převezme až po úspěšném načtení - při chybě
+        zůstává předchozí stav a načtení se zkusí znovu při dalším dotazu.
+        """
+        if self.catalog_guard.pending() is not None:
+            with self._lock:
+                version = self.catalog_guard.pending()
+                if version is not None:
+                    try:
+                        self.snapshot = self._load()
+                    except Exception as e:
+                        print(f"Chyba při načítání lokálního indexu, zůstává předchozí verze: {e}")
+                        return self.snapshot
+                    self.catalog_guard.commit(version)
+        return self.snapshot
+
+    @staticmethod
+    def _filter_mask(snapshot: IndexSnapshot, min_price: Optional[float], max_price: Optional[float], product_code: Optional[str]) -> np.ndarray:
+        """Sestaví masku dokumentů odpovídající filtrům (stejná sémantika jako filtry ve WeaviateService)."""
+        mask = np.ones(len(snapshot.documents), dtype=bool)
+        # porovnání s NaN je vždy False, produkty bez ceny tedy cenové filtry nesplní (jako ve Weaviate)
+        with np.errstate(invalid="ignore"):
+            if min_price is not None:
+                mask &= snapshot.prices > min_price
+            if max_price is not None:
+                mask &= snapshot.prices < max_price
+        if product_code:
+            mask &= snapshot.product_codes == product_code
+        return mask
+
+    def search_products(self, search_params: SearchQuery, limit: int = 5) -> List[Document]:
+        """
+        Najde `limit` nejpodobnějších produktů k dotazu, které splňují filtry.
+
+        Args:
+            search_params: Dotaz s volitelnými filtry ceny a kódu produktu.
+            limit: Maximální počet vrácených výsledků.
+
+        Returns:
+            Seznam dokumentů seřazený od nejpodobnějšího. Při chybě prázdný seznam.
+        """
+        if not search_params.query:
+            print("Chyba: Parametr 'query' chybí nebo není řetězec v search_params.")
+            return []
+        if not isinstance(limit, int) or limit <= 0:
+            limit = 5
+
+        try:
+            snapshot = self._current()
+            vectors, documents = snapshot.vectors, snapshot.documents
+
+            candidates = np.flatnonzero(self._filter_mask(snapshot, search_params.min_price, search_params.max_price, search_params.product_code))
+            if candidates.size == 0:
+                return []
+
+            query_vector = np.asarray(self.embedding_cache.get_embedding(search_params.query, model=snapshot.model), dtype=np.float32)
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+
+            # vektory v indexu jsou normalizované, kosinová podobnost je tedy skalární součin;
+            # násobíme celou matici (bez kopírování řádků memmapu) a maska se aplikuje až na skóre
+            scores = (vectors @ query_vector)[candidates]
+            if candidates.size > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(candidates.size)
+            top = top[np.argsort(-scores[top])]
+
+            # kosinová vzdálenost jako u Weaviate (1 - podobnost)
+            return [
+                documents[candidates[index]].model_copy(update={"distance": float(1.0 - scores[index])})
+                for index in top
+            ]
+
+        except Exception as e:
+            print(f"Chyba při vyhledávání v lokálním indexu: {e}")
+            return []
+
+    def fetch_all_documents(self) -> List[Document]:
+        """Vrátí všechny produkty indexu (stejné rozhraní jako WeaviateService)."""
+        return [doc.model_copy() for doc in self._current().documents]
+
+    def fetch_by_product_codes(self, product_codes: List[str]) -> List[Document]:
+        """Vrátí produkty s danými kódy (stejné rozhraní jako WeaviateService)."""
+        snapshot = self._current()
+        mask = np.isin(snapshot.product_codes, [code for code in product_codes if code])
+        return [snapshot.documents[index].model_copy() for index in np.flatnonzero(mask)]
+
+    def close(self) -> None:
+        pass
+
+
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_vector_index() -> LocalVectorIndex:
+    """Vrátí sdílený LocalVectorIndex pro celý proces."""
+    global _local_index
+
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalVectorIndex()
+
+    return _local_index
+
+
+if __name__ == "__main__":
+    from .weaviate_service import WeaviateService
+
+    service = WeaviateService(use_embedding_cache=False, use_result_cache=False)
+    try:
+        export_weaviate_collection(service.collection)
+    finally:
+        service.close()
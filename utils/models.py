@@ -1,84 +1,129 @@
-import os, json, requests
-from typing import Any, List
+import os, json, time, requests, threading
+from typing import Any, Callable, List, Optional
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_anthropic import ChatAnthropic
 
-from .config import OPENAI_MODEL, OPENAI_MINI_MODEL, GOOGLE_MODEL, GOOGLE_BASIC_MODEL, ANTHROPIC_MODEL, ANTHROPIC_BASIC_MODEL, XAI_MODEL, XAI_BASIC_MODEL
+from .config import OPENAI_MODEL, OPENAI_MINI_MODEL, GOOGLE_MODEL, GOOGLE_BASIC_MODEL, ANTHROPIC_MODEL, ANTHROPIC_BASIC_MODEL, XAI_MODEL, XAI_BASIC_MODEL, HEDGING_CONFIG
+from .files import write_json_atomic
 
 # Načtení proměnných z .env souboru
 load_dotenv()
 
 
+# Balíčky providerů se importují až při vytvoření prvního klienta daného providera
+def _chat_openai(**kwargs):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(**kwargs)
+
+
+def _chat_google(**kwargs):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(**kwargs)
+
+
+def _chat_anthropic(**kwargs):
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(**kwargs)
+
+
+class _LazyModel:
+    """Atribut třídy Models, který vytvoří klienta až při prvním přístupu a dál vrací stejnou instanci."""
+
+    def __init__(self, factory: Callable, **kwargs):
+        self.factory = factory
+        self.kwargs = kwargs
+        self.client = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance, owner):
+        if self.client is None:
+            with self._lock:
+                if self.client is None:
+                    self.client = self.factory(**self.kwargs)
+        return self.client
+
+
 class Models:
-    openai = ChatOpenAI(
+    openai = _LazyModel(
+        _chat_openai,
         model_name=OPENAI_MODEL,
         temperature=0,
     )
 
-    openai_hot = ChatOpenAI(
+    openai_hot = _LazyModel(
+        _chat_openai,
         model_name=OPENAI_MODEL,
         temperature=0.7,
+        stream_usage=True,
     )
     
-    openai_mini = ChatOpenAI(
+    openai_mini = _LazyModel(
+        _chat_openai,
         model_name=OPENAI_MINI_MODEL,
         temperature=0,
     )
     
-    gemini = ChatGoogleGenerativeAI(
+    gemini = _LazyModel(
+        _chat_google,
         model=GOOGLE_MODEL,
         temperature=0,
         api_key=os.environ.get("GEMINI_API_KEY")
     )
     
-    gemini_hot = ChatGoogleGenerativeAI(
+    gemini_hot = _LazyModel(
+        _chat_google,
         model=GOOGLE_MODEL,
         temperature=0.7,
         api_key=os.environ.get("GEMINI_API_KEY")
     )
     
-    gemini_mini = ChatGoogleGenerativeAI(
+    gemini_mini = _LazyModel(
+        _chat_google,
         model=GOOGLE_BASIC_MODEL,
         temperature=0,
         api_key=os.environ.get("GEMINI_API_KEY")
     )
     
-    anthropic = ChatAnthropic(
+    anthropic = _LazyModel(
+        _chat_anthropic,
         model_name=ANTHROPIC_MODEL,
         temperature=0,
         api_key=os.environ.get("ANTHROPIC_API_KEY")
     )
     
-    anthropic_hot = ChatAnthropic(
+    anthropic_hot = _LazyModel(
+        _chat_anthropic,
         model_name=ANTHROPIC_MODEL,
         temperature=0.7,
         api_key=os.environ.get("ANTHROPIC_API_KEY")
     )
     
-    anthropic_mini = ChatAnthropic(
+    anthropic_mini = _LazyModel(
+        _chat_anthropic,
         model_name=ANTHROPIC_BASIC_MODEL,
         temperature=0,
         api_key=os.environ.get("ANTHROPIC_API_KEY")
     )
     
-    grok = ChatOpenAI(
+    grok = _LazyModel(
+        _chat_openai,
         model=XAI_MODEL,
         temperature=0,
         base_url="https://api.x.ai/v1",
         api_key=os.environ.get("XAI_API_KEY")
     )
     
-    grok_hot = ChatOpenAI(
+    grok_hot = _LazyModel(
+        _chat_openai,
         model=XAI_MODEL,
         temperature=0.7,
+        stream_usage=True,
         base_url="https://api.x.ai/v1",
         api_key=os.environ.get("XAI_API_KEY")
     )
 
-    grok_mini = ChatOpenAI(
+    grok_mini = _LazyModel(
+        _chat_openai,
         model=XAI_BASIC_MODEL,
         temperature=0,
         base_url="https://api.x.ai/v1",
@@ -86,49 +131,73 @@ class Models:
     )
 
 
-    def get_model(provider: str, model_type: str = "normal"):
+    def get_model(provider: str, model_type: str = "normal", hedge: Optional[str] = None):
         """Returns the appropriate model based on the specified provider and type.
+
+        The client is created (and its provider package imported) on first use
+        and then reused for the lifetime of the process.
         
         Args:
             provider: LLM provider ("GOOGLE", "XAI", "OPENAI", "ANTHROPIC")
             model_type: Type of model ("mini", "normal", "hot"), default is "normal"
+            hedge: Flow node name; if hedging is enabled for the node in HEDGING_CONFIG,
+                the model is raced against the node's secondary provider
         """
         
         provider_map = {
             "GOOGLE": {
-                "mini": Models.gemini_mini,
-                "normal": Models.gemini,
-                "hot": Models.gemini_hot
+                "mini": "gemini_mini",
+                "normal": "gemini",
+                "hot": "gemini_hot"
             },
             "XAI": {
-                "mini": Models.grok_mini,
-                "normal": Models.grok,
-                "hot": Models.grok_hot
+                "mini": "grok_mini",
+                "normal": "grok",
+                "hot": "grok_hot"
             },
             "OPENAI": {
-                "mini": Models.openai_mini,
-                "normal": Models.openai,
-                "hot": Models.openai_hot
+                "mini": "openai_mini",
+                "normal": "openai",
+                "hot": "openai_hot"
             },
             "ANTHROPIC": {
-                "mini": Models.anthropic_mini,
-                "normal": Models.anthropic,
-                "hot": Models.anthropic_hot
+                "mini": "anthropic_mini",
+                "normal": "anthropic",
+                "hot": "anthropic_hot"
             }
         }
         
         if provider not in provider_map:
             return None
-            
-        return provider_map[provider].get(model_type)
+
+        attribute = provider_map[provider].get(model_type)
+        # getattr až pro zvolený model - ostatní klienti se nevytváří
+        model = getattr(Models, attribute) if attribute else None
+
+        settings = HEDGING_CONFIG.get(hedge, {}) if hedge else {}
+        secondary_provider = settings.get("secondary_provider")
+        if model is None or not settings.get("enabled") or secondary_provider in (None, provider):
+            return model
+
+        secondary = Models.get_model(secondary_provider, model_type)
+        if secondary is None:
+            return model
+
+        from .hedging import HedgedChatModel
+        return HedgedChatModel(model, secondary, node=hedge, settings=settings, providers=(provider, secondary_provider))
 
 
 class TokenCounter:
-    def __init__(self, model: str="gpt-4o", input_tokens: int=0, output_tokens: int=0, note: str=""):
+    def __init__(self, model: str="gpt-4o", input_tokens: int=0, output_tokens: int=0, note: str="",
+                 provider: Optional[str]=None, node: Optional[str]=None, latency: Optional[float]=None):
         self.model = model
         self.input_tokens = input_tokens
         self.output_tokens = output_tokens
         self.note = note
+        self.provider = provider
+        self.node = node
+        self.latency = latency
+        self.timestamp = time.time()
 
 
 class TokenManager:
@@ -140,10 +209,11 @@ class TokenManager:
         self.pricing_manager = PricingManager()
     
     
-    def add_token(self, model: str, input_tokens: int, output_tokens: int, note: str="") -> None:
+    def add_token(self, model: str, input_tokens: int, output_tokens: int, note: str="",
+                  provider: Optional[str]=None, node: Optional[str]=None, latency: Optional[float]=None) -> None:
         """Add token usage to tracking"""
 
-        self.tokens.append(TokenCounter(model, input_tokens, output_tokens, note))
+        self.tokens.append(TokenCounter(model, input_tokens, output_tokens, note, provider, node, latency))
 
     
     def calculate_total_cost(self) -> float:
@@ -194,17 +264,38 @@ class PricingManager:
         return f"{model_key}_{token_type.lower()}"
 
 class PricingCacheManager:
-    """Manages caching of pricing data"""
+    """Manages caching of pricing data
+
+    Pricing data are held in memory (shared by the whole process). A cold process
+    reads the cache file once, synchronously, so it starts with the last stored rate
+    instead of the default. Cost calculation never waits for the network: stale data
+    (or defaults when there is no cache file yet) are returned immediately and a
+    background thread refreshes them (stale-while-revalidate). The cache file is
+    written atomically, so several worker processes can share it safely.
+    """
     
     output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing_cache')
     os.makedirs(output_dir, exist_ok=True)
 
     file_name = 'pricing_cache.json'
     file_path = os.path.join(output_dir, file_name)
+
+    DEFAULT_USD_CZK_RATE = 23
+    REFRESH_RETRY_INTERVAL = 10 * 60  # po neúspěšném stažení kurzu zkusíme znovu za 10 minut
+
+    # sdílený stav procesu - PricingCacheManager vzniká s každým TokenManagerem
+    _memory: Optional[dict] = None
+    _file_loaded: bool = False
+    _refresh_lock = threading.Lock()
+    _refresh_thread: Optional[threading.Thread] = None
+    _next_refresh_at: float = 0.0
     
     
-    def get_usd_czk_exchange_rate(self, date) -> float:
-        """Returns the USD/CZK exchange rate for a specific day. We call the kurzy.cz API to query the ČNB exchange rate."""
+    def get_usd_czk_exchange_rate(self, date, default: Optional[float] = DEFAULT_USD_CZK_RATE) -> Optional[float]:
+        """Returns the USD/CZK exchange rate for a specific day. We call the kurzy.cz API to query the ČNB exchange rate.
+
+        On failure returns `default` (None lets the caller keep the previous rate).
+        """
         try:
             url = f'https://data.kurzy.cz/json/meny/b[6]den[{date}].json'  # b6 je banka 6, což je ČNB
             response = requests.get(url, timeout=5)  # Adding timeout for the request
@@ -216,27 +307,31 @@ class PricingCacheManager:
             
         except requests.exceptions.Timeout:
             print(f"Požadavek na API vypršel pro datum {date}.")
-            return 23
+            return default
         except requests.exceptions.ConnectionError:
             print(f"Nepodařilo se připojit k API pro datum {date}.")
-            return 23
+            return default
         except requests.exceptions.HTTPError as err:
             print(f"HTTP chyba při získávání dat pro datum {date}: {err}")
-            return 23
+            return default
         except requests.exceptions.RequestException as err:
             print(f"Obecná chyba požadavku pro datum {date}: {err}")
-            return 23
+            return default
         except (KeyError, ValueError, TypeError) as err:
             print(f"Chyba při zpracování dat z API pro datum {date}: {err}")
-            return 23
+            return default
 
 
     def read_from_file(self, file_path):
         # vytvoření cesty ke cachovacímu jsonu, abychom nemuseli pořád provolávat tu API
    
         if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except ValueError as e:
+                print(f"Poškozený soubor s cenami {file_path}: {e}")
+                return None
         else:
             return None
     
@@ -274,34 +369,84 @@ class PricingCacheManager:
     
 
     def get_current_pricing_data(self) -> dict:
-        """Get the current pricing data, refreshing if needed"""
+        """Get the current pricing data from memory; stale data trigger a background refresh"""
 
         today = self.get_today_date_formatted()
-        cached_data = self.read_from_file(self.file_path)
-        
-        if cached_data:
-            if cached_data.get("date") == today:
-                # dnes se aktualizovali cached_data, můžeme ceny načíst z nich
-                print("Cashed data, načítáme ze souboru")
-                return cached_data
-                
-            else:
-                print("Aktualizace cached dat")
-                new_price_data = self.update_cached_data(today)
-                return new_price_data
+        if PricingCacheManager._memory is None and not PricingCacheManager._file_loaded:
+            self.load_from_file()
+        cached_data = PricingCacheManager._memory
+
+        if cached_data is None or cached_data.get("date") != today:
+            # studený start nebo data z minulého dne - vrátíme co máme a obnovíme na pozadí
+            self.refresh_in_background(today)
+
+        if cached_data is None:
+            return {
+                "date": None,
+                "USD/CZK": self.DEFAULT_USD_CZK_RATE,
+                "api_costs": self.get_api_costs()
+            }
+        return cached_data
+
+
+    def load_from_file(self) -> Optional[dict]:
+        """Load the last stored pricing data into memory (done once per process, on first access)"""
+        cls = PricingCacheManager
+        with cls._refresh_lock:
+            if cls._memory is None and not cls._file_loaded:
+                cached_data = self.read_from_file(self.file_path)
+                if cached_data and cached_data.get("USD/CZK") is not None:
+                    # ceníky bereme vždy z kódu, ze souboru jen kurz
+                    cls._memory = {**cached_data, "api_costs": self.get_api_costs()}
+                cls._file_loaded = True
+        return cls._memory
+
+
+    def refresh_in_background(self, today: str) -> None:
+        """Start a background refresh unless one is running or a failed one is waiting to retry"""
+        cls = PricingCacheManager
+        with cls._refresh_lock:
+            if cls._refresh_thread is not None and cls._refresh_thread.is_alive():
+                return
+            if time.monotonic() < cls._next_refresh_at:
+                return
+            cls._refresh_thread = threading.Thread(target=self.refresh, args=(today,), name="pricing-refresh", daemon=True)
+            cls._refresh_thread.start()
+
+
+    def refresh(self, today: str) -> dict:
+        """Load today's pricing data from the cache file (possibly written by another process), or fetch and store them"""
+        cls = PricingCacheManager
+        try:
+            cached_data = self.read_from_file(self.file_path)
+            if cached_data and cached_data.get("date") == today:
+                # ceníky bereme vždy z kódu, ze souboru jen kurz
+                cls._memory = {**cached_data, "api_costs": self.get_api_costs()}
+                return cls._memory
 
-        else:
-            print("Žádné cached data, vytvářím...")
-            new_price_data = self.update_cached_data(today)
-            return new_price_data
+            if cls._memory is None and cached_data:
+                # než se stáhne dnešní kurz, použijeme aspoň poslední uložený
+                cls._memory = {**cached_data, "api_costs": self.get_api_costs()}
+
+            return self.update_cached_data(today)
+        except Exception as e:
+            print(f"Chyba při obnově cenových dat: {e}")
+            cls._next_refresh_at = time.monotonic() + self.REFRESH_RETRY_INTERVAL
+            return cls._memory or {}
 
 
     def update_cached_data(self, today) -> dict:
         """Update the pricing data and write it to the cache json file"""
+        cls = PricingCacheManager
         price_data = {}
         
         try:
-            usd_czk_rate = self.get_usd_czk_exchange_rate(today)
+            usd_czk_rate = self.get_usd_czk_exchange_rate(today, default=None)
+            if usd_czk_rate is None:
+                # kurz se nepodařilo stáhnout - necháme dosavadní (zastaralá) data a zkusíme to později
+                cls._next_refresh_at = time.monotonic() + self.REFRESH_RETRY_INTERVAL
+                return cls._memory or price_data
+
             api_costs = self.get_api_costs()
             
             price_data = {
@@ -310,11 +455,14 @@ class PricingCacheManager:
                 "api_costs": api_costs
             }
             
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(price_data, f, indent=4)
+            # atomický zápis - souběžné procesy nikdy nečtou rozepsaný soubor
+            write_json_atomic(self.file_path, price_data)
+            cls._memory = price_data
+            cls._next_refresh_at = 0.0
         
         except requests.exceptions.RequestException as e:
             print(f"Error fetching data: {e}")
+            cls._next_refresh_at = time.monotonic() + self.REFRESH_RETRY_INTERVAL
         except KeyError as e:
             print(f"Error processing data: {e}")
 
@@ -344,9 +492,32 @@ def _extract_token_counts(output_data: Any) -> tuple[int, int]:
         else:
             raw = output_data
         
-        usage_metadata = getattr(raw, "usage_metadata", {})
+        usage_metadata = getattr(raw, "usage_metadata", None) or {}
         
         input_tokens = usage_metadata.get("input_tokens", 0)
         output_tokens = usage_metadata.get("output_tokens", 0)
   
         return input_tokens, output_tokens
+
+
+def record_usage(token_manager: "TokenManager", llm, output_data: Any, note: str = "",
+                 provider: Optional[str] = None, node: Optional[str] = None, latency: Optional[float] = None) -> None:
+    """Record token usage of a structured-output call, including hedged calls.
+
+    A hedged call reports the winning model (and provider) under "model_name" and
+    "provider" and the cost of the losing (possibly cancelled) call under "hedge_usage".
+    """
+    if isinstance(output_data, dict) and output_data.get("model_name"):
+        model_name = output_data["model_name"]
+        provider = output_data.get("provider") or provider
+    else:
+        model_name = get_model_name(llm)
+    input_tokens, output_tokens = _extract_token_counts(output_data)
+    token_manager.add_token(model_name, input_tokens, output_tokens, note, provider, node, latency)
+
+    hedge_usage = output_data.get("hedge_usage", []) if isinstance(output_data, dict) else []
+    for usage in hedge_usage:
+        token_manager.add_token(
+            usage["model"], usage["input_tokens"], usage["output_tokens"], usage.get("note", ""),
+            usage.get("provider"), node, usage.get("latency")
+        )
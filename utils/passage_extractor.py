@@ -0,0 +1,165 @@
+"""
+Extrakce pasáží z obsahu produktů relevantních k dotazu zákazníka.
+
+Obsah produktu (dlouhý výpis specifikací) se rozdělí na sekce, sekce se ohodnotí
+pomocí BM25 vůči dotazu zákazníka a vyhledávacím dotazům a u každého produktu se
+ponechá jen několik nejlepších pasáží v původním pořadí. Vše běží lokálně bez
+dalšího volání LLM.
+"""
+import math, re, unicodedata
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+from .config import PASSAGE_TOP_K, PASSAGE_MAX_CHARS, PASSAGE_MIN_CONTENT_CHARS
+from .weaviate_service import Document
+
+
+# Slova bez vlivu na relevanci (po odstranění diakritiky)
+STOP_WORDS = {
+    "a", "i", "o", "u", "v", "ve", "s", "se", "z", "ze", "k", "ke", "na", "do", "od", "po", "pro", "pri", "za",
+    "je", "jsou", "ma", "maji", "jaky", "jaka", "jake", "jakou", "kolik", "co", "jak", "ktery", "ktera", "ktere",
+    "to", "ten", "ta", "tak", "ale", "nebo", "by", "bych", "mi", "me", "muj", "chci", "hledam", "prosim",
+    "the", "and", "or", "of", "with", "for", "in", "is", "what", "which", "how",
+}
+
+# Hranice sekcí: konce řádků, odrážky, konce vět, středníky a svislítka
+SECTION_SPLIT_PATTERN = re.compile(r"\n+|(?<=[.!?])\s+(?=[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ0-9])|\s*[;|•]\s*")
+TOKEN_PATTERN = re.compile(r"\w+")
+STEM_LENGTH = 6
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fold_diacritics(text: str) -> str:
+    """Odstraní diakritiku a převede text na malá písmena ("Jaký displej" -> "jaky displej")."""
+    decomposed = unicodedata.normalize("NFD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Rozdělí text na termy pro BM25.
+
+    Termy jsou bez diakritiky a zkrácené na prvních STEM_LENGTH znaků - hrubý stemming,
+    díky kterému se potkají tvary jako "displeje" a "displej".
+    """
+    return [
+        token[:STEM_LENGTH]
+        for token in TOKEN_PATTERN.findall(fold_diacritics(text))
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def split_sections(content: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[str]:
+    """Rozdělí obsah na sekce a krátké sousední sekce spojí do pasáží o délce nejvýše `max_chars`."""
+    pieces = [piece.strip() for piece in SECTION_SPLIT_PATTERN.split(content or "") if piece and piece.strip()]
+
+    passages: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current} {piece}" if current else piece
+    if current:
+        passages.append(current)
+    return passages
+
+
+class BM25:
+    """BM25 nad malým korpusem pasází (všechny pasáže dokumentů jednoho dotazu)."""
+
+    def __init__(self, corpus: List[List[str]], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(terms) for terms in corpus]
+        self.lengths = [len(terms) for terms in corpus]
+        self.average_length = (sum(self.lengths) / len(corpus)) if corpus else 0.0
+
+        document_frequency = Counter(term for terms in self.term_frequencies for term in terms)
+        count = len(corpus)
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, index: int, query: Counter) -> float:
+        frequencies = self.term_frequencies[index]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1.0))
+        score = 0.0
+        for term, weight in query.items():
+            frequency = frequencies.get(term)
+            if frequency:
+                score += weight * self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+        return score
+
+
+def build_query(customer_input: str, search_queries: Iterable[str]) -> Counter:
+    """Termy dotazu - dotaz zákazníka má plnou váhu, vygenerované vyhledávací dotazy poloviční."""
+    query = Counter({term: 1.0 for term in tokenize(customer_input)})
+    for search_query in search_queries:
+        for term in set(tokenize(search_query)):
+            query[term] = max(query[term], 0.5)
+    return query
+
+
+def extract_passages(
+    documents: List[Document],
+    customer_input: str,
+    search_queries: Iterable[str] = (),
+    top_k: int = PASSAGE_TOP_K,
+    max_chars: int = PASSAGE_MAX_CHARS,
+    min_content_chars: int = PASSAGE_MIN_CONTENT_CHARS,
+) -> Tuple[List[Document], dict]:
+    """
+    Zkrátí obsah dokumentů na pasáže nejrelevantnější k dotazu.
+
+    Args:
+        documents: Nalezené dokumenty.
+        customer_input: Dotaz zákazníka.
+        search_queries: Texty vyhledávacích dotazů.
+        top_k: Počet pasáží ponechaných u každého produktu.
+        max_chars: Maximální délka pasáže.
+        min_content_chars: Obsah kratší než tato hodnota se nezkracuje.
+
+    Returns:
+        Dvojici (kopie dokumentů se zkráceným obsahem, statistiky počtu znaků před a po).
+    """
+    query = build_query(customer_input, search_queries)
+
+    # pasáže všech dlouhých dokumentů tvoří jeden korpus (IDF přes celý kontext dotazu)
+    sections = {}
+    corpus: List[List[str]] = []
+    owners: List[Tuple[int, int]] = []
+    for doc_index, document in enumerate(documents):
+        if len(document.content or "") < min_content_chars:
+            continue
+        sections[doc_index] = split_sections(document.content, max_chars)
+        for section_index, section in enumerate(sections[doc_index]):
+            corpus.append(tokenize(section))
+            owners.append((doc_index, section_index))
+
+    bm25 = BM25(corpus)
+    scores = {doc_index: [0.0] * len(doc_sections) for doc_index, doc_sections in sections.items()}
+    for corpus_index, (doc_index, section_index) in enumerate(owners):
+        scores[doc_index][section_index] = bm25.score(corpus_index, query)
+
+    output = []
+    chars_before = chars_after = 0
+    for doc_index, document in enumerate(documents):
+        chars_before += len(document.content or "")
+        if doc_index not in sections or len(sections[doc_index]) <= top_k:
+            output.append(document)
+            chars_after += len(document.content or "")
+            continue
+
+        doc_scores = scores[doc_index]
+        # nejlepší pasáže (při shodném skóre dříve uvedené); bez shody s dotazem zůstane začátek obsahu
+        best = sorted(range(len(doc_scores)), key=lambda index: (-doc_scores[index], index))[:top_k]
+        content = " … ".join(sections[doc_index][index] for index in sorted(best))
+        output.append(document.model_copy(update={"content": content}))
+        chars_after += len(content)
+
+    stats = {"chars_before": chars_before, "chars_after": chars_after}
+    return output, stats
@@ -0,0 +1,188 @@
+"""
+Rychlá aktualizace cen a skladových zásob produktů bez nové vektorizace.
+
+Feed je malé CSV se sloupci `product_code`, `price` a volitelně `stock`. Updater načte
+existující objekty s kódy z feedu (po úsecích, bez vektorů) a změněným objektům zapíše
+jen změněné `price`/`stock` částečnou aktualizací (`collection.data.update`) - ostatní
+properties i vektor zůstávají na serveru a vektorizér se vůbec nevolá.
+Nakonec zvýší verzi katalogu jen pro změněné produkty, takže cache výsledků vyhledávání,
+odpovědí a indexu kódů zahodí jen jejich záznamy, a upraví ceny v lokálním indexu.
+
+`properties_hash` se při aktualizaci nemění - delta import ze stejného CSV pak objekt
+nepřepíše a aktuální cena z feedu platí, dokud se nezmění řádek produktu v CSV.
+
+Použití (CLI viz Weaviate/update_prices.py):
+    updater = PriceUpdater(WeaviateBatchWriter(collection))
+    report = updater.run(read_price_feed("prices.csv"))
+"""
+import csv
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+from .catalog_importer import CatalogImporter, ImportObject, ImportReport, parse_price
+from .catalog_version import CATALOG_VERSION_FILE, bump_catalog_version
+from .config import PRICE_UPDATE_CHUNK_SIZE, CATALOG_IMPORT_MAX_RETRIES, LOCAL_INDEX_DIR
+from .local_vector_index import update_local_index_prices
+
+
+class PriceUpdate(BaseModel):
+    """Nová cena (a případně sklad) jednoho produktu."""
+
+    product_code: str
+    price: Optional[float] = None
+    stock: Optional[int] = None
+
+
+class PriceUpdateReport(ImportReport):
+    """Výsledek aktualizace cen (`updated` = objekty se změnou, `imported` = úspěšně zapsané)."""
+
+    not_found: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"přečteno {self.rows_read} řádků feedu, přeskočeno {self.skipped}, nenalezeno {self.not_found}, "
+            f"změněno {self.updated} objektů (zapsáno {self.imported}, selhalo {self.failed}, "
+            f"opakováno {self.retried}), beze změny {self.unchanged}"
+        )
+
+
+def read_price_feed(path: str, delimiter: str = ",", report: Optional[PriceUpdateReport] = None) -> List[PriceUpdate]:
+    """
+    Načte feed cen z CSV (sloupce `product_code`, `price`, volitelně `stock`).
+
+    Neplatné řádky přeskočí (a zapíše do `report`); pro opakovaný kód platí poslední řádek.
+    """
+    updates: Dict[str, PriceUpdate] = {}
+    with open(path, mode="r", encoding="utf-8", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f, delimiter=delimiter), start=1):
+            if report is not None:
+                report.rows_read += 1
+            update, reason = row_to_update(row)
+            if update is None:
+                if report is not None:
+                    report.skipped += 1
+                    report.add_error(f"řádek {row_number}: přeskočen - {reason}")
+                continue
+            updates[update.product_code] = update
+    return list(updates.values())
+
+
+def row_to_update(row: dict) -> Tuple[Optional[PriceUpdate], Optional[str]]:
+    code = (row.get("product_code") or "").strip()
+    if not code:
+        return None, "chybí 'product_code'"
+
+    raw_price = (row.get("price") or "").strip()
+    price = parse_price(raw_price)
+    if raw_price and price is None:
+        return None, f"neplatná cena '{raw_price}'"
+
+    raw_stock = (row.get("stock") or "").strip()
+    stock = None
+    if raw_stock:
+        try:
+            stock = int(float(raw_stock))
+        except ValueError:
+            return None, f"neplatný sklad '{raw_stock}'"
+
+    if price is None and stock is None:
+        return None, "chybí 'price' i 'stock'"
+    return PriceUpdate(product_code=code, price=price, stock=stock), None
+
+
+def ensure_stock_property(collection) -> None:
+    """Doplní do kolekce celočíselnou property `stock` (jinak by ji autoschema založilo jako NUMBER)."""
+    import weaviate.classes as wvc
+
+    if any(prop.name == "stock" for prop in collection.config.get().properties):
+        return
+    collection.config.add_property(wvc.config.Property(name="stock", data_type=wvc.config.DataType.INT, skip_vectorization=True))
+    print(f"Do kolekce '{collection.name}' přidána property 'stock'.")
+
+
+class PriceUpdater:
+    """
+    Hromadná částečná aktualizace `price`/`stock` existujících objektů.
+
+    Args:
+        writer: Objekt s metodami `fetch_by_product_codes(codes)` a `update(objects)` (typicky WeaviateBatchWriter).
+        chunk_size: Počet kódů produktů na jeden dotaz a jeden zápis.
+        max_retries: Opakování zápisu odmítnutého kvůli rate limitu (viz CatalogImporter.write_with_retry).
+        index_dir: Adresář lokálního indexu, kde se upraví ceny.
+        version_path: Soubor verze katalogu.
+    """
+
+    def __init__(
+        self,
+        writer,
+        chunk_size: int = PRICE_UPDATE_CHUNK_SIZE,
+        max_retries: int = CATALOG_IMPORT_MAX_RETRIES,
+        index_dir: str = LOCAL_INDEX_DIR,
+        version_path: str = CATALOG_VERSION_FILE,
+    ):
+        self.writer = writer
+        self.chunk_size = max(1, chunk_size)
+        self.index_dir = index_dir
+        self.version_path = version_path
+        self.importer = CatalogImporter(writer, max_retries=max_retries)
+
+    def plan(self, updates: Dict[str, PriceUpdate], existing: List[ImportObject], report: PriceUpdateReport) -> List[ImportObject]:
+        """Z existujících objektů vybere ty, kterým se cena nebo sklad mění; zapisují se jen změněné properties."""
+        objects = []
+        for obj in existing:
+            update = updates.get(obj.properties.get("product_code"))
+            if update is None:
+                continue
+            changes = {}
+            if update.price is not None and obj.properties.get("price") != update.price:
+                changes["price"] = update.price
+            if update.stock is not None and obj.properties.get("stock") != update.stock:
+                changes["stock"] = update.stock
+            if not changes:
+                report.unchanged += 1
+                continue
+            report.updated += 1
+            objects.append(ImportObject(row=obj.row, uuid=obj.uuid, properties=changes))
+        return objects
+
+    def run(self, updates: List[PriceUpdate], report: Optional[PriceUpdateReport] = None) -> PriceUpdateReport:
+        """
+        Aplikuje feed cen na kolekci.
+
+        Returns:
+            PriceUpdateReport; `completed` je True po zpracování celého feedu.
+        """
+        report = report or PriceUpdateReport()
+        by_code = {update.product_code: update for update in updates}
+        codes = list(by_code)
+        changed: Dict[str, Optional[float]] = {}
+
+        for start in range(0, len(codes), self.chunk_size):
+            chunk = codes[start:start + self.chunk_size]
+            existing = self.writer.fetch_by_product_codes(chunk)
+            found = {obj.properties.get("product_code") for obj in existing}
+            for code in chunk:
+                if code not in found:
+                    report.not_found += 1
+                    report.add_error(f"produkt {code}: v kolekci nenalezen")
+
+            codes_by_uuid = {obj.uuid: obj.properties.get("product_code") for obj in existing}
+            objects = self.plan(by_code, existing, report)
+            if objects:
+                self.importer.write_with_retry(objects, report, write=self.writer.update)
+                for obj in objects:
+                    code = codes_by_uuid[obj.uuid]
+                    changed[code] = by_code[code].price
+
+        if changed:
+            local_prices = {code: price for code, price in changed.items() if price is not None}
+            try:
+                update_local_index_prices(local_prices, self.index_dir)
+            except Exception as e:
+                print(f"Chyba při aktualizaci cen v lokálním indexu: {e}")
+            # cache zahodí jen záznamy změněných produktů
+            bump_catalog_version(self.version_path, product_codes=changed)
+
+        report.completed = True
+        print(f"Aktualizace cen dokončena: {report.summary()}.")
+        return report
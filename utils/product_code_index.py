@@ -0,0 +1,213 @@
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+from .catalog_version import CatalogVersion, CatalogVersionGuard
+from .weaviate_service import Document
+
+
+def _default_loader() -> List[Document]:
+    from .retrieval import get_retrieval_service
+    return get_retrieval_service().fetch_all_documents()
+
+
+def _default_fetcher(product_codes: List[str]) -> List[Document]:
+    from .retrieval import get_retrieval_service
+    return get_retrieval_service().fetch_by_product_codes(product_codes)
+
+
+class CodeMaps(NamedTuple):
+    """Přesné a case-insensitive mapování kódů na dokumenty (zveřejňuje se najednou jedním přiřazením)."""
+
+    exact: Dict[str, List[Document]]
+    folded: Dict[str, List[Document]]
+
+    def get(self, code: str) -> List[Document]:
+        return self.exact.get(code) or self.folded.get(code.upper()) or []
+
+
+def _group_by_code(documents: Iterable[Document]) -> CodeMaps:
+    """Seskupí dokumenty podle kódu - varianty se stejným kódem zůstanou všechny."""
+    exact: Dict[str, List[Document]] = {}
+    for doc in documents:
+        if doc.product_code:
+            exact.setdefault(doc.product_code, []).append(doc)
+    folded: Dict[str, List[Document]] = {}
+    for code, docs in exact.items():
+        folded.setdefault(code.upper(), []).extend(docs)
+    return CodeMaps(exact, folded)
+
+
+class ProductCodeIndex:
+    """
+    Paměťový index `product_code -> [Document]` pro dotazy na konkrétní kód produktu.
+
+    Dotazy s kódem produktu se tak obslouží vyhledáním ve slovníku, bez vektorového
+    vyhledávání a bez volání embedding API. Varianty se stejným kódem se drží všechny.
+    Index se načítá z katalogu na pozadí (poprvé při prvním použití a znovu po každé
+    změně verze katalogu); dokud není načtený, použije se jeden dávkový dotaz `fetcher`
+    (fetch_objects s contains_any). Při změně jen některých produktů (aktualizace cen)
+    se na pozadí `fetcher` znovu načtou jen ty a do té doby se dotazy na ně posílají
+    rovnou `fetcher`.
+
+    Args:
+        loader: Funkce vracející všechny produkty katalogu.
+        fetcher: Funkce vracející produkty pro seznam kódů (záloha, dokud index není načtený).
+        catalog_version: Sledovač verze katalogu. None = sdílený sledovač.
+        background: Načítat index ve vlákně na pozadí (False = synchronně, např. v testech).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Iterable[Document]] = _default_loader,
+        fetcher: Callable[[List[str]], List[Document]] = _default_fetcher,
+        catalog_version: Optional[CatalogVersion] = None,
+        background: bool = True
+    ):
+        self.loader = loader
+        self.fetcher = fetcher
+        self.background = background
+        self.catalog_guard = CatalogVersionGuard(catalog_version)
+        self.index_hits = 0
+        self.fetches = 0
+        self._maps: Optional[CodeMaps] = None
+        self._stale: FrozenSet[str] = frozenset()  # kódy (velkými písmeny) čekající na aktualizaci
+        self._generation = 0
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def _start(self, target: Callable, *args) -> None:
+        if self.background:
+            threading.Thread(target=target, args=args, name="product-code-index", daemon=True).start()
+        else:
+            target(*args)
+
+    def _load(self) -> None:
+        try:
+            maps = _group_by_code(self.loader())
+            with self._lock:
+                self._maps, self._stale = maps, frozenset()
+                self._generation += 1
+            print(f"Index kódů produktů načten ({len(maps.exact)} kódů).")
+        except Exception as e:
+            print(f"Chyba při načítání indexu kódů produktů: {e}")
+        finally:
+            self._loading = False
+
+    def refresh(self) -> None:
+        """Spustí (znovu)načtení indexu z katalogu, pokud už neprobíhá."""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        self._start(self._load)
+
+    def _patch(self, product_codes: List[str]) -> None:
+        """Znovu načte jen změněné produkty; při chybě se index načte celý znovu."""
+        try:
+            documents = self.fetcher(product_codes)
+        except Exception as e:
+            print(f"Chyba při aktualizaci indexu kódů produktů: {e}")
+            with self._lock:
+                self._maps, self._stale = None, frozenset()
+            self.refresh()
+            return
+
+        changed = _group_by_code(documents)
+        folded_codes = {code.upper() for code in product_codes}
+        with self._lock:
+            if self._maps is None:
+                return
+            exact = {code: docs for code, docs in self._maps.exact.items() if code.upper() not in folded_codes}
+            exact.update(changed.exact)
+            folded = {code: docs for code, docs in self._maps.folded.items() if code not in folded_codes}
+            folded.update(changed.folded)
+            self._maps = CodeMaps(exact, folded)
+            self._stale = self._stale - folded_codes
+            self._generation += 1
+
+    def _get_index(self) -> Optional[CodeMaps]:
+        change = self.catalog_guard.poll()
+        if change is not None:
+            if change.full or self._maps is None:
+                # starý index už neodpovídá katalogu - do načtení nového se použije fetcher
+                with self._lock:
+                    self._maps, self._stale = None, frozenset()
+            elif change.product_codes:
+                with self._lock:
+                    self._stale = self._stale | {code.upper() for code in change.product_codes}
+                self._start(self._patch, sorted(change.product_codes))
+        if self._maps is None:
+            self.refresh()
+        return self._maps
+
+    def lookup(self, product_codes: Iterable[str]) -> Dict[str, List[Document]]:
+        """
+        Najde produkty podle kódů.
+
+        Kódy se porovnávají přesně, případně bez ohledu na velikost písmen
+        (kódy z regexu v dotazu zákazníka nemusí mít správnou velikost písmen).
+
+        Returns:
+            Slovník kód (tak, jak byl zadán) -> kopie všech dokumentů s tímto kódem
+            (varianty); nenalezené kódy chybí.
+        """
+        product_codes = [code for code in dict.fromkeys(product_codes) if code]
+        if not product_codes:
+            return {}
+
+        maps = self._get_index()
+        stale = self._stale
+        if maps is not None:
+            indexed = [code for code in product_codes if code.upper() not in stale]
+            missing = [code for code in product_codes if code.upper() in stale]
+            self.index_hits += len(indexed)
+        else:
+            indexed, missing = [], product_codes
+
+        found = {}
+        for code in indexed:
+            documents = maps.get(code)
+            if documents:
+                found[code] = [doc.model_copy() for doc in documents]
+        if missing:
+            self.fetches += 1
+            fetched = _group_by_code(self.fetcher(missing))
+            for code in missing:
+                documents = fetched.get(code)
+                if documents:
+                    found[code] = [doc.model_copy() for doc in documents]
+        return found
+
+    def generation(self) -> Optional[int]:
+        """Pořadové číslo načteného stavu indexu (mění se s každým načtením a aktualizací); None, dokud není načtený."""
+        return self._generation if self._get_index() is not None else None
+
+    def product_names(self) -> List[str]:
+        """Názvy produktů z načteného indexu (prázdné, dokud se index nenačte)."""
+        maps = self._get_index()
+        return [doc.name for docs in maps.exact.values() for doc in docs if doc.name] if maps is not None else []
+
+    def stats(self) -> dict:
+        maps = self._maps
+        return {
+            "codes": len(maps.exact) if maps is not None else None,
+            "documents": sum(len(docs) for docs in maps.exact.values()) if maps is not None else None,
+            "index_hits": self.index_hits,
+            "fetches": self.fetches,
+        }
+
+
+_product_code_index: Optional[ProductCodeIndex] = None
+_product_code_index_lock = threading.Lock()
+
+
+def get_product_code_index() -> ProductCodeIndex:
+    """Vrátí sdílený ProductCodeIndex pro celý proces."""
+    global _product_code_index
+
+    if _product_code_index is None:
+        with _product_code_index_lock:
+            if _product_code_index is None:
+                _product_code_index = ProductCodeIndex()
+
+    return _product_code_index
@@ -0,0 +1,98 @@
+"""
+Sestavení dokumentů do promptu podle rozpočtu vstupních tokenů.
+
+Tokeny se odhadují lokálně z počtu znaků (bez tokenizéru a bez volání API), dokumenty
+se řadí podle relevance (vzdálenosti od dotazu) a do promptu se jich vejde tolik,
+kolik dovolí rozpočet daného modelu/providera po odečtení zbytku promptu.
+"""
+import math
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from .config import PROMPT_TOKEN_BUDGETS, PROMPT_TOKEN_BUDGET_DEFAULT, PROMPT_CHARS_PER_TOKEN
+from .weaviate_service import Document
+
+
+class PromptBudgetReport(BaseModel):
+    """Přehled, kolik dokumentů a tokenů se do promptu vešlo a kolik se zahodilo."""
+    budget: int = Field(description="Input token budget of the model.")
+    base_tokens: int = Field(default=0, description="Estimated tokens of the prompt without documents.")
+    document_tokens: int = Field(default=0, description="Estimated tokens of the included documents.")
+    included_documents: int = Field(default=0, description="Number of documents in the prompt.")
+    dropped_documents: int = Field(default=0, description="Number of documents left out of the prompt.")
+    dropped_tokens: int = Field(default=0, description="Estimated tokens of the left out (or truncated) documents.")
+    truncated: bool = Field(default=False, description="Whether the most relevant document had to be shortened.")
+
+
+def estimate_tokens(text: str, chars_per_token: float = PROMPT_CHARS_PER_TOKEN) -> int:
+    """Odhadne počet tokenů textu (zaokrouhleno nahoru)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / chars_per_token)
+
+
+def get_token_budget(provider: str, model_name: Optional[str] = None) -> int:
+    """Rozpočet vstupních tokenů - přednost má záznam pro konkrétní model, pak pro providera."""
+    if model_name and model_name in PROMPT_TOKEN_BUDGETS:
+        return PROMPT_TOKEN_BUDGETS[model_name]
+    return PROMPT_TOKEN_BUDGETS.get(provider, PROMPT_TOKEN_BUDGET_DEFAULT)
+
+
+def format_document(document: Document) -> str:
+    """Textová podoba dokumentu v promptu (bez interních polí jako vzdálenost)."""
+    return (
+        f"- name: {document.name}; product_code: {document.product_code}; price: {document.price}; "
+        f"url: {document.url}; content: {document.content}"
+    )
+
+
+def order_by_relevance(documents: List[Document]) -> List[Document]:
+    """Seřadí dokumenty od nejmenší vzdálenosti; dokumenty bez vzdálenosti jsou na konci v původním pořadí."""
+    return sorted(documents, key=lambda doc: (doc.distance is None, doc.distance or 0.0))
+
+
+def build_documents_section(
+    documents: List[Document],
+    base_prompt: str,
+    budget: int,
+    chars_per_token: float = PROMPT_CHARS_PER_TOKEN,
+) -> tuple[str, PromptBudgetReport]:
+    """
+    Vybere nejrelevantnější dokumenty, které se vejdou do rozpočtu tokenů.
+
+    Args:
+        documents: Nalezené dokumenty (v libovolném pořadí).
+        base_prompt: Zbytek promptu (šablona, historie, dotaz...) - jeho tokeny se z rozpočtu odečtou.
+        budget: Rozpočet vstupních tokenů modelu.
+
+    Returns:
+        Dvojici (text sekce dokumentů, přehled PromptBudgetReport).
+    """
+    base_tokens = estimate_tokens(base_prompt, chars_per_token)
+    remaining = budget - base_tokens
+    report = PromptBudgetReport(budget=budget, base_tokens=base_tokens)
+
+    lines = []
+    for document in order_by_relevance(documents):
+        line = format_document(document)
+        tokens = estimate_tokens(line, chars_per_token) + 1  # + oddělovač řádků
+
+        if tokens <= remaining:
+            lines.append(line)
+            remaining -= tokens
+            report.document_tokens += tokens
+            report.included_documents += 1
+        elif not lines and remaining > 0:
+            # nejrelevantnější dokument se nevejde celý - zkrátíme ho, aby prompt nebyl bez dokumentů
+            kept_chars = int(remaining * chars_per_token)
+            lines.append(line[:kept_chars])
+            report.document_tokens += remaining
+            report.dropped_tokens += tokens - remaining
+            report.included_documents += 1
+            report.truncated = True
+            remaining = 0
+        else:
+            report.dropped_documents += 1
+            report.dropped_tokens += tokens
+
+    return "\n".join(lines), report
@@ -0,0 +1,269 @@
+"""
+Pravidlový plánovač vyhledávacích dotazů.
+
+Jednoduché dotazy typu "MacBook Air 13 M3 do 35 000" nebo "iPhone 16 Pro kolem 30k"
+převede přímo na SearchQuery bez volání "mini" LLM. Pokud si plánovač není jistý
+(dotaz obsahuje slova mimo známý slovník, při existující historii konverzace odkazuje
+na předchozí zprávy apod.), vrátí None a dotazy vygeneruje LLM jako dosud.
+"""
+import re, threading
+from typing import Callable, Hashable, Iterable, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field
+
+from .weaviate_service import SearchQuery
+
+
+# Produktové řady v katalogu (Apple_Products); další slova se doplní z názvů produktů v katalogu
+PRODUCT_FAMILIES = [
+    "iphone", "ipad", "macbook", "imac", "mac mini", "mac studio", "mac pro", "apple watch", "watch",
+    "airpods", "airtag", "apple tv", "homepod", "magic keyboard", "magic mouse", "magic trackpad",
+    "apple pencil", "pencil", "studio display", "pro display", "vision pro", "beats",
+]
+
+# Slova, která mohou být součástí označení modelu (varianta, čip, velikost, barva, ...)
+MODEL_WORDS = {
+    "apple", "pro", "max", "plus", "mini", "air", "ultra", "se", "studio", "lite", "series", "gen", "generace",
+    "wifi", "wi-fi", "cellular", "lte", "5g", "gps", "retina", "xdr", "usb-c", "magsafe", "anc",
+    "černý", "černá", "bílý", "bílá", "stříbrný", "stříbrná", "zlatý", "zlatá", "modrý", "modrá",
+    "růžový", "růžová", "zelený", "zelená", "fialový", "fialová", "šedý", "šedá", "vesmírně", "titan", "titanový",
+    "midnight", "starlight", "space", "gray", "grey", "silver", "gold", "black", "white", "blue", "pink", "green",
+}
+
+# Výplňová slova, která význam vyhledávání nemění
+FILLER_WORDS = {
+    "chci", "chtěl", "chtěla", "bych", "hledám", "sháním", "potřebuji", "koupit", "koupím", "máte", "mate",
+    "prosím", "nějaký", "nějakou", "nějaké", "nějakej", "kolik", "stojí", "cena", "ceny", "cenu", "nabídka",
+    "nabídněte", "doporučte", "ukažte", "ukaž", "zobrazit", "a", "s", "se", "ve", "v", "na", "nový", "nová",
+    "nové", "nejlevnější", "levný", "levné", "levnou", "kč", "czk", "korun", ",-",
+}
+
+# slova odkazující na dříve zmíněné produkty ("a ten v modré?", "něco levnějšího než tenhle")
+REFERENCE_WORDS = {
+    "ten", "ta", "to", "tu", "ty", "tím", "toho", "tomu", "tenhle", "tahle", "tohle", "tyhle",
+    "něj", "ní", "nich", "jeho", "její", "jejich", "stejný", "stejná", "stejné", "stejnou", "předchozí",
+    "předtím", "zmíněný", "zmíněné", "levnější", "dražší", "větší", "menší", "jiný", "jinou", "jiné",
+    "další", "taky", "také", "ještě",
+}
+
+PRICE_UNIT_PATTERN = r"(?:\s*(?P<unit{n}>tisíce|tisíc|tis(?:\.|\b)|k(?!\w)))?"
+NUMBER_PATTERN = r"(?P<num{n}>\d{{1,3}}(?:[  .]\d{{3}})+|\d+(?:[.,]\d+)?)"
+CURRENCY_PATTERN = r"(?:\s*(?P<cur{n}>kč|czk|korun\w*|,-))?"
+# holý rozsah bez jednotky a měny ("iPhone 14-15") je spíš rozsah modelů než cen
+MIN_BARE_RANGE_PRICE = 1000
+
+
+def _amount(n: int) -> str:
+    return NUMBER_PATTERN.format(n=n) + PRICE_UNIT_PATTERN.format(n=n) + CURRENCY_PATTERN.format(n=n)
+
+
+PRICE_PATTERNS = [
+    ("range", re.compile(rf"\b(?:mezi|od)\s+{_amount(1)}\s+(?:a|do|až)\s+{_amount(2)}", re.IGNORECASE)),
+    ("bare_range", re.compile(rf"(?<![\w.]){_amount(1)}\s*(?:-|–|až)\s*{_amount(2)}", re.IGNORECASE)),
+    ("max", re.compile(rf"\b(?:do|pod|max(?:\.|imálně)?|nejvýše|maximum|levnější\s+než)\s+{_amount(1)}", re.IGNORECASE)),
+    ("min", re.compile(rf"\b(?:od|nad|min(?:\.|imálně)?|alespoň|aspoň|dražší\s+než)\s+{_amount(1)}", re.IGNORECASE)),
+    ("around", re.compile(rf"\b(?:kolem|okolo|zhruba|přibližně|cca|za)\s+{_amount(1)}", re.IGNORECASE)),
+]
+
+PRODUCT_CODE_PATTERN = re.compile(r"^[A-Z](?=.*\d)[a-zA-Z0-9]{4,8}$", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[\w+-]+|,-", re.UNICODE)
+MODEL_TOKEN_PATTERN = re.compile(r"^(?:\d+(?:[.,]\d+)?(?:gb|tb|mm|\"|palc[ůe]?)?|m\d+|a\d+|s\d+|gen\d+|\d+\.?(?:gen|generace)?)$", re.IGNORECASE)
+
+AROUND_TOLERANCE = 0.1
+
+
+def _parse_amount(match: re.Match, n: int) -> float:
+    number = match.group(f"num{n}")
+    unit = match.group(f"unit{n}")
+    if re.fullmatch(r"\d{1,3}(?:[  .]\d{3})+", number):
+        value = float(re.sub(r"[  .]", "", number))
+    else:
+        value = float(number.replace(",", "."))
+    if unit:
+        value *= 1000
+    return value
+
+
+def parse_price_expression(text: str) -> Tuple[Optional[float], Optional[float], str]:
+    """
+    Najde v textu cenový výraz ("do 40 000", "od 20 tisíc", "kolem 30k", "mezi 20 a 30 tis").
+
+    Returns:
+        Trojici (min_price, max_price, text bez cenového výrazu). Ceny jsou v Kč a ještě
+        nejsou rozšířené o toleranci - to dělá generate_search_queries stejně jako u LLM dotazů.
+    """
+    for kind, pattern in PRICE_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+
+        remaining = (text[:match.start()] + " " + text[match.end():]).strip()
+        if kind in ("range", "bare_range"):
+            low, high = _parse_amount(match, 1), _parse_amount(match, 2)
+            if kind == "bare_range" and not any(match.group(f"{group}{n}") for group in ("unit", "cur") for n in (1, 2)) \
+                    and min(low, high) < MIN_BARE_RANGE_PRICE:
+                continue
+            # "mezi 20 a 30 tisíc" - jednotka u druhé hodnoty platí i pro první
+            if match.group("unit2") and not match.group("unit1") and low < 1000:
+                low *= 1000
+            return min(low, high), max(low, high), remaining
+
+        value = _parse_amount(match, 1)
+        if kind == "max":
+            return None, value, remaining
+        if kind == "min":
+            return value, None, remaining
+        return round(value * (1 - AROUND_TOLERANCE), 2), round(value * (1 + AROUND_TOLERANCE), 2), remaining
+
+    return None, None, text
+
+
+class PlannerStats(BaseModel):
+    """Počty dotazů naplánovaných pravidly a dotazů, pro které bylo nutné volat LLM."""
+
+    planned: int = Field(default=0, description="Dotazy obsloužené plánovačem (LLM přeskočen).")
+    llm: int = Field(default=0, description="Dotazy, u kterých plánovač nebyl jistý a volalo se LLM.")
+
+    @property
+    def bypass_rate(self) -> float:
+        total = self.planned + self.llm
+        return self.planned / total if total else 0.0
+
+
+class QueryPlanner:
+    """
+    Převádí jednoduché dotazy zákazníka na SearchQuery bez volání LLM.
+
+    Plánovač je "jistý" jen tehdy, když dotaz obsahuje známou produktovou řadu nebo
+    kód produktu a všechna ostatní slova jsou označení modelu, slova z názvů produktů
+    v katalogu, cenový výraz nebo výplňová slova.
+
+    Slovník se sestaví jednou a znovu jen tehdy, když `vocabulary_version` vrátí jinou
+    hodnotu (typicky po novém načtení indexu kódů produktů po změně katalogu).
+
+    Args:
+        vocabulary_source: Funkce vracející názvy produktů z katalogu (rozšiřují slovník).
+        vocabulary_version: Levná funkce vracející verzi zdroje slovníku; None = slovník se
+            sestaví jen jednou. Vrátí-li None (zdroj zatím není načtený), použije se dosavadní slovník.
+    """
+
+    def __init__(
+        self,
+        vocabulary_source: Optional[Callable[[], Iterable[str]]] = None,
+        vocabulary_version: Optional[Callable[[], Optional[Hashable]]] = None,
+    ):
+        self.vocabulary_source = vocabulary_source
+        self.vocabulary_version = vocabulary_version
+        self.stats = PlannerStats()
+        self._lock = threading.Lock()
+        self._vocabulary_cache: Optional[Tuple[Optional[Hashable], Set[str]]] = None
+
+    def _vocabulary(self) -> Set[str]:
+        try:
+            version = self.vocabulary_version() if self.vocabulary_version is not None else 0
+        except Exception as e:
+            print(f"Nepodařilo se zjistit verzi slovníku katalogu pro plánovač dotazů: {e}")
+            version = None
+
+        cached = self._vocabulary_cache
+        if cached is not None and (version is None or cached[0] == version):
+            return cached[1]
+
+        vocabulary = self._build_vocabulary()
+        self._vocabulary_cache = (version, vocabulary)
+        return vocabulary
+
+    def _build_vocabulary(self) -> Set[str]:
+        vocabulary = set(MODEL_WORDS)
+        for family in PRODUCT_FAMILIES:
+            vocabulary.update(family.split())
+        if self.vocabulary_source is not None:
+            try:
+                for name in self.vocabulary_source() or []:
+                    vocabulary.update(token.lower() for token in TOKEN_PATTERN.findall(name or ""))
+            except Exception as e:
+                print(f"Nepodařilo se načíst slovník katalogu pro plánovač dotazů: {e}")
+        return vocabulary
+
+    def plan(self, customer_input: str, chat_history: Optional[list] = None) -> Optional[List[SearchQuery]]:
+        """
+        Vrátí vyhledávací dotazy pro jednoduchý dotaz zákazníka, nebo None, pokud si plánovač není jistý.
+
+        Pokud konverzace už má historii a dotaz na ni odkazuje ("a ten iPhone 16 do 30k?"),
+        vrátí None - význam dotazu závisí na kontextu, který zná jen LLM.
+        Dotazy na kódy produktů a záložní dotaz s celým vstupem doplňuje
+        generate_search_queries stejně jako u dotazů z LLM, proto je plán neobsahuje.
+        """
+        text = (customer_input or "").strip().rstrip("?!.")
+        if not text:
+            return None
+
+        min_price, max_price, remaining = parse_price_expression(text)
+        tokens = TOKEN_PATTERN.findall(remaining)
+        lowered = " ".join(token.lower() for token in tokens)
+
+        if chat_history and any(token.lower() in REFERENCE_WORDS for token in tokens):
+            return None
+
+        has_family = any(re.search(rf"\b{re.escape(family)}\b", lowered) for family in PRODUCT_FAMILIES)
+        codes = [token for token in tokens if PRODUCT_CODE_PATTERN.match(token) and not MODEL_TOKEN_PATTERN.match(token)]
+        if not has_family and not codes:
+            return None
+
+        vocabulary = self._vocabulary()
+        product_tokens = []
+        for token in tokens:
+            lower = token.lower()
+            if lower in FILLER_WORDS or token in codes:
+                continue
+            if lower in vocabulary or MODEL_TOKEN_PATTERN.match(lower):
+                product_tokens.append(token)
+            else:
+                # neznámé slovo - dotaz může být složitější (srovnání, dotaz na vlastnost, ...)
+                return None
+
+        if not product_tokens:
+            # jen kód produktu (případně s cenou) - stačí dotazy na kód, které doplní generate_search_queries
+            return []
+
+        return [SearchQuery(query=" ".join(product_tokens), min_price=min_price, max_price=max_price)]
+
+    def record(self, planned: bool) -> None:
+        """Započítá výsledek plánování a vypíše, jak často se LLM přeskakuje."""
+        with self._lock:
+            if planned:
+                self.stats.planned += 1
+            else:
+                self.stats.llm += 1
+            stats = self.stats.model_copy()
+
+        print(
+            f"Plánovač dotazů: {'LLM přeskočen' if planned else 'voláno LLM'} "
+            f"(přeskočeno {stats.planned}/{stats.planned + stats.llm}, {stats.bypass_rate:.0%})"
+        )
+
+
+def _catalog_product_names() -> List[str]:
+    from .product_code_index import get_product_code_index
+    return get_product_code_index().product_names()
+
+
+def _catalog_vocabulary_version() -> Optional[int]:
+    # index kódů sám sleduje verzi katalogu - po změně katalogu se načte znovu a změní generaci
+    from .product_code_index import get_product_code_index
+    return get_product_code_index().generation()
+
+
+_query_planner: Optional[QueryPlanner] = None
+_query_planner_lock = threading.Lock()
+
+
+def get_query_planner() -> QueryPlanner:
+    """Vrátí sdílený QueryPlanner pro celý proces (slovník doplňuje z indexu kódů produktů)."""
+    global _query_planner
+
+    if _query_planner is None:
+        with _query_planner_lock:
+            if _query_planner is None:
+                _query_planner = QueryPlanner(vocabulary_source=_catalog_product_names, vocabulary_version=_catalog_vocabulary_version)
+
+    return _query_planner
@@ -0,0 +1,35 @@
+from typing import List, Protocol
+
+from .config import RETRIEVAL_BACKEND
+from .weaviate_service import Document, SearchQuery, get_weaviate_service
+
+
+class RetrievalService(Protocol):
+    """Společné rozhraní vyhledávacích backendů (WeaviateService, LocalVectorIndex)."""
+
+    def search_products(self, search_params: SearchQuery, limit: int = 5) -> List[Document]:
+        ...
+
+    def fetch_all_documents(self) -> List[Document]:
+        ...
+
+    def fetch_by_product_codes(self, product_codes: List[str]) -> List[Document]:
+        ...
+
+
+def get_retrieval_service(backend: str = None) -> RetrievalService:
+    """
+    Vrátí sdílený vyhledávací backend podle RETRIEVAL_BACKEND v konfiguraci.
+
+    Args:
+        backend: "weaviate" (výchozí) nebo "local" - lokální index exportovaný z Weaviate.
+    """
+    backend = (backend or RETRIEVAL_BACKEND).lower()
+
+    if backend == "local":
+        from .local_vector_index import get_local_vector_index
+        return get_local_vector_index()
+    if backend == "weaviate":
+        return get_weaviate_service()
+
+    raise ValueError(f"Nepodporovaný vyhledávací backend: {backend}")
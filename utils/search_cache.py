@@ -0,0 +1,124 @@
+import math, threading
+from typing import Hashable, List, Optional, Tuple
+
+from .cache import TTLCache
+from .catalog_version import CatalogVersion, CatalogVersionGuard
+from .config import SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL, SEARCH_PRICE_BUCKET
+from .embedding_cache import normalize_query
+
+
+def bucket_price_range(
+    min_price: Optional[float],
+    max_price: Optional[float],
+    bucket: float = SEARCH_PRICE_BUCKET
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Zaokrouhlí cenové meze směrem ven na násobky `bucket` (min dolů, max nahoru).
+
+    Ceny už jsou v generate_search_queries rozšířené o 15 %, takže další mírné
+    rozšíření výsledky prakticky nemění, ale blízké dotazy sdílí stejný klíč cache.
+    Zaokrouhlené meze se používají i pro samotný dotaz, aby výsledek v cache
+    odpovídal svému klíči přesně; dotaz proto načte víc kandidátů a vrácené dokumenty
+    se dofiltrují na přesné meze a ořízne se na limit.
+    """
+    if not bucket or bucket <= 0:
+        return min_price, max_price
+    if min_price is not None:
+        min_price = max(0.0, math.floor(min_price / bucket) * bucket)
+    if max_price is not None:
+        max_price = math.ceil(max_price / bucket) * bucket
+    return min_price, max_price
+
+
+def search_cache_key(
+    query: str,
+    min_price: Optional[float],
+    max_price: Optional[float],
+    product_code: Optional[str],
+    limit: int
+) -> Hashable:
+    """Sestaví kanonický klíč vyhledávání (normalizovaný text, zaokrouhlené ceny, kód produktu, limit)."""
+    product_code = product_code.strip().upper() if product_code and product_code.strip() else None
+    return (normalize_query(query), min_price, max_price, product_code, limit)
+
+
+class SearchResultCache:
+    """
+    TTL + LRU cache výsledků vektorového vyhledávání.
+
+    Při každém přístupu se (levně, viz CatalogVersion) ověří verze katalogu;
+    jakmile import do Weaviate verzi zvýší, cache se celá zahodí. Při změně jen
+    některých produktů (aktualizace cen) se zahodí výsledky, které je obsahují,
+    a všechny výsledky s cenovým filtrem (produkt do nich mohl přibýt).
+
+    Args:
+        maxsize: Maximální počet uložených výsledků.
+        ttl: Doba platnosti výsledku v sekundách.
+        catalog_version: Sledovač verze katalogu. None = sdílený sledovač.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = SEARCH_RESULT_CACHE_SIZE,
+        ttl: Optional[float] = SEARCH_RESULT_CACHE_TTL,
+        catalog_version: Optional[CatalogVersion] = None
+    ):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.catalog_guard = CatalogVersionGuard(catalog_version)
+        self.invalidations = 0
+
+    def _check_version(self) -> None:
+        change = self.catalog_guard.poll()
+        if change is None:
+            return
+        self.invalidations += 1
+        if change.full:
+            self.cache.clear()
+            print(f"Katalog změněn (verze {change.version}), cache výsledků vyhledávání vyprázdněna.")
+            return
+
+        product_codes = {code.upper() for code in change.product_codes}
+
+        def affected(key: Hashable, documents: List) -> bool:
+            _, min_price, max_price, product_code, _ = key
+            return (
+                min_price is not None or max_price is not None or product_code in product_codes
+                or any((doc.product_code or "").upper() in product_codes for doc in documents)
+            )
+
+        removed = self.cache.remove_where(affected)
+        print(f"Katalog změněn (verze {change.version}, {len(product_codes)} produktů), z cache výsledků vyhledávání odstraněno {removed} záznamů.")
+
+    def get(self, key: Hashable) -> Optional[list]:
+        """Vrátí kopie uložených dokumentů (volající je může bezpečně upravovat), nebo None."""
+        self._check_version()
+        documents = self.cache.get(key)
+        if documents is None:
+            return None
+        return [doc.model_copy() for doc in documents]
+
+    def set(self, key: Hashable, documents: List) -> None:
+        self._check_version()
+        self.cache.set(key, [doc.model_copy() for doc in documents])
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "invalidations": self.invalidations}
+
+
+_search_result_cache: Optional[SearchResultCache] = None
+_search_result_cache_lock = threading.Lock()
+
+
+def get_search_result_cache() -> SearchResultCache:
+    """Vrátí sdílenou SearchResultCache pro celý proces."""
+    global _search_result_cache
+
+    if _search_result_cache is None:
+        with _search_result_cache_lock:
+            if _search_result_cache is None:
+                _search_result_cache = SearchResultCache()
+
+    return _search_result_cache
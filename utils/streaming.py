@@ -0,0 +1,119 @@
+import contextvars, time
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+from pydantic import BaseModel, Field
+from langchain_core.utils.json import parse_partial_json
+
+
+class StreamEvent(BaseModel):
+    """Událost streamovaná z běžícího flow do UI."""
+
+    type: str = Field(description="Typ události: 'answer_delta', 'ttft' nebo 'result'.")
+    data: Any = Field(default=None, description="Obsah události (kus textu odpovědi, výsledek flow, ...).")
+
+
+StreamHandler = Callable[[StreamEvent], None]
+
+# Handler aktuálního běhu flow - uzly ho čtou přes `emit`, při běhu přes pf.test není nastaven
+_stream_handler: contextvars.ContextVar[Optional[StreamHandler]] = contextvars.ContextVar("stream_handler", default=None)
+
+
+@contextmanager
+def stream_to(handler: StreamHandler):
+    """Nastaví handler, kterému se budou posílat streamované události (platí i ve vláknech spuštěných přes copy_context)."""
+    token = _stream_handler.set(handler)
+    try:
+        yield
+    finally:
+        _stream_handler.reset(token)
+
+
+def is_streaming() -> bool:
+    return _stream_handler.get() is not None
+
+
+def emit(event_type: str, data: Any = None) -> None:
+    """Pošle událost aktuálnímu handleru; bez handleru nedělá nic."""
+    handler = _stream_handler.get()
+    if handler is not None:
+        handler(StreamEvent(type=event_type, data=data))
+
+
+def message_partial_json(message) -> str:
+    """Vrátí dosud vygenerovaný JSON strukturovaného výstupu z (sloučeného) chunku zprávy."""
+    tool_call_chunks = getattr(message, "tool_call_chunks", None)
+    if tool_call_chunks:
+        return tool_call_chunks[0].get("args") or ""
+
+    content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+
+    # Anthropic vrací obsah jako seznam bloků, JSON nástroje je v 'partial_json'
+    parts: List[str] = []
+    for block in content or []:
+        if isinstance(block, dict):
+            parts.append(block.get("partial_json") or block.get("text") or "")
+    return "".join(parts)
+
+
+class AnswerStreamParser:
+    """
+    Průběžně parsuje streamovaný JSON strukturovaného výstupu (OutputSchema).
+
+    Z každého nového stavu vrátí jen přírůstek textu `answer`. Produkty UI vykreslí
+    z výsledku flow (událost 'result'), teprve tam jsou úplné i s URL obrázků.
+    """
+
+    def __init__(self):
+        self.answer = ""
+
+    def feed(self, partial_json: str) -> str:
+        """Zpracuje dosavadní JSON a vrátí nový kus odpovědi (může být prázdný)."""
+        parsed = parse_partial_json(partial_json) if partial_json else None
+        if not isinstance(parsed, dict):
+            return ""
+
+        answer = parsed.get("answer")
+        # neúplná escape sekvence může text dočasně zkrátit - počkáme na další chunk
+        if not isinstance(answer, str) or not answer.startswith(self.answer):
+            return ""
+
+        delta = answer[len(self.answer):]
+        self.answer = answer
+        return delta
+
+
+def stream_structured_output(runnable, data: dict) -> tuple:
+    """
+    Spustí `prompt | llm.with_structured_output(..., include_raw=True)` ve streamovacím režimu.
+
+    Text odpovědi posílá průběžně jako události 'answer_delta', čas do prvního
+    tokenu jako událost 'ttft'.
+
+    Returns:
+        Dvojici (výstup ve stejném tvaru jako `invoke` - raw/parsed/parsing_error,
+        čas do prvního tokenu odpovědi v sekundách nebo None).
+    """
+    parser = AnswerStreamParser()
+    output_data = {"raw": None, "parsed": None, "parsing_error": None}
+    time_to_first_token = None
+    started = time.perf_counter()
+
+    for chunk in runnable.stream(data):
+        if chunk.get("raw") is not None:
+            # chunky sčítáme - sloučená zpráva nese celý dosavadní JSON i usage_metadata
+            output_data["raw"] = chunk["raw"] if output_data["raw"] is None else output_data["raw"] + chunk["raw"]
+            delta = parser.feed(message_partial_json(output_data["raw"]))
+            if delta:
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - started
+                    emit("ttft", time_to_first_token)
+                emit("answer_delta", delta)
+
+        # parsed/parsing_error a případná metadata (např. model_name a hedge_usage z hedgingu)
+        for key, value in chunk.items():
+            if key != "raw":
+                output_data[key] = value
+
+    return output_data, time_to_first_token
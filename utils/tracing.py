@@ -0,0 +1,217 @@
+"""
+Tracing jednoho běhu flow - časové úseky (spany) uzlů, LLM volání a vyhledávacích dotazů.
+
+`start_trace` otevře trace pro jeden tah konverzace, `span` uvnitř něj měří jednotlivé
+kroky. Aktuální trace a rodičovský span se předávají přes contextvars, takže spany
+z vláken uzlů (FlowExecutor kopíruje kontext) i z paralelních vyhledávacích dotazů
+se správně zanoří. Mimo trace je `span` no-op.
+
+Hotový trace se na pozadí zapíše do JSONL souboru (jeden span na řádek) a volitelně
+odešle do OTLP collectoru (opentelemetry-sdk se importuje až při prvním exportu).
+"""
+import json, os, threading, time, uuid, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from pydantic import BaseModel, Field
+
+from .config import TRACING_ENABLED, TRACING_JSONL_PATH, TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME
+
+
+class Span(BaseModel):
+    """Jeden měřený úsek (uzel flow, LLM volání, vyhledávací dotaz...)."""
+
+    trace_id: str
+    span_id: str = Field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: Optional[str] = None
+    name: str
+    kind: str = Field(default="internal", description="flow, node, llm, search, ...")
+    start: float = Field(default_factory=time.time, description="Unix time of the span start.")
+    end: Optional[float] = None
+    duration: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+
+    def set(self, **attributes: Any) -> None:
+        """Doplní atributy spanu (např. počty tokenů, čas do prvního tokenu)."""
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """Spany jednoho běhu flow (thread-safe - spany přibývají z více vláken)."""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dicts(self) -> List[dict]:
+        """Spany seřazené podle začátku, s časy relativně ke startu trace (pro waterfall)."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        origin = spans[0].start if spans else 0.0
+        return [
+            {**span.model_dump(), "offset": span.start - origin}
+            for span in spans
+        ]
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """Náhrada spanu mimo trace - `set` nic nedělá."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Any]:
+    """
+    Změří blok kódu jako span aktuálního trace.
+
+    Výjimka z bloku se zaznamená do spanu (status "error") a propaguje se dál.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(trace_id=trace.trace_id, parent_id=parent.span_id if parent else None, name=name, kind=kind, attributes=attributes)
+    started = time.perf_counter()
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - started
+        current.end = current.start + current.duration
+        trace.add(current)
+
+
+@contextmanager
+def start_trace(name: str = "flow", exporter: Optional["SpanExporter"] = None, **attributes: Any) -> Iterator[Optional[Trace]]:
+    """
+    Otevře trace s kořenovým spanem; po skončení bloku ho předá exportéru.
+
+    Při vypnutém tracingu (TRACING_ENABLED) vrací None a spany jsou no-op.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, kind="flow", **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        (exporter or get_span_exporter()).export(trace)
+
+
+class SpanExporter:
+    """
+    Export hotových trace na pozadí - JSONL soubor a volitelně OTLP collector.
+
+    Args:
+        jsonl_path: Soubor, kam se připisují spany (jeden JSON na řádek). None = bez JSONL.
+        otlp_endpoint: URL OTLP/HTTP collectoru. None = bez OTLP.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = TRACING_JSONL_PATH, otlp_endpoint: Optional[str] = TRACING_OTLP_ENDPOINT):
+        self.jsonl_path = jsonl_path
+        self.otlp_endpoint = otlp_endpoint
+        self._tracer = None
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-export")
+
+    def export(self, trace: Trace) -> None:
+        self._pool.submit(self._export, trace)
+
+    def flush(self) -> None:
+        """Počká na dokončení všech naplánovaných exportů."""
+        self._pool.submit(lambda: None).result()
+
+    def _export(self, trace: Trace) -> None:
+        spans = trace.to_dicts()
+        if self.jsonl_path:
+            try:
+                os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    for item in spans:
+                        f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                print(f"Chyba při zápisu trace do {self.jsonl_path}: {e}")
+        if self.otlp_endpoint:
+            try:
+                self._export_otlp(spans)
+            except Exception as e:
+                print(f"Chyba při odesílání trace do OTLP collectoru: {e}")
+
+    def _get_tracer(self):
+        if self._tracer is None:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=self.otlp_endpoint)))
+            self._tracer = provider.get_tracer("utils.tracing")
+        return self._tracer
+
+    def _export_otlp(self, spans: List[dict]) -> None:
+        """Přehraje hotové spany do OpenTelemetry se zachovanými časy a zanořením."""
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.trace import Status, StatusCode
+
+        tracer = self._get_tracer()
+        otel_spans = {}
+        # spany jsou seřazené podle začátku - rodič je vždy vytvořen před potomky
+        for item in spans:
+            parent = otel_spans.get(item["parent_id"])
+            context = otel_trace.set_span_in_context(parent) if parent is not None else None
+            otel_span = tracer.start_span(
+                item["name"], context=context, start_time=int(item["start"] * 1e9),
+                attributes={"kind": item["kind"], **{key: value for key, value in item["attributes"].items() if isinstance(value, (str, bool, int, float))}},
+            )
+            if item["status"] == "error":
+                otel_span.set_status(Status(StatusCode.ERROR, item["error"]))
+            otel_spans[item["span_id"]] = otel_span
+        for item in reversed(spans):
+            otel_spans[item["span_id"]].end(end_time=int((item["end"] or item["start"]) * 1e9))
+
+
+_span_exporter: Optional[SpanExporter] = None
+_span_exporter_lock = threading.Lock()
+
+
+def get_span_exporter() -> SpanExporter:
+    """Vrátí sdílený SpanExporter pro celý proces."""
+    global _span_exporter
+    if _span_exporter is None:
+        with _span_exporter_lock:
+            if _span_exporter is None:
+                # cesty se čtou až tady, aby je šlo přesměrovat (testy, benchmarky)
+                _span_exporter = SpanExporter(jsonl_path=TRACING_JSONL_PATH, otlp_endpoint=TRACING_OTLP_ENDPOINT)
+    return _span_exporter
@@ -0,0 +1,211 @@
+"""
+Append-only ledger spotřeby tokenů a nákladů (SQLite).
+
+Každý TokenCounter z tahu konverzace se uloží jako jeden řádek spolu se sessionou,
+zákazníkem, providerem, modelem, uzlem flow a latencí. `record_turn` jen vloží
+záznamy do fronty; do SQLite je v dávkách zapisuje vlákno na pozadí, takže zápis
+nezdržuje odpověď. Nad ledgerem jsou agregační dotazy pro ladění volby providera.
+"""
+import atexit, os, queue, sqlite3, threading, time, uuid
+from datetime import datetime
+from typing import List, Optional
+
+from .config import USAGE_LEDGER_PATH, USAGE_LEDGER_FLUSH_INTERVAL, USAGE_LEDGER_BATCH_SIZE
+
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS usage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        day TEXT NOT NULL,
+        turn_id TEXT NOT NULL,
+        session_id TEXT,
+        customer_id TEXT,
+        provider TEXT,
+        model TEXT NOT NULL,
+        node TEXT,
+        note TEXT,
+        input_tokens INTEGER NOT NULL,
+        output_tokens INTEGER NOT NULL,
+        cost REAL NOT NULL,
+        latency REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS usage_day_provider ON usage (day, provider)",
+    "CREATE INDEX IF NOT EXISTS usage_node ON usage (node)",
+    "CREATE INDEX IF NOT EXISTS usage_turn ON usage (turn_id)",
+]
+
+COLUMNS = ("ts", "day", "turn_id", "session_id", "customer_id", "provider", "model", "node", "note",
+           "input_tokens", "output_tokens", "cost", "latency")
+
+
+class UsageLedger:
+    """
+    Ledger spotřeby s dávkovým zápisem na pozadí.
+
+    Args:
+        db_path: Cesta k SQLite souboru.
+        flush_interval: Nejdelší doba (s), po kterou záznamy čekají ve frontě.
+        batch_size: Počet záznamů, po kterém se fronta zapíše hned.
+        pricing_manager: Výpočet ceny jednoho TokenCounteru (výchozí PricingManager).
+    """
+
+    def __init__(
+        self,
+        db_path: str = USAGE_LEDGER_PATH,
+        flush_interval: float = USAGE_LEDGER_FLUSH_INTERVAL,
+        batch_size: int = USAGE_LEDGER_BATCH_SIZE,
+        pricing_manager=None,
+    ):
+        if pricing_manager is None:
+            from .models import PricingManager
+            pricing_manager = PricingManager()
+
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pricing_manager = pricing_manager
+        self.written = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._db_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL: čtení agregací neblokuje zápis a zápisy více procesů se serializují
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+        self._writer = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+        self._writer.start()
+
+    def record_turn(self, token_manager, session_id: Optional[str] = None, customer_id: Optional[str] = None,
+                    turn_id: Optional[str] = None) -> str:
+        """Zařadí všechny TokenCountery tahu do fronty k zápisu; vrátí turn_id."""
+        turn_id = turn_id or uuid.uuid4().hex
+        for token in token_manager.tokens:
+            self._queue.put((turn_id, session_id, customer_id, token))
+        return turn_id
+
+    def _row(self, turn_id: str, session_id: Optional[str], customer_id: Optional[str], token) -> tuple:
+        timestamp = getattr(token, "timestamp", None) or time.time()
+        cost = self.pricing_manager.calculate_cost([token])
+        return (
+            timestamp, datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"), turn_id, session_id, customer_id,
+            getattr(token, "provider", None), token.model, getattr(token, "node", None), token.note,
+            token.input_tokens, token.output_tokens, cost, getattr(token, "latency", None),
+        )
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[tuple]) -> None:
+        try:
+            rows = [self._row(*item) for item in batch]
+            with self._db_lock:
+                with self._db:
+                    self._db.executemany(
+                        f"INSERT INTO usage ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})", rows
+                    )
+            self.written += len(rows)
+        except Exception as e:
+            print(f"Chyba při zápisu do ledgeru spotřeby: {e}")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Počká, až se zapíše vše, co je ve frontě (testy, ukončení procesu)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self) -> None:
+        """Zapíše zbytek fronty a zavře databázi."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        with self._db_lock:
+            self._db.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def cost_per_provider_per_day(self, since_day: Optional[str] = None) -> List[dict]:
+        """Náklady (CZK) a tokeny podle dne a providera; `since_day` ve tvaru YYYY-MM-DD."""
+        rows = self._query(
+            """
+            SELECT day, COALESCE(provider, '?'), SUM(cost), SUM(input_tokens), SUM(output_tokens), COUNT(DISTINCT turn_id)
+            FROM usage WHERE day >= ? GROUP BY day, provider ORDER BY day, provider
+            """,
+            (since_day or "",),
+        )
+        return [
+            {"day": day, "provider": provider, "cost": round(cost, 5), "input_tokens": input_tokens,
+             "output_tokens": output_tokens, "turns": turns}
+            for day, provider, cost, input_tokens, output_tokens, turns in rows
+        ]
+
+    def tokens_per_node(self) -> List[dict]:
+        """Tokeny, náklady a průměrná latence podle uzlu flow."""
+        rows = self._query(
+            """
+            SELECT COALESCE(node, '?'), SUM(input_tokens), SUM(output_tokens), SUM(cost), AVG(latency), COUNT(*)
+            FROM usage GROUP BY node ORDER BY SUM(input_tokens) + SUM(output_tokens) DESC
+            """
+        )
+        return [
+            {"node": node, "input_tokens": input_tokens, "output_tokens": output_tokens, "cost": round(cost, 5),
+             "avg_latency": latency, "calls": calls}
+            for node, input_tokens, output_tokens, cost, latency, calls in rows
+        ]
+
+    def cost_per_turn_percentile(self, percentile: float = 95, since_day: Optional[str] = None) -> Optional[float]:
+        """Percentil ceny jednoho tahu (součet všech volání tahu); None bez dat."""
+        since = since_day or ""
+        count = self._query("SELECT COUNT(DISTINCT turn_id) FROM usage WHERE day >= ?", (since,))[0][0]
+        if not count:
+            return None
+        offset = min(count - 1, int(round(percentile / 100 * (count - 1))))
+        row = self._query(
+            """
+            SELECT turn_cost FROM (SELECT SUM(cost) AS turn_cost FROM usage WHERE day >= ? GROUP BY turn_id)
+            ORDER BY turn_cost LIMIT 1 OFFSET ?
+            """,
+            (since, offset),
+        )
+        return round(row[0][0], 5)
+
+
+_usage_ledger: Optional[UsageLedger] = None
+_usage_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Vrátí sdílený UsageLedger pro celý proces (při ukončení procesu se fronta zapíše)."""
+    global _usage_ledger
+    if _usage_ledger is None:
+        with _usage_ledger_lock:
+            if _usage_ledger is None:
+                # cesta se čte až tady, aby ji šlo přesměrovat (testy, benchmarky)
+                _usage_ledger = UsageLedger(db_path=USAGE_LEDGER_PATH)
+                atexit.register(_usage_ledger.close)
+    return _usage_ledger
@@ -1,9 +1,12 @@
-import os
+import os, threading
 import weaviate
 import weaviate.classes as wvc
+from weaviate.classes.init import AdditionalConfig, Timeout
 from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Any
-from .config import WEAVIATE_URL
+from .config import WEAVIATE_URL, WEAVIATE_SEARCH_TIMEOUT, WEAVIATE_HEALTH_CHECK_INTERVAL, EMBEDDING_CACHE_ENABLED, EMBEDDING_MODEL, SEARCH_RESULT_CACHE_ENABLED, SEARCH_PRICE_OVERFETCH
+from .embedding_cache import get_embedding_cache
+from .search_cache import bucket_price_range, search_cache_key, get_search_result_cache
 
 
 class Document(BaseModel):
@@ -13,6 +16,7 @@ class Document(BaseModel):
     url: Optional[str] = Field(default=None, description="Product URL.")
     product_code: Optional[str] = Field(default=None, description="Product code.")
     price: Optional[float] = Field(default=None, description="Product price.")
+    distance: Optional[float] = Field(default=None, description="Vector distance to the search query (lower is more relevant).")
 
 
 class SearchQuery(BaseModel):
@@ -46,12 +50,51 @@ class SearchQuery(BaseModel):
         return self
 
 
+# Vlastnosti produktů vracené z Weaviate (odpovídají polím Document)
+RETURN_PROPERTIES = ["name", "price", "product_code", "url", "content"]
+
+
+def matches_price_filter(document: Document, query: SearchQuery) -> bool:
+    """Ověří cenové filtry dotazu stejně jako filtry ve Weaviate (ostré nerovnosti, produkt bez ceny nevyhovuje)."""
+    if query.min_price is None and query.max_price is None:
+        return True
+    if document.price is None:
+        return False
+    if query.min_price is not None and not document.price > query.min_price:
+        return False
+    if query.max_price is not None and not document.price < query.max_price:
+        return False
+    return True
+
+
+def read_vectorizer_model(collection) -> str:
+    """Zjistí embedding model nastavený v text2vec_openai vektorizéru kolekce (vektory dotazů musí být ze stejného modelu)."""
+    try:
+        vectorizer_config = collection.config.get().vectorizer_config
+        model = (vectorizer_config.model or {}).get("model") if vectorizer_config else None
+        if isinstance(model, str) and model:
+            return model
+    except Exception as e:
+        print(f"Nepodařilo se zjistit model vektorizéru kolekce, použije se {EMBEDDING_MODEL}: {e}")
+    return EMBEDDING_MODEL
+
+
 class WeaviateService:
     """
     Třída pro obsluhu spojení a dotazů do Weaviate databáze,
     konkrétně pro kolekci produktů.
+
+    Pro flow se používá jedna sdílená instance na proces (viz `get_weaviate_service`),
+    která drží spojení i referenci na kolekci mezi jednotlivými zprávami.
     """
 
+    collection = None
+    embedding_cache = None
+    result_cache = None
+    vectorizer_model = EMBEDDING_MODEL
+    _healthy = True
+    _health_thread = None
+
     def __init__(
         self,
         http_host: str = WEAVIATE_URL,
@@ -60,7 +103,10 @@ class WeaviateService:
         grpc_port: int = 50051,
         weaviate_api_key: str = os.getenv("WEAVIATE_API_KEY", ""),
         openai_api_key: str = os.getenv("OPENAI_API_KEY", ""),
-        collection_name: str = "Apple_Products"
+        collection_name: str = "Apple_Products",
+        query_timeout: int = WEAVIATE_SEARCH_TIMEOUT,
+        use_embedding_cache: bool = EMBEDDING_CACHE_ENABLED,
+        use_result_cache: bool = SEARCH_RESULT_CACHE_ENABLED
     ):
         """
         Inicializuje a připojí klienta k Weaviate.
@@ -74,24 +120,53 @@ class WeaviateService:
             openai_api_key: API klíč pro OpenAI (potřebný pro vektorizaci dotazů).
                            Pokud není zadán, pokusí se načíst z env proměnné OPENAI_API_KEY.
             collection_name: Název kolekce ve Weaviate.
+            query_timeout: Timeout jednoho dotazu v sekundách (na úrovni klienta).
+            use_embedding_cache: Vektorizovat dotazy na straně klienta přes EmbeddingCache
+                                 a vyhledávat pomocí near_vector místo near_text.
+            use_result_cache: Ukládat výsledky vyhledávání do sdílené SearchResultCache.
         """
         self.collection_name = collection_name
         self.client = None
+        self.collection = None
+        self._healthy = True
+        self._lock = threading.RLock()
+        self._health_stop = threading.Event()
+        self._health_thread = None
+        self.embedding_cache = get_embedding_cache() if use_embedding_cache else None
+        self.result_cache = get_search_result_cache() if use_result_cache else None
+        self._connection_params = {
+            "http_host": http_host,
+            "http_port": http_port,
+            "grpc_host": grpc_host,
+            "grpc_port": grpc_port,
+            "weaviate_api_key": weaviate_api_key,
+            "openai_api_key": openai_api_key,
+            "query_timeout": query_timeout,
+        }
+
+        self._connect()
+
+    def _connect(self) -> None:
+        """Vytvoří spojení s Weaviate, ověří dostupnost kolekce a uloží si na ni referenci."""
+        params = self._connection_params
 
         print("Pokouším se připojit k Weaviate...")
-        auth_config = weaviate.auth.AuthApiKey(api_key=weaviate_api_key)
+        auth_config = weaviate.auth.AuthApiKey(api_key=params["weaviate_api_key"])
 
         try:
             self.client = weaviate.connect_to_custom(
-                http_host=http_host,
-                http_port=http_port,
+                http_host=params["http_host"],
+                http_port=params["http_port"],
                 http_secure=False,
-                grpc_host=grpc_host,
-                grpc_port=grpc_port,
+                grpc_host=params["grpc_host"],
+                grpc_port=params["grpc_port"],
                 grpc_secure=False,
                 auth_credentials=auth_config,
+                additional_config=AdditionalConfig(
+                    timeout=Timeout(query=params["query_timeout"])
+                ),
                 headers={
-                    "X-OpenAI-Api-Key": openai_api_key or ""
+                    "X-OpenAI-Api-Key": params["openai_api_key"] or ""
                 }
             )
             self.client.connect()
@@ -100,16 +175,87 @@ class WeaviateService:
                 # Pokud se nepodaří připojit nebo není ready, vyvoláme chybu
                 raise ConnectionError("Nepodařilo se připojit k Weaviate nebo instance není připravena.")
 
-            print(f"Úspěšně připojeno k Weaviate. Stav: ready={self.client.is_ready()}")
+            print("Úspěšně připojeno k Weaviate.")
 
             if not self.client.collections.exists(self.collection_name):
                 print(f"Varování: Kolekce '{self.collection_name}' neexistuje v Weaviate!")
                 raise ValueError(f"Kolekce '{self.collection_name}' neexistuje.")
 
+            self.collection = self.client.collections.get(self.collection_name)
+            self.vectorizer_model = self._read_vectorizer_model()
+            self._healthy = True
+
         except Exception as e:
             print(f"Chyba při inicializaci WeaviateService: {e}")
             raise
-    
+
+    def _read_vectorizer_model(self) -> str:
+        return read_vectorizer_model(self.collection)
+
+    def _get_query_vector(self, query: str) -> Optional[List[float]]:
+        """Vrátí vektor dotazu z EmbeddingCache, nebo None (pak se použije near_text)."""
+        if self.embedding_cache is None:
+            return None
+        try:
+            return self.embedding_cache.get_embedding(query, model=self.vectorizer_model)
+        except Exception as e:
+            print(f"Chyba při vektorizaci dotazu, použije se near_text: {e}")
+            return None
+
+    def reconnect(self) -> bool:
+        """Zavře případné staré spojení a připojí se znovu. Vrací True při úspěchu."""
+        with self._lock:
+            if self._healthy and self.client is not None:
+                # jiné vlákno už mezitím znovu připojilo
+                return True
+
+            if self.client is not None:
+                try:
+                    self.client.close()
+                except Exception as e:
+                    print(f"Chyba při zavírání starého spojení s Weaviate: {e}")
+            self.client = None
+            self.collection = None
+
+            try:
+                self._connect()
+                return True
+            except Exception:
+                self._healthy = False
+                return False
+
+    def _get_collection(self):
+        """Vrátí uloženou referenci na kolekci, při nezdravém spojení se nejdřív líně znovu připojí."""
+        if not self._healthy and not self.reconnect():
+            return None
+
+        if self.collection is None and self.client is not None:
+            self.collection = self.client.collections.get(self.collection_name)
+
+        return self.collection
+
+    def check_health(self) -> bool:
+        """Ověří, zda je Weaviate připraveno, a podle toho označí spojení jako (ne)zdravé."""
+        try:
+            self._healthy = bool(self.client) and self.client.is_ready()
+        except Exception as e:
+            print(f"Kontrola stavu Weaviate selhala: {e}")
+            self._healthy = False
+        return self._healthy
+
+    def start_health_check(self, interval: float = WEAVIATE_HEALTH_CHECK_INTERVAL) -> None:
+        """Spustí na pozadí periodickou kontrolu stavu spojení (mimo cestu požadavku)."""
+        if self._health_thread is not None and self._health_thread.is_alive():
+            return
+
+        def loop():
+            while not self._health_stop.wait(interval):
+                self.check_health()
+
+        self._health_stop.clear()
+        self._health_thread = threading.Thread(target=loop, name="weaviate-health-check", daemon=True)
+        self._health_thread.start()
+
     def extract_and_print_properties(self, weaviate_results) -> List[Document]:
         """
         Vezme seznam výsledků z Weaviate (očekává strukturu [[{obj1}, {obj2}, ...]]),
@@ -133,6 +279,10 @@ class WeaviateService:
 
             if isinstance(props, dict):
                 doc = Document(**props) 
+                # vzdálenost od dotazu (return_metadata) - podle ní se řadí dokumenty do promptu
+                distance = getattr(getattr(obj, "metadata", None), "distance", None)
+                if isinstance(distance, (int, float)):
+                    doc.distance = float(distance)
                 extracted_products.append(doc)
             else:
                 print(f"Varování: Objekt na indexu {i} nemá platný slovník 'properties'.")
@@ -149,8 +299,9 @@ class WeaviateService:
         limit: int = 5
         ) -> List[Document]:
         """
-        Provádí vektorové vyhledávání (nearText) v kolekci produktů
-        s možností filtrování podle ceny a produktového kódu.
+        Provádí vektorové vyhledávání (nearVector s vektorem z EmbeddingCache,
+        případně nearText) v kolekci produktů s možností filtrování podle ceny
+        a produktového kódu.
 
         Args:
             query: Textový dotaz pro sémantické vyhledávání.
@@ -167,10 +318,6 @@ class WeaviateService:
             Vrací prázdný seznam, pokud nic nenajde nebo nastane chyba.
         """
         
-        if not self.client or not self.client.is_connected():
-            print("Chyba: Klient Weaviate není připojen.")
-            return []
-
         query = search_params.query
         if not query or not isinstance(query, str):
             print("Chyba: Parametr 'query' chybí nebo není řetězec v search_params.")
@@ -192,9 +339,27 @@ class WeaviateService:
         if not isinstance(limit, int) or limit <= 0:
             print(f"Varování: 'limit' není kladné celé číslo ({limit}), použije se výchozí 5.")
             limit = 5
-    
+
+        # Kanonický tvar dotazu - zaokrouhlené ceny tvoří klíč cache i filtr dotazu do Weaviate,
+        # výsledky se pak dofiltrují na přesné meze zákazníka
+        exact_filter = SearchQuery(query=query, min_price=min_price, max_price=max_price)
+        exact_bounds = (min_price, max_price)
+        min_price, max_price = bucket_price_range(min_price, max_price)
+        cache_key = search_cache_key(query, min_price, max_price, product_code, limit)
+        # Produkty mimo přesné meze by jinak zabraly místa v top-k - se zaokrouhlenými mezemi
+        # se načte víc kandidátů a po dofiltrování se seznam ořízne na limit
+        query_limit = limit if (min_price, max_price) == exact_bounds else limit * SEARCH_PRICE_OVERFETCH
+        if self.result_cache is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return [doc for doc in cached if matches_price_filter(doc, exact_filter)][:limit]
+
         try:
-            apple_collection = self.client.collections.get(self.collection_name)
+            # Sdílená reference na kolekci - žádné is_connected()/collections.get() na každý dotaz
+            apple_collection = self._get_collection()
+            if apple_collection is None:
+                print("Chyba: Klient Weaviate není připojen.")
+                return []
 
             # Sestavení filtrů
             filters_list = []
@@ -214,28 +379,123 @@ class WeaviateService:
             # Pokud je filters_list prázdný, combined_filter zůstane None
 
             # Definice vlastností, které se mají vrátit z weaviate
-            return_props = ["name", "price", "product_code", "url", "content"]
-
-            # Provedení dotazu 
-            response = apple_collection.query.near_text(
-                query=query,
-                limit=limit,
-                filters=combined_filter,
-                return_properties=return_props,
-                return_metadata=wvc.query.MetadataQuery(distance=True)
-            )
+            return_props = RETURN_PROPERTIES
+
+            # Provedení dotazu - s vektorem z cache přes near_vector (bez vektorizace na straně Weaviate)
+            query_vector = self._get_query_vector(query)
+            if query_vector is not None:
+                response = apple_collection.query.near_vector(
+                    near_vector=query_vector,
+                    limit=query_limit,
+                    filters=combined_filter,
+                    return_properties=return_props,
+                    return_metadata=wvc.query.MetadataQuery(distance=True)
+                )
+            else:
+                response = apple_collection.query.near_text(
+                    query=query,
+                    limit=query_limit,
+                    filters=combined_filter,
+                    return_properties=return_props,
+                    return_metadata=wvc.query.MetadataQuery(distance=True)
+                )
             
-            output = self.extract_and_print_properties(response.objects)     
-              
-            return output
+            output = self.extract_and_print_properties(response.objects)
+
+            # Ukládáme jen úspěšné odpovědi, chyby (prázdný seznam z except) se necachují
+            if self.result_cache is not None:
+                self.result_cache.set(cache_key, output)
+
+            return [doc for doc in output if matches_price_filter(doc, exact_filter)][:limit]
 
         except Exception as e:
             print(f"Chyba při vyhledávání v Weaviate: {e}")
             return []
 
+    def fetch_all_documents(self) -> List[Document]:
+        """Načte všechny produkty kolekce (bez vektorů) - např. pro index kódů produktů."""
+        apple_collection = self._get_collection()
+        if apple_collection is None:
+            raise ConnectionError("Klient Weaviate není připojen.")
+
+        return [
+            Document(**obj.properties)
+            for obj in apple_collection.iterator(return_properties=RETURN_PROPERTIES)
+            if isinstance(obj.properties, dict)
+        ]
+
+    def fetch_by_product_codes(self, product_codes: List[str], page_size: int = 100) -> List[Document]:
+        """
+        Načte produkty podle kódů dotazem fetch_objects s filtrem contains_any (bez vektorizace).
+
+        Jeden kód může mít libovolně mnoho variant, proto se čte po stránkách, dokud
+        nepřijde neúplná stránka.
+
+        Args:
+            product_codes: Přesné kódy produktů.
+            page_size: Počet objektů na jednu stránku dotazu.
+
+        Returns:
+            Nalezené produkty; při chybě prázdný seznam.
+        """
+        product_codes = [code for code in product_codes if code]
+        if not product_codes:
+            return []
+
+        try:
+            apple_collection = self._get_collection()
+            if apple_collection is None:
+                print("Chyba: Klient Weaviate není připojen.")
+                return []
+
+            documents = []
+            offset = 0
+            while True:
+                response = apple_collection.query.fetch_objects(
+                    filters=wvc.query.Filter.by_property("product_code").contains_any(product_codes),
+                    limit=page_size,
+                    offset=offset,
+                    return_properties=RETURN_PROPERTIES
+                )
+                documents.extend(Document(**obj.properties) for obj in response.objects if isinstance(obj.properties, dict))
+                if len(response.objects) < page_size:
+                    return documents
+                offset += page_size
+
+        except Exception as e:
+            print(f"Chyba při načítání produktů podle kódů z Weaviate: {e}")
+            return []
+
     def close(self):
         """Uzavře spojení s Weaviate, pokud existuje."""
+        if self._health_thread is not None:
+            self._health_stop.set()
         if self.client and self.client.is_connected():
             self.client.close()
             print("Spojení s Weaviate uzavřeno.")
         self.client = None # Resetujeme klienta
+        self.collection = None
+
+
+_shared_service: Optional[WeaviateService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_weaviate_service() -> WeaviateService:
+    """
+    Vrátí sdílenou instanci WeaviateService pro celý proces.
+
+    Instance se vytvoří při prvním volání, spustí se u ní kontrola stavu na pozadí
+    a dále se sdílí mezi všemi voláními flow i Streamlit sessions. Pokud se připojení
+    nepodaří, výjimka se propaguje a příští volání zkusí spojení vytvořit znovu.
+    """
+    global _shared_service
+
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                service = WeaviateService()
+                service.start_health_check()
+                _shared_service = service
+
+    return _shared_service